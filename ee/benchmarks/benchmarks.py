@@ -20,6 +20,16 @@ from posthog.queries.session_recordings.session_recording_list import (
 )
 from ee.clickhouse.queries.retention import ClickhouseRetention
 from posthog.queries.util import get_earliest_timestamp
+from posthog.hogql import ast
+from posthog.hogql.context import HogQLContext
+from posthog.hogql.parser import parse_select
+from posthog.hogql.printer import prepare_ast_for_printing, print_prepared_ast
+from posthog.hogql.query import execute_hogql_query
+from posthog.hogql.visitor import clone_expr
+from posthog.hogql_queries.insights.funnels.funnels_query_runner import FunnelsQueryRunner
+from posthog.hogql_queries.insights.paths_query_runner import PathsQueryRunner
+from posthog.hogql_queries.insights.retention_query_runner import RetentionQueryRunner
+from posthog.hogql_queries.insights.trends.trends_query_runner import TrendsQueryRunner
 from posthog.models import Action, Cohort, Team, Organization
 from posthog.models.filters.retention_filter import RetentionFilter
 from posthog.models.filters.session_recordings_filter import SessionRecordingsFilter
@@ -361,6 +371,43 @@ class QuerySuite:
         )
         ClickhouseFunnel(filter, self.team).run()
 
+    @benchmark_clickhouse
+    def track_paths(self):
+        PathsQueryRunner(
+            query={
+                "pathsFilter": {"includeEventTypes": ["$pageview"]},
+                "dateRange": {"date_from": SHORT_DATE_RANGE["date_from"], "date_to": SHORT_DATE_RANGE["date_to"]},
+            },
+            team=self.team,
+        ).calculate()
+
+    @benchmark_clickhouse
+    def track_paths_edge_pruning_synthetic(self):
+        # 1M synthetic edges over 10 levels, aggregated into the top 1000 and pruned to the reachable ones
+        runner = PathsQueryRunner(query={"pathsFilter": {"edgeLimit": 1000, "stepLimit": 10}}, team=self.team)
+        edges_query = parse_select(
+            """
+            SELECT
+                source_event,
+                target_event,
+                count() AS event_count,
+                avg(conversion_time) AS average_conversion_time
+            FROM (
+                SELECT
+                    number % 10 + 1 AS level,
+                    concat(toString(level), '_', toString(number * 7919 % 200)) AS source_event,
+                    concat(toString(level + 1), '_', toString((number + 1) * 7919 % 200)) AS target_event,
+                    number % 600 AS conversion_time
+                FROM numbers(1000000)
+            )
+            GROUP BY source_event, target_event
+            ORDER BY event_count DESC, source_event, target_event
+            LIMIT 1000
+            """
+        )
+        assert isinstance(edges_query, ast.SelectQuery)
+        execute_hogql_query(runner.reachable_edges_query(edges_query), self.team)
+
     @benchmark_clickhouse
     def track_correlations_by_events(self):
         filter = Filter(
@@ -802,3 +849,83 @@ class QuerySuite:
             )
             cohort.calculate_people_ch(pending_version=0)
         self.cohort = cohort
+
+
+class HogQLCompileSuite:
+    """Times compiling insight queries from HogQL to ClickHouse SQL, without running them."""
+
+    version = "v001"
+
+    team: Team
+
+    def _compile(self, runner):
+        for query in runner.to_queries() if isinstance(runner, TrendsQueryRunner) else [runner.to_query()]:
+            context = HogQLContext(team_id=self.team.pk, enable_select_queries=True, modifiers=runner.modifiers)
+            prepared_ast = prepare_ast_for_printing(clone_expr(query), context=context, dialect="clickhouse")
+            assert prepared_ast is not None
+            print_prepared_ast(prepared_ast, context=context, dialect="clickhouse")
+
+    def time_compile_trends_breakdown(self):
+        self._compile(
+            TrendsQueryRunner(
+                query={
+                    "kind": "TrendsQuery",
+                    "series": [
+                        {"kind": "EventsNode", "event": "$pageview", "math": "dau"},
+                        {"kind": "EventsNode", "event": "$pageview", "math": "unique_session"},
+                        {"kind": "EventsNode", "event": "insight analyzed", "math": "weekly_active"},
+                    ],
+                    "breakdownFilter": {"breakdown": "$browser", "breakdown_type": "person"},
+                    "properties": [{"key": "$current_url", "value": "posthog", "operator": "icontains"}],
+                    "dateRange": {"date_from": DATE_RANGE["date_from"], "date_to": DATE_RANGE["date_to"]},
+                    "interval": "week",
+                },
+                team=self.team,
+            )
+        )
+
+    def time_compile_funnel_breakdown(self):
+        self._compile(
+            FunnelsQueryRunner(
+                query={
+                    "kind": "FunnelsQuery",
+                    "series": [{"kind": "EventsNode", "event": f"step {i}"} for i in range(10)],
+                    "breakdownFilter": {"breakdown": "$browser", "breakdown_type": "event"},
+                    "funnelsFilter": {"exclusions": [{"event": "excluded", "funnelFromStep": 0, "funnelToStep": 9}]},
+                    "dateRange": {"date_from": DATE_RANGE["date_from"], "date_to": DATE_RANGE["date_to"]},
+                },
+                team=self.team,
+            )
+        )
+
+    def peakmem_compile_trends_breakdown(self):
+        self.time_compile_trends_breakdown()
+
+    def peakmem_compile_funnel_breakdown(self):
+        self.time_compile_funnel_breakdown()
+
+    def time_compile_retention_person_property_filter(self):
+        self._compile(
+            RetentionQueryRunner(
+                query={
+                    "kind": "RetentionQuery",
+                    "retentionFilter": {
+                        "targetEntity": {"id": "$pageview", "type": "events"},
+                        "returningEntity": {"id": "$pageview", "type": "events"},
+                        "totalIntervals": 14,
+                        "period": "Week",
+                    },
+                    "properties": [{"key": "email", "value": ".com", "operator": "icontains", "type": "person"}],
+                    "dateRange": {"date_from": DATE_RANGE["date_from"], "date_to": DATE_RANGE["date_to"]},
+                },
+                team=self.team,
+            )
+        )
+
+    def setup(self):
+        # :TRICKY: Data in benchmark servers has ID=2
+        team = Team.objects.filter(id=2).first()
+        if team is None:
+            organization = Organization.objects.create()
+            team = Team.objects.create(id=2, organization=organization, name="The Bakery")
+        self.team = team
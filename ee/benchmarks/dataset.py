@@ -0,0 +1,137 @@
+# isort: skip_file
+# Needs to be first to set up django environment
+from . import helpers  # noqa: F401
+from datetime import datetime
+from posthog import client
+from posthog.models import Organization, Team
+from posthog.models.event.sql import EVENTS_DATA_TABLE
+
+# :TRICKY: Data in benchmark servers lives in team 2, the generated dataset is kept apart from it
+GENERATED_TEAM_ID = 3
+
+GENERATED_DATE_FROM = "2021-01-01"
+GENERATED_DATE_TO = "2021-10-01"
+
+EVENT_COUNT = 1_000_000
+PERSON_COUNT = 10_000
+
+# Events are spread uniformly over persons and time, so every person has events of every kind to funnel, retain and
+# path over. A session is a person's events in the same half hour, its id is a valid UUIDv7 for the sessions table.
+PERSON_UUID = lambda person_number: (
+    f"toUUID(concat('00000000-0000-4000-8000-', substring(toString(1000000000000 + {person_number}), 2)))"
+)
+
+SESSION_UUID = (
+    lambda session_start, session_number: f"""lower(concat(
+    substring(hex(toUInt64(toUnixTimestamp({session_start})) * 1000 + 0x1000000000000), 3, 8), '-',
+    substring(hex(toUInt64(toUnixTimestamp({session_start})) * 1000 + 0x1000000000000), 11, 4), '-7',
+    substring(hex(bitOr(cityHash64({session_number}), 0x8000000000000000)), 2, 3), '-8',
+    substring(hex(bitOr(cityHash64({session_number}), 0x8000000000000000)), 5, 3), '-',
+    substring(hex(bitOr(cityHash64({session_number}, 1), 0x8000000000000000)), 5, 12)
+))"""
+)
+
+GENERATE_PERSONS_SQL = (
+    lambda: f"""
+INSERT INTO person (id, created_at, team_id, properties, is_identified, _timestamp, _offset, is_deleted, version)
+SELECT
+    {PERSON_UUID("number")},
+    toDateTime(%(date_from)s, 'UTC'),
+    %(team_id)s,
+    toJSONString(map(
+        'email', concat('user', toString(number), if(number %% 10 = 0, '@posthog.com', '@example.com')),
+        '$browser', ['Chrome', 'Firefox', 'Safari', 'Edge'][number %% 4 + 1]
+    )),
+    1,
+    now(),
+    0,
+    0,
+    0
+FROM numbers(%(person_count)s)
+"""
+)
+
+GENERATE_PERSON_DISTINCT_IDS_SQL = (
+    lambda: f"""
+INSERT INTO person_distinct_id2 (distinct_id, person_id, team_id, is_deleted, version, _timestamp, _offset, _partition)
+SELECT concat('user', toString(number)), {PERSON_UUID("number")}, %(team_id)s, 0, 0, now(), 0, 0
+FROM numbers(%(person_count)s)
+"""
+)
+
+GENERATE_EVENTS_SQL = (
+    lambda: f"""
+INSERT INTO {EVENTS_DATA_TABLE()}
+(uuid, event, properties, timestamp, team_id, distinct_id, elements_chain, person_id, person_properties, person_created_at, created_at, _timestamp, _offset)
+SELECT
+    generateUUIDv4(number),
+    event,
+    toJSONString(map(
+        '$current_url', concat('https://posthog.example.com', pathname),
+        '$pathname', pathname,
+        '$host', 'posthog.example.com',
+        '$browser', browser,
+        '$session_id', {SESSION_UUID("session_start", "session_number")}
+    )),
+    timestamp,
+    %(team_id)s,
+    concat('user', toString(person_number)),
+    '',
+    {PERSON_UUID("person_number")},
+    toJSONString(map(
+        'email', concat('user', toString(person_number), if(person_number %% 10 = 0, '@posthog.com', '@example.com')),
+        '$browser', browser
+    )),
+    toDateTime(%(date_from)s, 'UTC'),
+    now(),
+    now(),
+    0
+FROM (
+    SELECT
+        number,
+        cityHash64(number, 'person') %% %(person_count)s AS person_number,
+        toDateTime(%(date_from)s, 'UTC') + cityHash64(number, 'time') %% %(period_seconds)s AS timestamp,
+        toStartOfInterval(timestamp, INTERVAL 30 MINUTE) AS session_start,
+        person_number * 100000 + intDiv(toUnixTimestamp(timestamp), 1800) AS session_number,
+        ['$pageview', '$pageview', '$pageview', 'user signed up', 'insight analyzed'][number %% 5 + 1] AS event,
+        ['/', '/pricing', '/docs', '/blog', '/signup', '/insights', '/dashboard', '/persons'][cityHash64(number, 'path') %% 8 + 1] AS pathname,
+        ['Chrome', 'Firefox', 'Safari', 'Edge'][person_number %% 4 + 1] AS browser
+    FROM numbers(%(event_count)s)
+)
+"""
+)
+
+
+def get_generated_dataset_team() -> Team:
+    team = Team.objects.filter(id=GENERATED_TEAM_ID).first()
+    if team is None:
+        organization = Organization.objects.create(name="Benchmarks")
+        team = Team.objects.create(id=GENERATED_TEAM_ID, organization=organization, name="Generated dataset")
+    return team
+
+
+def ensure_generated_dataset(event_count: int = EVENT_COUNT, person_count: int = PERSON_COUNT) -> Team:
+    """
+    Returns the team of the generated dataset, generating its persons and events in ClickHouse first if they aren't
+    there yet. Generation is deterministic apart from event uuids, so results are comparable between machines.
+    """
+    team = get_generated_dataset_team()
+    [[existing_event_count]] = client.sync_execute(
+        "SELECT count() FROM events WHERE team_id = %(team_id)s", {"team_id": team.pk}
+    )
+    if existing_event_count >= event_count:
+        return team
+
+    params = {
+        "team_id": team.pk,
+        "date_from": GENERATED_DATE_FROM,
+        "period_seconds": int(
+            (datetime.fromisoformat(GENERATED_DATE_TO) - datetime.fromisoformat(GENERATED_DATE_FROM)).total_seconds()
+        ),
+        "event_count": event_count,
+        "person_count": person_count,
+    }
+    client.sync_execute(GENERATE_PERSONS_SQL(), params)
+    client.sync_execute(GENERATE_PERSON_DISTINCT_IDS_SQL(), params)
+    client.sync_execute(GENERATE_EVENTS_SQL(), params)
+    return team
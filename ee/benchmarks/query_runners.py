@@ -0,0 +1,278 @@
+# isort: skip_file
+# Needs to be first to set up django environment
+from .helpers import benchmark_clickhouse, run_query
+import argparse
+import json
+import statistics
+import sys
+import time
+from collections.abc import Callable
+from typing import Any, Optional
+
+from posthog.hogql.context import HogQLContext
+from posthog.hogql.printer import prepare_ast_for_printing, print_prepared_ast
+from posthog.hogql.visitor import clone_expr
+from posthog.hogql_queries.actors_query_runner import ActorsQueryRunner
+from posthog.hogql_queries.insights.funnels.funnels_query_runner import FunnelsQueryRunner
+from posthog.hogql_queries.insights.paths_query_runner import PathsQueryRunner
+from posthog.hogql_queries.insights.retention_query_runner import RetentionQueryRunner
+from posthog.hogql_queries.insights.trends.trends_query_runner import TrendsQueryRunner
+from posthog.hogql_queries.query_runner import QueryRunner
+from posthog.hogql_queries.web_analytics.web_overview import WebOverviewQueryRunner
+from posthog.models import Team
+from .dataset import GENERATED_DATE_FROM, GENERATED_DATE_TO, ensure_generated_dataset
+
+DATE_RANGE = {"date_from": GENERATED_DATE_FROM, "date_to": GENERATED_DATE_TO}
+SHORT_DATE_RANGE = {"date_from": "2021-09-01", "date_to": GENERATED_DATE_TO}
+
+TRENDS_QUERY = {
+    "kind": "TrendsQuery",
+    "series": [
+        {"kind": "EventsNode", "event": "$pageview", "math": "dau"},
+        {"kind": "EventsNode", "event": "$pageview", "math": "unique_session"},
+        {"kind": "EventsNode", "event": "insight analyzed", "math": "weekly_active"},
+    ],
+    "breakdownFilter": {"breakdown": "$browser", "breakdown_type": "person"},
+    "properties": [{"key": "$current_url", "value": "docs", "operator": "icontains"}],
+    "dateRange": DATE_RANGE,
+    "interval": "week",
+}
+
+# The query runners benchmarked against the generated dataset, see `dataset.py`
+QUERY_RUNNER_CASES: dict[str, Callable[[Team], QueryRunner]] = {
+    "trends": lambda team: TrendsQueryRunner(query=TRENDS_QUERY, team=team),
+    "funnels": lambda team: FunnelsQueryRunner(
+        query={
+            "kind": "FunnelsQuery",
+            "series": [
+                {"kind": "EventsNode", "event": "$pageview"},
+                {"kind": "EventsNode", "event": "user signed up"},
+                {"kind": "EventsNode", "event": "insight analyzed"},
+            ],
+            "breakdownFilter": {"breakdown": "$browser", "breakdown_type": "event"},
+            "dateRange": DATE_RANGE,
+        },
+        team=team,
+    ),
+    "retention": lambda team: RetentionQueryRunner(
+        query={
+            "kind": "RetentionQuery",
+            "retentionFilter": {
+                "targetEntity": {"id": "user signed up", "type": "events"},
+                "returningEntity": {"id": "insight analyzed", "type": "events"},
+                "totalIntervals": 14,
+                "period": "Week",
+            },
+            "properties": [{"key": "email", "value": "@posthog.com", "operator": "icontains", "type": "person"}],
+            "dateRange": DATE_RANGE,
+        },
+        team=team,
+    ),
+    "paths": lambda team: PathsQueryRunner(
+        query={
+            "kind": "PathsQuery",
+            "pathsFilter": {"includeEventTypes": ["$pageview"], "stepLimit": 5},
+            "dateRange": SHORT_DATE_RANGE,
+        },
+        team=team,
+    ),
+    "web_overview": lambda team: WebOverviewQueryRunner(
+        query={"kind": "WebOverviewQuery", "properties": [], "dateRange": SHORT_DATE_RANGE, "compare": True},
+        team=team,
+    ),
+    "actors": lambda team: ActorsQueryRunner(
+        query={
+            "kind": "ActorsQuery",
+            "select": ["id", "properties.email", "created_at"],
+            "orderBy": ["created_at DESC"],
+            "source": {"kind": "InsightActorsQuery", "day": "2021-06-07", "series": 0, "source": TRENDS_QUERY},
+        },
+        team=team,
+    ),
+}
+
+COMPILE_PHASES = ("build", "resolve", "print")
+
+
+def compile_query_runner(runner: QueryRunner) -> dict[str, float]:
+    """
+    Compiles the queries of the runner to ClickHouse SQL without running them, returning the seconds spent building
+    the HogQL AST, resolving its types and printing it.
+    """
+    timings = dict.fromkeys(COMPILE_PHASES, 0.0)
+
+    start = time.perf_counter()
+    queries = runner.to_queries() if isinstance(runner, TrendsQueryRunner) else [runner.to_query()]
+    timings["build"] += time.perf_counter() - start
+
+    for query in queries:
+        context = HogQLContext(team_id=runner.team.pk, enable_select_queries=True, modifiers=runner.modifiers)
+
+        start = time.perf_counter()
+        prepared_ast = prepare_ast_for_printing(clone_expr(query), context=context, dialect="clickhouse")
+        timings["resolve"] += time.perf_counter() - start
+        assert prepared_ast is not None
+
+        start = time.perf_counter()
+        print_prepared_ast(prepared_ast, context=context, dialect="clickhouse")
+        timings["print"] += time.perf_counter() - start
+
+    return timings
+
+
+class QueryRunnerSuite:
+    """
+    Benchmarks HogQL query runners against the generated dataset. `time_compile_*` times compiling their queries
+    only, `track_*` tracks the time ClickHouse spends running them.
+    """
+
+    timeout = 3000.0
+    version = "v001"
+
+    team: Team
+
+    def setup(self):
+        self.team = ensure_generated_dataset()
+
+    def _compile(self, case: str):
+        compile_query_runner(QUERY_RUNNER_CASES[case](self.team))
+
+    def _calculate(self, case: str):
+        QUERY_RUNNER_CASES[case](self.team).calculate()
+
+    def time_compile_trends(self):
+        self._compile("trends")
+
+    def time_compile_funnels(self):
+        self._compile("funnels")
+
+    def time_compile_retention(self):
+        self._compile("retention")
+
+    def time_compile_paths(self):
+        self._compile("paths")
+
+    def time_compile_web_overview(self):
+        self._compile("web_overview")
+
+    def time_compile_actors(self):
+        self._compile("actors")
+
+    @benchmark_clickhouse
+    def track_query_runner_trends(self):
+        self._calculate("trends")
+
+    @benchmark_clickhouse
+    def track_query_runner_funnels(self):
+        self._calculate("funnels")
+
+    @benchmark_clickhouse
+    def track_query_runner_retention(self):
+        self._calculate("retention")
+
+    @benchmark_clickhouse
+    def track_query_runner_paths(self):
+        self._calculate("paths")
+
+    @benchmark_clickhouse
+    def track_query_runner_web_overview(self):
+        self._calculate("web_overview")
+
+    @benchmark_clickhouse
+    def track_query_runner_actors(self):
+        self._calculate("actors")
+
+
+def measure_case(team: Team, case: str, runs: int) -> dict[str, Any]:
+    """Runs a case `runs` times, returning the median compile and ClickHouse times in milliseconds."""
+    compile_samples = [compile_query_runner(QUERY_RUNNER_CASES[case](team)) for _ in range(runs)]
+
+    def calculate():
+        QUERY_RUNNER_CASES[case](team).calculate()
+
+    clickhouse_samples = [run_query(calculate) for _ in range(runs)]
+
+    result: dict[str, Any] = {
+        f"{phase}_ms": statistics.median(sample[phase] for sample in compile_samples) * 1000 for phase in COMPILE_PHASES
+    }
+    result["compile_ms"] = sum(result[f"{phase}_ms"] for phase in COMPILE_PHASES)
+    result["clickhouse_ms"] = statistics.median(sample["ch_query_time"] for sample in clickhouse_samples)
+    result["query_count"] = clickhouse_samples[-1]["query_count"]
+    result["read_rows"] = clickhouse_samples[-1]["read_rows"]
+    return result
+
+
+# Relative and absolute slowdowns both need to be exceeded for a metric to regress, so that noise in short timings
+# isn't reported
+REGRESSION_THRESHOLDS = {
+    "compile_ms": (1.2, 2.0),
+    "clickhouse_ms": (1.5, 20.0),
+}
+
+
+def find_regressions(
+    results: dict[str, dict[str, Any]],
+    baseline: dict[str, dict[str, Any]],
+    thresholds: dict[str, tuple[float, float]] = REGRESSION_THRESHOLDS,
+) -> list[str]:
+    regressions = []
+    for case, metrics in results.items():
+        for metric, (ratio, min_delta) in thresholds.items():
+            previous = baseline.get(case, {}).get(metric)
+            if previous is None:
+                continue
+            current = metrics[metric]
+            if current > previous * ratio and current - previous > min_delta:
+                regressions.append(f"{case} {metric}: {previous:.1f} -> {current:.1f} ({current / previous:.2f}x)")
+    return regressions
+
+
+def print_report(results: dict[str, dict[str, Any]], baseline: dict[str, dict[str, Any]]) -> None:
+    columns = ["build_ms", "resolve_ms", "print_ms", "compile_ms", "clickhouse_ms", "read_rows"]
+    print(f"{'case':<14}" + "".join(f"{column:>16}" for column in columns))  # noqa: T201
+    for case, metrics in results.items():
+        cells = []
+        for column in columns:
+            cell = f"{metrics[column]:.1f}" if isinstance(metrics[column], float) else str(metrics[column])
+            previous = baseline.get(case, {}).get(column)
+            if previous:
+                cell += f" {metrics[column] / previous:.2f}x"
+            cells.append(f"{cell:>16}")
+        print(f"{case:<14}" + "".join(cells))  # noqa: T201
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """
+    Runs the query runner cases against the generated dataset and reports regressions against a baseline, e.g.
+
+        python -m ee.benchmarks.query_runners --output results.json
+        python -m ee.benchmarks.query_runners --baseline results.json
+    """
+    parser = argparse.ArgumentParser(description="Benchmark HogQL query runners against a generated dataset")
+    parser.add_argument("--cases", nargs="*", choices=list(QUERY_RUNNER_CASES), default=list(QUERY_RUNNER_CASES))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--baseline", help="Results of an earlier run to compare against")
+    parser.add_argument("--output", help="Where to write the results to")
+    args = parser.parse_args(argv)
+
+    team = ensure_generated_dataset()
+    results = {case: measure_case(team, case, args.runs) for case in args.cases}
+
+    baseline: dict[str, dict[str, Any]] = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    print_report(results, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    regressions = find_regressions(results, baseline)
+    for regression in regressions:
+        print(f"Regression: {regression}")  # noqa: T201
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,5 @@
 import re
+from dataclasses import dataclass
 from datetime import timedelta
 from typing import Optional
 from collections.abc import Generator
@@ -15,10 +16,12 @@ from ee.settings import (
     MATERIALIZE_COLUMNS_ANALYSIS_PERIOD_HOURS,
     MATERIALIZE_COLUMNS_BACKFILL_PERIOD_DAYS,
     MATERIALIZE_COLUMNS_MAX_AT_ONCE,
+    MATERIALIZE_COLUMNS_MINIMUM_BYTES_SAVED,
     MATERIALIZE_COLUMNS_MINIMUM_QUERY_TIME,
 )
 from posthog.cache_utils import instance_memoize
 from posthog.client import sync_execute
+from posthog.settings import CLICKHOUSE_DATABASE
 from posthog.models.filters.mixins.utils import cached_property
 from posthog.models.person.sql import (
     GET_EVENT_PROPERTIES_COUNT,
@@ -162,6 +165,107 @@ LIMIT 100 -- Make sure we don't add 100s of columns in one run
     return [("events", table_column, property_name) for (table_column, property_name) in raw_queries]
 
 
+@dataclass
+class MaterializationCandidate:
+    table: TableWithProperties
+    table_column: TableColumn
+    property_name: PropertyName
+    query_count: int
+    team_count: int
+    total_duration_ms: int
+    # Bytes that queries wouldn't have read with the property materialized, estimated from the size of the column the
+    # property is extracted from. A query extracting several properties from the column is split evenly between them.
+    expected_bytes_saved: int
+
+    @property
+    def suggestion(self) -> Suggestion:
+        return self.table, self.table_column, self.property_name
+
+
+def _get_column_shares() -> dict[tuple[TableWithProperties, TableColumn], float]:
+    "Share of the size of each JSON column in the size of its table"
+    rows = sync_execute(
+        """
+        SELECT table, name, data_compressed_bytes
+        FROM system.columns
+        WHERE database = %(database)s AND table IN ('sharded_events', 'person')
+        """,
+        {"database": CLICKHOUSE_DATABASE},
+    )
+    table_sizes: dict[str, int] = {}
+    for table, _, size in rows:
+        table_sizes[table] = table_sizes.get(table, 0) + size
+
+    return {
+        ("events" if table == "sharded_events" else "person", column): size / table_sizes[table]
+        for table, column, size in rows
+        if column in ("properties", "person_properties") and table_sizes[table] > 0
+    }
+
+
+def _analyze_hogql(
+    since_hours_ago: int, min_query_time: int, team_id: Optional[int] = None
+) -> list[MaterializationCandidate]:
+    """
+    Finds properties that slow HogQL queries extract from JSON, ranked by the bytes materializing them would save.
+    HogQL queries list these properties in the `unmaterialized_properties` query tag, see `execute_hogql_query`.
+    """
+    rows = sync_execute(
+        """
+WITH
+    (
+        159, -- TIMEOUT EXCEEDED
+        160, -- TOO SLOW (estimated query execution time)
+    ) as exception_codes
+SELECT
+    property.1 AS table,
+    property.2 AS table_column,
+    property.3 AS property_name,
+    count() AS query_count,
+    uniq(team_id) AS team_count,
+    sum(query_duration_ms) AS total_duration_ms,
+    sum(read_bytes / column_property_count) AS read_bytes
+FROM (
+    SELECT
+        JSONExtract(log_comment, 'unmaterialized_properties', 'Array(Tuple(String, String, String))') AS properties,
+        arrayJoin(properties) AS property,
+        countEqual(arrayMap(p -> (p.1, p.2), properties), (property.1, property.2)) AS column_property_count,
+        JSONExtractInt(log_comment, 'team_id') AS team_id,
+        query_duration_ms,
+        read_bytes
+    FROM clusterAllReplicas(posthog, system, query_log)
+    WHERE
+        query_start_time > now() - toIntervalHour(%(since_hours_ago)s)
+        AND type > 1
+        AND is_initial_query
+        AND JSONLength(log_comment, 'unmaterialized_properties') > 0
+        AND (exception_code IN exception_codes OR query_duration_ms > %(min_query_time)s)
+        {team_id_filter}
+)
+GROUP BY table, table_column, property_name
+        """.format(
+            team_id_filter="AND team_id = %(team_id)s" if team_id else "",
+        ),
+        {"since_hours_ago": since_hours_ago, "min_query_time": min_query_time, "team_id": team_id},
+    )
+
+    column_shares = _get_column_shares()
+    candidates = [
+        MaterializationCandidate(
+            table=table,
+            table_column=table_column,
+            property_name=property_name,
+            query_count=query_count,
+            team_count=team_count,
+            total_duration_ms=total_duration_ms,
+            expected_bytes_saved=int(read_bytes * column_shares.get((table, table_column), 0)),
+        )
+        for table, table_column, property_name, query_count, team_count, total_duration_ms, read_bytes in rows
+    ]
+    candidates.sort(key=lambda candidate: candidate.expected_bytes_saved, reverse=True)
+    return candidates
+
+
 def materialize_properties_task(
     columns_to_materialize: Optional[list[Suggestion]] = None,
     time_to_analyze_hours: int = MATERIALIZE_COLUMNS_ANALYSIS_PERIOD_HOURS,
@@ -176,7 +280,31 @@ def materialize_properties_task(
     """
 
     if columns_to_materialize is None:
-        columns_to_materialize = _analyze(time_to_analyze_hours, min_query_time, team_id_to_analyze)
+        hogql_candidates = [
+            candidate
+            for candidate in _analyze_hogql(time_to_analyze_hours, min_query_time, team_id_to_analyze)
+            if candidate.expected_bytes_saved >= MATERIALIZE_COLUMNS_MINIMUM_BYTES_SAVED
+        ]
+        for candidate in hogql_candidates:
+            logger.info(
+                "HogQL materialization candidate",
+                table=candidate.table,
+                table_column=candidate.table_column,
+                property_name=candidate.property_name,
+                query_count=candidate.query_count,
+                team_count=candidate.team_count,
+                total_duration_ms=candidate.total_duration_ms,
+                expected_bytes_saved=candidate.expected_bytes_saved,
+            )
+        # HogQL candidates are ranked, so they go first
+        columns_to_materialize = list(
+            dict.fromkeys(
+                [
+                    *(candidate.suggestion for candidate in hogql_candidates),
+                    *_analyze(time_to_analyze_hours, min_query_time, team_id_to_analyze),
+                ]
+            )
+        )
     result = []
     for suggestion in columns_to_materialize:
         table, table_column, property_name = suggestion
@@ -1,3 +1,5 @@
+import json
+
 from posthog.test.base import BaseTest, ClickhouseTestMixin
 from posthog.client import sync_execute
 from ee.clickhouse.materialized_columns.analyze import materialize_properties_task
@@ -55,3 +57,58 @@ class TestMaterializedColumnsAnalyze(ClickhouseTestMixin, BaseTest):
                 call("events", "materialize_me3", table_column="properties"),
             ]
         )
+
+    @patch("ee.clickhouse.materialized_columns.analyze.materialize")
+    @patch("ee.clickhouse.materialized_columns.analyze.backfill_materialized_columns")
+    @patch("ee.clickhouse.materialized_columns.analyze.MATERIALIZE_COLUMNS_MINIMUM_BYTES_SAVED", 1000)
+    @patch(
+        "ee.clickhouse.materialized_columns.analyze._get_column_shares",
+        return_value={("events", "properties"): 0.5, ("person", "properties"): 0.1},
+    )
+    def test_mat_columns_from_hogql_queries(self, patch_column_shares, patch_backfill, patch_materialize):
+        sync_execute("SYSTEM FLUSH LOGS")
+        sync_execute("TRUNCATE TABLE system.query_log")
+
+        queries_to_insert = [
+            ([["events", "properties", "$browser"], ["events", "properties", "$os"]], 100000),
+            ([["events", "properties", "$browser"]], 100000),
+            ([["person", "properties", "email"]], 100000),
+            ([["events", "properties", "too_cheap"]], 1),
+        ]
+        for properties, read_bytes in queries_to_insert:
+            sync_execute(
+                """
+            INSERT INTO system.query_log (
+                query,
+                query_start_time,
+                type,
+                is_initial_query,
+                log_comment,
+                query_duration_ms,
+                read_bytes
+            ) VALUES (
+                'SELECT 1',
+                now(),
+                2,
+                1,
+                %(log_comment)s,
+                60000,
+                %(read_bytes)s
+            )
+            """,
+                {
+                    "log_comment": json.dumps({"team_id": 2, "unmaterialized_properties": properties}),
+                    "read_bytes": read_bytes,
+                },
+            )
+
+        materialize_properties_task()
+
+        self.assertEqual(
+            patch_materialize.call_args_list,
+            [
+                call("events", "$browser", table_column="properties"),
+                call("events", "$os", table_column="properties"),
+                call("person", "email", table_column="properties"),
+            ],
+        )
@@ -1,7 +1,9 @@
 from django.contrib.postgres.fields import ArrayField
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch.dispatcher import receiver
 
-from posthog.models.property_definition import PropertyDefinition
+from posthog.models.property_definition import PropertyDefinition, invalidate_property_definition_types
 
 
 class EnterprisePropertyDefinition(PropertyDefinition):
@@ -28,3 +30,8 @@ class EnterprisePropertyDefinition(PropertyDefinition):
         default=None,
         db_column="tags",
     )
+
+
+@receiver([post_save, post_delete], sender=EnterprisePropertyDefinition)
+def enterprise_property_definition_changed(sender, instance: EnterprisePropertyDefinition, **kwargs):
+    invalidate_property_definition_types(instance.team_id)
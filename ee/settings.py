@@ -63,6 +63,10 @@ MATERIALIZE_COLUMNS_ANALYSIS_PERIOD_HOURS = get_from_env(
 MATERIALIZE_COLUMNS_BACKFILL_PERIOD_DAYS = get_from_env("MATERIALIZE_COLUMNS_BACKFILL_PERIOD_DAYS", 0, type_cast=int)
 # Maximum number of columns to materialize at once. Avoids running into resource bottlenecks (storage + ingest + backfilling).
 MATERIALIZE_COLUMNS_MAX_AT_ONCE = get_from_env("MATERIALIZE_COLUMNS_MAX_AT_ONCE", 100, type_cast=int)
+# Minimum bytes that materializing a property read by HogQL queries should save in the analysis period
+MATERIALIZE_COLUMNS_MINIMUM_BYTES_SAVED = get_from_env(
+    "MATERIALIZE_COLUMNS_MINIMUM_BYTES_SAVED", 100 * 1000 * 1000 * 1000, type_cast=int
+)
 
 BILLING_SERVICE_URL = get_from_env("BILLING_SERVICE_URL", "https://billing.posthog.com")
 
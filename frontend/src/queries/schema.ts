@@ -204,6 +204,8 @@ export interface HogQLQueryModifiers {
     personsJoinMode?: 'inner' | 'left'
     bounceRatePageViewMode?: 'count_pageviews' | 'uniq_urls'
     sessionTableVersion?: 'auto' | 'v1' | 'v2'
+    funnelsEngine?: 'window_functions' | 'array_functions'
+    useWebAnalyticsRollups?: boolean
 }
 
 export interface DataWarehouseEventsModifier {
@@ -21,7 +21,6 @@ from rest_framework import status
 from sentry_sdk import configure_scope
 from sentry_sdk.api import capture_exception, start_span
 from statshog.defaults.django import statsd
-from token_bucket import Limiter, MemoryStorage
 from typing import Any, Optional, Literal
 
 from ee.billing.quota_limiting import QuotaLimitingCaches
@@ -38,6 +37,7 @@ from posthog.kafka_client.topics import (
 from posthog.logging.timing import timed
 from posthog.metrics import KLUDGES_COUNTER, LABEL_RESOURCE_TYPE
 from posthog.models.utils import UUIDT
+from posthog.rate_limit import LocalTokenBucketLimiter
 from posthog.redis import get_client
 from posthog.session_recordings.session_recording_helpers import (
     preprocess_replay_events_for_blob_ingestion,
@@ -50,16 +50,11 @@ from posthog.utils_cors import cors_response
 
 logger = structlog.get_logger(__name__)
 
-LIMITER = Limiter(
-    rate=settings.PARTITION_KEY_BUCKET_REPLENTISH_RATE,
+LIMITER = LocalTokenBucketLimiter(
     capacity=settings.PARTITION_KEY_BUCKET_CAPACITY,
-    storage=MemoryStorage(),
-)
-LOG_RATE_LIMITER = Limiter(
-    rate=1 / 60,
-    capacity=1,
-    storage=MemoryStorage(),
+    replenish_rate=settings.PARTITION_KEY_BUCKET_REPLENTISH_RATE,
 )
+LOG_RATE_LIMITER = LocalTokenBucketLimiter(capacity=1, replenish_rate=1 / 60)
 
 # These event names are reserved for internal use and refer to non-analytics
 # events that are ingested via a separate path than analytics events. They have
@@ -924,7 +919,7 @@ def is_randomly_partitioned(candidate_partition_key: str) -> bool:
             logger.warning(
                 "Partition key %s overridden as bucket capacity of %s tokens exceeded",
                 candidate_partition_key,
-                LIMITER._capacity,
+                LIMITER.capacity,
             )
             return True
 
@@ -3,7 +3,6 @@ import urllib
 from datetime import datetime
 from typing import Any, List, Optional, Union  # noqa: UP035
 
-from django.db.models.query import Prefetch
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter
 from rest_framework import mixins, request, response, serializers, viewsets
@@ -18,11 +17,11 @@ from posthog.api.documentation import PropertiesSerializer, extend_schema
 from posthog.api.routing import TeamAndOrgViewSetMixin
 from posthog.client import query_with_columns, sync_execute
 from posthog.hogql.constants import DEFAULT_RETURNED_ROWS, MAX_SELECT_RETURNED_ROWS
-from posthog.models import Element, Filter, Person
+from posthog.models import Element, Filter
 from posthog.models.event.query_event_list import query_events_list
 from posthog.models.event.sql import GET_CUSTOM_EVENTS, SELECT_ONE_EVENT_SQL
 from posthog.models.event.util import ClickhouseEventSerializer
-from posthog.models.person.util import get_persons_by_distinct_ids
+from posthog.models.person.summary import get_person_summaries_by_distinct_ids
 from posthog.models.team import Team
 from posthog.models.utils import UUIDT
 from posthog.queries.property_values import get_property_values_for_key
@@ -189,19 +188,6 @@ class EventViewSet(
                 action_id=request.GET.get("action_id"),
             )
 
-            # Retry the query without the 1 day optimization
-            if len(query_result) < limit:
-                query_result = query_events_list(
-                    unbounded_date_from=True,  # only this changed from the query above
-                    filter=filter,
-                    team=team,
-                    limit=limit,
-                    offset=offset,
-                    request_get_query_dict=request.GET.dict(),
-                    order_by=order_by,
-                    action_id=request.GET.get("action_id"),
-                )
-
             result = ClickhouseEventSerializer(
                 query_result[0:limit],
                 many=True,
@@ -218,14 +204,7 @@ class EventViewSet(
             raise
 
     def _get_people(self, query_result: List[dict], team: Team) -> dict[str, Any]:  # noqa: UP006
-        distinct_ids = [event["distinct_id"] for event in query_result]
-        persons = get_persons_by_distinct_ids(team.pk, distinct_ids)
-        persons = persons.prefetch_related(Prefetch("persondistinctid_set", to_attr="distinct_ids_cache"))
-        distinct_to_person: dict[str, Person] = {}
-        for person in persons:
-            for distinct_id in person.distinct_ids:
-                distinct_to_person[distinct_id] = person
-        return distinct_to_person
+        return get_person_summaries_by_distinct_ids(team.pk, (event["distinct_id"] for event in query_result))
 
     def retrieve(
         self,
@@ -96,6 +96,7 @@ from posthog.rate_limit import (
     ClickHouseBurstRateThrottle,
     ClickHouseSustainedRateThrottle,
 )
+from posthog.renderers import StreamingJSONResponse, wants_streaming_response
 from posthog.settings import CAPTURE_TIME_TO_SEE_DATA, SITE_URL
 from posthog.user_permissions import UserPermissionsSerializerMixin
 from posthog.utils import (
@@ -882,6 +883,8 @@ Using the correct cache and enriching the response with dashboard specific confi
 
         result["timings"] = [val.model_dump() for val in timings.to_list()]
 
+        if wants_streaming_response(request):
+            return StreamingJSONResponse({**result, "next": next}, rows_key="result")
         return Response({**result, "next": next})
 
     @cached_by_filters
@@ -923,7 +926,7 @@ Using the correct cache and enriching the response with dashboard specific confi
         operation_id="Funnels",
     )
     @action(methods=["GET", "POST"], detail=False, required_scopes=["insight:read"])
-    def funnel(self, request: request.Request, *args: Any, **kwargs: Any) -> Response:
+    def funnel(self, request: request.Request, *args: Any, **kwargs: Any) -> Response | StreamingJSONResponse:
         timings = HogQLTimings()
         try:
             with timings.measure("calculate"):
@@ -934,6 +937,8 @@ Using the correct cache and enriching the response with dashboard specific confi
         funnel["result"] = protect_old_clients_from_multi_property_default(request.data, funnel["result"])
         funnel["timings"] = [val.model_dump() for val in timings.to_list()]
 
+        if wants_streaming_response(request):
+            return StreamingJSONResponse(funnel, rows_key="result")
         return Response(funnel)
 
     @cached_by_filters
@@ -10,6 +10,7 @@ from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError, NotAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from sentry_sdk import capture_exception, set_tag
 
 from posthog.api.documentation import extend_schema
@@ -24,6 +25,7 @@ from posthog.clickhouse.query_tagging import tag_queries
 from posthog.errors import ExposedCHQueryError
 from posthog.hogql.ai import PromptUnclear, write_sql_from_prompt
 from posthog.hogql.errors import ExposedHogQLError
+from posthog.hogql_queries.hogql_query_runner import HogQLQueryRunner
 from posthog.hogql_queries.query_runner import ExecutionMode, execution_mode_from_refresh
 from posthog.models.user import User
 from posthog.rate_limit import (
@@ -31,7 +33,13 @@ from posthog.rate_limit import (
     AISustainedRateThrottle,
     TeamRateThrottle,
 )
-from posthog.schema import QueryRequest, QueryResponseAlternative, QueryStatusResponse
+from posthog.renderers import (
+    ArrowStreamRenderer,
+    ArrowStreamResponse,
+    StreamingJSONResponse,
+    wants_streaming_response,
+)
+from posthog.schema import HogQLQuery, QueryRequest, QueryResponseAlternative, QueryStatusResponse
 
 
 class QueryThrottle(TeamRateThrottle):
@@ -46,6 +54,7 @@ class QueryViewSet(TeamAndOrgViewSetMixin, PydanticModelMixin, viewsets.ViewSet)
     scope_object_read_actions = ["retrieve", "create", "list", "destroy"]
     scope_object_write_actions: list[str] = []
     sharing_enabled_actions = ["retrieve"]
+    renderer_classes = (*tuple(api_settings.DEFAULT_RENDERER_CLASSES), ArrowStreamRenderer)
 
     def get_throttles(self):
         if self.action == "draft_sql":
@@ -59,7 +68,7 @@ class QueryViewSet(TeamAndOrgViewSetMixin, PydanticModelMixin, viewsets.ViewSet)
             200: QueryResponseAlternative,
         },
     )
-    def create(self, request, *args, **kwargs) -> Response:
+    def create(self, request, *args, **kwargs) -> Response | StreamingJSONResponse | ArrowStreamResponse:
         data = self.get_model(request.data, QueryRequest)
         client_query_id = data.client_query_id or uuid.uuid4().hex
         execution_mode = execution_mode_from_refresh(data.refresh)
@@ -76,6 +85,12 @@ class QueryViewSet(TeamAndOrgViewSetMixin, PydanticModelMixin, viewsets.ViewSet)
 
         tag_queries(query=request.data["query"])
         try:
+            if request.accepted_renderer.format == ArrowStreamRenderer.format:
+                if not isinstance(data.query, HogQLQuery):
+                    raise ValidationError("Arrow results are only supported for HogQLQuery")
+                # Streamed straight from ClickHouse, so never cached
+                return ArrowStreamResponse(HogQLQueryRunner(query=data.query, team=self.team).calculate_as_arrow())
+
             result = process_query_model(
                 self.team,
                 data.query,
@@ -84,6 +99,8 @@ class QueryViewSet(TeamAndOrgViewSetMixin, PydanticModelMixin, viewsets.ViewSet)
                 user=request.user,
             )
             if isinstance(result, BaseModel):
+                if getattr(result, "results", None) is not None and wants_streaming_response(request):
+                    return StreamingJSONResponse(result, rows_key="results")
                 result = result.model_dump(by_alias=True)
             if result.get("query_status") and result["query_status"].get("complete") is False:
                 response_status = status.HTTP_202_ACCEPTED
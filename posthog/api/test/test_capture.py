@@ -31,7 +31,6 @@ from kafka.structs import TopicPartition
 from parameterized import parameterized
 from prance import ResolvingParser
 from rest_framework import status
-from token_bucket import Limiter, MemoryStorage
 
 from ee.billing.quota_limiting import QuotaLimitingCaches
 from posthog.api import capture
@@ -49,6 +48,7 @@ from posthog.kafka_client.topics import (
     KAFKA_SESSION_RECORDING_SNAPSHOT_ITEM_EVENTS,
     KAFKA_SESSION_RECORDING_SNAPSHOT_ITEM_OVERFLOW,
 )
+from posthog.rate_limit import LocalTokenBucketLimiter
 from posthog.redis import get_client
 from posthog.settings import (
     DATA_UPLOAD_MAX_MEMORY_SIZE,
@@ -393,11 +393,7 @@ class TestCapture(BaseTest):
         """
         distinct_id = 100
         partition_key = f"{self.team.pk}:{distinct_id}"
-        limiter = Limiter(
-            rate=1,
-            capacity=1,
-            storage=MemoryStorage(),
-        )
+        limiter = LocalTokenBucketLimiter(capacity=1, replenish_rate=1)
         start = datetime.now(timezone.utc)
 
         with patch("posthog.api.capture.LIMITER", new=limiter):
@@ -410,7 +406,7 @@ class TestCapture(BaseTest):
                     PARTITION_KEY_AUTOMATIC_OVERRIDE_ENABLED=True,
                 ):
                     assert capture.is_randomly_partitioned(partition_key) is False
-                    assert limiter._storage._buckets[partition_key][0] == 0
+                    assert limiter._buckets[partition_key][0] == 0
 
                     # The second time we see the key we will have reached the capacity limit of the bucket (1).
                     # Without looking at the configuration we immediately return that we should randomly partition.
@@ -13,6 +13,7 @@ from rest_framework import status
 from posthog.models import Action, Element, Organization, Person, User
 from posthog.models.cohort import Cohort
 from posthog.models.event.query_event_list import insight_query_with_columns
+from posthog.tasks.property_values import index_property_values
 from posthog.test.base import (
     APIBaseTest,
     ClickhouseTestMixin,
@@ -96,8 +97,8 @@ class TestEvents(ClickhouseTestMixin, APIBaseTest):
         flush_persons_and_events()
 
         # Django session, PostHog user, PostHog team, PostHog org membership,
-        # instance setting check, person and distinct id
-        with self.assertNumQueries(7):
+        # instance setting check, person with its distinct ids
+        with self.assertNumQueries(6):
             response = self.client.get(f"/api/projects/{self.team.id}/events/?event=event_name").json()
             self.assertEqual(response["results"][0]["event"], "event_name")
 
@@ -124,8 +125,8 @@ class TestEvents(ClickhouseTestMixin, APIBaseTest):
 
         # Django session, PostHog user, PostHog team, PostHog org membership,
         # look up if rate limit is enabled (cached after first lookup), instance
-        # setting (poe, rate limit), person and distinct id
-        expected_queries = 8
+        # setting (poe, rate limit), person with its distinct ids
+        expected_queries = 7
 
         with self.assertNumQueries(expected_queries):
             response = self.client.get(
@@ -367,6 +368,45 @@ class TestEvents(ClickhouseTestMixin, APIBaseTest):
             ).json()
             self.assertEqual(response, [])
 
+    def test_event_property_values_from_index(self):
+        with freeze_time("2020-01-20 20:00:00"):
+            for value, count in [("asdf", 2), ("has asdf", 3), ("qwerty", 1)]:
+                for _ in range(count):
+                    _create_event(
+                        distinct_id="bla",
+                        event="random event",
+                        team=self.team,
+                        properties={"random_prop": value},
+                    )
+
+        with freeze_time("2020-01-20 21:05:00"):
+            index_property_values()
+
+            # only added to the index in the next hour
+            _create_event(
+                distinct_id="bla",
+                event="random event",
+                team=self.team,
+                properties={"random_prop": "not indexed yet", "other_prop": "qwerty"},
+            )
+
+            # values not indexed yet are added from the recent events
+            response = self.client.get(f"/api/projects/{self.team.id}/events/values/?key=random_prop").json()
+            self.assertEqual([resp["name"] for resp in response], ["has asdf", "asdf", "qwerty", "not indexed yet"])
+
+            # values starting with the search come first
+            response = self.client.get(f"/api/projects/{self.team.id}/events/values/?key=random_prop&value=AS").json()
+            self.assertEqual([resp["name"] for resp in response], ["asdf", "has asdf"])
+
+            response = self.client.get(
+                f"/api/projects/{self.team.id}/events/values/?key=random_prop&value=as&event_name=other event"
+            ).json()
+            self.assertEqual(response, [])
+
+            # values not in the index are looked up in the events
+            response = self.client.get(f"/api/projects/{self.team.id}/events/values/?key=other_prop").json()
+            self.assertEqual([resp["name"] for resp in response], ["qwerty"])
+
     def test_before_and_after(self):
         user = self._create_user("tim")
         self.client.force_login(user)
@@ -726,44 +766,51 @@ class TestEvents(ClickhouseTestMixin, APIBaseTest):
         response_invalid_token = self.client.get(f"/api/projects/{self.team.id}/events?token=invalid")
         self.assertEqual(response_invalid_token.status_code, 401)
 
-    @patch("posthog.models.event.query_event_list.insight_query_with_columns")
+    @patch("posthog.models.event.query_event_list.insight_query_with_columns", wraps=insight_query_with_columns)
     def test_optimize_query(self, patch_query_with_columns):
-        #  For ClickHouse we normally only query the last day,
-        # but if a user doesn't have many events we still want to return events that are older
-        patch_query_with_columns.return_value = [
-            {
-                "uuid": "event",
-                "event": "d",
-                "properties": "{}",
-                "timestamp": timezone.now(),
-                "team_id": "d",
-                "distinct_id": "d",
-                "elements_chain": "d",
-            }
-        ]
-        response = self.client.get(f"/api/projects/{self.team.id}/events/").json()
-        self.assertEqual(len(response["results"]), 1)
-        self.assertEqual(patch_query_with_columns.call_count, 2)
+        # For ClickHouse we first only query the last day, and widen the window of time until we have enough events
+        with freeze_time("2024-07-01T12:00:00Z"):
+            _create_event(
+                team=self.team,
+                event="sign up",
+                distinct_id="2",
+                timestamp=timezone.now() - relativedelta(days=30),
+            )
 
-        patch_query_with_columns.return_value = [
-            {
-                "uuid": "event",
-                "event": "d",
-                "properties": "{}",
-                "timestamp": timezone.now(),
-                "team_id": "d",
-                "distinct_id": "d",
-                "elements_chain": "d",
-            }
-            for _ in range(0, 100)
-        ]
-        response = self.client.get(f"/api/projects/{self.team.id}/events/").json()
-        self.assertEqual(patch_query_with_columns.call_count, 3)
+            response = self.client.get(f"/api/projects/{self.team.id}/events/").json()
+            self.assertEqual(len(response["results"]), 1)
+            # the last day, 8 days, 64 days and then without lower bound
+            self.assertEqual(patch_query_with_columns.call_count, 4)
+
+            # the team has so few events that we query without lower bound right away
+            response = self.client.get(f"/api/projects/{self.team.id}/events/").json()
+            self.assertEqual(len(response["results"]), 1)
+            self.assertEqual(patch_query_with_columns.call_count, 5)
+
+            for idx in range(0, 150):
+                _create_event(
+                    team=self.team,
+                    event="sign up",
+                    distinct_id="2",
+                    timestamp=timezone.now() - relativedelta(seconds=idx + 1),
+                )
+
+            response = self.client.get(f"/api/projects/{self.team.id}/events/").json()
+            self.assertEqual(len(response["results"]), 100)
+            self.assertEqual(patch_query_with_columns.call_count, 6)
+
+            # the team has many events now, so we only query the last minutes
+            response = self.client.get(f"/api/projects/{self.team.id}/events/?offset=10").json()
+            self.assertEqual(len(response["results"]), 100)
+            self.assertEqual(
+                parser.parse(response["results"][0]["timestamp"]), timezone.now() - relativedelta(seconds=11)
+            )
+            self.assertEqual(patch_query_with_columns.call_count, 7)
+            self.assertIn("timestamp > %(after)s", patch_query_with_columns.call_args[0][0])
 
     @patch("posthog.models.event.query_event_list.insight_query_with_columns", wraps=insight_query_with_columns)
     def test_optimize_query_with_bounded_dates(self, patch_query_with_columns):
-        #  For ClickHouse we normally only query the last day,
-        # but if a user doesn't have many events we still want to return events that are older
+        # For ClickHouse we first only query the last day, and widen the window of time until we have enough events
 
         _create_event(
             team=self.team,
@@ -777,7 +824,8 @@ class TestEvents(ClickhouseTestMixin, APIBaseTest):
             f"/api/projects/{self.team.id}/events/?after=2021-01-01&before=2024-01-01T02:02:02Z"
         ).json()
         self.assertEqual(len(response["results"]), 1)
-        self.assertEqual(patch_query_with_columns.call_count, 2)
+        # the last day, 8 days, 64 days and then until `after`
+        self.assertEqual(patch_query_with_columns.call_count, 4)
 
         [
             _create_event(
@@ -789,10 +837,11 @@ class TestEvents(ClickhouseTestMixin, APIBaseTest):
             )
             for _ in range(0, 100)
         ]
+        # the team has so few events that we query until `after` right away
         response = self.client.get(
             f"/api/projects/{self.team.id}/events/?after=2023-01-01T01:01:00Z&before=2024-01-01T02:02:01Z"
         ).json()
-        self.assertEqual(patch_query_with_columns.call_count, 3)
+        self.assertEqual(patch_query_with_columns.call_count, 5)
         self.assertEqual(len(response["results"]), 100)
 
         # Test for the bug where we wouldn't respect ?after if we had more 100 results on the same day
@@ -800,7 +849,7 @@ class TestEvents(ClickhouseTestMixin, APIBaseTest):
             f"/api/projects/{self.team.id}/events/?after=2024-01-01T01:02:00Z&before=2024-01-01T01:04:01Z"
         ).json()
         self.assertEqual(len(response["results"]), 99)
-        self.assertEqual(patch_query_with_columns.call_count, 5)
+        self.assertEqual(patch_query_with_columns.call_count, 6)
         self.assertIsNone(response["next"])
 
     def test_filter_events_by_being_after_properties_with_date_type(self):
@@ -2,6 +2,7 @@ import json
 from unittest import mock
 from unittest.mock import patch
 
+import pyarrow as pa
 from freezegun import freeze_time
 from rest_framework import status
 
@@ -570,6 +571,52 @@ class TestQuery(ClickhouseTestMixin, APIBaseTest):
                 ],
             )
 
+    def test_full_hogql_query_streamed(self):
+        with freeze_time("2020-01-10 12:00:00"):
+            for event in ["sign up", "sign out"]:
+                _create_event(team=self.team, event=event, distinct_id="2", properties={"key": "test_val1"})
+        flush_persons_and_events()
+
+        query = HogQLQuery(query="select event, properties.key from events order by timestamp, event")
+        response = self.client.post(f"/api/projects/{self.team.id}/query/?stream=true", {"query": query.dict()})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        body = response.getvalue()
+        self.assertLess(body.index(b'"columns"'), body.index(b'"results"'))
+        api_response = CachedHogQLQueryResponse.model_validate(json.loads(body))
+        self.assertEqual(api_response.columns, ["event", "key"])
+        self.assertEqual(api_response.results, [["sign out", "test_val1"], ["sign up", "test_val1"]])
+
+    def test_full_hogql_query_as_arrow(self):
+        with freeze_time("2020-01-10 12:00:00"):
+            for event in ["sign up", "sign out"]:
+                _create_event(team=self.team, event=event, distinct_id="2", properties={"key": "test_val1"})
+        flush_persons_and_events()
+
+        query = HogQLQuery(query="select event, properties.key, toDate(timestamp) from events order by event")
+        response = self.client.post(f"/api/projects/{self.team.id}/query/?format=arrow", {"query": query.dict()})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/vnd.apache.arrow.stream")
+        table = pa.ipc.open_stream(response.getvalue()).read_all()
+        self.assertEqual(table.column_names, ["event", "key", "toDate(timestamp)"])
+        self.assertEqual(table.schema.field("key").metadata, {b"clickhouse_type": b"Nullable(String)"})
+        self.assertEqual(table.column("event").to_pylist(), ["sign out", "sign up"])
+        self.assertEqual(table.column("toDate(timestamp)").type, pa.date32())
+
+    def test_arrow_only_for_hogql_query(self):
+        query = {"kind": "EventsQuery", "select": ["event"]}
+        response = self.client.post(
+            f"/api/projects/{self.team.id}/query/",
+            {"query": query},
+            HTTP_ACCEPT="application/vnd.apache.arrow.stream",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(response.json()["detail"], "Arrow results are only supported for HogQLQuery")
+
     def test_query_with_source(self):
         query = {
             "kind": "DataTableNode",
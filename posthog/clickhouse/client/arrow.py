@@ -0,0 +1,174 @@
+import io
+import json
+import re
+from collections.abc import Iterator
+from time import perf_counter
+from typing import Any, Optional
+
+import pyarrow as pa
+import requests
+from clickhouse_driver.errors import ServerException
+from django.conf import settings as app_settings
+from statshog.defaults.django import statsd
+
+from posthog.clickhouse.client.connection import Workload
+from posthog.clickhouse.client.escape import substitute_params
+from posthog.clickhouse.client.execute import _annotate_tagged_query, default_settings, validated_client_query_id
+from posthog.errors import wrap_query_error
+
+ARROW_STREAM_CONTENT_TYPE = "application/vnd.apache.arrow.stream"
+
+# Settings for ClickHouse to write Arrow that is read the same way as the rows of the native protocol
+ARROW_OUTPUT_SETTINGS = {
+    "output_format_arrow_string_as_string": 1,
+    "output_format_arrow_low_cardinality_as_dictionary": 0,
+}
+
+# Wrappers that don't change how ClickHouse writes a column to Arrow
+_TRANSPARENT_TYPE_WRAPPERS = re.compile(r"^(?:Nullable|LowCardinality)\((.*)\)$")
+
+_DATETIME_TYPE = re.compile(r"^DateTime(?:\('(?P<timezone>[^']+)'\))?$")
+_DATETIME64_TYPE = re.compile(r"^DateTime64\((?P<precision>\d+)(?:,\s*'(?P<timezone>[^']+)')?\)$")
+
+
+def arrow_type_for_clickhouse_type(clickhouse_type: str, written_type: pa.DataType) -> pa.DataType:
+    """
+    The Arrow type of a column of `clickhouse_type`, which ClickHouse wrote to Arrow as `written_type`. ClickHouse
+    writes `DateTime` as seconds and `Date` as days in unsigned integers, which are turned into timestamps and dates.
+    """
+    while match := _TRANSPARENT_TYPE_WRAPPERS.match(clickhouse_type):
+        clickhouse_type = match.group(1)
+
+    if match := _DATETIME_TYPE.match(clickhouse_type):
+        return pa.timestamp("s", tz=match.group("timezone") or "UTC")
+    if match := _DATETIME64_TYPE.match(clickhouse_type):
+        precision = int(match.group("precision"))
+        unit = "s" if precision == 0 else "ms" if precision <= 3 else "us" if precision <= 6 else "ns"
+        return pa.timestamp(unit, tz=match.group("timezone") or "UTC")
+    if clickhouse_type in ("Date", "Date32"):
+        return pa.date32()
+    return written_type
+
+
+def arrow_schema_for_columns(columns: list[tuple[str, str]], written_schema: pa.Schema) -> pa.Schema:
+    """
+    The schema of the streamed batches, with the names and ClickHouse types of `columns`, e.g. the `columns` and
+    `types` of a `HogQLQueryResponse`. The ClickHouse type is kept in the `clickhouse_type` metadata of every field.
+    """
+    if len(columns) != len(written_schema):
+        raise ValueError(f"Expected {len(columns)} columns, ClickHouse returned {len(written_schema)}")
+    return pa.schema(
+        pa.field(
+            name,
+            arrow_type_for_clickhouse_type(clickhouse_type, field.type),
+            nullable=field.nullable,
+            metadata={"clickhouse_type": clickhouse_type},
+        )
+        for (name, clickhouse_type), field in zip(columns, written_schema)
+    )
+
+
+def _cast(array: pa.Array, arrow_type: pa.DataType) -> pa.Array:
+    if array.type == arrow_type:
+        return array
+    # Unsigned integers can't be cast to temporal types directly
+    if pa.types.is_unsigned_integer(array.type):
+        array = array.cast(pa.int32() if pa.types.is_date32(arrow_type) else pa.int64())
+    return array.cast(arrow_type)
+
+
+def convert_record_batch(batch: pa.RecordBatch, schema: pa.Schema) -> pa.RecordBatch:
+    return pa.RecordBatch.from_arrays(
+        [_cast(column, field.type) for column, field in zip(batch.columns, schema)], schema=schema
+    )
+
+
+def stream_arrow_query(
+    query: str,
+    args: Optional[dict[str, Any]] = None,
+    *,
+    columns: list[tuple[str, str]],
+    team_id: Optional[int] = None,
+    settings: Optional[dict[str, Any]] = None,
+    workload: Workload = Workload.ONLINE,
+) -> Iterator[bytes]:
+    """
+    Runs a SELECT query over the HTTP interface of ClickHouse, which writes the result as an Arrow IPC stream. The
+    stream is passed on one record batch at a time, with the columns renamed and typed by `columns` (name and
+    ClickHouse type, in order), without ever building rows in Python.
+
+    Errors ClickHouse raises before writing the first batch are raised like `sync_execute` raises them, as the query
+    is sent right away.
+    """
+    if team_id is not None and str(team_id) in app_settings.CLICKHOUSE_PER_TEAM_SETTINGS:
+        raise ValueError("Arrow results are not supported for teams with their own ClickHouse settings")
+
+    sql, tags = _annotate_tagged_query(substitute_params(query, args) if args else query, workload)
+    query_settings = {**default_settings(), **(settings or {})}
+    tags["query_settings"] = query_settings
+    params = {
+        **query_settings,
+        **ARROW_OUTPUT_SETTINGS,
+        "database": app_settings.CLICKHOUSE_DATABASE,
+        "default_format": "ArrowStream",
+        "log_comment": json.dumps(tags, separators=(",", ":")),
+        "query_id": validated_client_query_id(),
+    }
+    if app_settings.READONLY_CLICKHOUSE_USER is not None and app_settings.READONLY_CLICKHOUSE_PASSWORD:
+        user, password = app_settings.READONLY_CLICKHOUSE_USER, app_settings.READONLY_CLICKHOUSE_PASSWORD
+    else:
+        user, password = app_settings.CLICKHOUSE_USER, app_settings.CLICKHOUSE_PASSWORD
+
+    start_time = perf_counter()
+    response = requests.post(
+        app_settings.CLICKHOUSE_OFFLINE_HTTP_URL if workload == Workload.OFFLINE else app_settings.CLICKHOUSE_HTTP_URL,
+        params=params,
+        data=sql.encode("utf-8"),
+        headers={"X-ClickHouse-User": user, "X-ClickHouse-Key": password},
+        verify=app_settings.CLICKHOUSE_VERIFY,
+        stream=True,
+    )
+    if response.status_code != 200:
+        error = ServerException(
+            response.text.strip(), code=int(response.headers.get("X-ClickHouse-Exception-Code", 0)) or None
+        )
+        response.close()
+        statsd.incr("clickhouse_arrow_execution_failure", tags={"failed": True})
+        raise wrap_query_error(error) from error
+
+    return _convert_arrow_stream(response, columns, start_time)
+
+
+def _drain(sink: io.BytesIO) -> bytes:
+    written = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return written
+
+
+def _convert_arrow_stream(
+    response: requests.Response, columns: list[tuple[str, str]], start_time: float
+) -> Iterator[bytes]:
+    try:
+        body = io.BufferedReader(response.raw)
+        sink = io.BytesIO()
+        if not body.peek(1):
+            # Nothing is written for queries without rows, not even the schema
+            schema = arrow_schema_for_columns(columns, pa.schema(pa.field(name, pa.null()) for name, _ in columns))
+            with pa.ipc.new_stream(sink, schema):
+                pass
+            yield _drain(sink)
+            return
+
+        reader = pa.ipc.open_stream(body)
+        schema = arrow_schema_for_columns(columns, reader.schema)
+        writer = pa.ipc.new_stream(sink, schema)
+        for batch in reader:
+            writer.write_batch(convert_record_batch(batch, schema))
+            # Every batch is sent as soon as ClickHouse has written it
+            yield _drain(sink)
+        writer.close()
+        yield _drain(sink)
+    finally:
+        response.close()
+        statsd.timing("clickhouse_arrow_execution_time", (perf_counter() - start_time) * 1000.0)
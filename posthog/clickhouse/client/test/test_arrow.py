@@ -0,0 +1,93 @@
+import io
+from datetime import UTC, date, datetime
+from unittest import mock
+
+import pyarrow as pa
+import pytest
+
+from posthog.clickhouse.client.arrow import arrow_type_for_clickhouse_type, stream_arrow_query
+from posthog.errors import InternalCHQueryError
+
+
+def _arrow_stream(batch: pa.RecordBatch) -> bytes:
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+
+def _response(status_code: int = 200, body: bytes = b"", headers: dict | None = None) -> mock.MagicMock:
+    response = mock.MagicMock(status_code=status_code, raw=io.BytesIO(body), headers=headers or {})
+    response.text = body.decode(errors="replace")
+    return response
+
+
+@pytest.mark.parametrize(
+    "clickhouse_type,written_type,expected",
+    [
+        ("String", pa.string(), pa.string()),
+        ("Nullable(Int64)", pa.int64(), pa.int64()),
+        ("DateTime", pa.uint32(), pa.timestamp("s", tz="UTC")),
+        ("Nullable(DateTime('Europe/Berlin'))", pa.uint32(), pa.timestamp("s", tz="Europe/Berlin")),
+        ("DateTime64(6, 'UTC')", pa.timestamp("us"), pa.timestamp("us", tz="UTC")),
+        ("LowCardinality(Nullable(Date))", pa.uint16(), pa.date32()),
+        ("Array(DateTime)", pa.list_(pa.uint32()), pa.list_(pa.uint32())),
+    ],
+)
+def test_arrow_type_for_clickhouse_type(clickhouse_type, written_type, expected):
+    assert arrow_type_for_clickhouse_type(clickhouse_type, written_type) == expected
+
+
+def test_stream_arrow_query_renames_and_types_columns():
+    written = pa.RecordBatch.from_arrays(
+        [
+            pa.array(["sign up", None], pa.string()),
+            pa.array([1578657600, 1578661200], pa.uint32()),
+            pa.array([18271, 18272], pa.uint16()),
+        ],
+        names=["event", "toTimeZone(events.timestamp, 'UTC')", "toDate(events.timestamp)"],
+    )
+    columns = [("event", "Nullable(String)"), ("timestamp", "DateTime('UTC')"), ("day", "Date")]
+
+    with mock.patch(
+        "posthog.clickhouse.client.arrow.requests.post", return_value=_response(body=_arrow_stream(written))
+    ) as post:
+        chunks = list(
+            stream_arrow_query("SELECT 1 FROM events WHERE team_id = %(team_id)s", {"team_id": 2}, columns=columns)
+        )
+
+    assert post.call_args.kwargs["data"].endswith(b"SELECT 1 FROM events WHERE team_id = 2")
+    assert post.call_args.kwargs["params"]["default_format"] == "ArrowStream"
+    # One chunk per batch and one for the end of the stream
+    assert len(chunks) == 2
+    table = pa.ipc.open_stream(b"".join(chunks)).read_all()
+    assert table.column_names == ["event", "timestamp", "day"]
+    assert table.schema.field("timestamp").metadata == {b"clickhouse_type": b"DateTime('UTC')"}
+    assert table.to_pylist() == [
+        {"event": "sign up", "timestamp": datetime(2020, 1, 10, 12, tzinfo=UTC), "day": date(2020, 1, 10)},
+        {"event": None, "timestamp": datetime(2020, 1, 10, 13, tzinfo=UTC), "day": date(2020, 1, 11)},
+    ]
+
+
+def test_stream_arrow_query_without_rows():
+    with mock.patch("posthog.clickhouse.client.arrow.requests.post", return_value=_response(body=b"")):
+        chunks = list(stream_arrow_query("SELECT 1", columns=[("count()", "UInt64")]))
+
+    table = pa.ipc.open_stream(b"".join(chunks)).read_all()
+    assert table.column_names == ["count()"]
+    assert table.num_rows == 0
+
+
+def test_stream_arrow_query_raises_clickhouse_errors():
+    error_response = _response(
+        status_code=500,
+        body=b"Code: 46. DB::Exception: Unknown function foo. (UNKNOWN_FUNCTION)",
+        headers={"X-ClickHouse-Exception-Code": "46"},
+    )
+
+    with mock.patch("posthog.clickhouse.client.arrow.requests.post", return_value=error_response):
+        with pytest.raises(InternalCHQueryError) as error:
+            stream_arrow_query("SELECT foo()", columns=[])
+
+    assert error.value.code == 46
+    error_response.close.assert_called_once()
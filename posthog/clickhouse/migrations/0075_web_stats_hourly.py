@@ -0,0 +1,14 @@
+from posthog.clickhouse.client.migration_tools import run_sql_with_exceptions
+from posthog.models.web_stats_hourly.sql import (
+    DISTRIBUTED_WEB_STATS_HOURLY_TABLE_SQL,
+    WRITABLE_WEB_STATS_HOURLY_TABLE_SQL,
+    WEB_STATS_HOURLY_TABLE_SQL,
+    WEB_STATS_HOURLY_MV_SQL,
+)
+
+operations = [
+    run_sql_with_exceptions(WRITABLE_WEB_STATS_HOURLY_TABLE_SQL),
+    run_sql_with_exceptions(DISTRIBUTED_WEB_STATS_HOURLY_TABLE_SQL),
+    run_sql_with_exceptions(WEB_STATS_HOURLY_TABLE_SQL),
+    run_sql_with_exceptions(WEB_STATS_HOURLY_MV_SQL),
+]
@@ -103,6 +103,17 @@ from posthog.models.sessions.sql import (
     DISTRIBUTED_SESSIONS_TABLE_SQL,
     SESSIONS_VIEW_SQL,
 )
+from posthog.models.web_stats_hourly.sql import (
+    WEB_STATS_HOURLY_TABLE_SQL,
+    DISTRIBUTED_WEB_STATS_HOURLY_TABLE_SQL,
+    WRITABLE_WEB_STATS_HOURLY_TABLE_SQL,
+    WEB_STATS_HOURLY_MV_SQL,
+)
+from posthog.models.property_values.sql import (
+    PROPERTY_VALUES_TABLE_SQL,
+    DISTRIBUTED_PROPERTY_VALUES_TABLE_SQL,
+    WRITABLE_PROPERTY_VALUES_TABLE_SQL,
+)
 from posthog.session_recordings.sql.session_recording_event_sql import (
     SESSION_RECORDING_EVENTS_TABLE_SQL,
     SESSION_RECORDING_EVENTS_TABLE_MV_SQL,
@@ -140,6 +151,8 @@ CREATE_MERGETREE_TABLE_QUERIES = (
     SESSIONS_TABLE_SQL,
     RAW_SESSIONS_TABLE_SQL,
     HEATMAPS_TABLE_SQL,
+    WEB_STATS_HOURLY_TABLE_SQL,
+    PROPERTY_VALUES_TABLE_SQL,
 )
 CREATE_DISTRIBUTED_TABLE_QUERIES = (
     WRITABLE_EVENTS_TABLE_SQL,
@@ -158,6 +171,10 @@ CREATE_DISTRIBUTED_TABLE_QUERIES = (
     DISTRIBUTED_RAW_SESSIONS_TABLE_SQL,
     WRITABLE_HEATMAPS_TABLE_SQL,
     DISTRIBUTED_HEATMAPS_TABLE_SQL,
+    WRITABLE_WEB_STATS_HOURLY_TABLE_SQL,
+    DISTRIBUTED_WEB_STATS_HOURLY_TABLE_SQL,
+    WRITABLE_PROPERTY_VALUES_TABLE_SQL,
+    DISTRIBUTED_PROPERTY_VALUES_TABLE_SQL,
 )
 CREATE_KAFKA_TABLE_QUERIES = (
     KAFKA_LOG_ENTRIES_TABLE_SQL,
@@ -198,6 +215,7 @@ CREATE_MV_TABLE_QUERIES = (
     SESSIONS_TABLE_MV_SQL,
     RAW_SESSIONS_TABLE_MV_SQL,
     HEATMAPS_TABLE_MV_SQL,
+    WEB_STATS_HOURLY_MV_SQL,
 )
 
 CREATE_TABLE_QUERIES = (
@@ -6,7 +6,7 @@ from django.utils import timezone
 from posthog.models import EventDefinition, EventProperty, PropertyDefinition
 from posthog.models.group.sql import GROUPS_TABLE
 from posthog.models.person.sql import PERSONS_TABLE
-from posthog.models.property_definition import PropertyType
+from posthog.models.property_definition import PropertyType, invalidate_property_definition_types
 
 
 def infer_taxonomy_for_team(team_id: int) -> tuple[int, int, int]:
@@ -40,6 +40,8 @@ def infer_taxonomy_for_team(team_id: int) -> tuple[int, int, int]:
         batch_size=1000,
         ignore_conflicts=True,
     )
+    # `bulk_create` doesn't send `post_save`
+    invalidate_property_definition_types(team_id)
 
     # (event, property) pairs
     event_property_pairs = _get_event_property_pairs(team_id)
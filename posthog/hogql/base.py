@@ -1,7 +1,8 @@
 import re
 from dataclasses import dataclass, field
 
-from typing import TYPE_CHECKING, Literal, Optional
+from typing import TYPE_CHECKING, Any, ClassVar, Literal, Optional
+from collections.abc import Callable
 
 from posthog.hogql.constants import ConstantDataType
 from posthog.hogql.errors import NotImplementedError
@@ -13,29 +14,59 @@ if TYPE_CHECKING:
 camel_case_pattern = re.compile(r"(?<!^)(?<![A-Z])(?=[A-Z])")
 
 
-@dataclass(kw_only=True)
+# NOTE: Sync with ./test/test_visitor.py#test_hogql_visitor_naming_exceptions
+visit_method_name_replacements = {
+    "hog_qlxtag": "hogqlx_tag",
+    "hog_qlxattribute": "hogqlx_attribute",
+    "uuidtype": "uuid_type",
+}
+
+# For each visitor class, the function that visits each node class. Filled in lazily by `AST.accept`.
+_visitor_dispatch: dict[type, dict[type, Callable[[Any, "AST"], Any]]] = {}
+
+
+def visit_method_name(node_class: type) -> str:
+    name = camel_case_pattern.sub("_", node_class.__name__).lower()
+    for old, new in visit_method_name_replacements.items():
+        name = name.replace(old, new)
+    return f"visit_{name}"
+
+
+@dataclass(kw_only=True, slots=True)
 class AST:
     start: Optional[int] = field(default=None)
     end: Optional[int] = field(default=None)
 
+    # Computed once per class, so that `accept` doesn't need to derive it on every visit
+    _visit_method_name: ClassVar[str] = "visit_ast"
+
+    def __init_subclass__(cls, **kwargs):
+        # :TRICKY: `slots=True` dataclasses are recreated by the decorator, so a zero-argument `super()` would point
+        # to the discarded class.
+        super(AST, cls).__init_subclass__(**kwargs)  # noqa: UP008
+        cls._visit_method_name = visit_method_name(cls)
+
     # This is part of the visitor pattern from visitor.py.
     def accept(self, visitor):
-        name = camel_case_pattern.sub("_", self.__class__.__name__).lower()
-
-        # NOTE: Sync with ./test/test_visitor.py#test_hogql_visitor_naming_exceptions
-        replacements = {"hog_qlxtag": "hogqlx_tag", "hog_qlxattribute": "hogqlx_attribute", "uuidtype": "uuid_type"}
-        for old, new in replacements.items():
-            name = name.replace(old, new)
-        method_name = f"visit_{name}"
-        if hasattr(visitor, method_name):
-            visit = getattr(visitor, method_name)
-            return visit(self)
-        if hasattr(visitor, "visit_unknown"):
-            return visitor.visit_unknown(self)
-        raise NotImplementedError(f"{visitor.__class__.__name__} has no method {method_name}")
-
-
-@dataclass(kw_only=True)
+        dispatch = _visitor_dispatch.get(visitor.__class__)
+        if dispatch is None:
+            dispatch = _visitor_dispatch[visitor.__class__] = {}
+        visit = dispatch.get(self.__class__)
+        if visit is None:
+            visit = dispatch[self.__class__] = self._find_visit_method(visitor)
+        return visit(visitor, self)
+
+    def _find_visit_method(self, visitor) -> Callable[[Any, "AST"], Any]:
+        visitor_class = visitor.__class__
+        method_name = self._visit_method_name
+        if hasattr(visitor_class, method_name):
+            return getattr(visitor_class, method_name)
+        if hasattr(visitor_class, "visit_unknown"):
+            return visitor_class.visit_unknown
+        raise NotImplementedError(f"{visitor_class.__name__} has no method {method_name}")
+
+
+@dataclass(kw_only=True, slots=True)
 class Type(AST):
     def get_child(self, name: str, context: "HogQLContext") -> "Type":
         raise NotImplementedError("Type.get_child not overridden")
@@ -50,12 +81,12 @@ class Type(AST):
         raise NotImplementedError(f"{self.__class__.__name__}.resolve_column_constant_type not overridden")
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class Expr(AST):
     type: Optional[Type] = field(default=None)
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class CTE(Expr):
     """A common table expression."""
 
@@ -65,7 +96,7 @@ class CTE(Expr):
     cte_type: Literal["column", "subquery"]
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class ConstantType(Type):
     data_type: ConstantDataType
     nullable: bool = field(default=True)
@@ -77,7 +108,7 @@ class ConstantType(Type):
         raise NotImplementedError("ConstantType.print_type not implemented")
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class UnknownType(ConstantType):
     data_type: ConstantDataType = field(default="unknown", init=False)
 
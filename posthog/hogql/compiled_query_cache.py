@@ -0,0 +1,306 @@
+import dataclasses
+import hashlib
+import random
+import re
+from datetime import UTC, date, datetime, timedelta
+from functools import lru_cache
+from typing import Any, Optional, get_args
+from uuid import uuid4
+
+import structlog
+from django.conf import settings as app_settings
+from django.core.cache import cache
+from prometheus_client import Counter
+
+from posthog.git import get_git_commit_full
+from posthog.hogql import ast
+from posthog.hogql.constants import HogQLGlobalSettings
+from posthog.hogql.escape_sql import escape_clickhouse_string, escape_hogql_string
+from posthog.hogql.visitor import CloningVisitor
+from posthog.models.hogql_schema import get_saved_query_materializations_version, hogql_schema_version_key
+from posthog.models.property import TableWithProperties
+from posthog.models.property_definition import property_definition_types_version_key
+from posthog.schema import HogQLQueryModifiers
+
+logger = structlog.get_logger(__name__)
+
+COMPILED_QUERY_CACHE_LOOKUPS_COUNTER = Counter(
+    "hogql_compiled_query_cache_lookups",
+    "Lookups of printed ClickHouse SQL for HogQL queries, by whether compiling the query was skipped",
+    labelnames=["result"],
+)
+
+# Date and datetime strings, as query runners put them into queries for their date ranges
+DATE_CONSTANT_REGEX = re.compile(r"^\d{4}-\d{2}-\d{2}([ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?(Z|[+-]\d{2}:?\d{2})?$")
+
+# Functions that compile to SQL depending on the current state of the team's actions and cohorts
+UNCACHEABLE_FUNCTIONS = {"inCohort", "notInCohort", "matchesAction"}
+
+# Date and datetime strings, and dates and datetimes, which are printed inline
+DateConstant = str | date | datetime
+
+
+@dataclasses.dataclass
+class CompiledQuery:
+    """A HogQL query, printed both as HogQL and as ClickHouse SQL."""
+
+    hogql: str
+    columns: list[str]
+    clickhouse: str
+    values: dict[str, Any]
+    unmaterialized_properties: list[tuple[str, str, str]] = dataclasses.field(default_factory=list)
+    # Whether properties without a typed definition were printed, which ingestion can create definitions for any time
+    has_untyped_properties: bool = False
+
+
+@dataclasses.dataclass
+class ParameterizedQuery:
+    """
+    A query with its date constants lifted out. Queries with the same `key` compile to the same SQL, apart from the
+    lifted constants, which end up as ClickHouse query parameters, or inline for dates and datetimes.
+    """
+
+    key: str
+    # The lifted constants, in order
+    constants: list[DateConstant]
+    # The query with every lifted constant replaced by a unique marker of the same type
+    query: ast.SelectQuery | ast.SelectUnionQuery
+    markers: list[DateConstant]
+    # Timezone dates and datetimes are printed in
+    timezone: str
+    # Versions of everything the query compiles against, as of the cache lookup
+    versions: Optional[tuple[Optional[str], ...]] = None
+
+
+@dataclasses.dataclass
+class CompiledQueryTemplate:
+    versions: tuple[Optional[str], ...]
+    compiled_query: CompiledQuery
+    markers: list[DateConstant]
+    timezone: str
+    # Keys in `compiled_query.values` of the lifted constants, mapped to the index of the constant
+    constant_value_keys: dict[str, int]
+
+
+class DateConstantLifter(CloningVisitor):
+    def __init__(self, marker_prefix: str):
+        super().__init__(clear_types=True, clear_locations=True)
+        self.marker_prefix = marker_prefix
+        # Dates and datetimes are printed inline, so their markers are random ones, unlikely to be in any query
+        self.marker_datetime = datetime(2000, 1, 1, tzinfo=UTC) + timedelta(microseconds=random.randrange(10**15))
+        self.marker_date = date(2100, 1, 1) + timedelta(days=random.randrange(10**5))
+        self.constants: list[DateConstant] = []
+        self.markers: list[DateConstant] = []
+        self.cacheable = True
+
+    def visit_constant(self, node: ast.Constant):
+        value = node.value
+        marker: DateConstant
+        if isinstance(value, datetime):
+            marker = self.marker_datetime + timedelta(microseconds=len(self.constants))
+        elif isinstance(value, date):
+            marker = self.marker_date + timedelta(days=len(self.constants))
+        elif isinstance(value, str) and DATE_CONSTANT_REGEX.match(value):
+            marker = f"{self.marker_prefix}_{len(self.constants)}"
+        else:
+            return super().visit_constant(node)
+        self.constants.append(value)
+        self.markers.append(marker)
+        return ast.Constant(value=marker)
+
+    def visit_compare_operation(self, node: ast.CompareOperation):
+        if node.op in (ast.CompareOperationOp.InCohort, ast.CompareOperationOp.NotInCohort):
+            self.cacheable = False
+        if isinstance(node.left, ast.Constant) and isinstance(node.right, ast.Constant):
+            # comparisons of two constants are evaluated while printing
+            return CloningVisitor(clear_types=True, clear_locations=True).visit(node)
+        return super().visit_compare_operation(node)
+
+    def visit_array_access(self, node: ast.ArrayAccess):
+        # `properties['2024-01-01']` is a property access
+        return ast.ArrayAccess(
+            array=self.visit(node.array),
+            property=CloningVisitor(clear_types=True, clear_locations=True).visit(node.property),
+            nullish=node.nullish,
+        )
+
+    def visit_call(self, node: ast.Call):
+        if node.name in UNCACHEABLE_FUNCTIONS:
+            self.cacheable = False
+        return super().visit_call(node)
+
+
+def parameterize_query(
+    query: ast.SelectQuery | ast.SelectUnionQuery,
+    *,
+    team_id: int,
+    modifiers: HogQLQueryModifiers,
+    settings: HogQLGlobalSettings,
+    pretty: bool,
+    limit_top_select: bool,
+    timezone: Optional[str],
+) -> Optional[ParameterizedQuery]:
+    """Returns None if the printed SQL of the query can't be reused."""
+    marker_prefix = f"hogql_constant_{uuid4().hex}"
+    lifter = DateConstantLifter(marker_prefix)
+    lifted_query = lifter.visit(query)
+    if not lifter.cacheable:
+        COMPILED_QUERY_CACHE_LOOKUPS_COUNTER.labels(result="uncacheable").inc()
+        return None
+
+    query_shape = repr(lifted_query).replace(marker_prefix, "")
+    for index, marker in enumerate(lifter.markers):
+        if not isinstance(marker, str):
+            query_shape = query_shape.replace(repr(marker), f"{type(marker).__name__}_{index}")
+
+    shape = "\n".join(
+        [
+            query_shape,
+            modifiers.model_dump_json(),
+            settings.model_dump_json(),
+            str(pretty),
+            str(limit_top_select),
+        ]
+    )
+    digest = hashlib.sha256(shape.encode("utf-8")).hexdigest()
+    return ParameterizedQuery(
+        key=f"hogql_compiled_query_{team_id}_{digest}",
+        constants=lifter.constants,
+        query=lifted_query,
+        markers=lifter.markers,
+        timezone=timezone or "UTC",
+    )
+
+
+@lru_cache(maxsize=1)
+def _get_compiler_version() -> Optional[str]:
+    # printed SQL is only valid for the code that printed it
+    return get_git_commit_full()
+
+
+def _get_materialized_columns_version() -> Optional[str]:
+    """
+    Changes whenever properties are materialized or their columns dropped, as seen by the printer of this process.
+    Printed SQL reads properties from their materialized columns, if there are any.
+    """
+    try:
+        from ee.clickhouse.materialized_columns.columns import get_materialized_columns
+    except ModuleNotFoundError:
+        return None
+
+    materialized_columns = sorted(
+        (table, property_name, table_column, column_name)
+        for table in get_args(TableWithProperties)
+        for (property_name, table_column), column_name in get_materialized_columns(table).items()
+    )
+    return hashlib.sha256(repr(materialized_columns).encode("utf-8")).hexdigest()
+
+
+def _fill_in_constants(template: CompiledQueryTemplate, constants: list[DateConstant]) -> CompiledQuery:
+    hogql = template.compiled_query.hogql
+    columns = template.compiled_query.columns
+    clickhouse = template.compiled_query.clickhouse
+    for marker, constant in zip(template.markers, constants):
+        escaped_marker = escape_hogql_string(marker, timezone=template.timezone)
+        escaped_constant = escape_hogql_string(constant, timezone=template.timezone)
+        hogql = hogql.replace(escaped_marker, escaped_constant)
+        columns = [column.replace(escaped_marker, escaped_constant) for column in columns]
+        if not isinstance(marker, str):
+            # Strings are passed as values, dates and datetimes are printed inline
+            clickhouse = clickhouse.replace(
+                escape_clickhouse_string(marker, timezone=template.timezone),
+                escape_clickhouse_string(constant, timezone=template.timezone),
+            )
+
+    values = {
+        key: constants[template.constant_value_keys[key]] if key in template.constant_value_keys else value
+        for key, value in template.compiled_query.values.items()
+    }
+    return CompiledQuery(
+        hogql=hogql,
+        columns=columns,
+        clickhouse=clickhouse,
+        values=values,
+        unmaterialized_properties=template.compiled_query.unmaterialized_properties,
+        has_untyped_properties=template.compiled_query.has_untyped_properties,
+    )
+
+
+def get_compiled_query(team_id: int, query: ParameterizedQuery) -> Optional[CompiledQuery]:
+    """Returns the cached compiled query with the constants of `query` filled in, if there is one."""
+    schema_version_key = hogql_schema_version_key(team_id)
+    property_types_version_key = property_definition_types_version_key(team_id)
+    try:
+        cached = cache.get_many([query.key, schema_version_key, property_types_version_key])
+        materialized_columns_version = _get_materialized_columns_version()
+        saved_query_materializations_version = get_saved_query_materializations_version(team_id)
+    except Exception:
+        logger.exception("hogql_compiled_query_cache_get_failed", team_id=team_id)
+        return None
+
+    template: Optional[CompiledQueryTemplate] = cached.get(query.key)
+    query.versions = (
+        _get_compiler_version(),
+        cached.get(schema_version_key),
+        cached.get(property_types_version_key),
+        materialized_columns_version,
+        saved_query_materializations_version,
+    )
+    if template is None or template.versions != query.versions:
+        COMPILED_QUERY_CACHE_LOOKUPS_COUNTER.labels(result="miss").inc()
+        return None
+
+    COMPILED_QUERY_CACHE_LOOKUPS_COUNTER.labels(result="hit").inc()
+    return _fill_in_constants(template, query.constants)
+
+
+def has_sensitive_values(values: dict[str, Any]) -> bool:
+    """Whether the values of a compiled query contain any added with `HogQLContext.add_sensitive_value`."""
+    return any(key.endswith("_sensitive") for key in values)
+
+
+def set_compiled_query(
+    team_id: int, query: ParameterizedQuery, parameterized: CompiledQuery, compiled: CompiledQuery
+) -> bool:
+    """
+    Stores `parameterized`, the compiled `query.query`, as template for queries of the same shape. `compiled` is the
+    compiled original query. The template is only stored if filling the original constants into it gives exactly the
+    original result, i.e. if the lifted constants were passed to ClickHouse as they are.
+    """
+    if query.versions is None:
+        # nothing to compare against when reading the template later
+        return False
+    if has_sensitive_values(parameterized.values):
+        # e.g. the credentials of S3 tables, which must not be stored outside of the process
+        return False
+
+    timeout = app_settings.HOGQL_COMPILED_QUERY_CACHE_TTL
+    if parameterized.has_untyped_properties:
+        # Ingestion creates property definitions without bumping the property types version, so the template is only
+        # kept as long as the property types it was printed with
+        timeout = min(timeout, app_settings.HOGQL_PROPERTY_TYPES_CACHE_TTL)
+    if timeout <= 0:
+        return False
+
+    constant_value_keys = {
+        key: query.markers.index(value)
+        for key, value in parameterized.values.items()
+        if isinstance(value, str) and value in query.markers
+    }
+    template = CompiledQueryTemplate(
+        versions=query.versions,
+        compiled_query=parameterized,
+        markers=query.markers,
+        timezone=query.timezone,
+        constant_value_keys=constant_value_keys,
+    )
+    if _fill_in_constants(template, query.constants) != compiled:
+        COMPILED_QUERY_CACHE_LOOKUPS_COUNTER.labels(result="uncacheable").inc()
+        return False
+
+    try:
+        cache.set(query.key, template, timeout=timeout)
+    except Exception:
+        logger.exception("hogql_compiled_query_cache_set_failed", team_id=team_id)
+        return False
+    return True
@@ -56,6 +56,10 @@ class HogQLContext:
     debug: bool = False
 
     property_swapper: Optional["PropertySwapper"] = None
+    # Properties printed as JSON extraction, as they have no materialized column. (table, column, property) tuples.
+    unmaterialized_properties: set[tuple[str, str, str]] = field(default_factory=set)
+    # Properties without a definition with a type, so printed untyped. (definition type, group type index, name) tuples.
+    untyped_properties: set[tuple[int, Optional[int], str]] = field(default_factory=set)
 
     def add_value(self, value: Any) -> str:
         key = f"hogql_val_{len(self.values)}"
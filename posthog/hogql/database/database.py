@@ -33,6 +33,7 @@ from posthog.hogql.database.schema.cohort_people import CohortPeople, RawCohortP
 from posthog.hogql.database.schema.events import EventsTable
 from posthog.hogql.database.schema.groups import GroupsTable, RawGroupsTable
 from posthog.hogql.database.schema.heatmaps import HeatmapsTable
+from posthog.hogql.database.schema.web_stats_hourly import WebStatsHourlyTable
 from posthog.hogql.database.schema.log_entries import (
     LogEntriesTable,
     ReplayConsoleLogsLogEntriesTable,
@@ -113,6 +114,7 @@ class Database(BaseModel):
     batch_export_log_entries: BatchExportLogEntriesTable = BatchExportLogEntriesTable()
     sessions: Union[SessionsTableV1, SessionsTableV2] = SessionsTableV1()
     heatmaps: HeatmapsTable = HeatmapsTable()
+    web_stats_hourly: WebStatsHourlyTable = WebStatsHourlyTable()
 
     raw_session_replay_events: RawSessionReplayEventsTable = RawSessionReplayEventsTable()
     raw_person_distinct_ids: RawPersonDistinctIdsTable = RawPersonDistinctIdsTable()
@@ -211,21 +213,14 @@ def _use_person_id_from_person_overrides(database: Database) -> None:
     )
 
 
-def create_hogql_database(
-    team_id: int, modifiers: Optional[HogQLQueryModifiers] = None, team_arg: Optional["Team"] = None
+def create_core_hogql_database(
+    timezone: Optional[str],
+    week_start_day: Optional[WeekStartDay],
+    modifiers: HogQLQueryModifiers,
+    group_types: dict[str, int],
 ) -> Database:
-    from posthog.models import Team
-    from posthog.hogql.database.s3_table import S3Table
-    from posthog.hogql.query import create_default_modifiers_for_team
-    from posthog.warehouse.models import (
-        DataWarehouseTable,
-        DataWarehouseSavedQuery,
-        DataWarehouseJoin,
-    )
-
-    team = team_arg or Team.objects.get(pk=team_id)
-    modifiers = create_default_modifiers_for_team(team, modifiers)
-    database = Database(timezone=team.timezone, week_start_day=team.week_start_day)
+    """Database with the tables of every team, set up for the modifiers. Has no data warehouse tables, views or joins."""
+    database = Database(timezone=timezone, week_start_day=week_start_day)
 
     if modifiers.personsOnEventsMode == PersonsOnEventsMode.DISABLED:
         # no change
@@ -282,9 +277,35 @@ def create_hogql_database(
     )
     database.persons.fields["$virt_initial_channel_type"] = create_initial_channel_type("$virt_initial_channel_type")
 
-    for mapping in GroupTypeMapping.objects.filter(team=team):
-        if database.events.fields.get(mapping.group_type) is None:
-            database.events.fields[mapping.group_type] = FieldTraverser(chain=[f"group_{mapping.group_type_index}"])
+    for group_type, group_type_index in group_types.items():
+        if database.events.fields.get(group_type) is None:
+            database.events.fields[group_type] = FieldTraverser(chain=[f"group_{group_type_index}"])
+
+    return database
+
+
+def create_hogql_database(
+    team_id: int, modifiers: Optional[HogQLQueryModifiers] = None, team_arg: Optional["Team"] = None
+) -> Database:
+    from posthog.models import Team
+    from posthog.hogql.database.s3_table import S3Table
+    from posthog.hogql.query import create_default_modifiers_for_team
+    from posthog.warehouse.models import (
+        DataWarehouseTable,
+        DataWarehouseSavedQuery,
+        DataWarehouseJoin,
+    )
+
+    team = team_arg or Team.objects.get(pk=team_id)
+    modifiers = create_default_modifiers_for_team(team, modifiers)
+    database = create_core_hogql_database(
+        timezone=team.timezone,
+        week_start_day=team.week_start_day,
+        modifiers=modifiers,
+        group_types={
+            mapping.group_type: mapping.group_type_index for mapping in GroupTypeMapping.objects.filter(team=team)
+        },
+    )
 
     warehouse_tables: dict[str, Table] = {}
     views: dict[str, Table] = {}
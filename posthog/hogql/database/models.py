@@ -216,6 +216,8 @@ class SavedQuery(Table):
 
     query: str
     name: str
+    # Read instead of running the query, if the query is materialized, e.g. an S3Table
+    materialized_table: Optional[Table] = None
 
     # Note: redundancy for safety. This validation is used in the data model already
     def to_printed_clickhouse(self, context):
@@ -1,5 +1,5 @@
 import re
-from typing import Optional
+from typing import Any, Optional
 
 from posthog.clickhouse.client.escape import substitute_params
 from posthog.hogql.context import HogQLContext
@@ -110,6 +110,8 @@ class S3Table(FunctionCallTable):
     access_key: Optional[str] = None
     access_secret: Optional[str] = None
     structure: Optional[str] = None
+    # Min and max values of the columns per file of a Delta table, see `DataWarehouseTable.file_stats`
+    file_stats: Optional[dict[str, Any]] = None
 
     def to_printed_hogql(self):
         return escape_hogql_identifier(self.name)
@@ -123,3 +125,15 @@ class S3Table(FunctionCallTable):
             structure=self.structure,
             context=context,
         )
+
+    def to_printed_clickhouse_for_files(self, context: HogQLContext, files: list[str]) -> str:
+        """Reads only the given parquet files of a Delta table, instead of all files of its current version."""
+        paths = files[0] if len(files) == 1 else f"{{{','.join(files)}}}"
+        return build_function_call(
+            url=f"{self.url.rstrip('/')}/{paths}",
+            format="Parquet",
+            access_key=self.access_key,
+            access_secret=self.access_secret,
+            structure=self.structure,
+            context=context,
+        )
@@ -0,0 +1,165 @@
+from datetime import UTC, date, datetime, timedelta
+from typing import Any, Optional
+
+from posthog.hogql import ast
+from posthog.hogql.ast import CompareOperationOp
+from posthog.hogql.context import HogQLContext
+from posthog.hogql.database.s3_table import S3Table
+from posthog.hogql.database.schema.util.where_clause_extractor import WhereClauseExtractor, has_tombstone
+
+# Dates and datetimes in queries are compared in the timezone of the team, and the file stats are in UTC
+TEMPORAL_MARGIN = timedelta(days=1)
+
+# Calls of these functions with a constant are compared like the constant
+DATE_CONVERSION_FUNCTIONS = {"toDate", "toDateTime", "toDateTime64", "parseDateTimeBestEffort"}
+
+FLIPPED_OPERATORS = {
+    CompareOperationOp.Eq: CompareOperationOp.Eq,
+    CompareOperationOp.Gt: CompareOperationOp.Lt,
+    CompareOperationOp.GtEq: CompareOperationOp.LtEq,
+    CompareOperationOp.Lt: CompareOperationOp.Gt,
+    CompareOperationOp.LtEq: CompareOperationOp.GtEq,
+}
+
+
+class S3TableWhereClauseExtractor(WhereClauseExtractor):
+    """
+    Extracts the comparisons of columns of an S3 table with constants from a where clause. Everything else is replaced
+    by the tombstone, i.e. "might be true".
+    """
+
+    def __init__(self, context: HogQLContext, table: S3Table):
+        super().__init__(context)
+        self.table = table
+
+    def visit_compare_operation(self, node: ast.CompareOperation) -> ast.Expr:
+        left, right = self.visit(node.left), self.visit(node.right)
+        if isinstance(right, ast.Field) and isinstance(left, ast.Constant) and node.op in FLIPPED_OPERATORS:
+            left, right = right, left
+            op = FLIPPED_OPERATORS[node.op]
+        else:
+            op = node.op
+
+        if (
+            op in FLIPPED_OPERATORS
+            and isinstance(left, ast.Field)
+            and isinstance(right, ast.Constant)
+            and not has_tombstone(right, self.tombstone_string)
+        ):
+            return ast.CompareOperation(op=op, left=left, right=right)
+        return ast.Constant(value=self.tombstone_string)
+
+    def visit_call(self, node: ast.Call) -> ast.Expr:
+        if node.name == "toTimeZone" and len(node.args) >= 1:
+            # datetime fields are converted to the timezone of the team, which keeps them the same point in time
+            return self.visit(node.args[0])
+        if node.name in DATE_CONVERSION_FUNCTIONS and len(node.args) >= 1 and isinstance(node.args[0], ast.Constant):
+            return ast.Constant(value=node.args[0].value)
+        if node.name in ("and", "or", "greaterOrEquals", "greater", "lessOrEquals", "less", "equals"):
+            return super().visit_call(node)
+        return ast.Constant(value=self.tombstone_string)
+
+    def visit_field(self, node: ast.Field) -> ast.Expr:
+        type = node.type
+        if isinstance(type, ast.FieldAliasType):
+            type = type.type
+        if isinstance(type, ast.FieldType):
+            table_type = type.table_type
+            while isinstance(table_type, ast.TableAliasType):
+                table_type = table_type.table_type
+            if isinstance(table_type, ast.TableType) and table_type.table is self.table:
+                return ast.Field(chain=[type.name])
+        return ast.Constant(value=self.tombstone_string)
+
+    def visit_not(self, node: ast.Not) -> ast.Expr:
+        # the file stats only say which values a file might contain, not which it doesn't
+        return ast.Constant(value=self.tombstone_string)
+
+
+def get_s3_table_files(
+    table: S3Table, join_expr: ast.JoinExpr, select_query: ast.SelectQuery, context: HogQLContext
+) -> Optional[list[str]]:
+    """
+    The paths of the files of `table` that might have rows matching the where clause of the query, relative to the URL
+    of the table. None if all files need to be read.
+    """
+    if not table.file_stats or select_query.select_from is not join_expr:
+        return None
+
+    # rows of the table dropped by the where clause would come back as nulls from right and full joins
+    next_join = join_expr.next_join
+    while next_join is not None:
+        if next_join.join_type and ("RIGHT" in next_join.join_type or "FULL" in next_join.join_type):
+            return None
+        next_join = next_join.next_join
+
+    where = S3TableWhereClauseExtractor(context, table).get_inner_where(select_query)
+    if where is None:
+        return None
+
+    columns: dict[str, str] = table.file_stats.get("columns", {})
+    files: list[dict[str, Any]] = table.file_stats.get("files", [])
+    matching_files = [file["path"] for file in files if _file_might_match(where, file, columns)]
+    if len(matching_files) == len(files):
+        return None
+    if not matching_files:
+        # reading no files at all is an error, the where clause filters out the rows of this one
+        return [files[0]["path"]]
+    return matching_files
+
+
+def _file_might_match(expr: ast.Expr, file: dict[str, Any], columns: dict[str, str]) -> bool:
+    if isinstance(expr, ast.And):
+        return all(_file_might_match(e, file, columns) for e in expr.exprs)
+    if isinstance(expr, ast.Or):
+        return any(_file_might_match(e, file, columns) for e in expr.exprs)
+    if isinstance(expr, ast.Constant):
+        return expr.value is not False and expr.value != 0
+    if not isinstance(expr, ast.CompareOperation) or not isinstance(expr.left, ast.Field):
+        return True
+
+    column = str(expr.left.chain[0])
+    kind = columns.get(column)
+    value = _to_comparable(expr.right.value, kind) if isinstance(expr.right, ast.Constant) else None
+    if kind is None or value is None:
+        return True
+
+    low = _to_comparable(file.get("min", {}).get(column), kind)
+    high = _to_comparable(file.get("max", {}).get(column), kind)
+    if kind != "number":
+        low = low - TEMPORAL_MARGIN if low is not None else None
+        high = high + TEMPORAL_MARGIN if high is not None else None
+
+    try:
+        if expr.op == CompareOperationOp.Eq:
+            return (low is None or low <= value) and (high is None or value <= high)
+        if expr.op == CompareOperationOp.Gt:
+            return high is None or high > value
+        if expr.op == CompareOperationOp.GtEq:
+            return high is None or high >= value
+        if expr.op == CompareOperationOp.Lt:
+            return low is None or low < value
+        if expr.op == CompareOperationOp.LtEq:
+            return low is None or low <= value
+    except TypeError:
+        pass
+    return True
+
+
+def _to_comparable(value: Any, kind: Optional[str]) -> Any:
+    """Numbers for numeric columns, datetimes in UTC for date and datetime columns. None if that's not possible."""
+    if value is None or isinstance(value, bool):
+        return None
+    if kind == "number":
+        return value if isinstance(value, int | float) else None
+    if kind in ("date", "datetime"):
+        if isinstance(value, str):
+            try:
+                value = datetime.fromisoformat(value)
+            except ValueError:
+                return None
+        if isinstance(value, datetime):
+            return value if value.tzinfo is not None else value.replace(tzinfo=UTC)
+        if isinstance(value, date):
+            return datetime(value.year, value.month, value.day, tzinfo=UTC)
+    return None
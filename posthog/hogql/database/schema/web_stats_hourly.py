@@ -0,0 +1,34 @@
+from posthog.hogql.database.models import (
+    StringDatabaseField,
+    DateTimeDatabaseField,
+    IntegerDatabaseField,
+    DatabaseField,
+    Table,
+    FieldOrTable,
+)
+
+
+class WebStatsHourlyTable(Table):
+    fields: dict[str, FieldOrTable] = {
+        "team_id": IntegerDatabaseField(name="team_id"),
+        "hour": DateTimeDatabaseField(name="hour"),
+        "pathname": StringDatabaseField(name="pathname"),
+        "referring_domain": StringDatabaseField(name="referring_domain"),
+        "utm_source": StringDatabaseField(name="utm_source"),
+        "utm_medium": StringDatabaseField(name="utm_medium"),
+        "utm_campaign": StringDatabaseField(name="utm_campaign"),
+        "pageview_count": IntegerDatabaseField(name="pageview_count"),
+        # aggregate function states, these need to be read with uniqMerge
+        "persons_uniq": DatabaseField(name="persons_uniq"),
+        "sessions_uniq": DatabaseField(name="sessions_uniq"),
+    }
+
+    def to_printed_clickhouse(self, context):
+        return "web_stats_hourly"
+
+    def to_printed_hogql(self):
+        return "web_stats_hourly"
+
+    def avoid_asterisk_fields(self) -> list[str]:
+        # our clickhouse driver can't return aggregate states
+        return ["persons_uniq", "sessions_uniq"]
@@ -271,3 +271,59 @@ class TestS3Table(BaseTest):
             res
             == "azureBlobStorage(%(hogql_val_0_sensitive)s, %(hogql_val_1_sensitive)s, %(hogql_val_2_sensitive)s, %(hogql_val_3_sensitive)s, %(hogql_val_4_sensitive)s, %(hogql_val_5)s, 'auto')"
         )
+
+    def _init_database_with_file_stats(self):
+        self._init_database()
+        delta_stock = create_aapl_stock_s3_table(name="delta_stock")
+        delta_stock.url = "http://bucket/folder/delta_stock/"
+        delta_stock.format = "Delta"
+        delta_stock.file_stats = {
+            "version": 1,
+            "columns": {"Date": "date", "OpenInt": "number"},
+            "files": [
+                {
+                    "path": "a.parquet",
+                    "min": {"Date": "2024-01-01", "OpenInt": 1},
+                    "max": {"Date": "2024-01-31", "OpenInt": 9},
+                },
+                {
+                    "path": "b.parquet",
+                    "min": {"Date": "2024-02-01", "OpenInt": 10},
+                    "max": {"Date": "2024-02-29", "OpenInt": 19},
+                },
+                {
+                    "path": "c.parquet",
+                    "min": {"Date": "2024-03-01", "OpenInt": 20},
+                    "max": {"Date": "2024-03-31", "OpenInt": 29},
+                },
+            ],
+        }
+        self.database.add_warehouse_tables(delta_stock=delta_stock)
+
+    def test_s3_table_select_prunes_files_by_where_clause(self):
+        self._init_database_with_file_stats()
+        self._select(query="SELECT OpenInt FROM delta_stock WHERE OpenInt >= 12 AND Date < '2024-03-10'")
+        assert self.context.values["hogql_val_0_sensitive"] == "http://bucket/folder/delta_stock/{b.parquet,c.parquet}"
+
+        self._init_database_with_file_stats()
+        self._select(query="SELECT OpenInt FROM delta_stock AS s WHERE s.Date > '2024-03-15' OR s.OpenInt = 5")
+        assert self.context.values["hogql_val_0_sensitive"] == "http://bucket/folder/delta_stock/{a.parquet,c.parquet}"
+
+        self._init_database_with_file_stats()
+        clickhouse = self._select(query="SELECT OpenInt FROM delta_stock WHERE OpenInt = 15")
+        assert self.context.values["hogql_val_0_sensitive"] == "http://bucket/folder/delta_stock/b.parquet"
+        assert "FROM s3(%(hogql_val_0_sensitive)s, %(hogql_val_1)s) AS delta_stock" in clickhouse
+        assert self.context.values["hogql_val_1"] == "Parquet"
+
+    def test_s3_table_select_reads_all_files_without_prunable_where_clause(self):
+        for query in [
+            "SELECT OpenInt FROM delta_stock",
+            "SELECT OpenInt FROM delta_stock WHERE OpenInt > 0",
+            "SELECT OpenInt FROM delta_stock WHERE not(OpenInt = 15)",
+            "SELECT OpenInt FROM delta_stock WHERE OpenInt = 15 OR High > 10",
+            "SELECT OpenInt FROM (SELECT OpenInt FROM delta_stock) WHERE OpenInt = 15",
+            "SELECT d.OpenInt FROM aapl_stock AS a RIGHT JOIN delta_stock AS d ON a.Date = d.Date WHERE d.OpenInt = 15",
+        ]:
+            self._init_database_with_file_stats()
+            clickhouse = self._select(query=query)
+            assert "deltaLake(" in clickhouse, query
@@ -1,9 +1,11 @@
-from typing import Literal, Optional, cast
+import threading
+from collections import OrderedDict
+from typing import Any, Literal, Optional, cast
 from collections.abc import Callable
 
 from antlr4 import CommonTokenStream, InputStream, ParseTreeVisitor, ParserRuleContext
 from antlr4.error.ErrorListener import ErrorListener
-from prometheus_client import Histogram
+from prometheus_client import Counter, Histogram
 
 from posthog.hogql import ast
 from posthog.hogql.base import AST
@@ -14,6 +16,7 @@ from posthog.hogql.grammar.HogQLParser import HogQLParser
 from posthog.hogql.parse_string import parse_string_literal_text, parse_string_literal_ctx, parse_string_text_ctx
 from posthog.hogql.placeholders import replace_placeholders
 from posthog.hogql.timings import HogQLTimings
+from posthog.hogql.visitor import clone_expr
 from hogql_parser import (
     parse_expr as _parse_expr_cpp,
     parse_order_expr as _parse_order_expr_cpp,
@@ -67,6 +70,60 @@ RULE_TO_HISTOGRAM: dict[Literal["expr", "order_expr", "select", "full_template_s
     for rule in ("expr", "order_expr", "select", "full_template_string")
 }
 
+PARSE_CACHE_LOOKUPS_COUNTER = Counter(
+    "hogql_parse_cache_lookups",
+    "Lookups of previously parsed HogQL strings, by whether the parsed tree was reused",
+    labelnames=["rule", "result"],
+)
+
+# Bounds the memory used by the cache. Templates that query builders parse repeatedly are far below the length limit,
+# whereas long strings are usually one-off user queries that aren't worth keeping around.
+PARSE_CACHE_MAX_ENTRIES = 1024
+PARSE_CACHE_MAX_LENGTH = 10_000
+
+_parse_cache: OrderedDict[tuple[Any, ...], AST] = OrderedDict()
+_parse_cache_lock = threading.Lock()
+
+
+def _parse_with_cache(
+    rule: Literal["expr", "order_expr", "select"], backend: Literal["python", "cpp"], string: str, *args: Any
+) -> Any:
+    """
+    Parses `string`, reusing the tree of an earlier parse of the exact same string.
+
+    Query builders parse the same templates over and over, e.g. the lazy persons and sessions tables are parsed for
+    every series of an insight. The cached tree itself must never be handed out, as later passes (like the resolver)
+    modify the AST in place, so callers get a copy of it.
+    """
+    parse = RULE_TO_PARSE_FUNCTION[backend][rule]
+    if len(string) > PARSE_CACHE_MAX_LENGTH:
+        return parse(string, *args)
+
+    key = (rule, backend, string, *args)
+    with _parse_cache_lock:
+        node = _parse_cache.get(key)
+        if node is not None:
+            _parse_cache.move_to_end(key)
+    PARSE_CACHE_LOOKUPS_COUNTER.labels(rule=rule, result="miss" if node is None else "hit").inc()
+
+    if node is None:
+        node = parse(string, *args)
+        with _parse_cache_lock:
+            _parse_cache[key] = node
+            while len(_parse_cache) > PARSE_CACHE_MAX_ENTRIES:
+                _parse_cache.popitem(last=False)
+    return node
+
+
+def _copy_and_replace_placeholders(
+    node: Any, placeholders: Optional[dict[str, ast.Expr]], timings: HogQLTimings
+) -> Any:
+    if placeholders:
+        with timings.measure("replace_placeholders"):
+            # returns a copy of the whole tree, leaving the cached one intact
+            return replace_placeholders(node, placeholders)
+    return clone_expr(node)
+
 
 def parse_string_template(
     string: str,
@@ -101,10 +158,8 @@ def parse_expr(
         timings = HogQLTimings()
     with timings.measure(f"parse_expr_{backend}"):
         with RULE_TO_HISTOGRAM["expr"].labels(backend=backend).time():
-            node = RULE_TO_PARSE_FUNCTION[backend]["expr"](expr, start)
-        if placeholders:
-            with timings.measure("replace_placeholders"):
-                node = replace_placeholders(node, placeholders)
+            node = _parse_with_cache("expr", backend, expr, start)
+        node = _copy_and_replace_placeholders(node, placeholders, timings)
     return node
 
 
@@ -119,10 +174,8 @@ def parse_order_expr(
         timings = HogQLTimings()
     with timings.measure(f"parse_order_expr_{backend}"):
         with RULE_TO_HISTOGRAM["order_expr"].labels(backend=backend).time():
-            node = RULE_TO_PARSE_FUNCTION[backend]["order_expr"](order_expr)
-        if placeholders:
-            with timings.measure("replace_placeholders"):
-                node = replace_placeholders(node, placeholders)
+            node = _parse_with_cache("order_expr", backend, order_expr)
+        node = _copy_and_replace_placeholders(node, placeholders, timings)
     return node
 
 
@@ -137,10 +190,8 @@ def parse_select(
         timings = HogQLTimings()
     with timings.measure(f"parse_select_{backend}"):
         with RULE_TO_HISTOGRAM["select"].labels(backend=backend).time():
-            node = RULE_TO_PARSE_FUNCTION[backend]["select"](statement)
-        if placeholders:
-            with timings.measure("replace_placeholders"):
-                node = replace_placeholders(node, placeholders)
+            node = _parse_with_cache("select", backend, statement)
+        node = _copy_and_replace_placeholders(node, placeholders, timings)
     return node
 
 
@@ -22,6 +22,7 @@ from posthog.hogql.context import HogQLContext
 from posthog.hogql.database.models import Table, FunctionCallTable, SavedQuery
 from posthog.hogql.database.database import create_hogql_database
 from posthog.hogql.database.s3_table import S3Table
+from posthog.hogql.database.s3_table_pruning import get_s3_table_files
 from posthog.hogql.errors import ImpossibleASTError, InternalHogQLError, QueryError, ResolutionError
 from posthog.hogql.escape_sql import (
     escape_clickhouse_identifier,
@@ -43,6 +44,9 @@ from posthog.models.team import Team
 from posthog.models.utils import UUIDT
 from posthog.schema import HogQLQueryModifiers, InCohortVia, MaterializationMode, PersonsOnEventsMode
 
+# (table, column) pairs whose properties can be materialized, see `ee.clickhouse.materialized_columns`
+MATERIALIZABLE_PROPERTY_COLUMNS = {("events", "properties"), ("events", "person_properties"), ("person", "properties")}
+
 
 def team_id_guard_for_table(table_type: Union[ast.TableType, ast.TableAliasType], context: HogQLContext) -> ast.Expr:
     """Add a mandatory "and(team_id, ...)" filter around the expression."""
@@ -416,7 +420,12 @@ class _Printer(Visitor):
                 extra_where = team_id_guard_for_table(node.type, self.context)
 
             if self.dialect == "clickhouse":
-                sql = table_type.table.to_printed_clickhouse(self.context)
+                if isinstance(table_type.table, S3Table) and (
+                    files := self._get_s3_table_files(node, table_type.table)
+                ):
+                    sql = table_type.table.to_printed_clickhouse_for_files(self.context, files)
+                else:
+                    sql = table_type.table.to_printed_clickhouse(self.context)
 
                 # Edge case. If we are joining an s3 table, we must wrap it in a subquery for the join to work
                 if isinstance(table_type.table, S3Table) and (
@@ -489,6 +498,15 @@ class _Printer(Visitor):
 
         return JoinExprResponse(printed_sql=" ".join(join_strings), where=extra_where)
 
+    def _get_s3_table_files(self, node: ast.JoinExpr, table: S3Table) -> Optional[list[str]]:
+        """The files of a warehouse table that might have rows matching the where clause of the query it's read in."""
+        if not table.file_stats:
+            return None
+        select_query = next((item for item in reversed(self.stack) if isinstance(item, ast.SelectQuery)), None)
+        if select_query is None:
+            return None
+        return get_s3_table_files(table, node, select_query, self.context)
+
     def visit_join_constraint(self, node: ast.JoinConstraint):
         return self.visit(node.expr)
 
@@ -1058,6 +1076,8 @@ class _Printer(Visitor):
                     property_sql = self._print_identifier(materialized_column)
                     property_sql = f"{self.visit(field_type.table_type)}.{property_sql}"
                     materialized_property_sql = property_sql
+                elif self.dialect == "clickhouse" and (table_name, field_name) in MATERIALIZABLE_PROPERTY_COLUMNS:
+                    self.context.unmaterialized_properties.add((table_name, field_name, str(type.chain[0])))
             elif (
                 self.context.within_non_hogql_query
                 and (isinstance(table, ast.SelectQueryAliasType) and table.alias == "events__pdi__person")
@@ -1072,6 +1092,8 @@ class _Printer(Visitor):
                     materialized_column = self._get_materialized_column("person", str(type.chain[0]), "properties")
                 if materialized_column:
                     materialized_property_sql = self._print_identifier(materialized_column)
+                elif self.dialect == "clickhouse" and isinstance(table, ast.VirtualTableType):
+                    self.context.unmaterialized_properties.add(("events", "person_properties", str(type.chain[0])))
 
             if materialized_property_sql is not None:
                 # TODO: rematerialize all columns to properly support empty strings and "null" string values.
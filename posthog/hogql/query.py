@@ -1,6 +1,10 @@
 import dataclasses
+from collections.abc import Iterator
 from typing import Optional, Union, cast
 
+from django.conf import settings as app_settings
+
+from posthog.clickhouse.client.arrow import stream_arrow_query
 from posthog.clickhouse.client.connection import Workload
 from posthog.errors import ExposedCHQueryError
 from posthog.hogql import ast
@@ -16,6 +20,14 @@ from posthog.hogql.printer import (
     print_prepared_ast,
 )
 from posthog.hogql.filters import replace_filters
+from posthog.hogql.compiled_query_cache import (
+    CompiledQuery,
+    ParameterizedQuery,
+    get_compiled_query,
+    has_sensitive_values,
+    parameterize_query,
+    set_compiled_query,
+)
 from posthog.hogql.timings import HogQLTimings
 from posthog.hogql.visitor import clone_expr
 from posthog.models.team import Team
@@ -32,6 +44,18 @@ from posthog.schema import (
 from posthog.settings import HOGQL_INCREASED_MAX_EXECUTION_TIME
 
 
+@dataclasses.dataclass
+class CompiledHogQLQuery:
+    query: Optional[str]
+    hogql: Optional[str]
+    columns: Optional[list[str]]
+    # None if printing failed in debug mode, with the reason in `error`
+    clickhouse: Optional[str]
+    clickhouse_context: HogQLContext
+    modifiers: HogQLQueryModifiers
+    error: Optional[str]
+
+
 def execute_hogql_query(
     query: Union[str, ast.SelectQuery, ast.SelectUnionQuery],
     team: Team,
@@ -50,16 +74,185 @@ def execute_hogql_query(
     if timings is None:
         timings = HogQLTimings()
 
+    compiled = _compile_hogql_query(
+        query,
+        team,
+        filters=filters,
+        placeholders=placeholders,
+        settings=settings,
+        modifiers=modifiers,
+        limit_context=limit_context,
+        timings=timings,
+        pretty=pretty,
+        context=context,
+    )
+    clickhouse_sql = compiled.clickhouse
+    clickhouse_context = compiled.clickhouse_context
+    debug = modifiers is not None and modifiers.debug
+    error = compiled.error
+    explain: Optional[list[str]] = None
+    results = None
+    types = None
+    metadata: Optional[HogQLMetadataResponse] = None
+
+    if clickhouse_sql is not None:
+        timings_dict = timings.to_dict()
+        with timings.measure("clickhouse_execute"):
+            _tag_hogql_query(compiled, team, query_type=query_type, modifiers=modifiers, timings_dict=timings_dict)
+
+            try:
+                results, types = sync_execute(
+                    clickhouse_sql,
+                    clickhouse_context.values,
+                    with_column_types=True,
+                    workload=workload,
+                    team_id=team.pk,
+                    readonly=True,
+                )
+            except Exception as e:
+                if debug:
+                    results = []
+                    if isinstance(e, ExposedCHQueryError | ExposedHogQLError):
+                        error = str(e)
+                    else:
+                        error = "Unknown error"
+                else:
+                    raise
+
+        if debug and error is None:  # If the query errored, explain will fail as well.
+            with timings.measure("explain"):
+                explain_results = sync_execute(
+                    f"EXPLAIN {clickhouse_sql}",
+                    clickhouse_context.values,
+                    with_column_types=True,
+                    workload=workload,
+                    team_id=team.pk,
+                    readonly=True,
+                )
+                explain = [str(r[0]) for r in explain_results[0]]
+            with timings.measure("metadata"):
+                from posthog.hogql.metadata import get_hogql_metadata
+
+                metadata = get_hogql_metadata(
+                    HogQLMetadata(language=HogLanguage.HOG_QL, query=compiled.hogql, debug=True), team
+                )
+
+    return HogQLQueryResponse(
+        query=compiled.query,
+        hogql=compiled.hogql,
+        clickhouse=clickhouse_sql,
+        error=error,
+        timings=timings.to_list(),
+        results=results,
+        columns=compiled.columns,
+        types=types,
+        modifiers=compiled.modifiers,
+        explain=explain,
+        metadata=metadata,
+    )
+
+
+def execute_hogql_query_as_arrow(
+    query: Union[str, ast.SelectQuery, ast.SelectUnionQuery],
+    team: Team,
+    *,
+    query_type: str = "hogql_query",
+    filters: Optional[HogQLFilters] = None,
+    placeholders: Optional[dict[str, ast.Expr]] = None,
+    workload: Workload = Workload.DEFAULT,
+    settings: Optional[HogQLGlobalSettings] = None,
+    modifiers: Optional[HogQLQueryModifiers] = None,
+    limit_context: Optional[LimitContext] = LimitContext.QUERY,
+    timings: Optional[HogQLTimings] = None,
+) -> Iterator[bytes]:
+    """
+    Like `execute_hogql_query`, but returns the results as an Arrow IPC stream that ClickHouse writes and is passed on
+    batch by batch. Fields are named like the `columns` of `HogQLQueryResponse`, and typed by its `types`, which are
+    looked up with a `DESCRIBE` of the query before running it. Errors are raised before the stream is returned.
+    """
+    if timings is None:
+        timings = HogQLTimings()
+
+    compiled = _compile_hogql_query(
+        query,
+        team,
+        filters=filters,
+        placeholders=placeholders,
+        settings=settings,
+        modifiers=modifiers,
+        limit_context=limit_context,
+        timings=timings,
+        pretty=False,
+    )
+    if compiled.clickhouse is None:
+        raise ExposedHogQLError(compiled.error or "Unknown error")
+
+    timings_dict = timings.to_dict()
+    _tag_hogql_query(compiled, team, query_type=query_type, modifiers=modifiers, timings_dict=timings_dict)
+    with timings.measure("clickhouse_describe"):
+        # Only analyzes the query, returning the same types as `sync_execute(..., with_column_types=True)`
+        description = sync_execute(
+            f"DESCRIBE TABLE ({compiled.clickhouse})",
+            compiled.clickhouse_context.values,
+            workload=workload,
+            team_id=team.pk,
+            readonly=True,
+        )
+    names = compiled.columns if compiled.columns and len(compiled.columns) == len(description) else None
+    columns = [(names[index] if names else row[0], row[1]) for index, row in enumerate(description)]
+
+    return stream_arrow_query(
+        compiled.clickhouse,
+        compiled.clickhouse_context.values,
+        columns=columns,
+        team_id=team.pk,
+        workload=workload,
+    )
+
+
+def _tag_hogql_query(
+    compiled: CompiledHogQLQuery,
+    team: Team,
+    *,
+    query_type: str,
+    modifiers: Optional[HogQLQueryModifiers],
+    timings_dict: dict[str, float],
+) -> None:
+    clickhouse_sql = compiled.clickhouse or ""
+    tag_queries(
+        team_id=team.pk,
+        query_type=query_type,
+        has_joins="JOIN" in clickhouse_sql,
+        has_json_operations="JSONExtract" in clickhouse_sql or "JSONHas" in clickhouse_sql,
+        timings=timings_dict,
+        modifiers={k: v for k, v in modifiers.model_dump().items() if v is not None} if modifiers else {},
+        # read by the materialized columns analysis, see `ee.clickhouse.materialized_columns.analyze`
+        unmaterialized_properties=sorted(compiled.clickhouse_context.unmaterialized_properties),
+    )
+
+
+def _compile_hogql_query(
+    query: Union[str, ast.SelectQuery, ast.SelectUnionQuery],
+    team: Team,
+    *,
+    filters: Optional[HogQLFilters] = None,
+    placeholders: Optional[dict[str, ast.Expr]] = None,
+    settings: Optional[HogQLGlobalSettings] = None,
+    modifiers: Optional[HogQLQueryModifiers] = None,
+    limit_context: Optional[LimitContext] = LimitContext.QUERY,
+    timings: Optional[HogQLTimings] = None,
+    pretty: Optional[bool] = True,
+    context: Optional[HogQLContext] = None,
+) -> CompiledHogQLQuery:
+    if timings is None:
+        timings = HogQLTimings()
+
     if context is None:
         context = HogQLContext(team_id=team.pk)
 
     query_modifiers = create_default_modifiers_for_team(team, modifiers)
     debug = modifiers is not None and modifiers.debug
     error: Optional[str] = None
-    explain: Optional[list[str]] = None
-    results = None
-    types = None
-    metadata: Optional[HogQLMetadataResponse] = None
 
     with timings.measure("query"):
         if isinstance(query, ast.SelectQuery) or isinstance(query, ast.SelectUnionQuery):
@@ -103,139 +296,200 @@ def execute_hogql_query(
             if one_query.limit is None:
                 one_query.limit = ast.Constant(value=get_default_limit_for_context(limit_context))
 
-    # Get printed HogQL query, and returned columns. Using a cloned query.
-    with timings.measure("hogql"):
-        with timings.measure("prepare_ast"):
-            hogql_query_context = dataclasses.replace(
-                context,
-                # set the team.pk here so someone can't pass a context for a different team 🤷‍️
-                team_id=team.pk,
-                team=team,
-                enable_select_queries=True,
-                timings=timings,
-                modifiers=query_modifiers,
-            )
-
-            with timings.measure("clone"):
-                cloned_query = clone_expr(select_query, True)
-            select_query_hogql = cast(
-                ast.SelectQuery,
-                prepare_ast_for_printing(node=cloned_query, context=hogql_query_context, dialect="hogql"),
-            )
-
-        with timings.measure("print_ast"):
-            hogql = print_prepared_ast(
-                select_query_hogql, hogql_query_context, "hogql", pretty=pretty if pretty is not None else True
-            )
-            print_columns = []
-            columns_query = (
-                select_query_hogql.select_queries[0]
-                if isinstance(select_query_hogql, ast.SelectUnionQuery)
-                else select_query_hogql
-            )
-            for node in columns_query.select:
-                if isinstance(node, ast.Alias):
-                    print_columns.append(node.alias)
-                else:
-                    print_columns.append(
-                        print_prepared_ast(
-                            node=node,
-                            context=hogql_query_context,
-                            dialect="hogql",
-                            stack=[select_query_hogql],
-                        )
-                    )
-
     settings = settings or HogQLGlobalSettings()
     if limit_context in (LimitContext.EXPORT, LimitContext.COHORT_CALCULATION, LimitContext.QUERY_ASYNC):
         settings.max_execution_time = HOGQL_INCREASED_MAX_EXECUTION_TIME
 
-    # Print the ClickHouse SQL query
-    with timings.measure("print_ast"):
-        try:
-            clickhouse_context = dataclasses.replace(
-                context,
-                # set the team.pk here so someone can't pass a context for a different team 🤷‍️
-                team_id=team.pk,
-                team=team,
-                enable_select_queries=True,
-                timings=timings,
-                modifiers=query_modifiers,
-            )
-            clickhouse_sql = print_ast(
-                select_query,
-                context=clickhouse_context,
-                dialect="clickhouse",
-                settings=settings,
-                pretty=pretty if pretty is not None else True,
-            )
-        except Exception as e:
-            if debug:
-                clickhouse_sql = None
-                if isinstance(e, ExposedCHQueryError | ExposedHogQLError):
-                    error = str(e)
-                else:
-                    error = "Unknown error"
-            else:
-                raise
-
-    if clickhouse_sql is not None:
-        timings_dict = timings.to_dict()
-        with timings.measure("clickhouse_execute"):
-            tag_queries(
-                team_id=team.pk,
-                query_type=query_type,
-                has_joins="JOIN" in clickhouse_sql,
-                has_json_operations="JSONExtract" in clickhouse_sql or "JSONHas" in clickhouse_sql,
-                timings=timings_dict,
-                modifiers={k: v for k, v in modifiers.model_dump().items() if v is not None} if modifiers else {},
-            )
+    hogql_query_context = dataclasses.replace(
+        context,
+        # set the team.pk here so someone can't pass a context for a different team 🤷‍️
+        team_id=team.pk,
+        team=team,
+        enable_select_queries=True,
+        timings=timings,
+        modifiers=query_modifiers,
+    )
+    clickhouse_context = dataclasses.replace(
+        context,
+        # set the team.pk here so someone can't pass a context for a different team 🤷‍️
+        team_id=team.pk,
+        team=team,
+        enable_select_queries=True,
+        timings=timings,
+        modifiers=query_modifiers,
+        unmaterialized_properties=set(),
+        untyped_properties=set(),
+    )
+    pretty = pretty if pretty is not None else True
 
-            try:
-                results, types = sync_execute(
-                    clickhouse_sql,
-                    clickhouse_context.values,
-                    with_column_types=True,
-                    workload=workload,
+    with timings.measure("compile"):
+        # Queries that only differ in their date range (e.g. on dashboard refreshes) reuse the printed SQL
+        parameterized_query: Optional[ParameterizedQuery] = None
+        compiled_query: Optional[CompiledQuery] = None
+        if (
+            app_settings.HOGQL_COMPILED_QUERY_CACHE_TTL > 0
+            and not debug
+            and not context.values
+            and context.database is None
+            and context.globals is None
+        ):
+            with timings.measure("compiled_query_cache"):
+                parameterized_query = parameterize_query(
+                    select_query,
                     team_id=team.pk,
-                    readonly=True,
+                    modifiers=query_modifiers,
+                    settings=settings,
+                    pretty=pretty,
+                    limit_top_select=context.limit_top_select,
+                    timezone=team.timezone,
                 )
-            except Exception as e:
-                if debug:
-                    results = []
-                    if isinstance(e, ExposedCHQueryError | ExposedHogQLError):
-                        error = str(e)
-                    else:
-                        error = "Unknown error"
-                else:
-                    raise
+                if parameterized_query is not None:
+                    compiled_query = get_compiled_query(team.pk, parameterized_query)
 
-        if debug and error is None:  # If the query errored, explain will fail as well.
-            with timings.measure("explain"):
-                explain_results = sync_execute(
-                    f"EXPLAIN {clickhouse_sql}",
-                    clickhouse_context.values,
-                    with_column_types=True,
-                    workload=workload,
-                    team_id=team.pk,
-                    readonly=True,
-                )
-                explain = [str(r[0]) for r in explain_results[0]]
-            with timings.measure("metadata"):
-                from posthog.hogql.metadata import get_hogql_metadata
+        if compiled_query is not None:
+            hogql = compiled_query.hogql
+            print_columns = compiled_query.columns
+            clickhouse_sql = compiled_query.clickhouse
+            clickhouse_context.values = compiled_query.values
+            clickhouse_context.unmaterialized_properties = set(compiled_query.unmaterialized_properties)
+        else:
+            # Get printed HogQL query, and returned columns. Using a cloned query.
+            with timings.measure("hogql"):
+                hogql, print_columns = _print_hogql_and_columns(select_query, hogql_query_context, timings, pretty)
+
+            # Print the ClickHouse SQL query
+            with timings.measure("print_ast"):
+                try:
+                    clickhouse_sql = print_ast(
+                        select_query,
+                        context=clickhouse_context,
+                        dialect="clickhouse",
+                        settings=settings,
+                        pretty=pretty,
+                    )
+                except Exception as e:
+                    if debug:
+                        clickhouse_sql = None
+                        if isinstance(e, ExposedCHQueryError | ExposedHogQLError):
+                            error = str(e)
+                        else:
+                            error = "Unknown error"
+                    else:
+                        raise
 
-                metadata = get_hogql_metadata(HogQLMetadata(language=HogLanguage.HOG_QL, query=hogql, debug=True), team)
+            if parameterized_query is not None and clickhouse_sql is not None:
+                with timings.measure("compiled_query_cache"):
+                    _cache_compiled_query(
+                        parameterized_query,
+                        CompiledQuery(
+                            hogql=hogql,
+                            columns=print_columns,
+                            clickhouse=clickhouse_sql,
+                            values=clickhouse_context.values,
+                            unmaterialized_properties=sorted(clickhouse_context.unmaterialized_properties),
+                            has_untyped_properties=bool(clickhouse_context.untyped_properties),
+                        ),
+                        team=team,
+                        hogql_query_context=hogql_query_context,
+                        clickhouse_context=clickhouse_context,
+                        settings=settings,
+                        pretty=pretty,
+                    )
 
-    return HogQLQueryResponse(
-        query=query,
+    return CompiledHogQLQuery(
+        query=query if isinstance(query, str) else None,
         hogql=hogql,
-        clickhouse=clickhouse_sql,
-        error=error,
-        timings=timings.to_list(),
-        results=results,
         columns=print_columns,
-        types=types,
+        clickhouse=clickhouse_sql,
+        clickhouse_context=clickhouse_context,
         modifiers=query_modifiers,
-        explain=explain,
-        metadata=metadata,
+        error=error,
     )
+
+
+def _print_hogql_and_columns(
+    select_query: ast.SelectQuery | ast.SelectUnionQuery, context: HogQLContext, timings: HogQLTimings, pretty: bool
+) -> tuple[str, list[str]]:
+    with timings.measure("prepare_ast"):
+        with timings.measure("clone"):
+            cloned_query = clone_expr(select_query, True)
+        select_query_hogql = cast(
+            ast.SelectQuery,
+            prepare_ast_for_printing(node=cloned_query, context=context, dialect="hogql"),
+        )
+
+    with timings.measure("print_ast"):
+        hogql = print_prepared_ast(select_query_hogql, context, "hogql", pretty=pretty)
+        print_columns = []
+        columns_query = (
+            select_query_hogql.select_queries[0]
+            if isinstance(select_query_hogql, ast.SelectUnionQuery)
+            else select_query_hogql
+        )
+        for node in columns_query.select:
+            if isinstance(node, ast.Alias):
+                print_columns.append(node.alias)
+            else:
+                print_columns.append(
+                    print_prepared_ast(
+                        node=node,
+                        context=context,
+                        dialect="hogql",
+                        stack=[select_query_hogql],
+                    )
+                )
+    return hogql, print_columns
+
+
+def _cache_compiled_query(
+    parameterized_query: ParameterizedQuery,
+    compiled_query: CompiledQuery,
+    *,
+    team: Team,
+    hogql_query_context: HogQLContext,
+    clickhouse_context: HogQLContext,
+    settings: HogQLGlobalSettings,
+    pretty: bool,
+) -> None:
+    if has_sensitive_values(compiled_query.values):
+        return
+
+    if parameterized_query.constants:
+        # Compile once more with the constants lifted, to get SQL that works for any value of them
+        timings = HogQLTimings()
+        try:
+            hogql, print_columns = _print_hogql_and_columns(
+                parameterized_query.query,
+                dataclasses.replace(hogql_query_context, values={}, timings=timings),
+                timings,
+                pretty,
+            )
+            parameterized_context = dataclasses.replace(
+                clickhouse_context,
+                values={},
+                timings=timings,
+                unmaterialized_properties=set(),
+                untyped_properties=set(),
+            )
+            clickhouse_sql = print_ast(
+                parameterized_query.query,
+                context=parameterized_context,
+                dialect="clickhouse",
+                settings=settings,
+                pretty=pretty,
+            )
+        except Exception:
+            # the constants are interpreted while compiling, so the query can't be parameterized
+            return
+        parameterized_compiled_query = CompiledQuery(
+            hogql=hogql,
+            columns=print_columns,
+            clickhouse=clickhouse_sql,
+            values=parameterized_context.values,
+            unmaterialized_properties=sorted(parameterized_context.unmaterialized_properties),
+            has_untyped_properties=bool(parameterized_context.untyped_properties),
+        )
+    else:
+        parameterized_compiled_query = compiled_query
+
+    set_compiled_query(team.pk, parameterized_query, parameterized_compiled_query, compiled_query)
@@ -303,6 +303,9 @@ class Resolver(CloningVisitor):
 
             database_table = self.database.get_table(table_name)
 
+            if isinstance(database_table, SavedQuery) and database_table.materialized_table is not None:
+                database_table = database_table.materialized_table
+
             if isinstance(database_table, SavedQuery):
                 self.current_view_depth += 1
 
@@ -666,6 +666,18 @@ def parser_test_factory(backend: Literal["python", "cpp"]):
                 ),
             )
 
+        def test_repeated_parses_return_separate_trees(self):
+            query = "select event, {foo} from events where timestamp > now() - interval 1 day"
+            first = parse_select(query, backend=backend)
+            cast(ast.SelectQuery, first).select.append(ast.Constant(value=1))
+            second = parse_select(query, backend=backend)
+            third = parse_select(query, {"foo": ast.Constant(value=2)}, backend=backend)
+
+            self.assertIsNot(first, second)
+            self.assertEqual(len(cast(ast.SelectQuery, second).select), 2)
+            self.assertEqual(cast(ast.SelectQuery, second).select[1], ast.Placeholder(chain=["foo"], start=14, end=19))
+            self.assertEqual(cast(ast.SelectQuery, third).select[1], ast.Constant(value=2, start=14, end=19))
+
         def test_intervals(self):
             self.assertEqual(
                 self._expr("interval 1 month"),
@@ -323,6 +323,44 @@ class TestPrinter(BaseTest):
             "nullIf(nullIf(events.`mat_$browser_______`, ''), 'null')",
         )
 
+    def test_records_unmaterialized_properties(self):
+        try:
+            from ee.clickhouse.materialized_columns.analyze import materialize
+        except ModuleNotFoundError:
+            # EE not available? Assume we're good
+            self.assertEqual(1 + 2, 3)
+            return
+        materialize("events", "$browser")
+        context = HogQLContext(team_id=self.team.pk, enable_select_queries=True)
+
+        self._select(
+            "SELECT properties.$browser, properties.$os.name, person.properties.email FROM events", context=context
+        )
+
+        self.assertEqual(
+            context.unmaterialized_properties, {("events", "properties", "$os"), ("person", "properties", "email")}
+        )
+
+    def test_records_unmaterialized_person_properties_on_events(self):
+        try:
+            from ee.clickhouse.materialized_columns.analyze import materialize
+        except ModuleNotFoundError:
+            # EE not available? Assume we're good
+            self.assertEqual(1 + 2, 3)
+            return
+        materialize("events", "$browser", table_column="person_properties")
+        context = HogQLContext(
+            team_id=self.team.pk,
+            enable_select_queries=True,
+            modifiers=HogQLQueryModifiers(
+                personsOnEventsMode=PersonsOnEventsMode.PERSON_ID_OVERRIDE_PROPERTIES_ON_EVENTS
+            ),
+        )
+
+        self._select("SELECT poe.properties.$browser, poe.properties.email FROM events", context=context)
+
+        self.assertEqual(context.unmaterialized_properties, {("events", "person_properties", "email")})
+
     def test_methods(self):
         self.assertEqual(self._expr("count()"), "count()")
         self.assertEqual(self._expr("count(distinct event)"), "count(DISTINCT events.event)")
@@ -1,4 +1,6 @@
 import pytest
+from unittest.mock import patch
+from datetime import date
 from uuid import UUID
 
 from zoneinfo import ZoneInfo
@@ -10,11 +12,12 @@ from posthog import datetime
 from posthog.hogql import ast
 from posthog.hogql.errors import QueryError
 from posthog.hogql.property import property_to_expr
-from posthog.hogql.query import execute_hogql_query
+from posthog.hogql.query import _compile_hogql_query, execute_hogql_query
 from posthog.hogql.test.utils import pretty_print_in_tests, pretty_print_response_in_tests
 from posthog.models import Cohort
 from posthog.models.cohort.util import recalculate_cohortpeople
 from posthog.models.utils import UUIDT, uuid7
+from posthog.warehouse.models import DataWarehouseCredential, DataWarehouseTable
 from posthog.session_recordings.queries.test.session_replay_sql import (
     produce_replay_summary,
 )
@@ -139,6 +142,131 @@ class TestQuery(ClickhouseTestMixin, APIBaseTest):
             self.assertTrue(isinstance(response.timings[0], QueryTiming))
             self.assertEqual(response.timings[-1].k, ".")
 
+    @override_settings(HOGQL_COMPILED_QUERY_CACHE_TTL=60, HOGQL_PROPERTY_TYPES_CACHE_TTL=60)
+    def test_query_reuses_compiled_query_for_other_dates(self):
+        def run_query(date_from: str):
+            return execute_hogql_query(
+                "select count() from events where properties.random_uuid = {random_uuid} and timestamp >= toDateTime({date_from})",
+                placeholders={
+                    "random_uuid": ast.Constant(value=random_uuid),
+                    "date_from": ast.Constant(value=date_from),
+                },
+                team=self.team,
+            )
+
+        def timing_keys(response) -> set[str]:
+            return {timing.k for timing in response.timings or []}
+
+        with freeze_time("2020-01-10"):
+            random_uuid = self._create_random_events()
+
+            first = run_query("2020-01-01 00:00:00")
+            second = run_query("2020-01-09 00:00:00")
+            third = run_query("2020-01-11 00:00:00")
+
+            self.team.week_start_day = 1
+            self.team.save()
+            after_team_change = run_query("2020-01-01 00:00:00")
+
+        self.assertEqual([first.results, second.results, third.results], [[(2,)], [(2,)], [(0,)]])
+        self.assertIn("./compile/print_ast", timing_keys(first))
+        self.assertNotIn("./compile/print_ast", timing_keys(second))
+        self.assertIn("./compile/compiled_query_cache", timing_keys(second))
+        self.assertEqual(second.clickhouse, first.clickhouse)
+        self.assertIn("2020-01-11 00:00:00", third.hogql or "")
+        self.assertIn("./compile/print_ast", timing_keys(after_team_change))
+
+    @override_settings(HOGQL_COMPILED_QUERY_CACHE_TTL=60, HOGQL_PROPERTY_TYPES_CACHE_TTL=60)
+    def test_query_reuses_compiled_query_for_other_datetimes(self):
+        def run_query(date_from: datetime.datetime, day: date):
+            return execute_hogql_query(
+                "select count() from events where properties.random_uuid = {random_uuid} and timestamp >= {date_from} and toDate(timestamp) <= {day}",
+                placeholders={
+                    "random_uuid": ast.Constant(value=random_uuid),
+                    "date_from": ast.Constant(value=date_from),
+                    "day": ast.Constant(value=day),
+                },
+                team=self.team,
+            )
+
+        def timing_keys(response) -> set[str]:
+            return {timing.k for timing in response.timings or []}
+
+        with freeze_time("2020-01-10"):
+            random_uuid = self._create_random_events()
+
+            first = run_query(datetime.datetime(2020, 1, 1, tzinfo=ZoneInfo("UTC")), date(2020, 1, 10))
+            second = run_query(datetime.datetime(2020, 1, 11, tzinfo=ZoneInfo("UTC")), date(2020, 1, 12))
+
+        self.assertEqual([first.results, second.results], [[(2,)], [(0,)]])
+        self.assertIn("./compile/print_ast", timing_keys(first))
+        self.assertNotIn("./compile/print_ast", timing_keys(second))
+        self.assertIn("toDateTime64('2020-01-11 00:00:00.000000', 6, 'UTC')", second.clickhouse or "")
+        self.assertIn("toDate('2020-01-12')", second.clickhouse or "")
+
+    @override_settings(HOGQL_COMPILED_QUERY_CACHE_TTL=60, HOGQL_PROPERTY_TYPES_CACHE_TTL=60)
+    def test_query_recompiles_after_materializing_a_property(self):
+        try:
+            from ee.clickhouse.materialized_columns.analyze import materialize
+        except ModuleNotFoundError:
+            # EE not available? Assume we're good
+            self.assertEqual(1 + 2, 3)
+            return
+
+        def run_query():
+            return execute_hogql_query(
+                "select properties.$browser from events where timestamp >= toDateTime({date_from})",
+                placeholders={"date_from": ast.Constant(value="2020-01-01 00:00:00")},
+                team=self.team,
+            )
+
+        first = run_query()
+        materialize("events", "$browser")
+        second = run_query()
+
+        self.assertNotIn("mat_$browser", first.clickhouse or "")
+        self.assertIn("mat_$browser", second.clickhouse or "")
+
+    @override_settings(HOGQL_COMPILED_QUERY_CACHE_TTL=60, HOGQL_PROPERTY_TYPES_CACHE_TTL=60)
+    def test_query_with_sensitive_values_is_not_cached(self):
+        credential = DataWarehouseCredential.objects.create(
+            team=self.team, access_key="_accesskey", access_secret="_secret"
+        )
+        DataWarehouseTable.objects.create(
+            team=self.team,
+            name="warehouse_table",
+            columns={"id": {"hogql": "StringDatabaseField", "clickhouse": "Nullable(String)"}},
+            credential=credential,
+            url_pattern="http://s3/bucket/*.parquet",
+            format=DataWarehouseTable.TableFormat.Parquet,
+        )
+
+        with patch("posthog.hogql.query.set_compiled_query") as set_compiled_query:
+            _compile_hogql_query("select event from events", self.team)
+            self.assertEqual(set_compiled_query.call_count, 1)
+
+            # the credentials of the table are values of the compiled query
+            compiled = _compile_hogql_query("select id from warehouse_table", self.team)
+            self.assertIn("_secret", compiled.clickhouse_context.values.values())
+            self.assertEqual(set_compiled_query.call_count, 1)
+
+    @override_settings(HOGQL_COMPILED_QUERY_CACHE_TTL=60, HOGQL_PROPERTY_TYPES_CACHE_TTL=0)
+    def test_query_with_untyped_properties_is_cached_as_long_as_property_types(self):
+        def run_query(select: str):
+            response = execute_hogql_query(
+                f"select {select} from events where timestamp >= toDateTime({{date_from}})",
+                placeholders={"date_from": ast.Constant(value="2020-01-01 00:00:00")},
+                team=self.team,
+            )
+            return {timing.k for timing in response.timings or []}
+
+        # `$screen_width` has no definition yet, which ingestion can create at any time
+        run_query("properties.$screen_width")
+        self.assertIn("./compile/print_ast", run_query("properties.$screen_width"))
+
+        run_query("event")
+        self.assertNotIn("./compile/print_ast", run_query("event"))
+
     @pytest.mark.usefixtures("unittest_snapshot")
     def test_query_joins_simple(self):
         with freeze_time("2020-01-10"):
@@ -1,8 +1,10 @@
+from typing import cast
+
 from posthog.hogql import ast
 from posthog.hogql.ast import UUIDType, HogQLXTag, HogQLXAttribute
 from posthog.hogql.errors import InternalHogQLError
-from posthog.hogql.parser import parse_expr
-from posthog.hogql.visitor import CloningVisitor, Visitor, TraversingVisitor
+from posthog.hogql.parser import parse_expr, parse_select
+from posthog.hogql.visitor import CloningVisitor, SharingCloningVisitor, clear_locations, Visitor, TraversingVisitor
 from posthog.test.base import BaseTest
 
 
@@ -108,6 +110,42 @@ class TestVisitor(BaseTest):
             ]
         )
         self.assertEqual(node, CloningVisitor().visit(node))
+        self.assertIs(node, SharingCloningVisitor().visit(node))
+
+    def test_sharing_cloning_visitor(self):
+        class ConstantReplacer(SharingCloningVisitor):
+            def visit_constant(self, node: ast.Constant):
+                if node.value == 2:
+                    return ast.Constant(value=3)
+                return node
+
+        node = parse_select("SELECT a, b + 2 FROM events WHERE c = 1 GROUP BY a")
+        assert isinstance(node, ast.SelectQuery)
+        new_node = ConstantReplacer().visit(node)
+
+        self.assertEqual(
+            clear_locations(new_node),
+            clear_locations(parse_select("SELECT a, b + 3 FROM events WHERE c = 1 GROUP BY a")),
+        )
+        self.assertEqual(node, parse_select("SELECT a, b + 2 FROM events WHERE c = 1 GROUP BY a"))
+
+        # Only the path to the replaced constant is copied
+        self.assertIsNot(new_node, node)
+        self.assertIsNot(new_node.select, node.select)
+        self.assertIsNot(new_node.select[1], node.select[1])
+        self.assertIs(new_node.select[0], node.select[0])
+        self.assertIs(
+            cast(ast.ArithmeticOperation, new_node.select[1]).left, cast(ast.ArithmeticOperation, node.select[1]).left
+        )
+        self.assertIs(new_node.select_from, node.select_from)
+        self.assertIs(new_node.where, node.where)
+        self.assertIs(new_node.group_by, node.group_by)
+
+    def test_ast_nodes_are_slotted(self):
+        node = parse_expr("1 + a")
+        self.assertFalse(hasattr(node, "__dict__"))
+        with self.assertRaises(AttributeError):
+            node.not_a_field = True  # type: ignore
 
     def test_unknown_visitor(self):
         class UnknownVisitor(Visitor):
@@ -154,3 +192,25 @@ class TestVisitor(BaseTest):
         assert NamingCheck().visit(UUIDType()) == "visit_uuid_type"
         assert NamingCheck().visit(HogQLXAttribute(name="a", value="a")) == "visit_hogqlx_attribute"
         assert NamingCheck().visit(HogQLXTag(kind="", attributes=[])) == "visit_hogqlx_tag"
+
+    def test_hogql_visitor_dispatch_per_visitor_class(self):
+        class ParentVisitor(Visitor):
+            def visit_constant(self, node: ast.Constant):
+                return "parent"
+
+            def visit_unknown(self, node: ast.AST):
+                return "unknown"
+
+        class ChildVisitor(ParentVisitor):
+            def visit_constant(self, node: ast.Constant):
+                return "child"
+
+        class StrictVisitor(Visitor):
+            pass
+
+        for _ in range(2):
+            assert ParentVisitor().visit(ast.Constant(value=1)) == "parent"
+            assert ChildVisitor().visit(ast.Constant(value=1)) == "child"
+            assert ChildVisitor().visit(ast.Field(chain=["a"])) == "unknown"
+            with self.assertRaises(InternalHogQLError):
+                StrictVisitor().visit(ast.Constant(value=1))
@@ -1,5 +1,12 @@
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass, field
 from typing import Literal, Optional, cast
 
+from django.conf import settings
+from django.db.models import Q
+from prometheus_client import Counter
+
 from posthog.hogql import ast
 from posthog.hogql.context import HogQLContext
 from posthog.hogql.database.models import (
@@ -7,12 +14,36 @@ from posthog.hogql.database.models import (
     BooleanDatabaseField,
 )
 from posthog.hogql.escape_sql import escape_hogql_identifier
-from posthog.hogql.visitor import CloningVisitor, TraversingVisitor
+from posthog.hogql.visitor import SharingCloningVisitor, TraversingVisitor
 from posthog.models.property import PropertyName, TableColumn
 from posthog.schema import PersonsOnEventsMode
 from posthog.hogql.database.s3_table import S3Table
 
 
+PROPERTY_TYPES_CACHE_LOOKUPS_COUNTER = Counter(
+    "hogql_property_types_cache_lookups",
+    "Property type lookups for the HogQL property swapper, by whether they were served from the in-process cache.",
+    labelnames=["result"],
+)
+
+# Teams whose property types are kept in-process at most, the least recently fetched team is dropped first
+PROPERTY_TYPES_CACHE_MAX_TEAMS = 1000
+
+# (PropertyDefinition.Type, group type index, name)
+PropertyTypeKey = tuple[int, Optional[int], str]
+
+
+@dataclass
+class TeamPropertyTypes:
+    version: Optional[str]
+    expires_at: float
+    # `None` if the property has no definition with a type
+    property_types: dict[PropertyTypeKey, Optional[str]] = field(default_factory=dict)
+
+
+_property_types_cache: dict[int, TeamPropertyTypes] = {}
+
+
 def build_property_swapper(node: ast.Expr, context: HogQLContext) -> None:
     from posthog.models import PropertyDefinition
 
@@ -24,41 +55,30 @@ def build_property_swapper(node: ast.Expr, context: HogQLContext) -> None:
     property_finder.visit(node)
 
     # fetch them
-    event_property_values = (
-        PropertyDefinition.objects.filter(
-            name__in=property_finder.event_properties,
-            team_id=context.team_id,
-            type__in=[None, PropertyDefinition.Type.EVENT],
-        ).values_list("name", "property_type")
-        if property_finder.event_properties
-        else []
-    )
-    event_properties = {name: property_type for name, property_type in event_property_values if property_type}
-
-    person_property_values = (
-        PropertyDefinition.objects.filter(
-            name__in=property_finder.person_properties,
-            team_id=context.team_id,
-            type=PropertyDefinition.Type.PERSON,
-        ).values_list("name", "property_type")
-        if property_finder.person_properties
-        else []
-    )
-    person_properties = {name: property_type for name, property_type in person_property_values if property_type}
-
-    group_properties = {}
-    for group_id, properties in property_finder.group_properties.items():
-        if not properties:
+    keys: list[PropertyTypeKey] = [
+        *((PropertyDefinition.Type.EVENT, None, name) for name in property_finder.event_properties),
+        *((PropertyDefinition.Type.PERSON, None, name) for name in property_finder.person_properties),
+        *(
+            (PropertyDefinition.Type.GROUP, group_id, name)
+            for group_id, properties in property_finder.group_properties.items()
+            for name in properties
+        ),
+    ]
+    property_types = get_property_types(context.team_id, keys)
+    context.untyped_properties.update(key for key, property_type in property_types.items() if not property_type)
+
+    event_properties: dict[str, str] = {}
+    person_properties: dict[str, str] = {}
+    group_properties: dict[str, str] = {}
+    for (definition_type, group_id, name), property_type in property_types.items():
+        if not property_type:
             continue
-        group_property_values = PropertyDefinition.objects.filter(
-            name__in=properties,
-            team_id=context.team_id,
-            type=PropertyDefinition.Type.GROUP,
-            group_type_index=group_id,
-        ).values_list("name", "property_type")
-        group_properties.update(
-            {f"{group_id}_{name}": property_type for name, property_type in group_property_values if property_type}
-        )
+        if definition_type == PropertyDefinition.Type.EVENT:
+            event_properties[name] = property_type
+        elif definition_type == PropertyDefinition.Type.PERSON:
+            person_properties[name] = property_type
+        else:
+            group_properties[f"{group_id}_{name}"] = property_type
 
     timezone = context.database.get_timezone() if context and context.database else "UTC"
     context.property_swapper = PropertySwapper(
@@ -71,6 +91,86 @@ def build_property_swapper(node: ast.Expr, context: HogQLContext) -> None:
     )
 
 
+def get_property_types(team_id: int, keys: list[PropertyTypeKey]) -> dict[PropertyTypeKey, Optional[str]]:
+    """
+    Types of the given property definitions of the team.
+
+    Types are cached in-process per team. The cache is dropped when property definitions are written through Django,
+    and after `HOGQL_PROPERTY_TYPES_CACHE_TTL` seconds at the latest, as ingestion also creates definitions. All
+    properties missing from the cache are fetched with a single query.
+    """
+    from posthog.models import PropertyDefinition
+
+    team_property_types = _get_team_property_types(team_id)
+    cached_types = team_property_types.property_types
+
+    missing_keys = [key for key in keys if key not in cached_types]
+    if len(missing_keys) < len(keys):
+        PROPERTY_TYPES_CACHE_LOOKUPS_COUNTER.labels(result="hit").inc(len(keys) - len(missing_keys))
+
+    if missing_keys:
+        PROPERTY_TYPES_CACHE_LOOKUPS_COUNTER.labels(result="miss").inc(len(missing_keys))
+
+        missing_names: dict[tuple[int, Optional[int]], list[str]] = {}
+        for definition_type, group_id, name in missing_keys:
+            missing_names.setdefault((definition_type, group_id), []).append(name)
+
+        condition = Q()
+        for (definition_type, group_id), names in missing_names.items():
+            if definition_type == PropertyDefinition.Type.EVENT:
+                condition |= Q(name__in=names, type__in=[None, PropertyDefinition.Type.EVENT])
+            elif definition_type == PropertyDefinition.Type.GROUP:
+                condition |= Q(name__in=names, type=definition_type, group_type_index=group_id)
+            else:
+                condition |= Q(name__in=names, type=definition_type)
+
+        # Types are only cached once fetched, as other threads would read placeholders as untyped properties
+        fetched_types: dict[PropertyTypeKey, Optional[str]] = dict.fromkeys(missing_keys)
+        definitions: Iterable[tuple[Optional[int], Optional[int], str, Optional[str]]] = (
+            PropertyDefinition.objects.filter(
+                condition, team_id=team_id
+            ).values_list("type", "group_type_index", "name", "property_type")
+        )
+        for row_type, group_id, name, property_type in definitions:
+            # Definitions created before `type` existed are event property definitions
+            definition_type = PropertyDefinition.Type.EVENT if row_type is None else row_type
+            if definition_type != PropertyDefinition.Type.GROUP:
+                group_id = None
+            if property_type and (definition_type, group_id, name) in fetched_types:
+                fetched_types[(definition_type, group_id, name)] = property_type
+        cached_types.update(fetched_types)
+
+        return {key: fetched_types[key] if key in fetched_types else cached_types[key] for key in keys}
+
+    return {key: cached_types[key] for key in keys}
+
+
+def _get_team_property_types(team_id: int) -> TeamPropertyTypes:
+    from posthog.models.property_definition import get_property_definition_types_version
+
+    ttl = settings.HOGQL_PROPERTY_TYPES_CACHE_TTL
+    if ttl <= 0:
+        return TeamPropertyTypes(version=None, expires_at=0)
+
+    # Read the version before fetching anything, so that writes in the meantime invalidate what we fetch
+    version = get_property_definition_types_version(team_id)
+    now = time.monotonic()
+    team_property_types = _property_types_cache.get(team_id)
+    if (
+        team_property_types is not None
+        and team_property_types.version == version
+        and team_property_types.expires_at > now
+    ):
+        return team_property_types
+
+    team_property_types = TeamPropertyTypes(version=version, expires_at=now + ttl)
+    _property_types_cache.pop(team_id, None)
+    while len(_property_types_cache) >= PROPERTY_TYPES_CACHE_MAX_TEAMS:
+        _property_types_cache.pop(next(iter(_property_types_cache)))
+    _property_types_cache[team_id] = team_property_types
+    return team_property_types
+
+
 class PropertyFinder(TraversingVisitor):
     context: HogQLContext
 
@@ -114,7 +214,7 @@ class PropertyFinder(TraversingVisitor):
             self.found_timestamps = True
 
 
-class PropertySwapper(CloningVisitor):
+class PropertySwapper(SharingCloningVisitor):
     def __init__(
         self,
         timezone: str,
@@ -124,7 +224,7 @@ class PropertySwapper(CloningVisitor):
         context: HogQLContext,
         setTimeZones: bool,
     ):
-        super().__init__(clear_types=False)
+        super().__init__()
         self.timezone = timezone
         self.event_properties = event_properties
         self.person_properties = person_properties
@@ -1,13 +1,17 @@
 import pytest
 from typing import Any
 import re
+from unittest.mock import patch
 
+from django.db import connection
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 
 from posthog.hogql.context import HogQLContext
 from posthog.hogql.parser import parse_select
 from posthog.hogql.printer import print_ast
 from posthog.hogql.test.utils import pretty_print_in_tests
+from posthog.hogql.transforms.property_types import _get_team_property_types, get_property_types
 from posthog.models import PropertyDefinition, GroupTypeMapping
 from posthog.models.group.util import create_group
 from posthog.test.base import BaseTest
@@ -201,6 +205,56 @@ class TestPropertyTypes(BaseTest):
 
         assert printed == self.snapshot
 
+    @override_settings(
+        PERSON_ON_EVENTS_OVERRIDE=False, PERSON_ON_EVENTS_V2_OVERRIDE=False, HOGQL_PROPERTY_TYPES_CACHE_TTL=60
+    )
+    def test_property_types_are_cached_until_definitions_change(self):
+        select = "select properties.$screen_width, person.properties.tickets, organization.properties.inty from events"
+
+        def print_and_count_definition_queries() -> tuple[str, int]:
+            with CaptureQueriesContext(connection) as queries:
+                printed = self._print_select(select)
+            return printed, len([query for query in queries if "posthog_propertydefinition" in query["sql"]])
+
+        printed, definition_queries = print_and_count_definition_queries()
+        assert definition_queries == 1
+        assert printed.count("toFloat") == 3
+
+        assert print_and_count_definition_queries() == (printed, 0)
+
+        definition = PropertyDefinition.objects.get(team=self.team, name="$screen_width")
+        definition.property_type = "String"
+        definition.save()
+
+        printed, definition_queries = print_and_count_definition_queries()
+        assert definition_queries == 1
+        assert printed.count("toFloat") == 2
+
+    def test_property_types_of_definitions_without_type(self):
+        # Definitions from before `type` existed were stored without it, and are event property definitions
+        with patch.object(PropertyDefinition.objects, "filter") as filter_definitions:
+            filter_definitions.return_value.values_list.return_value = [(None, None, "untyped", "Numeric")]
+            property_types = get_property_types(self.team.pk, [(PropertyDefinition.Type.EVENT, None, "untyped")])
+
+        assert property_types == {(PropertyDefinition.Type.EVENT, None, "untyped"): "Numeric"}
+
+    @override_settings(HOGQL_PROPERTY_TYPES_CACHE_TTL=60)
+    def test_property_types_are_only_cached_once_fetched(self):
+        key = (PropertyDefinition.Type.EVENT, None, "$screen_width")
+        filter_definitions = PropertyDefinition.objects.filter
+
+        def filter_definitions_while_cached_types_are_read(*args, **kwargs):
+            # a concurrent request reading the cache now must not get the property as untyped
+            assert key not in _get_team_property_types(self.team.pk).property_types
+            return filter_definitions(*args, **kwargs)
+
+        with patch.object(
+            PropertyDefinition.objects, "filter", side_effect=filter_definitions_while_cached_types_are_read
+        ):
+            assert get_property_types(self.team.pk, [key]) == {key: "Numeric"}
+
+        assert _get_team_property_types(self.team.pk).property_types[key] == "Numeric"
+
     def _print_select(self, select: str):
         expr = parse_select(select)
         query = print_ast(
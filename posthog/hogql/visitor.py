@@ -1,5 +1,6 @@
+import dataclasses
 from copy import deepcopy
-from typing import Optional, TypeVar, Generic, Any
+from typing import Optional, TypeVar, Generic, Any, ForwardRef, Literal, get_args, get_origin
 
 from posthog.hogql import ast
 from posthog.hogql.base import AST, Expr
@@ -730,3 +731,76 @@ class CloningVisitor(Visitor[Any]):
             left=self.visit(node.left),
             right=self.visit(node.right),
         )
+
+
+# Dataclass fields of each AST node class that can hold child nodes. Types and locations are never rewritten.
+_child_field_names: dict[type, tuple[str, ...]] = {}
+
+
+def _may_contain_ast(annotation: Any) -> bool:
+    if annotation is Any or isinstance(annotation, str | ForwardRef):
+        return True
+    if get_origin(annotation) is Literal:
+        return False
+    if isinstance(annotation, type):
+        return issubclass(annotation, AST)
+    return any(_may_contain_ast(arg) for arg in get_args(annotation))
+
+
+def _get_child_field_names(node_class: type) -> tuple[str, ...]:
+    names = _child_field_names.get(node_class)
+    if names is None:
+        names = _child_field_names[node_class] = tuple(
+            field.name
+            for field in dataclasses.fields(node_class)
+            if field.name not in ("start", "end", "type") and _may_contain_ast(field.type)
+        )
+    return names
+
+
+class SharingCloningVisitor(Visitor[Any]):
+    """
+    Visitor that clones the AST tree, while sharing all subtrees that didn't change with the original.
+
+    Nodes are only copied if something below them was replaced. Override `visit_*` methods to replace nodes, and
+    return new nodes instead of mutating the visited ones, as those are still part of the original tree. Keeps types.
+    """
+
+    def visit_unknown(self, node: AST):
+        changes: Optional[dict[str, Any]] = None
+        for name in _get_child_field_names(node.__class__):
+            value = getattr(node, name)
+            if isinstance(value, AST):
+                new_value = self.visit(value)
+            elif isinstance(value, list | tuple | dict):
+                new_value = self._visit_collection(value)
+            else:
+                continue
+            if new_value is not value:
+                if changes is None:
+                    changes = {}
+                changes[name] = new_value
+        if changes is None:
+            return node
+        return dataclasses.replace(node, **changes)
+
+    def _visit_collection(self, value: list | tuple | dict) -> Any:
+        items = value.items() if isinstance(value, dict) else enumerate(value)
+        new_items: Optional[dict] = None
+        for key, item in items:
+            if isinstance(item, AST):
+                new_item = self.visit(item)
+            elif isinstance(item, list | tuple | dict):
+                new_item = self._visit_collection(item)
+            else:
+                continue
+            if new_item is not item:
+                if new_items is None:
+                    new_items = {}
+                new_items[key] = new_item
+        if new_items is None:
+            return value
+        if isinstance(value, dict):
+            return {**value, **new_items}
+        new_list = [new_items.get(index, item) for index, item in enumerate(value)]
+        return new_list if isinstance(value, list) else tuple(new_list)
@@ -1,6 +1,5 @@
 from typing import cast, Literal, Optional
 
-from django.db import connection
 
 from posthog.hogql import ast
 from posthog.hogql.property import property_to_expr
@@ -8,10 +7,9 @@ from posthog.hogql.parser import parse_expr
 from posthog.hogql_queries.insights.paginators import HogQLHasMorePaginator
 from posthog.hogql_queries.utils.recordings_helper import RecordingsHelper
 from posthog.models import Team, Group
+from posthog.models.person.summary import get_person_summaries_by_uuids
 from posthog.schema import ActorsQuery
 
-import orjson as json
-
 
 class ActorStrategy:
     field: str
@@ -44,47 +42,18 @@ class PersonStrategy(ActorStrategy):
     origin = "persons"
     origin_id = "id"
 
-    # This is hand written instead of using the ORM because the ORM was blowing up the memory on exports and taking forever
     def get_actors(self, actor_ids) -> dict[str, dict]:
-        # If actor queries start quietly dying again, this might need batching at some point
-        # but currently works with 800,000 persondistinctid entries (May 24, 2024)
-        with connection.cursor() as cursor:
-            cursor.execute(
-                """SELECT posthog_person.id, posthog_person.uuid, posthog_person.properties, posthog_person.is_identified, posthog_person.created_at
-            FROM posthog_person
-            WHERE posthog_person.uuid = ANY(%(uuids)s)
-            AND posthog_person.team_id = %(team_id)s""",
-                {"uuids": list(actor_ids), "team_id": self.team.pk},
-            )
-            people = cursor.fetchall()
-            cursor.execute(
-                """SELECT posthog_persondistinctid.person_id, posthog_persondistinctid.distinct_id
-            FROM posthog_persondistinctid
-            WHERE posthog_persondistinctid.person_id = ANY(%(people_ids)s)
-            AND posthog_persondistinctid.team_id = %(team_id)s""",
-                {"people_ids": [x[0] for x in people], "team_id": self.team.pk},
-            )
-            distinct_ids = cursor.fetchall()
-
-        person_id_to_raw_person_and_set: dict[int, tuple] = {person[0]: (person, []) for person in people}
-
-        for pdid in distinct_ids:
-            person_id_to_raw_person_and_set[pdid[0]][1].append(pdid[1])
-        del distinct_ids
-
-        person_uuid_to_person = {
-            str(person[1]): {
-                "id": person[1],
-                "properties": json.loads(person[2]),
-                "is_identified": person[3],
-                "created_at": person[4],
-                "distinct_ids": distinct_ids,
+        return {
+            uuid: {
+                "id": person.uuid,
+                "properties": person.properties,
+                "is_identified": person.is_identified,
+                "created_at": person.created_at,
+                "distinct_ids": person.distinct_ids,
             }
-            for person, distinct_ids in person_id_to_raw_person_and_set.values()
+            for uuid, person in get_person_summaries_by_uuids(self.team.pk, actor_ids).items()
         }
 
-        return person_uuid_to_person
-
     def get_recordings(self, matching_events) -> dict[str, list[dict]]:
         return RecordingsHelper(self.team).get_recordings(matching_events)
 
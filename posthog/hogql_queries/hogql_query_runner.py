@@ -1,11 +1,11 @@
 from typing import Optional, cast
-from collections.abc import Callable
+from collections.abc import Callable, Iterator
 
 from posthog.hogql import ast
 from posthog.hogql.filters import replace_filters
 from posthog.hogql.parser import parse_select
 from posthog.hogql.placeholders import find_placeholders
-from posthog.hogql.query import execute_hogql_query
+from posthog.hogql.query import execute_hogql_query, execute_hogql_query_as_arrow
 from posthog.hogql.timings import HogQLTimings
 from posthog.hogql_queries.insights.paginators import HogQLHasMorePaginator
 from posthog.hogql_queries.query_runner import QueryRunner
@@ -65,6 +65,18 @@ class HogQLQueryRunner(QueryRunner):
             response = response.model_copy(update={**paginator.response_params(), "results": paginator.results})
         return response
 
+    def calculate_as_arrow(self) -> Iterator[bytes]:
+        """The results as an Arrow IPC stream, without caching them, see `execute_hogql_query_as_arrow`."""
+        return execute_hogql_query_as_arrow(
+            query_type="HogQLQuery",
+            query=self.to_query(),
+            filters=self.query.filters,
+            modifiers=self.query.modifiers or self.modifiers,
+            team=self.team,
+            timings=self.timings,
+            limit_context=self.limit_context,
+        )
+
     def apply_dashboard_filters(self, dashboard_filter: DashboardFilter):
         self.query.filters = self.query.filters or HogQLFilters()
 
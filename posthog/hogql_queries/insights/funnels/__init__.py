@@ -1,10 +1,12 @@
 from .base import FunnelBase
 from .funnel import Funnel
+from .funnel_array import FunnelArray
 from .funnel_strict import FunnelStrict
 from .funnel_unordered import FunnelUnordered
 from .funnel_time_to_convert import FunnelTimeToConvert
 from .funnel_trends import FunnelTrends
 from .funnel_persons import FunnelActors
+from .funnel_array_persons import FunnelArrayActors
 from .funnel_strict_persons import FunnelStrictActors
 from .funnel_unordered_persons import FunnelUnorderedActors
 from .funnel_trends_persons import FunnelTrendsActors
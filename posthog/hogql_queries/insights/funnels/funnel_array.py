@@ -0,0 +1,205 @@
+from rest_framework.exceptions import ValidationError
+
+from posthog.hogql import ast
+from posthog.hogql.parser import parse_expr
+from posthog.hogql_queries.insights.funnels.funnel import Funnel
+from posthog.hogql_queries.insights.funnels.utils import funnel_window_interval_unit_to_sql
+from posthog.hogql_queries.insights.utils.entities import is_equal, is_superset
+
+
+# Every path is matched from at most this many events following its start, so that matching the paths of an actor
+# takes time linear in their number of events, instead of quadratic
+MAX_PATH_EVENTS = 1000
+
+
+class FunnelArray(Funnel):
+    """
+    An ordered funnel, that matches steps with array functions instead of window functions.
+
+    ## Query Intuition
+    `Funnel` needs a subquery level with window functions over all steps for every step, so the generated query
+    grows quadratically with the number of steps. Here, we instead collect all events of interest into a single sorted
+    array per aggregation target (and breakdown value). For every event that can start the funnel, an `arrayFold` walks
+    the events that follow it and greedily picks the first event matching the next step. This yields a "path" of step
+    timestamps, which is the same thing the levels of window functions compute in `Funnel`.
+
+    The paths are array joined back into one row per funnel start, with the same `steps` and `step_i_conversion_time`
+    columns as `Funnel.get_step_counts_without_aggregation_query`, so all aggregation on top of it is shared.
+
+    ## Exclusion Intuition
+    An exclusion disqualifies a path, if an excluded event happened between the timestamps of its from and to steps
+    (or the end of the conversion window, if the to step was never reached). Disqualified paths are dropped.
+
+    Used when the `funnelsEngine` modifier is set to `array_functions`.
+    """
+
+    def get_step_counts_without_aggregation_query(self):
+        max_steps = self.context.max_steps
+        if max_steps < 2:
+            raise ValidationError("Funnels require at least two steps before calculating.")
+
+        select: list[ast.Expr] = [
+            ast.Field(chain=["aggregation_target"]),
+            ast.Alias(
+                alias="steps",
+                expr=parse_expr(
+                    f"arrayCount(t -> t <= toTimeZone(path[1], 'UTC') + {self._window_interval_sql()}, path)"
+                ),
+            ),
+            *self._get_path_step_times(max_steps),
+            *self._get_breakdown_prop_expr(),
+        ]
+
+        return ast.SelectQuery(
+            select=select,
+            select_from=ast.JoinExpr(table=self._get_events_array_query()),
+            array_join_op="ARRAY JOIN",
+            array_join_list=[ast.Alias(alias="path", expr=self._get_paths_expr())],
+        )
+
+    def _get_events_array_query(self) -> ast.SelectQuery:
+        """
+        One row per aggregation target (and breakdown value), with all its events sorted by timestamp, in the form
+        `(timestamp, [1-indexed steps matched], [1-indexed exclusions matched])`.
+        """
+        max_steps = self.context.max_steps
+        exclusions = self.context.funnelsFilter.exclusions or []
+        breakdown_exprs = self._get_breakdown_prop_expr()
+
+        event_tuple: list[ast.Expr] = [
+            ast.Field(chain=["timestamp"]),
+            parse_expr(
+                "arrayFilter(x -> x > 0, {steps})",
+                {"steps": ast.Array(exprs=[parse_expr(f"step_{i} * {i + 1}") for i in range(max_steps)])},
+            ),
+        ]
+        if exclusions:
+            event_tuple.append(
+                parse_expr(
+                    "arrayFilter(x -> x > 0, {exclusions})",
+                    {
+                        "exclusions": ast.Array(
+                            exprs=[
+                                parse_expr(
+                                    f"exclusion_{exclusion_id}_step_{exclusion.funnelFromStep} * {exclusion_id + 1}"
+                                )
+                                for exclusion_id, exclusion in enumerate(exclusions)
+                            ]
+                        )
+                    },
+                )
+            )
+
+        events_array = parse_expr("arraySort(groupArray({event}))", {"event": ast.Tuple(exprs=event_tuple)})
+
+        return ast.SelectQuery(
+            select=[
+                ast.Field(chain=["aggregation_target"]),
+                *breakdown_exprs,
+                ast.Alias(alias="events_array", expr=events_array),
+            ],
+            select_from=ast.JoinExpr(table=self._get_inner_event_query()),
+            group_by=[ast.Field(chain=["aggregation_target"]), *breakdown_exprs],
+        )
+
+    def _get_paths_expr(self) -> ast.Expr:
+        """
+        For every event that matches the first step, the timestamps of the greedily matched following steps.
+
+        Like the window function levels in `Funnel`, the conversion window isn't considered while matching, only when
+        counting the steps a path reached. This keeps conversion times and exclusions identical between both engines.
+
+        Steps are only matched among the `MAX_PATH_EVENTS` events following the start. For actors with more events
+        than that, steps further away count as not reached, which `Funnel` would still match.
+        """
+        max_steps = self.context.max_steps
+        series = self.context.query.series
+
+        # consecutive duplicate steps can't be matched by the same timestamp
+        duplicate_steps = ast.Array(
+            exprs=[
+                ast.Constant(
+                    value=int(i > 0 and (is_equal(series[i], series[i - 1]) or is_superset(series[i], series[i - 1])))
+                )
+                for i in range(max_steps)
+            ]
+        )
+
+        paths = parse_expr(
+            f"""
+            arrayMap(
+                (start, start_index) -> if(
+                    has(start.2, 1),
+                    arrayFold(
+                        (matched, ev) -> if(
+                            length(matched) < {max_steps}
+                                AND has(ev.2, length(matched) + 1)
+                                AND (ev.1 > matched[length(matched)] OR {{duplicate_steps}}[length(matched) + 1] = 0),
+                            arrayPushBack(matched, ev.1),
+                            matched
+                        ),
+                        arraySlice(events_array, start_index + 1, {MAX_PATH_EVENTS}),
+                        [start.1]
+                    ),
+                    []
+                ),
+                events_array,
+                arrayEnumerate(events_array)
+            )
+            """,
+            {"duplicate_steps": duplicate_steps},
+        )
+
+        conditions: list[ast.Expr] = [parse_expr("length(candidate) > 0")]
+        conditions.extend(self._get_path_exclusion_conditions())
+
+        return ast.Call(
+            name="arrayFilter",
+            args=[ast.Lambda(args=["candidate"], expr=ast.And(exprs=conditions)), paths],
+        )
+
+    def _get_path_exclusion_conditions(self) -> list[ast.Expr]:
+        window_interval = self._window_interval_sql()
+        conditions: list[ast.Expr] = []
+
+        for exclusion_id, exclusion in enumerate(self.context.funnelsFilter.exclusions or []):
+            from_index, to_index = exclusion.funnelFromStep + 1, exclusion.funnelToStep + 1
+            conditions.append(
+                parse_expr(
+                    f"""
+                    NOT (
+                        length(candidate) >= {from_index}
+                        AND arrayExists(
+                            ev -> has(ev.3, {exclusion_id + 1})
+                                AND ev.1 > candidate[{from_index}]
+                                AND ev.1 < if(
+                                    length(candidate) >= {to_index},
+                                    candidate[{to_index}],
+                                    toTimeZone(candidate[{from_index}], 'UTC') + {window_interval}
+                                ),
+                            events_array
+                        )
+                    )
+                    """
+                )
+            )
+
+        return conditions
+
+    def _get_path_step_times(self, max_steps: int) -> list[ast.Expr]:
+        window_interval = self._window_interval_sql()
+        exprs: list[ast.Expr] = []
+
+        for i in range(1, max_steps):
+            exprs.append(
+                parse_expr(
+                    f"if(length(path) > {i} AND path[{i + 1}] <= toTimeZone(path[{i}], 'UTC') + {window_interval}, dateDiff('second', path[{i}], path[{i + 1}]), NULL) as step_{i}_conversion_time"
+                )
+            )
+
+        return exprs
+
+    def _window_interval_sql(self) -> str:
+        windowInterval = self.context.funnelWindowInterval
+        windowIntervalUnit = funnel_window_interval_unit_to_sql(self.context.funnelWindowIntervalUnit)
+        return f"INTERVAL {windowInterval} {windowIntervalUnit}"
@@ -0,0 +1,5 @@
+from posthog.hogql_queries.insights.funnels.funnel_array import FunnelArray
+
+
+class FunnelArrayActors(FunnelArray):
+    pass
@@ -5,6 +5,7 @@ from posthog.constants import AUTOCAPTURE_EVENT
 from posthog.hogql.parser import parse_select
 from posthog.hogql.property import property_to_expr
 from posthog.hogql_queries.insights.funnels.funnel_event_query import FunnelEventQuery
+from posthog.hogql_queries.insights.funnels.funnel_array_persons import FunnelArrayActors
 from posthog.hogql_queries.insights.funnels.funnel_persons import FunnelActors
 from posthog.hogql_queries.insights.funnels.funnel_strict_persons import FunnelStrictActors
 from posthog.hogql_queries.insights.funnels.funnel_unordered_persons import FunnelUnorderedActors
@@ -36,6 +37,7 @@ from posthog.schema import (
     FunnelCorrelationResult,
     FunnelCorrelationResultsType,
     FunnelsActorsQuery,
+    FunnelsEngine,
     FunnelsQuery,
     HogQLQueryModifiers,
     HogQLQueryResponse,
@@ -93,7 +95,7 @@ class FunnelCorrelationQueryRunner(QueryRunner):
     actors_query: FunnelsActorsQuery
     correlation_actors_query: Optional[FunnelCorrelationActorsQuery]
 
-    _funnel_actors_generator: FunnelActors | FunnelStrictActors | FunnelUnorderedActors
+    _funnel_actors_generator: FunnelActors | FunnelArrayActors | FunnelStrictActors | FunnelUnorderedActors
 
     def __init__(
         self,
@@ -132,9 +134,12 @@ class FunnelCorrelationQueryRunner(QueryRunner):
         self.context.actorsQuery = self.actors_query
 
         # Used for generating the funnel persons cte
-        funnel_order_actor_class = get_funnel_actor_class(self.context.funnelsFilter)(context=self.context)
+        use_array_functions = self.context.modifiers.funnelsEngine == FunnelsEngine.ARRAY_FUNCTIONS
+        funnel_order_actor_class = get_funnel_actor_class(
+            self.context.funnelsFilter, use_array_functions=use_array_functions
+        )(context=self.context)
         assert isinstance(
-            funnel_order_actor_class, FunnelActors | FunnelStrictActors | FunnelUnorderedActors
+            funnel_order_actor_class, FunnelActors | FunnelArrayActors | FunnelStrictActors | FunnelUnorderedActors
         )  # for typings
         self._funnel_actors_generator = funnel_order_actor_class
 
@@ -6,7 +6,7 @@ from posthog.hogql.parser import parse_select
 from posthog.hogql_queries.insights.funnels.base import FunnelBase
 from posthog.hogql_queries.insights.funnels.funnel_query_context import FunnelQueryContext
 from posthog.hogql_queries.insights.funnels.utils import get_funnel_order_class
-from posthog.schema import FunnelTimeToConvertResults
+from posthog.schema import FunnelsEngine, FunnelTimeToConvertResults
 
 
 class FunnelTimeToConvert(FunnelBase):
@@ -16,7 +16,10 @@ class FunnelTimeToConvert(FunnelBase):
     ):
         super().__init__(context)
 
-        self.funnel_order = get_funnel_order_class(self.context.funnelsFilter)(context=self.context)
+        use_array_functions = self.context.modifiers.funnelsEngine == FunnelsEngine.ARRAY_FUNCTIONS
+        self.funnel_order = get_funnel_order_class(self.context.funnelsFilter, use_array_functions=use_array_functions)(
+            context=self.context
+        )
 
     def _format_results(self, results: list) -> FunnelTimeToConvertResults:
         return FunnelTimeToConvertResults(
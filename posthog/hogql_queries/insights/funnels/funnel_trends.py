@@ -10,6 +10,7 @@ from posthog.hogql_queries.insights.utils.utils import get_start_of_interval_hog
 from posthog.hogql_queries.utils.query_date_range import QueryDateRange
 from posthog.models.cohort.cohort import Cohort
 from posthog.queries.util import correct_result_for_sampling, get_earliest_timestamp, get_interval_func_ch
+from posthog.schema import FunnelsEngine
 
 TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
 HUMAN_READABLE_TIMESTAMP_FORMAT = "%-d-%b-%Y"
@@ -55,7 +56,10 @@ class FunnelTrends(FunnelBase):
         super().__init__(context)
 
         self.just_summarize = just_summarize
-        self.funnel_order = get_funnel_order_class(self.context.funnelsFilter)(context=self.context)
+        use_array_functions = self.context.modifiers.funnelsEngine == FunnelsEngine.ARRAY_FUNCTIONS
+        self.funnel_order = get_funnel_order_class(self.context.funnelsFilter, use_array_functions=use_array_functions)(
+            context=self.context
+        )
 
     def _format_results(self, results) -> list[dict[str, Any]]:
         query = self.context.query
@@ -25,6 +25,7 @@ from posthog.models.filters.mixins.utils import cached_property
 from posthog.schema import (
     CachedFunnelsQueryResponse,
     FunnelVizType,
+    FunnelsEngine,
     FunnelsQuery,
     FunnelsQueryResponse,
     HogQLQueryModifiers,
@@ -106,7 +107,10 @@ class FunnelsQueryRunner(QueryRunner):
 
     @cached_property
     def funnel_order_class(self):
-        return get_funnel_order_class(self.context.funnelsFilter)(context=self.context)
+        use_array_functions = self.context.modifiers.funnelsEngine == FunnelsEngine.ARRAY_FUNCTIONS
+        return get_funnel_order_class(self.context.funnelsFilter, use_array_functions=use_array_functions)(
+            context=self.context
+        )
 
     @cached_property
     def funnel_class(self):
@@ -121,7 +125,10 @@ class FunnelsQueryRunner(QueryRunner):
 
     @cached_property
     def funnel_actor_class(self):
-        return get_funnel_actor_class(self.context.funnelsFilter)(context=self.context)
+        use_array_functions = self.context.modifiers.funnelsEngine == FunnelsEngine.ARRAY_FUNCTIONS
+        return get_funnel_actor_class(self.context.funnelsFilter, use_array_functions=use_array_functions)(
+            context=self.context
+        )
 
     @cached_property
     def query_date_range(self):
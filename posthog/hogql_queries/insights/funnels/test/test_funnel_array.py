@@ -0,0 +1,120 @@
+from freezegun import freeze_time
+
+from posthog.constants import FunnelOrderType
+from posthog.hogql.printer import to_printed_hogql
+from posthog.hogql_queries.insights.funnels import Funnel, FunnelActors, FunnelArray, FunnelArrayActors
+from posthog.hogql_queries.insights.funnels.funnel_query_context import FunnelQueryContext
+from posthog.hogql_queries.insights.funnels.funnels_query_runner import FunnelsQueryRunner
+from posthog.hogql_queries.insights.funnels.test.breakdown_cases import (
+    funnel_breakdown_group_test_factory,
+    funnel_breakdown_test_factory,
+)
+from posthog.hogql_queries.insights.funnels.test.conversion_time_cases import (
+    funnel_conversion_time_test_factory,
+)
+from posthog.hogql_queries.insights.funnels.test.test_funnel import _create_action, funnel_test_factory
+from posthog.queries.funnels import ClickhouseFunnelActors
+from posthog.schema import EventsNode, FunnelsEngine, FunnelsFilter, FunnelsQuery, FunnelVizType, HogQLQueryModifiers
+from posthog.test.base import BaseTest, ClickhouseTestMixin, _create_event, _create_person
+
+
+class FunnelArrayFunctionsMixin:
+    """Runs the wrapped funnel test cases with the `array_functions` funnels engine, to check parity."""
+
+    def setUp(self):
+        super().setUp()  # type: ignore
+        self.team.modifiers = {"funnelsEngine": FunnelsEngine.ARRAY_FUNCTIONS}  # type: ignore
+        self.team.save()  # type: ignore
+
+
+class TestFunnelArrayBreakdown(
+    FunnelArrayFunctionsMixin,
+    ClickhouseTestMixin,
+    funnel_breakdown_test_factory(  # type: ignore
+        FunnelOrderType.ORDERED,
+        ClickhouseFunnelActors,
+        _create_action,
+        _create_person,
+    ),
+):
+    maxDiff = None
+    pass
+
+
+class TestFunnelArrayGroupBreakdown(
+    FunnelArrayFunctionsMixin,
+    ClickhouseTestMixin,
+    funnel_breakdown_group_test_factory(  # type: ignore
+        FunnelOrderType.ORDERED,
+        ClickhouseFunnelActors,
+    ),
+):
+    pass
+
+
+class TestFunnelArrayConversionTime(
+    FunnelArrayFunctionsMixin,
+    ClickhouseTestMixin,
+    funnel_conversion_time_test_factory(FunnelOrderType.ORDERED, ClickhouseFunnelActors),  # type: ignore
+):
+    maxDiff = None
+    pass
+
+
+class TestFOSSFunnelArray(
+    FunnelArrayFunctionsMixin,
+    funnel_test_factory(Funnel, _create_event, _create_person),  # type: ignore
+):
+    maxDiff = None
+
+
+class TestFunnelArrayQuery(BaseTest):
+    maxDiff = None
+
+    def _printed_query_length(self, funnel_class: type[Funnel], steps: int) -> int:
+        with freeze_time("2024-01-10T12:01:00"):
+            query = FunnelsQuery(series=[EventsNode(event=f"event {i}") for i in range(steps)])
+            funnel = funnel_class(context=FunnelQueryContext(query=query, team=self.team))
+
+        return len(to_printed_hogql(funnel.get_query(), self.team))
+
+    def test_runner_uses_array_funnel_with_modifier(self):
+        query = FunnelsQuery(series=[EventsNode(event="step one"), EventsNode(event="step two")])
+
+        runner = FunnelsQueryRunner(query=query, team=self.team)
+        self.assertEqual(type(runner.funnel_class), Funnel)
+
+        runner = FunnelsQueryRunner(
+            query=query,
+            team=self.team,
+            modifiers=HogQLQueryModifiers(funnelsEngine=FunnelsEngine.ARRAY_FUNCTIONS),
+        )
+        self.assertEqual(type(runner.funnel_class), FunnelArray)
+        self.assertEqual(type(runner.funnel_actor_class), FunnelArrayActors)
+
+    def test_trends_and_actors_use_array_funnel_with_modifier(self):
+        query = FunnelsQuery(
+            series=[EventsNode(event="step one"), EventsNode(event="step two")],
+            funnelsFilter=FunnelsFilter(funnelVizType=FunnelVizType.TRENDS),
+        )
+
+        runner = FunnelsQueryRunner(query=query, team=self.team)
+        self.assertEqual(type(runner.funnel_class.funnel_order), Funnel)
+        self.assertEqual(type(runner.funnel_actor_class), FunnelActors)
+
+        runner = FunnelsQueryRunner(
+            query=query,
+            team=self.team,
+            modifiers=HogQLQueryModifiers(funnelsEngine=FunnelsEngine.ARRAY_FUNCTIONS),
+        )
+        self.assertEqual(type(runner.funnel_class.funnel_order), FunnelArray)
+        self.assertEqual(type(runner.funnel_actor_class), FunnelArrayActors)
+
+    def test_query_size_grows_linearly_with_steps(self):
+        array_small, array_large = (self._printed_query_length(FunnelArray, steps) for steps in (5, 20))
+        window_small, window_large = (self._printed_query_length(Funnel, steps) for steps in (5, 20))
+
+        self.assertLess(array_large, window_large)
+        # 4x the steps should result in roughly 4x the query, and not 16x as with window functions
+        self.assertLess(array_large / array_small, 5)
+        self.assertGreater(window_large / window_small, 8)
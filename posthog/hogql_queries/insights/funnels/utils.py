@@ -5,9 +5,10 @@ from posthog.schema import FunnelConversionWindowTimeUnit, FunnelVizType, Funnel
 from rest_framework.exceptions import ValidationError
 
 
-def get_funnel_order_class(funnelsFilter: FunnelsFilter):
+def get_funnel_order_class(funnelsFilter: FunnelsFilter, use_array_functions: bool = False):
     from posthog.hogql_queries.insights.funnels import (
         Funnel,
+        FunnelArray,
         FunnelStrict,
         FunnelUnordered,
     )
@@ -16,12 +17,15 @@ def get_funnel_order_class(funnelsFilter: FunnelsFilter):
         return FunnelUnordered
     elif funnelsFilter.funnelOrderType == StepOrderValue.STRICT:
         return FunnelStrict
+    elif use_array_functions:
+        return FunnelArray
     return Funnel
 
 
-def get_funnel_actor_class(funnelsFilter: FunnelsFilter):
+def get_funnel_actor_class(funnelsFilter: FunnelsFilter, use_array_functions: bool = False):
     from posthog.hogql_queries.insights.funnels import (
         FunnelActors,
+        FunnelArrayActors,
         FunnelStrictActors,
         FunnelUnorderedActors,
         FunnelTrendsActors,
@@ -34,6 +38,8 @@ def get_funnel_actor_class(funnelsFilter: FunnelsFilter):
             return FunnelUnorderedActors
         elif funnelsFilter.funnelOrderType == StepOrderValue.STRICT:
             return FunnelStrictActors
+        elif use_array_functions:
+            return FunnelArrayActors
         else:
             return FunnelActors
 
@@ -1,6 +1,5 @@
 import itertools
 from posthog.hogql.constants import HogQLGlobalSettings, MAX_BYTES_BEFORE_EXTERNAL_GROUP_BY
-from collections import defaultdict
 from datetime import datetime, timedelta
 from math import ceil
 from re import escape
@@ -783,8 +782,61 @@ class PathsQueryRunner(QueryRunner):
 
             paths_query.limit = ast.Constant(value=self.query.pathsFilter.edgeLimit or EDGE_LIMIT_DEFAULT)
 
+            paths_query = self.reachable_edges_query(paths_query)
+
         return paths_query
 
+    def reachable_edges_query(self, edges_query: ast.SelectQuery) -> ast.SelectQuery:
+        """
+        Keeps only the edges of `edges_query` that can be reached from a starting node, i.e. one prefixed with `1_`.
+
+        Node keys are prefixed with their position in the path, so every edge goes from one level to the next and
+        reachability can be resolved one level at a time, with one `arrayFold` iteration per level.
+        """
+        return cast(
+            ast.SelectQuery,
+            parse_select(
+                """
+                SELECT
+                    edge.1 AS source_event,
+                    edge.2 AS target_event,
+                    edge.3 AS event_count,
+                    edge.4 AS average_conversion_time
+                FROM (
+                    SELECT
+                        groupArray(tuple(source_event, target_event, event_count, average_conversion_time)) AS edges,
+                        arrayFold(
+                            (reached, level) -> arrayDistinct(
+                                arrayConcat(
+                                    reached,
+                                    arrayMap(e -> ifNull(e.2, ''), arrayFilter(e -> has(reached, ifNull(e.1, '')), edges))
+                                )
+                            ),
+                            range({levels}),
+                            arrayDistinct(
+                                arrayFilter(
+                                    source -> startsWith(source, '1_'),
+                                    arrayMap(e -> ifNull(e.1, ''), edges)
+                                )
+                            )
+                        ) AS reachable_nodes
+                    FROM {edges_query}
+                )
+                ARRAY JOIN arrayFilter(e -> has(reachable_nodes, ifNull(e.1, '')), edges) AS edge
+                ORDER BY event_count DESC,
+                        source_event,
+                        target_event
+                LIMIT {limit}
+            """,
+                {
+                    "edges_query": edges_query,
+                    "levels": ast.Constant(value=self.event_in_session_limit),
+                    "limit": ast.Constant(value=self.query.pathsFilter.edgeLimit or EDGE_LIMIT_DEFAULT),
+                },
+                timings=self.timings,
+            ),
+        )
+
     @cached_property
     def query_date_range(self) -> QueryDateRange:
         return QueryDateRange(
@@ -811,36 +863,6 @@ class PathsQueryRunner(QueryRunner):
 
         return refresh_frequency
 
-    def validate_results(self, results):
-        # Query guarantees results list to be:
-        # 1. Directed, Acyclic Tree where each node has only 1 child
-        # 2. All start nodes beginning with 1_
-
-        seen = set()  # source nodes that have been traversed
-        edges = defaultdict(list)
-        validated_results = []
-        starting_nodes_stack = []
-
-        for result in results:
-            edges[result[0]].append(result[1])
-            if result[0].startswith("1_"):
-                # All nodes with 1_ are valid starting nodes
-                starting_nodes_stack.append(result[0])
-
-        while starting_nodes_stack:
-            current_node = starting_nodes_stack.pop()
-            seen.add(current_node)
-
-            for node in edges[current_node]:
-                if node not in seen:
-                    starting_nodes_stack.append(node)
-
-        for result in results:
-            if result[0] in seen:
-                validated_results.append(result)
-
-        return validated_results
-
     def calculate(self) -> PathsQueryResponse:
         query = self.to_query()
         hogql = to_printed_hogql(query, self.team)
@@ -857,8 +879,7 @@ class PathsQueryRunner(QueryRunner):
             ),  # Make sure funnel queries never OOM
         )
 
-        response.results = self.validate_results(response.results)
-
+        # Unreachable edges are already pruned by the query, so results are built in a single pass
         assert response.results is not None
         results = (
             {
@@ -6,6 +6,8 @@ from math import ceil
 from typing import Any
 from typing import Optional
 
+import numpy as np
+
 from posthog.caching.insights_api import BASE_MINIMUM_INSIGHT_REFRESH_INTERVAL, REDUCED_MINIMUM_INSIGHT_REFRESH_INTERVAL
 from posthog.constants import (
     TREND_FILTER_TYPE_EVENTS,
@@ -313,19 +315,28 @@ class RetentionQueryRunner(QueryRunner):
         }
 
         with self.timings.measure("retention_query"):
+            # One row per start interval, with the counts of all its return intervals as parallel arrays. This
+            # keeps the number of returned rows at `total_intervals`, instead of growing with its square.
             retention_query = parse_select(
                 """
-                    SELECT [actor_activity.breakdown_values]       AS breakdown_values,
-                           actor_activity.intervals_from_base      AS intervals_from_base,
-                           COUNT(DISTINCT actor_activity.actor_id) AS count
+                    SELECT start_interval,
+                           groupArray(intervals_from_base) AS return_intervals,
+                           groupArray(count)               AS counts
 
-                    FROM {actor_query} AS actor_activity
+                    FROM (
+                        SELECT actor_activity.breakdown_values         AS start_interval,
+                               actor_activity.intervals_from_base      AS intervals_from_base,
+                               COUNT(DISTINCT actor_activity.actor_id) AS count
+
+                        FROM {actor_query} AS actor_activity
+
+                        GROUP BY start_interval,
+                                 intervals_from_base
+                    )
 
-                    GROUP BY breakdown_values,
-                             intervals_from_base
+                    GROUP BY start_interval
 
-                    ORDER BY breakdown_values,
-                             intervals_from_base
+                    ORDER BY start_interval
 
                     LIMIT 10000
                 """,
@@ -378,6 +389,20 @@ class RetentionQueryRunner(QueryRunner):
                 date = date + utfoffset
         return date
 
+    def counts_matrix(self, rows: list) -> np.ndarray:
+        """
+        Dense `total_intervals × total_intervals` matrix of actor counts, indexed by start interval and then by the
+        number of intervals since the start. Cells ClickHouse returned no count for stay zero.
+        """
+        total_intervals = self.query_date_range.total_intervals
+        counts = np.zeros((total_intervals, total_intervals), dtype=np.int64)
+
+        for start_interval, return_intervals, interval_counts in rows:
+            if 0 <= start_interval < total_intervals:
+                counts[start_interval, return_intervals] = interval_counts
+
+        return counts
+
     def calculate(self) -> RetentionQueryResponse:
         query = self.to_query()
         hogql = to_printed_hogql(query, self.team)
@@ -392,17 +417,14 @@ class RetentionQueryRunner(QueryRunner):
             settings=HogQLGlobalSettings(max_bytes_before_external_group_by=MAX_BYTES_BEFORE_EXTERNAL_GROUP_BY),
         )
 
-        result_dict = {
-            (tuple(breakdown_values), intervals_from_base): {
-                "count": correct_result_for_sampling(count, self.query.samplingFactor),
-            }
-            for (breakdown_values, intervals_from_base, count) in response.results
-        }
+        counts = self.counts_matrix(response.results)
         results = [
             {
                 "values": [
-                    result_dict.get(((first_interval,), return_interval), {"count": 0})
-                    for return_interval in range(self.query_date_range.total_intervals - first_interval)
+                    {"count": correct_result_for_sampling(count, self.query.samplingFactor)}
+                    for count in counts[
+                        first_interval, : self.query_date_range.total_intervals - first_interval
+                    ].tolist()
                 ],
                 "label": f"{self.query_date_range.interval_name.title()} {first_interval}",
                 "date": self.get_date(first_interval),
@@ -1,10 +1,8 @@
 from datetime import timedelta
 from typing import Any
 from unittest import skip
-from unittest.mock import MagicMock
 from uuid import UUID
 
-from django.test import TestCase
 from django.utils import timezone
 from freezegun import freeze_time
 
@@ -14,6 +12,9 @@ from posthog.constants import (
     FUNNEL_PATH_BETWEEN_STEPS,
     INSIGHT_FUNNELS,
 )
+from posthog.hogql import ast
+from posthog.hogql.parser import parse_select
+from posthog.hogql.query import execute_hogql_query
 from posthog.hogql_queries.actors_query_runner import ActorsQueryRunner
 from posthog.hogql_queries.insights.paths_query_runner import PathsQueryRunner
 from posthog.models.filters import Filter, PathFilter
@@ -4721,28 +4722,48 @@ class TestClickhousePaths(ClickhouseTestMixin, APIBaseTest):
         )
 
 
-class TestClickhousePathsEdgeValidation(TestCase):
+class TestClickhousePathsEdgeValidation(ClickhouseTestMixin, APIBaseTest):
     BASIC_PATH = [("1_a", "2_b"), ("2_b", "3_c"), ("3_c", "4_d")]  # a->b->c->d
     BASIC_PATH_2 = [("1_x", "2_y"), ("2_y", "3_z")]  # x->y->z
 
+    def _reachable_edges(self, edges: list[tuple[str, str]]) -> list[tuple[str, str]]:
+        edges_query = parse_select(
+            """
+            SELECT edge.1 AS source_event, edge.2 AS target_event, 1 AS event_count, 0.0 AS average_conversion_time
+            FROM (SELECT arrayJoin({edges}) AS edge)
+            """,
+            {
+                "edges": ast.Array(
+                    exprs=[
+                        ast.Tuple(exprs=[ast.Constant(value=source), ast.Constant(value=target)])
+                        for source, target in edges
+                    ]
+                )
+            },
+        )
+        assert isinstance(edges_query, ast.SelectQuery)
+        runner = PathsQueryRunner(query={"pathsFilter": {}}, team=self.team)
+        response = execute_hogql_query(runner.reachable_edges_query(edges_query), self.team)
+        return [(source, target) for source, target, _, _ in response.results]
+
     def test_basic_forest(self):
         edges = self.BASIC_PATH + self.BASIC_PATH_2
 
-        results = PathsQueryRunner(query={"pathsFilter": {}}, team=MagicMock()).validate_results(edges)
+        results = self._reachable_edges(edges)
 
         self.assertCountEqual(results, self.BASIC_PATH + self.BASIC_PATH_2)
 
     def test_basic_forest_with_dangling_edges(self):
         edges = self.BASIC_PATH + self.BASIC_PATH_2 + [("2_w", "3_z"), ("3_x", "4_d"), ("2_xxx", "3_yyy")]
 
-        results = PathsQueryRunner(query={"pathsFilter": {}}, team=MagicMock()).validate_results(edges)
+        results = self._reachable_edges(edges)
 
         self.assertCountEqual(results, self.BASIC_PATH + self.BASIC_PATH_2)
 
     def test_basic_forest_with_dangling_and_cross_edges(self):
         edges = self.BASIC_PATH + self.BASIC_PATH_2 + [("2_w", "3_z"), ("3_x", "4_d"), ("2_y", "3_c")]
 
-        results = PathsQueryRunner(query={"pathsFilter": {}}, team=MagicMock()).validate_results(edges)
+        results = self._reachable_edges(edges)
 
         self.assertCountEqual(results, self.BASIC_PATH + self.BASIC_PATH_2 + [("2_y", "3_c")])
 
@@ -4751,6 +4772,6 @@ class TestClickhousePathsEdgeValidation(TestCase):
         edges.remove(("1_a", "2_b"))  # remove first start point
         edges = list(edges)  # type: ignore
 
-        results = PathsQueryRunner(query={"pathsFilter": {}}, team=MagicMock()).validate_results(edges)
+        results = self._reachable_edges(edges)  # type: ignore
 
         self.assertCountEqual(results, self.BASIC_PATH_2)
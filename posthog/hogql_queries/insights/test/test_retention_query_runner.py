@@ -1,7 +1,7 @@
 from typing import Optional
 from unittest.mock import MagicMock, patch
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from zoneinfo import ZoneInfo
 
@@ -754,6 +754,33 @@ class TestRetention(ClickhouseTestMixin, APIBaseTest):
             ],
         )
 
+    def test_hour_interval_with_more_cells_than_row_limit(self):
+        # 150 hourly intervals make for 11325 non-zero cells, more than the 10000 rows a query may return
+        total_intervals = 150
+        _create_person(team=self.team, distinct_ids=["person1"])
+        _create_events(
+            self.team,
+            [
+                ("person1", (datetime(2020, 6, 10) + timedelta(hours=hour)).isoformat())
+                for hour in range(total_intervals)
+            ],
+        )
+
+        result = self.run_query(
+            query={
+                "dateRange": {"date_to": (datetime(2020, 6, 10) + timedelta(hours=total_intervals - 1)).isoformat()},
+                "retentionFilter": {
+                    "period": "Hour",
+                    "totalIntervals": total_intervals,
+                },
+            }
+        )
+
+        self.assertEqual(
+            pluck(result, "values", "count"),
+            [[1] * (total_intervals - first_interval) for first_interval in range(total_intervals)],
+        )
+
     # ensure that the first interval is properly rounded according to the specified period
     def test_interval_rounding(self):
         _create_person(
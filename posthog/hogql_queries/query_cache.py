@@ -1,13 +1,38 @@
+import time
+import uuid
 from datetime import datetime, UTC
 from typing import Optional
 
 from django.conf import settings
 from django.core.cache import cache
+from redis.commands.core import Script
+from redis.exceptions import RedisError
+from sentry_sdk import capture_exception
 
 from posthog import redis
 from posthog.cache_utils import OrjsonJsonSerializer
 from posthog.utils import get_safe_cache
 
+# Bounds how long a calculation that died holds on to its lease, after which the query is calculated again
+CALCULATION_LEASE_SECONDS = 180
+
+# Only deletes the lease if it's still ours, then tells everyone waiting that the calculation is done
+RELEASE_CALCULATION_LEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+end
+return redis.call('PUBLISH', KEYS[2], ARGV[1])
+"""
+
+_release_calculation_lease_script: Optional[Script] = None
+
+
+def _get_release_calculation_lease_script() -> Script:
+    global _release_calculation_lease_script
+    if _release_calculation_lease_script is None:
+        _release_calculation_lease_script = redis.get_client().register_script(RELEASE_CALCULATION_LEASE_LUA)
+    return _release_calculation_lease_script
+
 
 class QueryCacheManager:
     def __init__(
@@ -23,6 +48,7 @@ class QueryCacheManager:
         self.cache_key = cache_key
         self.insight_id = insight_id
         self.dashboard_id = dashboard_id
+        self.calculation_lease: Optional[str] = None
 
     @property
     def identifier(self):
@@ -96,3 +122,57 @@ class QueryCacheManager:
             return None
 
         return OrjsonJsonSerializer({}).loads(cached_response_bytes)
+
+    @property
+    def calculation_lease_key(self) -> str:
+        return f"query_calculation_lease:{self.cache_key}"
+
+    @property
+    def calculation_done_channel(self) -> str:
+        return f"query_calculation_done:{self.cache_key}"
+
+    def acquire_calculation_lease(self) -> bool:
+        """
+        Claims calculating the query across all workers, so that everyone else can wait for its result in the cache
+        instead of running the same query. Returns False if the query is being calculated elsewhere already.
+        """
+        token = uuid.uuid4().hex
+        if not self.redis_client.set(self.calculation_lease_key, token, nx=True, ex=CALCULATION_LEASE_SECONDS):
+            return False
+        self.calculation_lease = token
+        return True
+
+    def release_calculation_lease(self) -> None:
+        """Lets everyone waiting know the calculation is done. If Redis can't be reached, the lease just expires."""
+        if self.calculation_lease is None:
+            return
+        try:
+            _get_release_calculation_lease_script()(
+                keys=[self.calculation_lease_key, self.calculation_done_channel],
+                args=[self.calculation_lease],
+                client=self.redis_client,
+            )
+        except RedisError as e:
+            capture_exception(e)
+        self.calculation_lease = None
+
+    def wait_for_calculation(self, *, timeout: float, poll_interval: float = 1.0) -> bool:
+        """
+        Waits for the calculation holding the lease to finish, which is notified through pub/sub. The lease is polled
+        too, in case the notification is missed. Returns False if the calculation is still running after `timeout`.
+        """
+        deadline = time.monotonic() + timeout
+        pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.calculation_done_channel)
+        try:
+            while True:
+                # Checked after subscribing, so that a calculation finishing in between isn't missed
+                if not self.redis_client.exists(self.calculation_lease_key):
+                    return True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                if pubsub.get_message(timeout=min(poll_interval, remaining)) is not None:
+                    return True
+        finally:
+            pubsub.close()
@@ -4,8 +4,10 @@ from enum import IntEnum
 from typing import Any, Generic, Optional, TypeVar, Union, cast, TypeGuard
 
 import structlog
+from django.conf import settings
 from prometheus_client import Counter
 from pydantic import BaseModel, ConfigDict
+from redis.exceptions import RedisError
 from sentry_sdk import capture_exception, push_scope, set_tag, get_traceparent
 
 from posthog.caching.utils import is_stale, ThresholdMode, cache_target_age, last_refresh_from_cached_result
@@ -70,6 +72,14 @@ QUERY_CACHE_HIT_COUNTER = Counter(
     labelnames=[LABEL_TEAM_ID, "cache_hit", "trigger"],
 )
 
+QUERY_SINGLE_FLIGHT_COUNTER = Counter(
+    "posthog_query_single_flight_total",
+    "Queries missing from the cache, by whether they were calculated here or waited for elsewhere. `leader` calculated "
+    "it for everyone, `joined` got it from the cache after waiting, `failed` and `timed_out` calculated it after all, "
+    "and `unavailable` calculated it without coordinating, as Redis couldn't be reached.",
+    labelnames=["result"],
+)
+
 EXTENDED_CACHE_AGE = timedelta(days=1)
 
 
@@ -526,9 +536,43 @@ class QueryRunner(ABC, Generic[Q, R, CR]):
                 cached_response.query_status = self.enqueue_async_calculation(cache_manager=cache_manager, user=user)
                 return cached_response
 
+        if settings.QUERY_SINGLE_FLIGHT_WAIT_SECONDS > 0:
+            return self._calculate_once(cache_manager)
+
         # Nothing useful out of cache, nor async query status
         return None
 
+    def _calculate_once(self, cache_manager: QueryCacheManager) -> Optional[CR]:
+        """
+        Makes sure that only one worker calculates a query missing from the cache, e.g. when a shared dashboard is
+        opened by many at once. Returns the result of the calculation elsewhere, or None if the query should be
+        calculated here, in which case `run` releases the lease once the result is cached.
+        """
+        try:
+            if cache_manager.acquire_calculation_lease():
+                QUERY_SINGLE_FLIGHT_COUNTER.labels(result="leader").inc()
+                return None
+
+            finished = cache_manager.wait_for_calculation(timeout=settings.QUERY_SINGLE_FLIGHT_WAIT_SECONDS)
+        except RedisError as e:
+            # Coordinating is only an optimization, so the query is calculated here without it
+            capture_exception(e)
+            QUERY_SINGLE_FLIGHT_COUNTER.labels(result="unavailable").inc()
+            return None
+
+        if finished:
+            cached_response_candidate = cache_manager.get_cache_data()
+            if self.is_cached_response(cached_response_candidate):
+                cached_response_candidate["is_cached"] = True
+                cached_response = self.cached_response_type(**cached_response_candidate)
+                if not self._is_stale(last_refresh=last_refresh_from_cached_result(cached_response)):
+                    QUERY_SINGLE_FLIGHT_COUNTER.labels(result="joined").inc()
+                    return cached_response
+
+        # The calculation errored, its result wasn't cached or it's taking too long
+        QUERY_SINGLE_FLIGHT_COUNTER.labels(result="failed" if finished else "timed_out").inc()
+        return None
+
     def run(
         self,
         execution_mode: ExecutionMode = ExecutionMode.RECENT_CACHE_CALCULATE_BLOCKING_IF_STALE,
@@ -573,37 +617,40 @@ class QueryRunner(ABC, Generic[Q, R, CR]):
             if results is not None:
                 return results
 
-        last_refresh = datetime.now(UTC)
-        target_age = self.cache_target_age(last_refresh=last_refresh)
-        fresh_response_dict = {
-            **self.calculate().model_dump(),
-            "is_cached": False,
-            "last_refresh": last_refresh,
-            "next_allowed_client_refresh": last_refresh + self._refresh_frequency(),
-            "cache_key": cache_key,
-            "timezone": self.team.timezone,
-            "cache_target_age": target_age,
-        }
-        if get_query_tag_value("trigger"):
-            fresh_response_dict["calculation_trigger"] = get_query_tag_value("trigger")
-        fresh_response = CachedResponse(**fresh_response_dict)
-
-        # Don't cache debug queries with errors and export queries
-        has_error: Optional[list] = fresh_response_dict.get("error", None)
-        if (has_error is None or len(has_error) == 0) and self.limit_context != LimitContext.EXPORT:
-            cache_manager.set_cache_data(
-                response=fresh_response_dict,
-                # This would be a possible place to decide to not ever keep this cache warm
-                # Example: Not for super quickly calculated insights
-                # Set target_age to None in that case
-                target_age=self.cache_target_age(
-                    last_refresh=last_refresh,
-                    lazy=True,  # Attention: Currently using extended/lazy cache age as warming target
-                ),
-            )
-            QUERY_CACHE_WRITE_COUNTER.labels(team_id=self.team.pk).inc()
+        try:
+            last_refresh = datetime.now(UTC)
+            target_age = self.cache_target_age(last_refresh=last_refresh)
+            fresh_response_dict = {
+                **self.calculate().model_dump(),
+                "is_cached": False,
+                "last_refresh": last_refresh,
+                "next_allowed_client_refresh": last_refresh + self._refresh_frequency(),
+                "cache_key": cache_key,
+                "timezone": self.team.timezone,
+                "cache_target_age": target_age,
+            }
+            if get_query_tag_value("trigger"):
+                fresh_response_dict["calculation_trigger"] = get_query_tag_value("trigger")
+            fresh_response = CachedResponse(**fresh_response_dict)
+
+            # Don't cache debug queries with errors and export queries
+            has_error: Optional[list] = fresh_response_dict.get("error", None)
+            if (has_error is None or len(has_error) == 0) and self.limit_context != LimitContext.EXPORT:
+                cache_manager.set_cache_data(
+                    response=fresh_response_dict,
+                    # This would be a possible place to decide to not ever keep this cache warm
+                    # Example: Not for super quickly calculated insights
+                    # Set target_age to None in that case
+                    target_age=self.cache_target_age(
+                        last_refresh=last_refresh,
+                        lazy=True,  # Attention: Currently using extended/lazy cache age as warming target
+                    ),
+                )
+                QUERY_CACHE_WRITE_COUNTER.labels(team_id=self.team.pk).inc()
 
-        return fresh_response
+            return fresh_response
+        finally:
+            cache_manager.release_calculation_lease()
 
     @abstractmethod
     def to_query(self) -> ast.SelectQuery | ast.SelectUnionQuery:
@@ -1,11 +1,17 @@
+import threading
 from datetime import datetime, timedelta
 from typing import Any, Literal, Optional
 from unittest import mock
 from zoneinfo import ZoneInfo
 
+from django.core.cache import cache
+from django.test import override_settings
 from freezegun import freeze_time
 from pydantic import BaseModel
+from redis.exceptions import ConnectionError as RedisConnectionError
 
+from posthog import redis
+from posthog.hogql_queries.query_cache import QueryCacheManager
 from posthog.hogql_queries.query_runner import ExecutionMode, QueryRunner
 from posthog.models.team.team import Team
 from posthog.schema import (
@@ -205,6 +211,67 @@ class TestQueryRunner(BaseTest):
             self.assertEqual(response.is_cached, True)
             mock_on_commit.assert_called_once()
 
+    @override_settings(QUERY_SINGLE_FLIGHT_WAIT_SECONDS=5)
+    def test_single_flight_releases_lease(self):
+        TestQueryRunner = self.setup_test_query_runner_class()
+        runner = TestQueryRunner(query={"some_attr": "leader"}, team=self.team)
+        cache_manager = QueryCacheManager(team_id=self.team.pk, cache_key=runner.get_cache_key())
+
+        response = runner.run(execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_BLOCKING_IF_STALE)
+
+        self.assertEqual(response.is_cached, False)
+        self.assertFalse(redis.get_client().exists(cache_manager.calculation_lease_key))
+
+    @override_settings(QUERY_SINGLE_FLIGHT_WAIT_SECONDS=5)
+    def test_single_flight_waits_for_calculation_elsewhere(self):
+        TestQueryRunner = self.setup_test_query_runner_class()
+        runner = TestQueryRunner(query={"some_attr": "joined"}, team=self.team)
+        cache_key = runner.get_cache_key()
+        fresh_response = runner.run(execution_mode=ExecutionMode.CALCULATE_BLOCKING_ALWAYS)
+        cache.delete(cache_key)
+
+        # Another worker is calculating the same query
+        elsewhere = QueryCacheManager(team_id=self.team.pk, cache_key=cache_key)
+        self.assertTrue(elsewhere.acquire_calculation_lease())
+
+        def finish_calculation():
+            elsewhere.set_cache_data(response=fresh_response.model_dump(), target_age=None)
+            elsewhere.release_calculation_lease()
+
+        timer = threading.Timer(0.2, finish_calculation)
+        timer.start()
+        with mock.patch.object(TestQueryRunner, "calculate") as calculate:
+            response = runner.run(execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_BLOCKING_IF_STALE)
+        timer.join()
+
+        calculate.assert_not_called()
+        self.assertEqual(response.is_cached, True)
+        self.assertEqual(response.last_refresh, fresh_response.last_refresh)
+
+    @override_settings(QUERY_SINGLE_FLIGHT_WAIT_SECONDS=1)
+    def test_single_flight_calculates_after_waiting_too_long(self):
+        TestQueryRunner = self.setup_test_query_runner_class()
+        runner = TestQueryRunner(query={"some_attr": "timed_out"}, team=self.team)
+        elsewhere = QueryCacheManager(team_id=self.team.pk, cache_key=runner.get_cache_key())
+        self.assertTrue(elsewhere.acquire_calculation_lease())
+
+        response = runner.run(execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_BLOCKING_IF_STALE)
+
+        self.assertEqual(response.is_cached, False)
+        # The lease of the other worker is left alone
+        self.assertTrue(redis.get_client().exists(elsewhere.calculation_lease_key))
+        elsewhere.release_calculation_lease()
+
+    @override_settings(QUERY_SINGLE_FLIGHT_WAIT_SECONDS=5)
+    def test_single_flight_calculates_when_redis_is_unavailable(self):
+        TestQueryRunner = self.setup_test_query_runner_class()
+        runner = TestQueryRunner(query={"some_attr": "unavailable"}, team=self.team)
+
+        with mock.patch.object(redis.get_client(), "set", side_effect=RedisConnectionError):
+            response = runner.run(execution_mode=ExecutionMode.RECENT_CACHE_CALCULATE_BLOCKING_IF_STALE)
+
+        self.assertEqual(response.is_cached, False)
+
     def test_modifier_passthrough(self):
         try:
             from ee.clickhouse.materialized_columns.analyze import materialize
@@ -14,6 +14,7 @@ from posthog.hogql_queries.insights.paginators import HogQLHasMorePaginator
 from posthog.hogql_queries.web_analytics.web_analytics_query_runner import (
     WebAnalyticsQueryRunner,
     map_columns,
+    web_stats_hourly_property,
 )
 from posthog.schema import (
     CachedWebStatsTableQueryResponse,
@@ -40,6 +41,8 @@ class WebStatsTableQueryRunner(WebAnalyticsQueryRunner):
         )
 
     def to_query(self) -> ast.SelectQuery:
+        if self.use_rollups:
+            return self.to_rollup_query()
         if self.query.breakdownBy == WebStatsBreakdown.PAGE:
             if self.query.includeScrollDepth and self.query.includeBounceRate:
                 return self.to_path_scroll_bounce_query()
@@ -91,6 +94,47 @@ ORDER BY "context.columns.visitors" DESC,
         assert isinstance(query, ast.SelectQuery)
         return query
 
+    def to_rollup_query(self) -> ast.SelectQuery:
+        with self.timings.measure("stats_table_rollup_query"):
+            query = parse_select(
+                """
+SELECT
+    breakdown_value AS "context.columns.breakdown_value",
+    uniqMerge(persons_uniq) AS "context.columns.visitors",
+    sum(pageview_count) AS "context.columns.views"
+FROM (
+    SELECT
+        {breakdown_value} AS breakdown_value,
+        persons_uniq,
+        pageview_count
+    FROM web_stats_hourly
+    WHERE and(
+        {rollups_where},
+        {where_breakdown}
+    )
+)
+GROUP BY "context.columns.breakdown_value"
+ORDER BY "context.columns.visitors" DESC,
+"context.columns.breakdown_value" ASC
+""",
+                timings=self.timings,
+                placeholders={
+                    "breakdown_value": self._apply_path_cleaning(web_stats_hourly_property("$pathname")),
+                    "where_breakdown": self.where_breakdown(),
+                    "rollups_where": self.rollups_where(),
+                },
+            )
+        assert isinstance(query, ast.SelectQuery)
+        return query
+
+    def _supports_rollups(self) -> bool:
+        # bounce rate and scroll depth depend on the whole session, which the rollup doesn't know about
+        return (
+            self.query.breakdownBy == WebStatsBreakdown.PAGE
+            and not self.query.includeBounceRate
+            and not self.query.includeScrollDepth
+        )
+
     def _to_main_query_with_session_properties(self) -> ast.SelectQuery:
         with self.timings.measure("stats_table_query"):
             query = parse_select(
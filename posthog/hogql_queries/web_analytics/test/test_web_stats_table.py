@@ -1,9 +1,10 @@
-from typing import Optional
+from typing import Any, Optional
 
 from freezegun import freeze_time
 from parameterized import parameterized
 
 from posthog.hogql_queries.web_analytics.stats_table import WebStatsTableQueryRunner
+from posthog.models.person.util import create_person_distinct_id
 from posthog.models.utils import uuid7
 from posthog.schema import (
     DateRange,
@@ -13,12 +14,14 @@ from posthog.schema import (
     PropertyOperator,
     SessionTableVersion,
     HogQLQueryModifiers,
+    PersonsOnEventsMode,
 )
 from posthog.test.base import (
     APIBaseTest,
     ClickhouseTestMixin,
     _create_event,
     _create_person,
+    create_person_id_override_by_distinct_id,
 )
 
 
@@ -96,7 +99,10 @@ class TestWebStatsTableQueryRunner(ClickhouseTestMixin, APIBaseTest):
                 )
         return person_result
 
-    def _run_web_stats_table_query(
+    def _run_web_stats_table_query(self, *args, **kwargs):
+        return self._web_stats_table_runner(*args, **kwargs).calculate()
+
+    def _web_stats_table_runner(
         self,
         date_from,
         date_to,
@@ -108,8 +114,14 @@ class TestWebStatsTableQueryRunner(ClickhouseTestMixin, APIBaseTest):
         properties=None,
         session_table_version: SessionTableVersion = SessionTableVersion.V1,
         filter_test_accounts: Optional[bool] = False,
+        use_rollups: Optional[bool] = None,
+        persons_on_events_mode: Optional[PersonsOnEventsMode] = None,
     ):
-        modifiers = HogQLQueryModifiers(sessionTableVersion=session_table_version)
+        modifiers = HogQLQueryModifiers(
+            sessionTableVersion=session_table_version,
+            useWebAnalyticsRollups=use_rollups,
+            personsOnEventsMode=persons_on_events_mode,
+        )
         query = WebStatsTableQuery(
             dateRange=DateRange(date_from=date_from, date_to=date_to),
             properties=properties or [],
@@ -121,8 +133,7 @@ class TestWebStatsTableQueryRunner(ClickhouseTestMixin, APIBaseTest):
             filterTestAccounts=filter_test_accounts,
         )
         self.team.path_cleaning_filters = path_cleaning_filters or []
-        runner = WebStatsTableQueryRunner(team=self.team, query=query, modifiers=modifiers)
-        return runner.calculate()
+        return WebStatsTableQueryRunner(team=self.team, query=query, modifiers=modifiers)
 
     @parameterized.expand([[SessionTableVersion.V1], [SessionTableVersion.V2]])
     def test_no_crash_when_no_data(self, session_table_version: SessionTableVersion):
@@ -990,3 +1001,100 @@ class TestWebStatsTableQueryRunner(ClickhouseTestMixin, APIBaseTest):
             breakdown_by=WebStatsBreakdown.PAGE,
         ).results
         assert [["/path", 1, 1]] == results
+
+    def test_rollups_match_raw_tables(self):
+        s1a = str(uuid7("2023-12-02"))
+        s1b = str(uuid7("2023-12-13"))
+        s2 = str(uuid7("2023-12-10"))
+        s3 = str(uuid7("2023-12-10"))
+        self._create_events(
+            [
+                ("p1", [("2023-12-02", s1a, "/"), ("2023-12-03", s1a, "/login"), ("2023-12-13", s1b, "/docs")]),
+                ("p2", [("2023-12-10", s2, "/"), ("2023-12-10T12:30:00", s2, "/")]),
+                ("p3", [("2023-12-10T23:59:00", s3, "/cleaned/123")]),
+            ]
+        )
+
+        cases: list[tuple[str, str, dict[str, Any]]] = [
+            ("2023-12-01", "2023-12-11", {}),
+            ("all", "2023-12-15", {}),
+            (
+                "2023-12-01",
+                "2023-12-11",
+                {"properties": [EventPropertyFilter(key="$pathname", operator=PropertyOperator.EXACT, value="/")]},
+            ),
+            (
+                "2023-12-01",
+                "2023-12-11",
+                {"path_cleaning_filters": [{"regex": "\\/cleaned\\/\\d+", "alias": "/cleaned/:id"}]},
+            ),
+        ]
+        for date_from, date_to, kwargs in cases:
+            kwargs["persons_on_events_mode"] = PersonsOnEventsMode.PERSON_ID_NO_OVERRIDE_PROPERTIES_ON_EVENTS
+            raw_runner = self._web_stats_table_runner(date_from, date_to, **kwargs)
+            rollups_runner = self._web_stats_table_runner(date_from, date_to, use_rollups=True, **kwargs)
+
+            self.assertFalse(raw_runner.use_rollups)
+            self.assertTrue(rollups_runner.use_rollups)
+            self.assertEqual(raw_runner.calculate().results, rollups_runner.calculate().results)
+
+    def test_rollups_match_raw_tables_with_merged_persons(self):
+        s1 = str(uuid7("2023-12-02"))
+        s2 = str(uuid7("2023-12-02"))
+        _, p2 = self._create_events([("p1", [("2023-12-02", s1, "/")]), ("p2", [("2023-12-02", s2, "/")])])
+
+        # p1 is merged into p2 after the events were ingested
+        create_person_distinct_id(self.team.pk, "p1", str(p2.uuid), version=1)
+        create_person_id_override_by_distinct_id("p1", "p2", self.team.pk)
+
+        for persons_on_events_mode, expected_visitors in [
+            (PersonsOnEventsMode.DISABLED, 1),
+            (PersonsOnEventsMode.PERSON_ID_NO_OVERRIDE_PROPERTIES_ON_EVENTS, 2),
+            (PersonsOnEventsMode.PERSON_ID_OVERRIDE_PROPERTIES_ON_EVENTS, 1),
+            (PersonsOnEventsMode.PERSON_ID_OVERRIDE_PROPERTIES_JOINED, 1),
+        ]:
+            raw_runner = self._web_stats_table_runner(
+                "2023-12-01", "2023-12-03", persons_on_events_mode=persons_on_events_mode
+            )
+            rollups_runner = self._web_stats_table_runner(
+                "2023-12-01", "2023-12-03", use_rollups=True, persons_on_events_mode=persons_on_events_mode
+            )
+
+            # only events with the person ids of ingestion can be counted from the rollup
+            self.assertEqual(
+                rollups_runner.use_rollups,
+                persons_on_events_mode == PersonsOnEventsMode.PERSON_ID_NO_OVERRIDE_PROPERTIES_ON_EVENTS,
+            )
+            self.assertEqual(raw_runner.calculate().results, [["/", expected_visitors, 2]])
+            self.assertEqual(rollups_runner.calculate().results, [["/", expected_visitors, 2]])
+
+    def test_rollups_fall_back_to_raw_tables(self):
+        s1 = str(uuid7("2023-12-02"))
+        self._create_events([("p1", [("2023-12-02", s1, "/"), ("2023-12-03", s1, "/login")])])
+
+        cases: list[tuple[str, str, dict[str, Any]]] = [
+            ("2023-12-01", "2023-12-03", {"include_bounce_rate": True}),
+            ("2023-12-01", "2023-12-03", {"breakdown_by": WebStatsBreakdown.INITIAL_PAGE}),
+            (
+                "2023-12-01",
+                "2023-12-03",
+                {"properties": [EventPropertyFilter(key="$browser", operator=PropertyOperator.EXACT, value="Chrome")]},
+            ),
+            ("2023-12-01", "2023-12-03", {"filter_test_accounts": True}),
+        ]
+        for date_from, date_to, kwargs in cases:
+            runner = self._web_stats_table_runner(date_from, date_to, use_rollups=True, **kwargs)
+            self.assertFalse(runner.use_rollups)
+            self.assertNotIn("web_stats_hourly", runner.calculate().hogql)
+
+        # the rollup can't answer queries for part of an hour
+        runner = WebStatsTableQueryRunner(
+            team=self.team,
+            query=WebStatsTableQuery(
+                dateRange=DateRange(date_from="2023-12-01T12:30:00", date_to="2023-12-03T12:30:00", explicitDate=True),
+                properties=[],
+                breakdownBy=WebStatsBreakdown.PAGE,
+            ),
+            modifiers=HogQLQueryModifiers(useWebAnalyticsRollups=True),
+        )
+        self.assertFalse(runner.use_rollups)
@@ -7,12 +7,14 @@ from typing import Optional, Union
 from django.conf import settings
 from django.core.cache import cache
 from django.utils.timezone import datetime
+from zoneinfo import ZoneInfo
 
 from posthog.caching.insights_api import BASE_MINIMUM_INSIGHT_REFRESH_INTERVAL, REDUCED_MINIMUM_INSIGHT_REFRESH_INTERVAL
 from posthog.hogql import ast
 from posthog.hogql.parser import parse_expr, parse_select
-from posthog.hogql.property import property_to_expr
+from posthog.hogql.property import property_to_expr, get_property_type, get_property_key
 from posthog.hogql.query import execute_hogql_query
+from posthog.hogql.visitor import CloningVisitor
 from posthog.hogql_queries.query_runner import QueryRunner
 from posthog.hogql_queries.utils.query_date_range import QueryDateRange
 from posthog.models.filters.mixins.utils import cached_property
@@ -22,6 +24,7 @@ from posthog.schema import (
     WebOverviewQuery,
     WebStatsTableQuery,
     PersonPropertyFilter,
+    PersonsOnEventsMode,
     SamplingRate,
     SessionPropertyFilter,
 )
@@ -29,6 +32,15 @@ from posthog.utils import generate_cache_key, get_safe_cache
 
 WebQueryNode = Union[WebOverviewQuery, WebTopClicksQuery, WebStatsTableQuery]
 
+# Event properties that are dimensions of the `web_stats_hourly` rollup, and the columns they are stored in
+WEB_STATS_HOURLY_PROPERTY_COLUMNS = {
+    "$pathname": "pathname",
+    "$referring_domain": "referring_domain",
+    "utm_source": "utm_source",
+    "utm_medium": "utm_medium",
+    "utm_campaign": "utm_campaign",
+}
+
 
 class WebAnalyticsQueryRunner(QueryRunner, ABC):
     query: WebQueryNode
@@ -166,13 +178,63 @@ class WebAnalyticsQueryRunner(QueryRunner, ABC):
 
         return refresh_frequency
 
+    @cached_property
+    def use_rollups(self) -> bool:
+        """
+        Whether this query can be answered from the hourly `web_stats_hourly` rollup instead of the raw events and
+        sessions tables. Requires the `useWebAnalyticsRollups` modifier, a query shape the runner can answer from the
+        rollup, persons as they were at ingestion, filters on rollup dimensions only, and a date range that doesn't cut
+        through an hour.
+        """
+        if not self.modifiers.useWebAnalyticsRollups or not self._supports_rollups():
+            return False
+
+        # The rollup counts the person ids events were ingested with. The other modes resolve persons at query time,
+        # through distinct id mappings or overrides, which differ from those once persons are merged.
+        if self.modifiers.personsOnEventsMode != PersonsOnEventsMode.PERSON_ID_NO_OVERRIDE_PROPERTIES_ON_EVENTS:
+            return False
+
+        for p in self.query.properties + self._test_account_filters:
+            if get_property_type(p) != "event" or get_property_key(p) not in WEB_STATS_HOURLY_PROPERTY_COLUMNS:
+                return False
+
+        date_from = self.query_date_range.date_from().astimezone(ZoneInfo("UTC"))
+        date_to = self.query_date_range.date_to().astimezone(ZoneInfo("UTC"))
+        if not _is_start_of_hour(date_from):
+            return False
+        # The last hour is included as a whole. That's only correct if the range ends on (or a moment before) the end of
+        # that hour, or if the rest of the hour hasn't happened yet.
+        return (
+            _is_start_of_hour(date_to)
+            or _is_start_of_hour(date_to + timedelta(microseconds=1))
+            or date_to >= self.query_date_range.now_with_timezone
+        )
+
+    def _supports_rollups(self) -> bool:
+        """Overridden by runners that implement a query against the rollup for (some of) their queries."""
+        return False
+
+    def rollups_where(self) -> ast.Expr:
+        properties = [
+            parse_expr(
+                "web_stats_hourly.hour >= {date_from} AND web_stats_hourly.hour < {date_to}",
+                placeholders={
+                    "date_from": self.query_date_range.date_from_as_hogql(),
+                    "date_to": self.query_date_range.date_to_as_hogql(),
+                },
+            ),
+            *self.query.properties,
+            *self._test_account_filters,
+        ]
+        return WebStatsHourlyPropertyReplacer().visit(property_to_expr(properties, self.team, scope="event"))
+
     def _sample_rate_cache_key(self) -> str:
         return generate_cache_key(
             f"web_analytics_sample_rate_{self.query.dateRange.model_dump_json() if self.query.dateRange else None}_{self.team.pk}_{self.team.timezone}"
         )
 
     def _get_or_calculate_sample_ratio(self) -> SamplingRate:
-        if not self.query.sampling or not self.query.sampling.enabled:
+        if not self.query.sampling or not self.query.sampling.enabled or self.use_rollups:
             return SamplingRate(numerator=1)
         if self.query.sampling.forceSamplingRate:
             return self.query.sampling.forceSamplingRate
@@ -260,5 +322,33 @@ def _sample_rate_from_count(count: int) -> SamplingRate:
     return SamplingRate(numerator=1)
 
 
+def _is_start_of_hour(dt: datetime) -> bool:
+    return dt.minute == 0 and dt.second == 0 and dt.microsecond == 0
+
+
+def web_stats_hourly_property(key: str) -> ast.Expr:
+    # missing properties are stored as empty strings in the rollup, and are null on events
+    return ast.Call(
+        name="nullIf",
+        args=[
+            ast.Field(chain=["web_stats_hourly", WEB_STATS_HOURLY_PROPERTY_COLUMNS[key]]),
+            ast.Constant(value=""),
+        ],
+    )
+
+
+class WebStatsHourlyPropertyReplacer(CloningVisitor):
+    """Points event property accesses at the matching dimension columns of the `web_stats_hourly` rollup."""
+
+    def visit_field(self, node: ast.Field):
+        if (
+            len(node.chain) == 2
+            and node.chain[0] == "properties"
+            and node.chain[1] in WEB_STATS_HOURLY_PROPERTY_COLUMNS
+        ):
+            return web_stats_hourly_property(str(node.chain[1]))
+        return super().visit_field(node)
+
+
 def map_columns(results, mapper: dict[int, typing.Callable]):
     return [[mapper[i](data) if i in mapper else data for i, data in enumerate(row)] for row in results]
@@ -0,0 +1,244 @@
+import cProfile
+import io
+import json
+import pstats
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Optional
+from unittest import mock
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posthog.hogql.context import HogQLContext
+from posthog.hogql.database.database import create_core_hogql_database
+from posthog.hogql.modifiers import set_default_modifier_values
+from posthog.hogql.parser import parse_select
+from posthog.hogql.printer import prepare_ast_for_printing, print_prepared_ast
+from posthog.hogql.timings import HogQLTimings
+from posthog.models.property_definition import PropertyDefinition
+from posthog.schema import HogQLQueryModifiers, PersonsOnEventsMode
+
+# Not a real team, only used to key the in-process caches of the compiler
+SNAPSHOT_TEAM_ID = -1
+
+# pstats function key: (file name, line number, function name)
+FunctionKey = tuple[str, int, str]
+
+# Call paths that took less than this are left out of the folded stacks, as their number grows exponentially with depth
+MIN_STACK_MICROSECONDS = 10
+
+
+def build_schema_snapshot(team) -> dict[str, Any]:
+    """
+    Everything compiling HogQL reads about a team apart from the data warehouse: its settings, property types and the
+    materialized columns of the instance. Needs Postgres and ClickHouse, compiling against the snapshot needs neither.
+    """
+    from ee.clickhouse.materialized_columns.columns import get_materialized_columns
+    from posthog.hogql.query import create_default_modifiers_for_team
+    from posthog.models import GroupTypeMapping
+
+    property_types: dict[str, dict[str, Optional[str]]] = {"event": {}, "person": {}}
+    for definition_type, group_type_index, name, property_type in PropertyDefinition.objects.filter(
+        team=team, property_type__isnull=False
+    ).values_list("type", "group_type_index", "name", "property_type"):
+        if definition_type == PropertyDefinition.Type.EVENT:
+            property_types["event"][name] = property_type
+        elif definition_type == PropertyDefinition.Type.PERSON:
+            property_types["person"][name] = property_type
+        elif definition_type == PropertyDefinition.Type.GROUP:
+            property_types.setdefault(f"group_{group_type_index}", {})[name] = property_type
+
+    return {
+        "timezone": team.timezone,
+        "week_start_day": team.week_start_day,
+        "modifiers": create_default_modifiers_for_team(team).model_dump(exclude_none=True),
+        "group_types": {
+            mapping.group_type: mapping.group_type_index for mapping in GroupTypeMapping.objects.filter(team=team)
+        },
+        "property_types": property_types,
+        "materialized_columns": {
+            table: [[property, column, name] for (property, column), name in get_materialized_columns(table).items()]
+            for table in ("events", "person", "groups")
+        },
+    }
+
+
+@contextmanager
+def schema_snapshot_lookups(snapshot: dict[str, Any]) -> Iterator[None]:
+    """Answers the property type and materialized column lookups of the compiler from the snapshot."""
+    property_types = snapshot.get("property_types", {})
+    materialized_columns = {
+        table: {(property, column): name for property, column, name in columns}
+        for table, columns in snapshot.get("materialized_columns", {}).items()
+    }
+
+    def get_property_types(team_id, keys):
+        types: dict[Any, Optional[str]] = {}
+        for key in keys:
+            definition_type, group_type_index, name = key
+            if definition_type == PropertyDefinition.Type.EVENT:
+                types[key] = property_types.get("event", {}).get(name)
+            elif definition_type == PropertyDefinition.Type.PERSON:
+                types[key] = property_types.get("person", {}).get(name)
+            else:
+                types[key] = property_types.get(f"group_{group_type_index}", {}).get(name)
+        return types
+
+    with (
+        mock.patch("posthog.hogql.transforms.property_types.get_property_types", side_effect=get_property_types),
+        mock.patch(
+            "ee.clickhouse.materialized_columns.columns.get_materialized_columns",
+            side_effect=lambda table: materialized_columns.get(table, {}),
+        ),
+    ):
+        yield
+
+
+def get_modifiers(query: dict[str, Any], snapshot: dict[str, Any]) -> HogQLQueryModifiers:
+    from posthog.models import Team
+
+    modifiers = HogQLQueryModifiers.model_validate(
+        {
+            "personsOnEventsMode": PersonsOnEventsMode.DISABLED,
+            **snapshot.get("modifiers", {}),
+            **query.get("modifiers", {}),
+        }
+    )
+    # The persons on events mode is set, which is the only default read from the team
+    set_default_modifier_values(modifiers, Team())
+    return modifiers
+
+
+def compile_query(
+    query: dict[str, Any], snapshot: dict[str, Any], modifiers: HogQLQueryModifiers, timings: HogQLTimings
+) -> str:
+    """Compiles a serialized HogQLQuery to ClickHouse SQL against the snapshot, measuring every stage in `timings`."""
+    with timings.measure("create_hogql_database"):
+        database = create_core_hogql_database(
+            timezone=snapshot.get("timezone"),
+            week_start_day=snapshot.get("week_start_day"),
+            modifiers=modifiers,
+            group_types=snapshot.get("group_types", {}),
+        )
+    context = HogQLContext(
+        team_id=SNAPSHOT_TEAM_ID,
+        enable_select_queries=True,
+        modifiers=modifiers.model_copy(),
+        timings=timings,
+        database=database,
+    )
+
+    with timings.measure("parse"):
+        node = parse_select(query["query"])
+    prepared_ast = prepare_ast_for_printing(node, context=context, dialect="clickhouse")
+    if prepared_ast is None:
+        return ""
+    return print_prepared_ast(prepared_ast, context=context, dialect="clickhouse")
+
+
+def collapsed_stacks(stats: pstats.Stats) -> dict[str, int]:
+    """
+    Folded stacks with the microseconds spent in them, as read by flamegraph.pl and speedscope. cProfile only records
+    callers and callees, so the time of a function called from several places is split between them by how much time
+    each call site spent in it.
+    """
+    entries: dict[FunctionKey, Any] = stats.stats  # type: ignore[attr-defined]
+    callees: dict[FunctionKey, list[FunctionKey]] = {}
+    for function, (_, _, _, _, callers) in entries.items():
+        for caller in callers:
+            callees.setdefault(caller, []).append(function)
+
+    def label(function: FunctionKey) -> str:
+        file_name, line, name = function
+        return f"{name} ({Path(file_name).name}:{line})".replace(";", ":")
+
+    stacks: dict[str, int] = {}
+
+    def walk(function: FunctionKey, stack: list[str], share: float) -> None:
+        total_time = entries[function][2]
+        self_time = int(total_time * share * 1_000_000)
+        if self_time > 0:
+            key = ";".join(stack)
+            stacks[key] = stacks.get(key, 0) + self_time
+        for callee in callees.get(function, []):
+            callee_label = label(callee)
+            if callee_label in stack:
+                continue
+            callee_cumulative_time = entries[callee][3]
+            edge_cumulative_time = entries[callee][4][function][3]
+            if callee_cumulative_time > 0 and share * edge_cumulative_time * 1_000_000 >= MIN_STACK_MICROSECONDS:
+                walk(callee, [*stack, callee_label], share * edge_cumulative_time / callee_cumulative_time)
+
+    for function, (_, _, _, _, callers) in entries.items():
+        if not callers:
+            walk(function, [label(function)], 1.0)
+
+    return stacks
+
+
+def load_fixtures(paths: list[str]) -> dict[str, dict[str, Any]]:
+    fixtures: dict[str, dict[str, Any]] = {}
+    for path in map(Path, paths):
+        for file in sorted(path.glob("*.json")) if path.is_dir() else [path]:
+            fixture = json.loads(file.read_text())
+            if fixture.get("kind") != "HogQLQuery":
+                raise CommandError(f"{file} is not a serialized HogQLQuery")
+            fixtures[file.stem] = fixture
+    return fixtures
+
+
+class Command(BaseCommand):
+    help = (
+        "Profile compiling HogQL queries to ClickHouse SQL without running them. Needs neither Postgres nor ClickHouse, "
+        "the team is read from a schema snapshot, which --dump-schema writes for an existing team."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("fixtures", nargs="*", help="Serialized HogQLQuery JSON files, or directories of them")
+        parser.add_argument("--schema", help="Schema snapshot to compile against, by default an empty team")
+        parser.add_argument("--dump-schema", type=int, metavar="TEAM_ID", help="Write the schema snapshot of a team")
+        parser.add_argument("--iterations", type=int, default=10, help="Times to compile every query")
+        parser.add_argument("--profile-output", help="Where to write the cProfile stats, e.g. for snakeviz")
+        parser.add_argument("--collapsed-output", help="Where to write folded stacks, e.g. for flamegraph.pl")
+        parser.add_argument("--top", type=int, default=30, help="Functions to print by cumulative time")
+
+    def handle(self, *args, **options):
+        if options["dump_schema"] is not None:
+            from posthog.models import Team
+
+            snapshot = build_schema_snapshot(Team.objects.get(pk=options["dump_schema"]))
+            self.stdout.write(json.dumps(snapshot, indent=2))
+            return
+
+        fixtures = load_fixtures(options["fixtures"])
+        if not fixtures:
+            raise CommandError("No fixtures to compile")
+        snapshot = json.loads(Path(options["schema"]).read_text()) if options["schema"] else {}
+        iterations = options["iterations"]
+
+        profile = cProfile.Profile()
+        with schema_snapshot_lookups(snapshot):
+            for name, query in fixtures.items():
+                modifiers = get_modifiers(query, snapshot)
+                timings = HogQLTimings()
+                for _ in range(iterations):
+                    profile.enable()
+                    compile_query(query, snapshot, modifiers, timings)
+                    profile.disable()
+
+                self.stdout.write(f"{name}:")
+                for key, seconds in timings.timings.items():
+                    self.stdout.write(f"  {key:<50} {seconds / iterations * 1000:>10.3f} ms")
+
+        stream = io.StringIO()
+        stats = pstats.Stats(profile, stream=stream)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(options["top"])
+        self.stdout.write(stream.getvalue())
+
+        if options["profile_output"]:
+            stats.dump_stats(options["profile_output"])
+        if options["collapsed_output"]:
+            with open(options["collapsed_output"], "w") as file:
+                for stack, microseconds in collapsed_stacks(stats).items():
+                    file.write(f"{stack} {microseconds}\n")
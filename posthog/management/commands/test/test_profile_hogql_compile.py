@@ -0,0 +1,62 @@
+import cProfile
+import pstats
+
+from django.test import SimpleTestCase
+
+from posthog.hogql.timings import HogQLTimings
+from posthog.management.commands.profile_hogql_compile import (
+    collapsed_stacks,
+    compile_query,
+    get_modifiers,
+    schema_snapshot_lookups,
+)
+
+SNAPSHOT = {
+    "timezone": "Europe/Berlin",
+    "property_types": {"event": {"$screen_width": "Numeric"}, "person": {"email": "String"}},
+    "materialized_columns": {"events": [["$browser", "properties", "mat_$browser"]]},
+    "group_types": {"organization": 0},
+}
+
+QUERY = {
+    "kind": "HogQLQuery",
+    "query": "SELECT properties.$browser, properties.$screen_width, person.properties.email, organization.properties.name FROM events",
+}
+
+
+class TestProfileHogQLCompile(SimpleTestCase):
+    def test_compiles_against_snapshot(self):
+        timings = HogQLTimings()
+
+        with schema_snapshot_lookups(SNAPSHOT):
+            sql = compile_query(QUERY, SNAPSHOT, get_modifiers(QUERY, SNAPSHOT), timings)
+
+        self.assertIn("events.`mat_$browser`", sql)
+        self.assertIn("accurateCastOrNull(", sql)
+        self.assertIn("group_0", sql)
+        self.assertEqual(
+            list(timings.timings.keys()),
+            [
+                "./create_hogql_database",
+                "./parse",
+                "./resolve_types",
+                "./resolve_property_types",
+                "./resolve_lazy_tables",
+                "./swap_properties",
+                "./printer",
+            ],
+        )
+
+    def test_collapsed_stacks(self):
+        profile = cProfile.Profile()
+        with schema_snapshot_lookups(SNAPSHOT):
+            profile.enable()
+            for _ in range(3):
+                compile_query(QUERY, SNAPSHOT, get_modifiers(QUERY, SNAPSHOT), HogQLTimings())
+            profile.disable()
+
+        stacks = collapsed_stacks(pstats.Stats(profile))
+
+        self.assertTrue(stacks)
+        self.assertTrue(any("print_prepared_ast (printer.py" in stack for stack in stacks))
+        self.assertTrue(all(microseconds > 0 for microseconds in stacks.values()))
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.14 on 2024-07-30 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("posthog", "0452_organization_logo"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="datawarehousetable",
+            name="file_stats",
+            field=models.JSONField(
+                blank=True,
+                help_text="Min and max values of the numeric and temporal columns per file of the current version of a Delta table",
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.14 on 2024-07-31 09:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("posthog", "0453_datawarehousetable_file_stats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="datawarehousesavedquery",
+            name="materialization_interval",
+            field=models.DurationField(
+                blank=True,
+                help_text="How often to materialize the query into parquet files. Not materialized if unset.",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="datawarehousesavedquery",
+            name="materialization_state",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                help_text="Location and extent of the materialized parquet files, see `materialize_saved_query`",
+            ),
+        ),
+        migrations.AddField(
+            model_name="datawarehousesavedquery",
+            name="materialization_time_column",
+            field=models.CharField(
+                blank=True,
+                help_text="Column the query only ever appends rows by, for refreshing the materialization incrementally",
+                max_length=400,
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="datawarehousesavedquery",
+            name="materialized_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -42,6 +42,7 @@ from .filters import Filter, RetentionFilter
 from .group import Group
 from .group_type_mapping import GroupTypeMapping
 from .hog_functions import HogFunction
+from . import hogql_schema  # noqa: F401 (versions the HogQL schema of teams on writes)
 from .insight import Insight, InsightViewed
 from .insight_caching_state import InsightCachingState
 from .instance_setting import InstanceSetting
@@ -1,8 +1,9 @@
-from datetime import timedelta, datetime, time
-from typing import Optional, Union
+from datetime import timedelta, datetime
+from typing import Optional, Union, cast
 from zoneinfo import ZoneInfo
 
 from dateutil.parser import isoparse
+from django.core.cache import cache
 from django.utils.timezone import now
 
 from posthog.api.utils import get_pk_or_uuid
@@ -18,7 +19,17 @@ from posthog.models.event.sql import (
 from posthog.models.person.person import get_distinct_ids_for_subquery
 from posthog.models.property.util import parse_prop_grouped_clauses
 from posthog.queries.insight import insight_query_with_columns
-from posthog.utils import relative_date_parse
+from posthog.utils import get_safe_cache, relative_date_parse
+
+# Without an estimate of the event density of the team, events are first queried in the last day
+EVENTS_LIST_DEFAULT_WINDOW = timedelta(days=1)
+EVENTS_LIST_MIN_WINDOW = timedelta(minutes=1)
+# Windows wider than this scan about as much as not having a lower bound, the query then has none
+EVENTS_LIST_MAX_WINDOW = timedelta(days=90)
+EVENTS_LIST_WINDOW_GROWTH_FACTOR = 8
+# Windows estimated from the event density are widened by this, as the density varies over the day
+EVENTS_LIST_WINDOW_MARGIN = 2
+EVENTS_LIST_DENSITY_CACHE_TTL = 60 * 60 * 24
 
 
 def parse_timestamp(timestamp: str, tzinfo: ZoneInfo) -> datetime:
@@ -61,50 +72,31 @@ def query_events_list(
     request_get_query_dict: dict,
     order_by: list[str],
     action_id: Optional[str],
-    unbounded_date_from: bool = False,
     limit: int = DEFAULT_RETURNED_ROWS,
     offset: int = 0,
 ) -> list:
+    """
+    Returns up to `limit + 1` events, the extra one telling whether there's a next page.
+
+    Newest first, events are queried in windows of time before `before`, starting with a window expected to contain
+    enough events given the event density of the team, see `get_events_list_window`. Windows widen exponentially until
+    enough events are found, so teams with few events don't scan their whole history for the first events, and teams
+    with many events only scan the last minutes.
+    """
     # Note: This code is inefficient and problematic, see https://github.com/PostHog/posthog/issues/13485 for details.
     # To isolate its impact from rest of the queries its queries are run on different nodes as part of "offline" workloads.
     hogql_context = HogQLContext(within_non_hogql_query=True, team_id=team.pk, enable_select_queries=True)
 
-    limit += 1
-    limit_sql = "LIMIT %(limit)s"
-
-    if offset > 0:
-        limit_sql += " OFFSET %(offset)s"
-
     order = "DESC" if len(order_by) == 1 and order_by[0] == "-timestamp" else "ASC"
 
     if request_get_query_dict.get("before"):
-        request_get_query_dict["before"] = parse_timestamp(request_get_query_dict["before"], team.timezone_info)
+        before = parse_timestamp(request_get_query_dict["before"], team.timezone_info)
     else:
-        request_get_query_dict["before"] = now() + timedelta(seconds=5)
-
-    if request_get_query_dict.get("after"):
-        request_get_query_dict["after"] = parse_timestamp(request_get_query_dict["after"], team.timezone_info)
-
-    if (
-        not unbounded_date_from
-        and order == "DESC"
-        and (
-            not request_get_query_dict.get("after")
-            or request_get_query_dict["after"].date() != request_get_query_dict["before"].date()
-        )
-    ):
-        # If this is the first try, and after is not the same day as before, only load the current day, regardless of whether "after" is specified to reduce the amount of data we load
-        request_get_query_dict["after"] = datetime.combine(request_get_query_dict["before"], time.min)
+        before = now() + timedelta(seconds=5)
 
-    request_get_query_dict["before"] = request_get_query_dict["before"].strftime("%Y-%m-%d %H:%M:%S.%f")
+    after: Optional[datetime] = None
     if request_get_query_dict.get("after"):
-        request_get_query_dict["after"] = request_get_query_dict["after"].strftime("%Y-%m-%d %H:%M:%S.%f")
-
-    conditions, condition_params = parse_request_params(
-        request_get_query_dict,
-        team,
-        tzinfo=team.timezone_info,
-    )
+        after = parse_timestamp(request_get_query_dict["after"], team.timezone_info)
 
     prop_filters, prop_filter_params = parse_prop_grouped_clauses(
         team_id=team.pk,
@@ -125,6 +117,127 @@ def query_events_list(
         prop_filters += " AND {}".format(action_query)
         prop_filter_params = {**prop_filter_params, **params}
 
+    def query_window(window_after: Optional[datetime], window_before: datetime, limit: int, offset: int) -> list:
+        return _query_events(
+            team=team,
+            request_get_query_dict={**request_get_query_dict, "after": window_after, "before": window_before},
+            order=order,
+            prop_filters=prop_filters,
+            prop_filter_params={**prop_filter_params, **hogql_context.values},
+            limit=limit,
+            offset=offset,
+        )
+
+    if order != "DESC":
+        return query_window(after, before, limit + 1, offset)
+
+    # the rows of all windows together, newest first
+    needed_rows = offset + limit + 1
+    results: list = []
+    window_before = before
+    window = get_events_list_window(team.pk, needed_rows)
+    while True:
+        window_after = window_before - window if window is not None else None
+        is_last_window = window_after is None or (after is not None and _wall_clock(window_after) <= _wall_clock(after))
+        if is_last_window:
+            window_after = after
+
+        results += query_window(window_after, window_before, needed_rows - len(results), 0)
+        if len(results) >= needed_rows or is_last_window:
+            break
+
+        # events are after `window_after`, so events at exactly that time are in the next window
+        window_before = cast(datetime, window_after) + timedelta(microseconds=1)
+        window = window * EVENTS_LIST_WINDOW_GROWTH_FACTOR if window is not None else None
+        if window is not None and window > EVENTS_LIST_MAX_WINDOW:
+            window = None
+
+    if _is_unfiltered(request_get_query_dict, prop_filters):
+        _update_event_density(team.pk, results, needed_rows, before, window_after)
+
+    return results[offset:]
+
+
+def get_events_list_window(team_id: int, needed_rows: int) -> Optional[timedelta]:
+    """
+    The window of time before `before` to first query for events, which should contain `needed_rows` events given the
+    event density of the team. None if the first query should have no lower bound at all.
+    """
+    density = get_safe_cache(events_list_density_key(team_id))
+    if density is None:
+        return EVENTS_LIST_DEFAULT_WINDOW
+    if density <= 0:
+        return None
+
+    window = timedelta(seconds=needed_rows / density) * EVENTS_LIST_WINDOW_MARGIN
+    if window > EVENTS_LIST_MAX_WINDOW:
+        return None
+    return max(window, EVENTS_LIST_MIN_WINDOW)
+
+
+def events_list_density_key(team_id: int) -> str:
+    return f"events_list_density_{team_id}"
+
+
+def _is_unfiltered(request_get_query_dict: dict, prop_filters: str) -> bool:
+    # filtered queries find fewer events per time than the team has, their windows widen until they find enough
+    return prop_filters == "" and not any(
+        request_get_query_dict.get(key) for key in ("person_id", "distinct_id", "event")
+    )
+
+
+def _update_event_density(
+    team_id: int, results: list, needed_rows: int, before: datetime, last_window_after: Optional[datetime]
+) -> None:
+    if len(results) >= needed_rows:
+        oldest: Optional[datetime] = results[needed_rows - 1]["timestamp"]
+    else:
+        # all events after `last_window_after` were found
+        oldest = last_window_after or (results[-1]["timestamp"] if results else None)
+
+    if oldest is None:
+        density = 0.0
+    else:
+        seconds = (_wall_clock(before) - _wall_clock(oldest)).total_seconds()
+        if seconds <= 0:
+            return
+        density = len(results[:needed_rows]) / seconds
+
+    try:
+        cache.set(events_list_density_key(team_id), density, timeout=EVENTS_LIST_DENSITY_CACHE_TTL)
+    except Exception:
+        pass
+
+
+def _wall_clock(timestamp: datetime) -> datetime:
+    # timestamps are passed to ClickHouse without their timezone
+    return timestamp.replace(tzinfo=None)
+
+
+def _query_events(
+    team: Team,
+    request_get_query_dict: dict,
+    order: str,
+    prop_filters: str,
+    prop_filter_params: dict,
+    limit: int,
+    offset: int,
+) -> list:
+    limit_sql = "LIMIT %(limit)s"
+
+    if offset > 0:
+        limit_sql += " OFFSET %(offset)s"
+
+    request_get_query_dict["before"] = request_get_query_dict["before"].strftime("%Y-%m-%d %H:%M:%S.%f")
+    if request_get_query_dict.get("after"):
+        request_get_query_dict["after"] = request_get_query_dict["after"].strftime("%Y-%m-%d %H:%M:%S.%f")
+
+    conditions, condition_params = parse_request_params(
+        request_get_query_dict,
+        team,
+        tzinfo=team.timezone_info,
+    )
+
     if prop_filters != "":
         return insight_query_with_columns(
             SELECT_EVENT_BY_TEAM_AND_CONDITIONS_FILTERS_SQL.format(
@@ -139,7 +252,6 @@ def query_events_list(
                 "offset": offset,
                 **condition_params,
                 **prop_filter_params,
-                **hogql_context.values,
             },
             query_type="events_list",
             workload=Workload.OFFLINE,
@@ -153,7 +265,7 @@ def query_events_list(
                 "limit": limit,
                 "offset": offset,
                 **condition_params,
-                **hogql_context.values,
+                **prop_filter_params,
             },
             query_type="events_list",
             workload=Workload.OFFLINE,
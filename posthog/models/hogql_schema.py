@@ -0,0 +1,93 @@
+import hashlib
+from datetime import datetime
+from typing import Optional
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from posthog.models.group_type_mapping import GroupTypeMapping
+from posthog.models.signals import mutable_receiver
+from posthog.models.team import Team
+from posthog.utils import get_safe_cache
+from posthog.warehouse.models import (
+    DataWarehouseCredential,
+    DataWarehouseJoin,
+    DataWarehouseSavedQuery,
+    DataWarehouseTable,
+    ExternalDataSource,
+)
+
+
+def hogql_schema_version_key(team_id: int) -> str:
+    return f"hogql_schema_version_{team_id}"
+
+
+def get_hogql_schema_version(team_id: int) -> Optional[str]:
+    """
+    Changes whenever anything HogQL queries of the team are compiled against is written, i.e. the team itself (timezone,
+    person-on-events settings, ...), its group types and its data warehouse. Property definitions are versioned
+    separately, see `get_property_definition_types_version`.
+    """
+    return get_safe_cache(hogql_schema_version_key(team_id))
+
+
+def invalidate_hogql_schema(team_id: int) -> None:
+    cache.set(hogql_schema_version_key(team_id), uuid4().hex, timeout=None)
+
+
+# Fields of saved queries written by refreshing their materialization, see `materialize_saved_query`
+SAVED_QUERY_MATERIALIZATION_FIELDS = frozenset({"materialization_state", "materialized_at"})
+
+
+def saved_query_materializations_key(team_id: int) -> str:
+    return f"hogql_saved_query_materializations_{team_id}"
+
+
+def get_saved_query_materializations_version(team_id: int) -> Optional[str]:
+    """
+    Changes whenever queries of the team's views switch between reading the materialized files and running the query,
+    i.e. when a materialization is refreshed into new files, becomes fresh or goes stale. Refreshes don't change the
+    HogQL schema version, as that would throw away every compiled query of the team every few minutes.
+    """
+    key = saved_query_materializations_key(team_id)
+    materializations: Optional[list[tuple[str, str, datetime]]] = get_safe_cache(key)
+    if materializations is None:
+        materializations = [
+            (str(saved_query.pk), saved_query.materialization_state["url_pattern"], fresh_until)
+            for saved_query in DataWarehouseSavedQuery.objects.filter(
+                team_id=team_id, materialization_interval__isnull=False
+            ).exclude(deleted=True)
+            if (fresh_until := saved_query.materialization_fresh_until) is not None
+        ]
+        cache.set(key, materializations, timeout=None)
+
+    now = timezone.now()
+    fresh = sorted((saved_query_id, url) for saved_query_id, url, fresh_until in materializations if now <= fresh_until)
+    if not fresh:
+        return None
+    return hashlib.sha256(repr(fresh).encode("utf-8")).hexdigest()
+
+
+@mutable_receiver([post_save, post_delete], sender=Team)
+def team_hogql_schema_changed(sender, instance: Team, **kwargs):
+    invalidate_hogql_schema(instance.pk)
+
+
+@mutable_receiver([post_save, post_delete], sender=DataWarehouseSavedQuery)
+def saved_query_hogql_schema_changed(sender, instance: DataWarehouseSavedQuery, update_fields=None, **kwargs):
+    cache.delete(saved_query_materializations_key(instance.team_id))
+    if update_fields is not None and SAVED_QUERY_MATERIALIZATION_FIELDS.issuperset(update_fields):
+        # Only which files queries read changed, see `get_saved_query_materializations_version`
+        return
+    invalidate_hogql_schema(instance.team_id)
+
+
+@mutable_receiver([post_save, post_delete], sender=GroupTypeMapping)
+@mutable_receiver([post_save, post_delete], sender=DataWarehouseTable)
+@mutable_receiver([post_save, post_delete], sender=DataWarehouseJoin)
+@mutable_receiver([post_save, post_delete], sender=DataWarehouseCredential)
+@mutable_receiver([post_save, post_delete], sender=ExternalDataSource)
+def team_resource_hogql_schema_changed(sender, instance, **kwargs):
+    invalidate_hogql_schema(instance.team_id)
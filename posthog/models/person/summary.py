@@ -0,0 +1,186 @@
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Literal, Optional
+from uuid import UUID
+
+import orjson
+from django.conf import settings
+from django.db import connection
+from prometheus_client import Counter
+
+from posthog.models.person.person import Person
+
+PERSON_SUMMARY_CACHE_LOOKUPS_COUNTER = Counter(
+    "person_summary_cache_lookups",
+    "Person summary lookups for enriching events, actors and recordings, by whether they were served from the in-process cache.",
+    labelnames=["result"],
+)
+
+# Persons are looked up by either of these
+LookupKind = Literal["distinct_id", "uuid"]
+
+# (team id, lookup kind, distinct id or person uuid)
+PersonSummaryKey = tuple[int, LookupKind, str]
+
+SELECT_PERSON_SUMMARIES_SQL = """SELECT posthog_person.id, posthog_person.uuid, posthog_person.properties, posthog_person.is_identified, posthog_person.created_at,
+    ARRAY(
+        SELECT posthog_persondistinctid.distinct_id
+        FROM posthog_persondistinctid
+        WHERE posthog_persondistinctid.person_id = posthog_person.id AND posthog_persondistinctid.team_id = %(team_id)s
+        ORDER BY posthog_persondistinctid.id
+    )
+FROM posthog_person
+WHERE posthog_person.team_id = %(team_id)s AND {condition}
+"""
+
+BY_DISTINCT_IDS_CONDITION = """posthog_person.id IN (
+    SELECT posthog_persondistinctid.person_id
+    FROM posthog_persondistinctid
+    WHERE posthog_persondistinctid.team_id = %(team_id)s AND posthog_persondistinctid.distinct_id = ANY(%(keys)s)
+)"""
+
+BY_UUIDS_CONDITION = "posthog_person.uuid = ANY(%(keys)s::uuid[])"
+
+
+@dataclass(frozen=True)
+class PersonSummary:
+    """The columns of a person needed to show it next to events, actors and recordings."""
+
+    id: int
+    uuid: UUID
+    team_id: int
+    properties: dict
+    is_identified: bool
+    created_at: datetime
+    # All distinct ids of the person, in the order they were added
+    distinct_ids: list[str]
+
+    def to_person(self, distinct_ids: Optional[list[str]] = None) -> Person:
+        """An unsaved `Person` for serializers that need a model instance, optionally with only some distinct ids."""
+        person = Person(
+            id=self.id,
+            uuid=self.uuid,
+            team_id=self.team_id,
+            properties=self.properties,
+            is_identified=self.is_identified,
+            created_at=self.created_at,
+        )
+        person._distinct_ids = distinct_ids if distinct_ids is not None else self.distinct_ids
+        return person
+
+
+class _PersonSummaryCache:
+    """
+    LRU of person summaries, keyed by team so that a lookup can never return a person of another team. Persons that
+    don't exist are cached as `None` too, so that events of anonymous users don't hit Postgres on every page.
+    """
+
+    def __init__(self) -> None:
+        self._entries: OrderedDict[PersonSummaryKey, tuple[float, Optional[PersonSummary]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: Iterable[PersonSummaryKey]) -> dict[PersonSummaryKey, Optional[PersonSummary]]:
+        now = time.monotonic()
+        found: dict[PersonSummaryKey, Optional[PersonSummary]] = {}
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                expires_at, summary = entry
+                if expires_at <= now:
+                    del self._entries[key]
+                    continue
+                self._entries.move_to_end(key)
+                found[key] = summary
+        return found
+
+    def set_many(self, summaries: dict[PersonSummaryKey, Optional[PersonSummary]], ttl: int, max_entries: int) -> None:
+        # Caching a lookup that doesn't fit would only evict everyone else, e.g. for exports
+        if len(summaries) > max_entries:
+            return
+        expires_at = time.monotonic() + ttl
+        with self._lock:
+            for key, summary in summaries.items():
+                self._entries[key] = (expires_at, summary)
+                self._entries.move_to_end(key)
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_person_summary_cache = _PersonSummaryCache()
+
+
+def get_person_summaries_by_distinct_ids(team_id: int, distinct_ids: Iterable[str]) -> dict[str, PersonSummary]:
+    """
+    Summaries of the persons of the given distinct ids, by distinct id. Distinct ids without a person are left out.
+
+    Summaries are cached in-process for `PERSON_SUMMARY_CACHE_TTL` seconds, so merges and property updates can take
+    that long to show. All persons missing from the cache are fetched with a single query.
+    """
+    return _get_person_summaries(team_id, "distinct_id", distinct_ids)
+
+
+def get_person_summaries_by_uuids(team_id: int, uuids: Iterable[str | UUID | None]) -> dict[str, PersonSummary]:
+    """Summaries of the persons with the given uuids, by uuid. Cached like `get_person_summaries_by_distinct_ids`."""
+    return _get_person_summaries(team_id, "uuid", (str(uuid) for uuid in uuids if uuid is not None))
+
+
+def _get_person_summaries(team_id: int, kind: LookupKind, values: Iterable[str]) -> dict[str, PersonSummary]:
+    keys: list[PersonSummaryKey] = [(team_id, kind, value) for value in dict.fromkeys(values)]
+    if not keys:
+        return {}
+
+    ttl = settings.PERSON_SUMMARY_CACHE_TTL
+    cached = _person_summary_cache.get_many(keys) if ttl > 0 else {}
+    missing_values = [value for _, _, value in keys if (team_id, kind, value) not in cached]
+    if len(cached) > 0:
+        PERSON_SUMMARY_CACHE_LOOKUPS_COUNTER.labels(result="hit").inc(len(cached))
+
+    fetched: dict[PersonSummaryKey, Optional[PersonSummary]] = {}
+    if missing_values:
+        PERSON_SUMMARY_CACHE_LOOKUPS_COUNTER.labels(result="miss").inc(len(missing_values))
+        fetched = dict.fromkeys(((team_id, kind, value) for value in missing_values), None)
+        for summary in _fetch_person_summaries(team_id, kind, missing_values):
+            if kind == "uuid":
+                fetched[(team_id, kind, str(summary.uuid))] = summary
+            else:
+                for distinct_id in summary.distinct_ids:
+                    if (team_id, kind, distinct_id) in fetched:
+                        fetched[(team_id, kind, distinct_id)] = summary
+        if ttl > 0:
+            _person_summary_cache.set_many(fetched, ttl, settings.PERSON_SUMMARY_CACHE_MAX_ENTRIES)
+
+    return {value: summary for (_, _, value), summary in (*cached.items(), *fetched.items()) if summary is not None}
+
+
+def _fetch_person_summaries(team_id: int, kind: LookupKind, values: list[str]) -> list[PersonSummary]:
+    # Hand written to select only the columns needed, and the distinct ids of all persons in the same query
+    condition = BY_UUIDS_CONDITION if kind == "uuid" else BY_DISTINCT_IDS_CONDITION
+    with connection.cursor() as cursor:
+        cursor.execute(
+            SELECT_PERSON_SUMMARIES_SQL.format(condition=condition),
+            {"team_id": team_id, "keys": values},
+        )
+        rows = cursor.fetchall()
+
+    return [
+        PersonSummary(
+            id=id,
+            uuid=uuid,
+            team_id=team_id,
+            properties=orjson.loads(properties) if isinstance(properties, str | bytes) else properties,
+            is_identified=is_identified,
+            created_at=created_at,
+            distinct_ids=distinct_ids,
+        )
+        for id, uuid, properties, is_identified, created_at, distinct_ids in rows
+    ]
@@ -1,10 +1,17 @@
+from typing import Optional
+from uuid import uuid4
+
 from django.contrib.postgres.indexes import GinIndex
+from django.core.cache import cache
 from django.db import models
 from django.db.models.expressions import F
 from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save
+from django.dispatch.dispatcher import receiver
 
 from posthog.models.team import Team
 from posthog.models.utils import UniqueConstraintByExpression, UUIDModel
+from posthog.utils import get_safe_cache
 
 
 class PropertyType(models.TextChoices):
@@ -109,3 +116,21 @@ class PropertyDefinition(UUIDModel):
     # This is a dynamically calculated field in api/property_definition.py. Defaults to `True` here to help serializers.
     def is_seen_on_filtered_events(self) -> None:
         return None
+
+
+def property_definition_types_version_key(team_id: int) -> str:
+    return f"property_definition_types_version_{team_id}"
+
+
+def get_property_definition_types_version(team_id: int) -> Optional[str]:
+    """Changes whenever property definitions of the team are written, so that caches of their types can be dropped."""
+    return get_safe_cache(property_definition_types_version_key(team_id))
+
+
+def invalidate_property_definition_types(team_id: int) -> None:
+    cache.set(property_definition_types_version_key(team_id), uuid4().hex, timeout=None)
+
+
+@receiver([post_save, post_delete], sender=PropertyDefinition)
+def property_definition_changed(sender, instance: PropertyDefinition, **kwargs):
+    invalidate_property_definition_types(instance.team_id)
@@ -0,0 +1,122 @@
+from django.conf import settings
+
+from posthog.clickhouse.table_engines import (
+    Distributed,
+    ReplicationScheme,
+    AggregatingMergeTree,
+)
+
+TABLE_BASE_NAME = "property_values"
+PROPERTY_VALUES_DATA_TABLE = lambda: f"sharded_{TABLE_BASE_NAME}"
+
+# Values longer than this aren't suggested, they are mostly ids, urls with query strings or serialized objects
+MAX_INDEXED_VALUE_LENGTH = 200
+
+# Only the most frequent values of a property in an hour are indexed, so that high cardinality properties don't
+# blow up the index
+INDEXED_VALUES_PER_PROPERTY = 100
+
+# Days of values to keep, property value suggestions only look at the last 7 days
+PROPERTY_VALUES_TTL_DAYS = 8
+
+TRUNCATE_PROPERTY_VALUES_TABLE_SQL = (
+    lambda: f"TRUNCATE TABLE IF EXISTS {PROPERTY_VALUES_DATA_TABLE()} ON CLUSTER '{settings.CLICKHOUSE_CLUSTER}'"
+)
+DROP_PROPERTY_VALUES_TABLE_SQL = (
+    lambda: f"DROP TABLE IF EXISTS {PROPERTY_VALUES_DATA_TABLE()} ON CLUSTER '{settings.CLICKHOUSE_CLUSTER}'"
+)
+
+# Index of the most frequent values of event properties per team, property, event and day, used to suggest values
+# for property filters without scanning the events table. It's filled hourly from the events of the last hour, see
+# `posthog.tasks.property_values`, so counts are approximate and values of the current hour are missing.
+PROPERTY_VALUES_TABLE_BASE_SQL = """
+CREATE TABLE IF NOT EXISTS {table_name} ON CLUSTER '{cluster}'
+(
+    team_id Int64,
+    property_key String,
+    value String,
+    event String,
+    day Date,
+
+    count SimpleAggregateFunction(sum, UInt64),
+    last_seen SimpleAggregateFunction(max, DateTime64(6, 'UTC'))
+) ENGINE = {engine}
+"""
+
+PROPERTY_VALUES_DATA_TABLE_ENGINE = lambda: AggregatingMergeTree(
+    TABLE_BASE_NAME, replication_scheme=ReplicationScheme.SHARDED
+)
+
+PROPERTY_VALUES_TABLE_SQL = lambda: (
+    PROPERTY_VALUES_TABLE_BASE_SQL
+    + """
+PARTITION BY toYYYYMM(day)
+ORDER BY (team_id, property_key, value, event, day)
+TTL day + INTERVAL {ttl_days} DAY
+"""
+).format(
+    table_name=PROPERTY_VALUES_DATA_TABLE(),
+    cluster=settings.CLICKHOUSE_CLUSTER,
+    engine=PROPERTY_VALUES_DATA_TABLE_ENGINE(),
+    ttl_days=PROPERTY_VALUES_TTL_DAYS,
+)
+
+# Distributed engine tables are only created if CLICKHOUSE_REPLICATED
+
+# This table is responsible for writing to sharded_property_values based on a sharding key.
+WRITABLE_PROPERTY_VALUES_TABLE_SQL = lambda: PROPERTY_VALUES_TABLE_BASE_SQL.format(
+    table_name=f"writable_{TABLE_BASE_NAME}",
+    cluster=settings.CLICKHOUSE_CLUSTER,
+    engine=Distributed(
+        data_table=PROPERTY_VALUES_DATA_TABLE(),
+        sharding_key="cityHash64(team_id, property_key)",
+    ),
+)
+
+# This table is responsible for reading from property_values on a cluster setting
+DISTRIBUTED_PROPERTY_VALUES_TABLE_SQL = lambda: PROPERTY_VALUES_TABLE_BASE_SQL.format(
+    table_name=TABLE_BASE_NAME,
+    cluster=settings.CLICKHOUSE_CLUSTER,
+    engine=Distributed(
+        data_table=PROPERTY_VALUES_DATA_TABLE(),
+        sharding_key="cityHash64(team_id, property_key)",
+    ),
+)
+
+# Adds the most frequent values of every property of the events with a timestamp in [date_from, date_to) to the index.
+# Run this for every hour only once, or the values of the hour will be counted twice.
+INDEX_PROPERTY_VALUES_SQL = (
+    lambda: """
+INSERT INTO {database}.writable_{table_name} (team_id, property_key, value, event, day, count, last_seen)
+SELECT
+    team_id,
+    property.1 AS property_key,
+    replaceRegexpAll(property.2, '^"|"$', '') AS value,
+    event,
+    toDate(timestamp) AS day,
+    count() AS count,
+    max(timestamp) AS last_seen
+FROM {database}.events
+ARRAY JOIN JSONExtractKeysAndValuesRaw(properties) AS property
+WHERE timestamp >= %(date_from)s AND timestamp < %(date_to)s AND length(property.2) <= {max_value_length} + 2
+GROUP BY team_id, property_key, value, event, day
+ORDER BY count DESC
+LIMIT {values_per_property} BY team_id, property_key
+""".format(
+        database=settings.CLICKHOUSE_DATABASE,
+        table_name=TABLE_BASE_NAME,
+        max_value_length=MAX_INDEXED_VALUE_LENGTH,
+        values_per_property=INDEXED_VALUES_PER_PROPERTY,
+    )
+)
+
+SELECT_INDEXED_PROPERTY_VALUES_SQL = """
+SELECT value
+FROM property_values
+WHERE team_id = %(team_id)s AND property_key = %(key)s AND day >= %(date_from)s
+{event_filter}
+{value_filter}
+GROUP BY value
+ORDER BY {order_by_clause} sum(count) DESC
+LIMIT 10
+"""
@@ -0,0 +1,70 @@
+from django.test import override_settings
+
+from posthog.models import Person, Team
+from posthog.models.person.summary import (
+    _person_summary_cache,
+    get_person_summaries_by_distinct_ids,
+    get_person_summaries_by_uuids,
+)
+from posthog.test.base import BaseTest
+
+
+class TestPersonSummary(BaseTest):
+    def setUp(self):
+        super().setUp()
+        _person_summary_cache.clear()
+
+    def test_summaries_by_distinct_ids(self):
+        person = Person.objects.create(
+            team=self.team,
+            distinct_ids=["anonymous", "identified"],
+            properties={"email": "a@b.com"},
+            is_identified=True,
+        )
+
+        with self.assertNumQueries(1):
+            summaries = get_person_summaries_by_distinct_ids(self.team.pk, ["identified", "missing", "identified"])
+
+        self.assertEqual(list(summaries.keys()), ["identified"])
+        summary = summaries["identified"]
+        self.assertEqual(summary.uuid, person.uuid)
+        self.assertEqual(summary.properties, {"email": "a@b.com"})
+        self.assertTrue(summary.is_identified)
+        self.assertEqual(summary.distinct_ids, ["anonymous", "identified"])
+
+    def test_summaries_by_uuids(self):
+        person = Person.objects.create(team=self.team, distinct_ids=["1"])
+        other_team = Team.objects.create(organization=self.organization)
+        other_team_person = Person.objects.create(team=other_team, distinct_ids=["1"])
+
+        with self.assertNumQueries(1):
+            summaries = get_person_summaries_by_uuids(self.team.pk, [person.uuid, other_team_person.uuid, None])
+
+        self.assertEqual(list(summaries.keys()), [str(person.uuid)])
+        self.assertEqual(summaries[str(person.uuid)].distinct_ids, ["1"])
+
+    @override_settings(PERSON_SUMMARY_CACHE_TTL=60)
+    def test_summaries_are_cached_per_team(self):
+        person = Person.objects.create(team=self.team, distinct_ids=["1"])
+        other_team = Team.objects.create(organization=self.organization)
+        other_team_person = Person.objects.create(team=other_team, distinct_ids=["1"])
+
+        self.assertEqual(get_person_summaries_by_distinct_ids(self.team.pk, ["1", "2"])["1"].uuid, person.uuid)
+        with self.assertNumQueries(0):
+            summaries = get_person_summaries_by_distinct_ids(self.team.pk, ["1", "2"])
+        self.assertEqual(summaries["1"].uuid, person.uuid)
+        self.assertNotIn("2", summaries)
+
+        with self.assertNumQueries(1):
+            summaries = get_person_summaries_by_distinct_ids(other_team.pk, ["1"])
+        self.assertEqual(summaries["1"].uuid, other_team_person.uuid)
+
+    def test_to_person(self):
+        person = Person.objects.create(team=self.team, distinct_ids=["1", "2"], properties={"name": "Jane"})
+        summary = get_person_summaries_by_distinct_ids(self.team.pk, ["2"])["2"]
+
+        with self.assertNumQueries(0):
+            unsaved_person = summary.to_person(distinct_ids=["2"])
+            self.assertEqual(unsaved_person.pk, person.pk)
+            self.assertEqual(unsaved_person.properties, {"name": "Jane"})
+            self.assertEqual(unsaved_person.distinct_ids, ["2"])
@@ -0,0 +1,150 @@
+from django.conf import settings
+
+from posthog.clickhouse.table_engines import (
+    Distributed,
+    ReplicationScheme,
+    AggregatingMergeTree,
+)
+
+TABLE_BASE_NAME = "web_stats_hourly"
+WEB_STATS_HOURLY_DATA_TABLE = lambda: f"sharded_{TABLE_BASE_NAME}"
+
+TRUNCATE_WEB_STATS_HOURLY_TABLE_SQL = (
+    lambda: f"TRUNCATE TABLE IF EXISTS {WEB_STATS_HOURLY_DATA_TABLE()} ON CLUSTER '{settings.CLICKHOUSE_CLUSTER}'"
+)
+DROP_WEB_STATS_HOURLY_TABLE_SQL = (
+    lambda: f"DROP TABLE IF EXISTS {WEB_STATS_HOURLY_DATA_TABLE()} ON CLUSTER '{settings.CLICKHOUSE_CLUSTER}'"
+)
+DROP_WEB_STATS_HOURLY_MATERIALIZED_VIEW_SQL = (
+    lambda: f"DROP MATERIALISED VIEW IF EXISTS {TABLE_BASE_NAME}_mv ON CLUSTER '{settings.CLICKHOUSE_CLUSTER}'"
+)
+
+# Hourly rollup of $pageview events, used by web analytics to avoid scanning the raw events table for the queries it
+# can answer. Every dimension is an event property at the time of the pageview, so the rollup can be maintained at
+# insert time. Anything that depends on the whole session (bounce rate, session duration, entry/exit pages) can't be
+# answered from it, and is still queried from the events and sessions tables.
+#
+# if updating these column definitions
+# you'll need to update the explicit column definitions in the materialized view creation statement below
+WEB_STATS_HOURLY_TABLE_BASE_SQL = """
+CREATE TABLE IF NOT EXISTS {table_name} ON CLUSTER '{cluster}'
+(
+    team_id Int64,
+    hour DateTime('UTC'),
+
+    -- dimensions, missing properties are stored as empty strings
+    pathname String,
+    referring_domain String,
+    utm_source String,
+    utm_medium String,
+    utm_campaign String,
+
+    pageview_count SimpleAggregateFunction(sum, UInt64),
+    persons_uniq AggregateFunction(uniq, UUID),
+    sessions_uniq AggregateFunction(uniq, String)
+) ENGINE = {engine}
+"""
+
+WEB_STATS_HOURLY_DATA_TABLE_ENGINE = lambda: AggregatingMergeTree(
+    TABLE_BASE_NAME, replication_scheme=ReplicationScheme.SHARDED
+)
+
+WEB_STATS_HOURLY_TABLE_SQL = lambda: (
+    WEB_STATS_HOURLY_TABLE_BASE_SQL
+    + """
+PARTITION BY toYYYYMM(hour)
+ORDER BY (team_id, hour, pathname, referring_domain, utm_source, utm_medium, utm_campaign)
+"""
+).format(
+    table_name=WEB_STATS_HOURLY_DATA_TABLE(),
+    cluster=settings.CLICKHOUSE_CLUSTER,
+    engine=WEB_STATS_HOURLY_DATA_TABLE_ENGINE(),
+)
+
+
+def source_string_column(column_name: str) -> str:
+    return f"JSONExtractString(properties, '{column_name}')"
+
+
+def web_stats_hourly_select_sql(source_table: str, where: str) -> str:
+    return """
+SELECT
+    team_id,
+    toStartOfHour(timestamp) AS hour,
+    {pathname} AS pathname,
+    {referring_domain} AS referring_domain,
+    {utm_source} AS utm_source,
+    {utm_medium} AS utm_medium,
+    {utm_campaign} AS utm_campaign,
+    count() AS pageview_count,
+    uniqState(person_id) AS persons_uniq,
+    uniqState(`$session_id`) AS sessions_uniq
+FROM {database}.{source_table}
+WHERE event = '$pageview' AND {where}
+GROUP BY team_id, hour, pathname, referring_domain, utm_source, utm_medium, utm_campaign
+""".format(
+        database=settings.CLICKHOUSE_DATABASE,
+        source_table=source_table,
+        where=where,
+        pathname=source_string_column("$pathname"),
+        referring_domain=source_string_column("$referring_domain"),
+        utm_source=source_string_column("utm_source"),
+        utm_medium=source_string_column("utm_medium"),
+        utm_campaign=source_string_column("utm_campaign"),
+    )
+
+
+WEB_STATS_HOURLY_MV_SELECT_SQL = lambda: web_stats_hourly_select_sql(source_table="sharded_events", where="1")
+
+WEB_STATS_HOURLY_MV_SQL = (
+    lambda: """
+CREATE MATERIALIZED VIEW IF NOT EXISTS {table_name} ON CLUSTER '{cluster}'
+TO {database}.{target_table}
+AS
+{select_sql}
+""".format(
+        table_name=f"{TABLE_BASE_NAME}_mv",
+        target_table=f"writable_{TABLE_BASE_NAME}",
+        cluster=settings.CLICKHOUSE_CLUSTER,
+        database=settings.CLICKHOUSE_DATABASE,
+        select_sql=WEB_STATS_HOURLY_MV_SELECT_SQL(),
+    )
+)
+
+# Distributed engine tables are only created if CLICKHOUSE_REPLICATED
+
+# This table is responsible for writing to sharded_web_stats_hourly based on a sharding key.
+WRITABLE_WEB_STATS_HOURLY_TABLE_SQL = lambda: WEB_STATS_HOURLY_TABLE_BASE_SQL.format(
+    table_name=f"writable_{TABLE_BASE_NAME}",
+    cluster=settings.CLICKHOUSE_CLUSTER,
+    engine=Distributed(
+        data_table=WEB_STATS_HOURLY_DATA_TABLE(),
+        sharding_key="cityHash64(team_id, pathname)",
+    ),
+)
+
+# This table is responsible for reading from web_stats_hourly on a cluster setting
+DISTRIBUTED_WEB_STATS_HOURLY_TABLE_SQL = lambda: WEB_STATS_HOURLY_TABLE_BASE_SQL.format(
+    table_name=TABLE_BASE_NAME,
+    cluster=settings.CLICKHOUSE_CLUSTER,
+    engine=Distributed(
+        data_table=WEB_STATS_HOURLY_DATA_TABLE(),
+        sharding_key="cityHash64(team_id, pathname)",
+    ),
+)
+
+# Backfills the rollup for a team from the events table, for data that was ingested before the materialized view existed.
+# Only run this for hours that aren't covered by the materialized view yet, or the rows will be counted twice.
+WEB_STATS_HOURLY_BACKFILL_SQL = (
+    lambda: """
+INSERT INTO {database}.writable_{table_name}
+{select_sql}
+""".format(
+        database=settings.CLICKHOUSE_DATABASE,
+        table_name=TABLE_BASE_NAME,
+        select_sql=web_stats_hourly_select_sql(
+            source_table="events",
+            where="team_id = %(team_id)s AND timestamp >= %(date_from)s AND timestamp < %(date_to)s",
+        ),
+    )
+)
@@ -1,3 +1,4 @@
+from datetime import datetime, timedelta
 from typing import Optional
 
 from django.utils import timezone
@@ -8,10 +9,16 @@ from posthog.models.person.sql import (
     SELECT_PERSON_PROP_VALUES_SQL_WITH_FILTER,
 )
 from posthog.models.property.util import get_property_string_expr
+from posthog.models.property_values.sql import SELECT_INDEXED_PROPERTY_VALUES_SQL
 from posthog.models.team import Team
 from posthog.queries.insight import insight_sync_execute
 from posthog.utils import relative_date_parse
 
+MAX_PROPERTY_VALUES = 10
+
+# The index only has the most frequent values of full hours, so the events of this period are scanned as well
+RECENT_EVENTS_SCAN_PERIOD = timedelta(days=1)
+
 
 def get_property_values_for_key(
     key: str,
@@ -19,10 +26,77 @@ def get_property_values_for_key(
     event_names: Optional[list[str]] = None,
     value: Optional[str] = None,
 ):
-    property_field, mat_column_exists = get_property_string_expr("events", key, "%(key)s", "properties")
-    parsed_date_from = "AND timestamp >= '{}'".format(
-        relative_date_parse("-7d", team.timezone_info).strftime("%Y-%m-%d 00:00:00")
+    """
+    Up to 10 values of the event property seen in the last 7 days, containing `value` if given. Values are looked up in
+    the property values index, and if it has fewer than 10, in the events of the last day as well. These cover values
+    not indexed yet, as well as values too rare or too long to be indexed.
+    """
+    indexed_values = get_indexed_property_values_for_key(key, team, event_names, value)
+    if len(indexed_values) >= MAX_PROPERTY_VALUES:
+        return indexed_values
+
+    recent_values = get_property_values_for_key_from_events(
+        key, team, event_names, value, date_from=timezone.now() - RECENT_EVENTS_SCAN_PERIOD
+    )
+    seen_values = {row[0] for row in indexed_values}
+    return [
+        *indexed_values,
+        *(row for row in recent_values if row[0] not in seen_values),
+    ][:MAX_PROPERTY_VALUES]
+
+
+def get_indexed_property_values_for_key(
+    key: str,
+    team: Team,
+    event_names: Optional[list[str]] = None,
+    value: Optional[str] = None,
+):
+    """The most frequent values of the event property in the property values index, values starting with `value` first."""
+    event_filter = ""
+    value_filter = ""
+    order_by_clause = ""
+    extra_params: dict[str, str | list[str]] = {}
+
+    if event_names is not None and len(event_names) > 0:
+        event_filter = "AND event IN %(event_names)s"
+        extra_params["event_names"] = event_names
+
+    if value:
+        value_filter = "AND value ILIKE %(value)s"
+        extra_params["value"] = "%{}%".format(value)
+        extra_params["value_prefix"] = value.lower()
+
+        order_by_clause = "startsWith(lower(value), %(value_prefix)s) DESC,"
+
+    return insight_sync_execute(
+        SELECT_INDEXED_PROPERTY_VALUES_SQL.format(
+            event_filter=event_filter,
+            value_filter=value_filter,
+            order_by_clause=order_by_clause,
+        ),
+        {
+            "team_id": team.pk,
+            "key": key,
+            "date_from": relative_date_parse("-7d", team.timezone_info).strftime("%Y-%m-%d"),
+            **extra_params,
+        },
+        query_type="get_indexed_property_values",
+        team_id=team.pk,
     )
+
+
+def get_property_values_for_key_from_events(
+    key: str,
+    team: Team,
+    event_names: Optional[list[str]] = None,
+    value: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+):
+    """Values of the event property in the events since `date_from`, by default since the start of the day 7 days ago."""
+    property_field, mat_column_exists = get_property_string_expr("events", key, "%(key)s", "properties")
+    if date_from is None:
+        date_from = relative_date_parse("-7d", team.timezone_info).replace(hour=0, minute=0, second=0, microsecond=0)
+    parsed_date_from = "AND timestamp >= '{}'".format(date_from.strftime("%Y-%m-%d %H:%M:%S"))
     parsed_date_to = "AND timestamp <= '{}'".format(timezone.now().strftime("%Y-%m-%d 23:59:59"))
     property_exists_filter = ""
     event_filter = ""
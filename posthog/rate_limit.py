@@ -1,19 +1,22 @@
 import hashlib
 import re
+import threading
 import time
+from dataclasses import dataclass
 from functools import lru_cache
 from typing import Optional
 
 from prometheus_client import Counter
+from redis.commands.core import Script
 from rest_framework.throttling import SimpleRateThrottle, BaseThrottle, UserRateThrottle
 from rest_framework.request import Request
 from sentry_sdk.api import capture_exception
 from statshog.defaults.django import statsd
+from posthog import redis
 from posthog.auth import PersonalAPIKeyAuthentication
 from posthog.metrics import LABEL_PATH, LABEL_TEAM_ID
 from posthog.models.instance_setting import get_instance_setting
 from posthog.settings.utils import get_list
-from token_bucket import Limiter, MemoryStorage
 
 
 RATE_LIMIT_EXCEEDED_COUNTER = Counter(
@@ -34,6 +37,174 @@ DECIDE_RATE_LIMIT_EXCEEDED_COUNTER = Counter(
     labelnames=["token"],
 )
 
+TOKEN_BUCKET_LEASES_COUNTER = Counter(
+    "rate_limit_token_bucket_leases_total",
+    "Leases this process took from the shared token buckets in Redis, per scope. Each lease holds one or more tokens.",
+    labelnames=["scope"],
+)
+
+TOKEN_BUCKET_LEASED_TOKENS_COUNTER = Counter(
+    "rate_limit_token_bucket_leased_tokens_total",
+    "Tokens taken from the shared token buckets in Redis, per scope. Tokens of a lease that expires unused are lost.",
+    labelnames=["scope"],
+)
+
+TOKEN_BUCKET_DENIED_COUNTER = Counter(
+    "rate_limit_token_bucket_denied_total",
+    "Requests denied as neither the local lease nor the shared token bucket had tokens left, per scope.",
+    labelnames=["scope"],
+)
+
+# Refills the bucket for the time passed since it was last updated, then takes up to the requested number of tokens
+# from it, returning how many were taken. The time is passed in, as fakeredis has no TIME in tests.
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local replenish_rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local requested = tonumber(ARGV[4])
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(bucket[1])
+local updated_at = tonumber(bucket[2])
+if tokens == nil or updated_at == nil then
+    tokens = capacity
+    updated_at = now
+elseif now > updated_at then
+    tokens = math.min(capacity, tokens + (now - updated_at) * replenish_rate)
+    updated_at = now
+end
+
+local granted = math.min(requested, math.floor(tokens))
+tokens = tokens - granted
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(updated_at))
+-- A full bucket is the same as no bucket
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / replenish_rate) + 1)
+return granted
+"""
+
+# Processes lease tokens from the shared bucket in chunks of this share of its capacity, so that most requests are
+# admitted without a round trip to Redis. Small buckets are leased one token at a time, so they stay exact.
+LEASE_CAPACITY_FRACTION = 0.05
+LEASE_MAX_TOKENS = 20
+# Tokens of a lease not used within this many seconds are lost, so that a process can't hoard them
+LEASE_SECONDS = 1.0
+# Keys with leases kept in-process at most, the oldest leases are dropped first
+MAX_LOCAL_LEASES = 10_000
+
+_token_bucket_script: Optional[Script] = None
+
+
+def _get_token_bucket_script() -> Script:
+    """The script is registered once, and then run by its SHA, so that leases don't send it again and again."""
+    global _token_bucket_script
+    if _token_bucket_script is None:
+        _token_bucket_script = redis.get_client().register_script(TOKEN_BUCKET_LUA)
+    return _token_bucket_script
+
+
+@dataclass
+class _Lease:
+    tokens: int
+    expires_at: float
+
+
+class TokenBucketLimiter:
+    """
+    Token bucket shared by all processes through Redis. Every lease from the bucket is a single atomic Lua call, which
+    refills the bucket for the time passed since the last call before taking tokens from it. Tokens are leased in
+    chunks and handed out in-process until they run out or expire, so most requests don't touch Redis at all.
+
+    The bucket holds up to `capacity` tokens and refills by `replenish_rate` tokens per second.
+    """
+
+    def __init__(self, scope: str, capacity: int, replenish_rate: float) -> None:
+        self.scope = scope
+        self.capacity = capacity
+        self.replenish_rate = replenish_rate
+        self.lease_size = max(1, min(LEASE_MAX_TOKENS, int(capacity * LEASE_CAPACITY_FRACTION)))
+        self._leases: dict[str, _Lease] = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            lease = self._leases.get(key)
+            if lease is not None and lease.tokens > 0 and lease.expires_at > now:
+                lease.tokens -= 1
+                return True
+
+        granted = self._lease_from_bucket(key)
+        if granted == 0:
+            TOKEN_BUCKET_DENIED_COUNTER.labels(scope=self.scope).inc()
+            return False
+
+        TOKEN_BUCKET_LEASES_COUNTER.labels(scope=self.scope).inc()
+        TOKEN_BUCKET_LEASED_TOKENS_COUNTER.labels(scope=self.scope).inc(granted)
+        if granted > 1:
+            with self._lock:
+                self._leases.pop(key, None)
+                if len(self._leases) >= MAX_LOCAL_LEASES:
+                    self._drop_expired_leases(now)
+                self._leases[key] = _Lease(tokens=granted - 1, expires_at=now + LEASE_SECONDS)
+        return True
+
+    def reset(self) -> None:
+        """Drops the tokens leased in-process, the shared buckets in Redis are left as they are."""
+        with self._lock:
+            self._leases.clear()
+
+    def _lease_from_bucket(self, key: str) -> int:
+        return int(
+            _get_token_bucket_script()(
+                keys=[f"rate_limit:token_bucket:{self.scope}:{key}"],
+                args=[self.capacity, self.replenish_rate, time.time(), self.lease_size],
+                client=redis.get_client(),
+            )
+        )
+
+    def _drop_expired_leases(self, now: float) -> None:
+        for key in [key for key, lease in self._leases.items() if lease.expires_at <= now]:
+            del self._leases[key]
+        while len(self._leases) >= MAX_LOCAL_LEASES:
+            del self._leases[next(iter(self._leases))]
+
+
+class LocalTokenBucketLimiter:
+    """
+    Token buckets kept in-process, one per key, for limits that apply to every process on its own. Each bucket holds up
+    to `capacity` tokens and refills by `replenish_rate` tokens per second.
+    """
+
+    def __init__(self, capacity: int, replenish_rate: float) -> None:
+        self.capacity = capacity
+        self.replenish_rate = replenish_rate
+        # key -> (tokens, time the bucket was last refilled)
+        self._buckets: dict[str, tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated_at) * self.replenish_rate)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now)
+                return False
+            self._buckets[key] = (tokens - 1, now)
+            return True
+
+
+_token_bucket_limiters: dict[tuple[str, int, float], TokenBucketLimiter] = {}
+
+
+def get_token_bucket_limiter(scope: str, capacity: int, replenish_rate: float) -> TokenBucketLimiter:
+    """The limiter of the scope, shared by all throttles of this process so that they share leases."""
+    key = (scope, capacity, replenish_rate)
+    limiter = _token_bucket_limiters.get(key)
+    if limiter is None:
+        limiter = _token_bucket_limiters.setdefault(key, TokenBucketLimiter(scope, capacity, replenish_rate))
+    return limiter
+
 
 @lru_cache(maxsize=1)
 def get_team_allow_list(_ttl: int) -> list[str]:
@@ -69,6 +240,10 @@ path_by_org_pattern = re.compile(r"/api/organizations/(.+)/")
 
 
 class TeamRateThrottle(SimpleRateThrottle):
+    # Parsed from `rate` by SimpleRateThrottle
+    num_requests: int
+    duration: int
+
     @staticmethod
     def safely_get_team_id_from_view(view):
         """
@@ -93,7 +268,7 @@ class TeamRateThrottle(SimpleRateThrottle):
         # As we're figuring out what our throttle limits should be, we don't actually want to throttle anything.
         # Instead of throttling, this logs that the request would have been throttled.
         try:
-            request_would_be_allowed = super().allow_request(request, view)
+            request_would_be_allowed = self.consume(request, view)
             if not request_would_be_allowed:
                 team_id = self.safely_get_team_id_from_view(view)
                 path = getattr(request, "path", None)
@@ -128,6 +303,22 @@ class TeamRateThrottle(SimpleRateThrottle):
             capture_exception(e)
             return True
 
+    def consume(self, request, view) -> bool:
+        """Takes a token from the bucket of the request, which holds `num_requests` and refills over `duration`."""
+        if self.rate is None:
+            return True
+
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+
+        limiter = get_token_bucket_limiter(str(self.scope), self.num_requests, self.num_requests / self.duration)
+        return limiter.consume(key)
+
+    def wait(self):
+        # Time until the bucket has refilled a token
+        return self.duration / self.num_requests
+
     def get_cache_key(self, request, view):
         """
         Attempts to throttle based on the team_id of the request. If it can't do that, it falls back to the user_id.
@@ -156,21 +347,13 @@ class TeamRateThrottle(SimpleRateThrottle):
 
 class DecideRateThrottle(BaseThrottle):
     """
-    This is a custom throttle that is used to limit the number of requests to the /decide endpoint.
-    It is different from the TeamRateThrottle in that it does not use the Django cache, but instead
-    uses the Limiter from the `token-bucket` library.
-    This uses the token bucket algorithm to limit the number of requests to the endpoint. It's a lot
-    more performant than DRF's SimpleRateThrottle, which inefficiently uses the Django cache.
-
-    However, note that this throttle is per process, and not global.
+    This is a custom throttle that is used to limit the number of requests to the /decide endpoint, per token.
+    It is different from the TeamRateThrottle in that it is not a DRF throttle, as /decide is served by middleware.
+    Both use the token bucket algorithm through `TokenBucketLimiter`, so the limit holds across all processes.
     """
 
     def __init__(self, replenish_rate: float = 5, bucket_capacity=100) -> None:
-        self.limiter = Limiter(
-            rate=replenish_rate,
-            capacity=bucket_capacity,
-            storage=MemoryStorage(),
-        )
+        self.limiter = TokenBucketLimiter(scope="decide", capacity=bucket_capacity, replenish_rate=replenish_rate)
 
     @staticmethod
     def safely_get_token_from_request(request: Request) -> Optional[str]:
@@ -1,9 +1,21 @@
+from collections.abc import Iterator
+from typing import Any
+
 import orjson
-from rest_framework.renderers import JSONRenderer
+from django.http import StreamingHttpResponse
+from pydantic import BaseModel
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.request import Request
 from rest_framework.utils.encoders import JSONEncoder
 
+from posthog.clickhouse.client.arrow import ARROW_STREAM_CONTENT_TYPE
+
 CleaningMarker = bool | dict[int, "CleaningMarker"]
 
+# Rows of a streamed response are sent in chunks of about this many bytes, so that neither every row is a chunk of
+# its own nor the whole response is built in memory
+STREAMING_CHUNK_BYTES = 64 * 1024
+
 
 class SafeJSONRenderer(JSONRenderer):
     def render(self, data, accepted_media_type=None, renderer_context=None) -> bytes:
@@ -16,3 +28,83 @@ class SafeJSONRenderer(JSONRenderer):
             option |= orjson.OPT_INDENT_2
 
         return orjson.dumps(data, default=JSONEncoder().default, option=option)
+
+
+def wants_streaming_response(request: Request) -> bool:
+    """Streaming is asked for with `?stream=true`, or with an `Accept: application/json; stream=true` header."""
+    if request.query_params.get("stream") == "true":
+        return True
+    return any(
+        param.replace(" ", "") == "stream=true"
+        for media_type in request.META.get("HTTP_ACCEPT", "").split(",")
+        for param in media_type.split(";")[1:]
+    )
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(by_alias=True)
+    return JSONEncoder().default(value)
+
+
+def stream_json(data: BaseModel | dict[str, Any], rows_key: str) -> Iterator[bytes]:
+    """
+    Serializes `data` like `SafeJSONRenderer`, but one row of `data[rows_key]` at a time. Everything else, such as
+    columns, types and timings, comes first, so that clients can read it before all rows have arrived.
+    """
+    if isinstance(data, BaseModel):
+        rows = getattr(data, rows_key, None)
+        metadata = data.model_dump(by_alias=True, exclude={rows_key})
+    else:
+        rows = data.get(rows_key)
+        metadata = {key: value for key, value in data.items() if key != rows_key}
+
+    head = orjson.dumps(metadata, default=_default, option=orjson.OPT_UTC_Z)[:-1]
+    chunk = [head, b"," if metadata else b"", orjson.dumps(rows_key), b":"]
+    if rows is None:
+        yield b"".join([*chunk, b"null}"])
+        return
+
+    chunk.append(b"[")
+    chunk_bytes = 0
+    for index, row in enumerate(rows):
+        row_json = orjson.dumps(row, default=_default, option=orjson.OPT_UTC_Z)
+        chunk.append(b"," + row_json if index > 0 else row_json)
+        chunk_bytes += len(row_json) + 1
+        if chunk_bytes >= STREAMING_CHUNK_BYTES:
+            yield b"".join(chunk)
+            chunk = []
+            chunk_bytes = 0
+    chunk.append(b"]}")
+    yield b"".join(chunk)
+
+
+class StreamingJSONResponse(StreamingHttpResponse):
+    """A JSON response whose rows are serialized while it's being sent, see `stream_json`."""
+
+    def __init__(self, data: BaseModel | dict[str, Any], rows_key: str, **kwargs: Any) -> None:
+        super().__init__(stream_json(data, rows_key), content_type="application/json", **kwargs)
+
+
+class ArrowStreamRenderer(BaseRenderer):
+    """
+    Lets views negotiate Arrow IPC streams, with `?format=arrow` or `Accept: application/vnd.apache.arrow.stream`.
+    The stream itself is returned as an `ArrowStreamResponse`, errors are still rendered as JSON.
+    """
+
+    media_type = ARROW_STREAM_CONTENT_TYPE
+    format = "arrow"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None) -> bytes:
+        response = renderer_context.get("response") if renderer_context else None
+        if response is not None:
+            response["Content-Type"] = "application/json"
+        return SafeJSONRenderer().render(data)
+
+
+class ArrowStreamResponse(StreamingHttpResponse):
+    """An Arrow IPC stream, sent as it's being read from ClickHouse, see `execute_hogql_query_as_arrow`."""
+
+    def __init__(self, stream: Iterator[bytes], **kwargs: Any) -> None:
+        super().__init__(stream, content_type=ARROW_STREAM_CONTENT_TYPE, **kwargs)
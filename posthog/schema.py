@@ -568,6 +568,11 @@ class BounceRatePageViewMode(StrEnum):
     UNIQ_URLS = "uniq_urls"
 
 
+class FunnelsEngine(StrEnum):
+    WINDOW_FUNCTIONS = "window_functions"
+    ARRAY_FUNCTIONS = "array_functions"
+
+
 class InCohortVia(StrEnum):
     AUTO = "auto"
     LEFTJOIN = "leftjoin"
@@ -613,6 +618,7 @@ class HogQLQueryModifiers(BaseModel):
     bounceRatePageViewMode: Optional[BounceRatePageViewMode] = None
     dataWarehouseEventsModifiers: Optional[list[DataWarehouseEventsModifier]] = None
     debug: Optional[bool] = None
+    funnelsEngine: Optional[FunnelsEngine] = None
     inCohortVia: Optional[InCohortVia] = None
     materializationMode: Optional[MaterializationMode] = None
     optimizeJoinedFilters: Optional[bool] = None
@@ -621,6 +627,7 @@ class HogQLQueryModifiers(BaseModel):
     personsOnEventsMode: Optional[PersonsOnEventsMode] = None
     s3TableUseInvalidColumns: Optional[bool] = None
     sessionTableVersion: Optional[SessionTableVersion] = None
+    useWebAnalyticsRollups: Optional[bool] = None
 
 
 class HogQueryResponse(BaseModel):
@@ -30,7 +30,7 @@ from posthog.cloud_utils import is_cloud
 from posthog.constants import SESSION_RECORDINGS_FILTER_IDS
 from posthog.models import User, Team
 from posthog.models.filters.session_recordings_filter import SessionRecordingsFilter
-from posthog.models.person.person import PersonDistinctId
+from posthog.models.person.summary import get_person_summaries_by_distinct_ids
 from posthog.schema import QueryTiming, HogQLQueryModifiers
 from posthog.session_recordings.models.session_recording import SessionRecording
 from posthog.session_recordings.models.session_recording_event import (
@@ -799,23 +799,15 @@ def list_recordings(
     with timer("load_persons"):
         # Get the related persons for all the recordings
         distinct_ids = sorted([x.distinct_id for x in recordings])
-        person_distinct_ids = PersonDistinctId.objects.filter(distinct_id__in=distinct_ids, team=team).select_related(
-            "person"
-        )
+        distinct_id_to_person = get_person_summaries_by_distinct_ids(team.pk, distinct_ids)
 
     with timer("process_persons"):
-        distinct_id_to_person = {}
-        for person_distinct_id in person_distinct_ids:
-            person_distinct_id.person._distinct_ids = [
-                person_distinct_id.distinct_id
-            ]  # Stop the person from loading all distinct ids
-            distinct_id_to_person[person_distinct_id.distinct_id] = person_distinct_id.person
-
         for recording in recordings:
             recording.viewed = recording.session_id in viewed_session_recordings
             person = distinct_id_to_person.get(recording.distinct_id)
             if person:
-                recording.person = person
+                # Only the distinct id of the recording is shown
+                recording.person = person.to_person(distinct_ids=[recording.distinct_id])
 
     session_recording_serializer = SessionRecordingSerializer(recordings, context=context, many=True)
     results = session_recording_serializer.data
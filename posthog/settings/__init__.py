@@ -113,6 +113,22 @@ IN_UNIT_TESTING: bool = get_from_env("IN_UNIT_TESTING", False, type_cast=str_to_
 
 HOGQL_INCREASED_MAX_EXECUTION_TIME: int = get_from_env("HOGQL_INCREASED_MAX_EXECUTION_TIME", 600, type_cast=int)
 
+# How long property definition types are cached in-process for printing HogQL. Writes through Django invalidate the
+# cache right away, this bounds how long definitions created by ingestion can be missed. Off in tests by default.
+HOGQL_PROPERTY_TYPES_CACHE_TTL: int = get_from_env("HOGQL_PROPERTY_TYPES_CACHE_TTL", 0 if TEST else 60, type_cast=int)
+HOGQL_COMPILED_QUERY_CACHE_TTL: int = get_from_env("HOGQL_COMPILED_QUERY_CACHE_TTL", 0 if TEST else 3600, type_cast=int)
+
+# How long person summaries shown next to events, actors and recordings are cached in-process, and how many at most.
+# Bounds how long merges and property updates can take to show. Off in tests by default.
+PERSON_SUMMARY_CACHE_TTL: int = get_from_env("PERSON_SUMMARY_CACHE_TTL", 0 if TEST else 30, type_cast=int)
+PERSON_SUMMARY_CACHE_MAX_ENTRIES: int = get_from_env("PERSON_SUMMARY_CACHE_MAX_ENTRIES", 10_000, type_cast=int)
+
+# How long a query missing from the cache waits for the same query to be calculated elsewhere, e.g. for other viewers
+# of a shared dashboard, before calculating it itself. Off in tests by default.
+QUERY_SINGLE_FLIGHT_WAIT_SECONDS: int = get_from_env(
+    "QUERY_SINGLE_FLIGHT_WAIT_SECONDS", 0 if TEST else 30, type_cast=int
+)
+
 # Extend and override these settings with EE's ones
 if "ee.apps.EnterpriseConfig" in INSTALLED_APPS:
     from ee.settings import *  # noqa: F401, F403
@@ -187,6 +187,10 @@ if TEST or DEBUG or os.getenv("CLICKHOUSE_OFFLINE_CLUSTER_HOST", None) is None:
     CLICKHOUSE_OFFLINE_HTTP_URL = CLICKHOUSE_HTTP_URL
 
 
+# How many of the usage report queries run against ClickHouse at the same time. Tests run them one after another, so
+# that test data is flushed from the test thread.
+USAGE_REPORT_QUERY_CONCURRENCY: int = get_from_env("USAGE_REPORT_QUERY_CONCURRENCY", 1 if TEST else 4, type_cast=int)
+
 READONLY_CLICKHOUSE_USER: str | None = os.getenv("READONLY_CLICKHOUSE_USER", None)
 READONLY_CLICKHOUSE_PASSWORD: str | None = os.getenv("READONLY_CLICKHOUSE_PASSWORD", None)
 
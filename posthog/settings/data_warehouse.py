@@ -12,3 +12,21 @@ BUCKET = "test-pipeline"
 
 HUBSPOT_APP_CLIENT_ID = os.getenv("HUBSPOT_APP_CLIENT_ID", None)
 HUBSPOT_APP_CLIENT_SECRET = os.getenv("HUBSPOT_APP_CLIENT_SECRET", None)
+
+# Teams whose Postgres and MySQL sources are loaded as Arrow tables instead of rows of dicts
+DATA_IMPORTS_ARROW_LOADER_TEAM_IDS: list[str] = [
+    team_id.strip() for team_id in os.getenv("DATA_IMPORTS_ARROW_LOADER_TEAM_IDS", "").split(",") if team_id.strip()
+]
+
+# Full refreshes of Postgres and MySQL tables with an integer primary key are read in up to this many concurrent ranges
+# of the key, each over its own connection to the source database. 1, the default, reads every table with a single
+# query over a single connection, as more connections add load that customers' databases may not be sized for.
+DATA_IMPORTS_SQL_PARTITION_COUNT: int = int(os.getenv("DATA_IMPORTS_SQL_PARTITION_COUNT", None) or 1)
+
+# Delta tables of imports are compacted once they have this many files, into files of about this many bytes. Files no
+# longer part of a table are deleted after the retention period.
+DATA_IMPORTS_DELTA_COMPACTION_MIN_FILES: int = int(os.getenv("DATA_IMPORTS_DELTA_COMPACTION_MIN_FILES", None) or 32)
+DATA_IMPORTS_DELTA_TARGET_FILE_SIZE: int = int(
+    os.getenv("DATA_IMPORTS_DELTA_TARGET_FILE_SIZE", None) or 128 * 1024 * 1024
+)
+DATA_IMPORTS_DELTA_VACUUM_RETENTION_HOURS: int = int(os.getenv("DATA_IMPORTS_DELTA_VACUUM_RETENTION_HOURS", None) or 24)
@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+
+import structlog
+from django.core.cache import cache
+from django.utils import timezone
+
+from posthog.clickhouse.client.connection import Workload
+from posthog.client import sync_execute
+from posthog.models.property_values.sql import INDEX_PROPERTY_VALUES_SQL
+
+logger = structlog.get_logger(__name__)
+
+INDEXED_UNTIL_CACHE_KEY = "property_values_indexed_until"
+LOCK_CACHE_KEY = "property_values_indexing"
+
+# Hours missed by more than this, e.g. after an outage, aren't indexed
+MAX_HOURS_TO_INDEX = 24
+
+
+def index_property_values() -> None:
+    """
+    Adds the values of the event properties of every full hour since the last run to the property values index. Each
+    hour is indexed only once, the hour indexed last is kept in the cache.
+    """
+    if not cache.add(LOCK_CACHE_KEY, True, timeout=60 * 60):
+        logger.info("Property values are already being indexed")
+        return
+
+    try:
+        _index_property_values()
+    finally:
+        cache.delete(LOCK_CACHE_KEY)
+
+
+def _index_property_values() -> None:
+    current_hour = timezone.now().replace(minute=0, second=0, microsecond=0)
+    indexed_until_str = cache.get(INDEXED_UNTIL_CACHE_KEY)
+    if indexed_until_str is not None:
+        indexed_until = max(
+            datetime.fromisoformat(indexed_until_str), current_hour - timedelta(hours=MAX_HOURS_TO_INDEX)
+        )
+    else:
+        indexed_until = current_hour - timedelta(hours=1)
+
+    while indexed_until < current_hour:
+        date_to = indexed_until + timedelta(hours=1)
+        sync_execute(
+            INDEX_PROPERTY_VALUES_SQL(),
+            {
+                "date_from": indexed_until.strftime("%Y-%m-%d %H:%M:%S"),
+                "date_to": date_to.strftime("%Y-%m-%d %H:%M:%S"),
+            },
+            workload=Workload.OFFLINE,
+        )
+        indexed_until = date_to
+        cache.set(INDEXED_UNTIL_CACHE_KEY, indexed_until.isoformat(), timeout=None)
+        logger.info("Indexed property values", indexed_until=indexed_until.isoformat())
@@ -51,6 +51,8 @@ from posthog.tasks.tasks import (
     update_survey_iteration,
     replay_count_metrics,
     calculate_external_data_rows_synced,
+    materialize_saved_queries,
+    index_property_values,
 )
 from posthog.utils import get_crontab
 
@@ -259,6 +261,13 @@ def setup_periodic_tasks(sender: Celery, **kwargs: Any) -> None:
         name="update survey iteration based on date",
     )
 
+    # Every hour add the property values of the last hour to the index of values suggested for property filters
+    sender.add_periodic_task(
+        crontab(hour="*", minute="5"),
+        index_property_values.s(),
+        name="index property values",
+    )
+
     if settings.EE_AVAILABLE:
         # every interval seconds, we calculate N replay embeddings
         # the goal is to process _enough_ every 24 hours that
@@ -332,6 +341,13 @@ def setup_periodic_tasks(sender: Celery, **kwargs: Any) -> None:
         name="calculate external data rows synced",
     )
 
+    # Every 5 minutes refresh the materializations of saved queries that are due
+    sender.add_periodic_task(
+        crontab(minute="*/5"),
+        materialize_saved_queries.s(),
+        name="materialize saved queries",
+    )
+
     # Check integrations to refresh every minute
     add_periodic_task_with_expiry(
         sender,
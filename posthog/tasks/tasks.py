@@ -786,6 +786,13 @@ def update_survey_iteration() -> None:
     update_survey_iteration()
 
 
+@shared_task(ignore_result=True)
+def index_property_values() -> None:
+    from posthog.tasks.property_values import index_property_values
+
+    index_property_values()
+
+
 def recompute_materialized_columns_enabled() -> bool:
     from posthog.models.instance_setting import get_instance_setting
 
@@ -936,3 +943,13 @@ def calculate_external_data_rows_synced() -> None:
         pass
     else:
         capture_external_data_rows_synced()
+
+
+@shared_task(ignore_result=True)
+def materialize_saved_queries() -> None:
+    try:
+        from posthog.tasks.warehouse import materialize_due_saved_queries
+    except ImportError:
+        pass
+    else:
+        materialize_due_saved_queries()
@@ -0,0 +1,53 @@
+from unittest.mock import patch, MagicMock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from freezegun import freeze_time
+
+from posthog.tasks.property_values import INDEXED_UNTIL_CACHE_KEY, index_property_values
+
+
+@patch("posthog.tasks.property_values.sync_execute")
+class TestIndexPropertyValues(SimpleTestCase):
+    def setUp(self) -> None:
+        cache.clear()
+
+    def _indexed_hours(self, mock_sync_execute: MagicMock) -> list[tuple[str, str]]:
+        return [(call[0][1]["date_from"], call[0][1]["date_to"]) for call in mock_sync_execute.call_args_list]
+
+    def test_indexes_every_hour_once(self, mock_sync_execute: MagicMock) -> None:
+        with freeze_time("2024-07-01T12:05:00Z"):
+            index_property_values()
+            index_property_values()
+
+        with freeze_time("2024-07-01T15:05:00Z"):
+            index_property_values()
+
+        self.assertEqual(
+            self._indexed_hours(mock_sync_execute),
+            [
+                ("2024-07-01 11:00:00", "2024-07-01 12:00:00"),
+                ("2024-07-01 12:00:00", "2024-07-01 13:00:00"),
+                ("2024-07-01 13:00:00", "2024-07-01 14:00:00"),
+                ("2024-07-01 14:00:00", "2024-07-01 15:00:00"),
+            ],
+        )
+        self.assertEqual(cache.get(INDEXED_UNTIL_CACHE_KEY), "2024-07-01T15:00:00+00:00")
+
+    def test_skips_hours_missed_long_ago(self, mock_sync_execute: MagicMock) -> None:
+        cache.set(INDEXED_UNTIL_CACHE_KEY, "2024-06-01T00:00:00+00:00")
+
+        with freeze_time("2024-07-01T12:05:00Z"):
+            index_property_values()
+
+        indexed_hours = self._indexed_hours(mock_sync_execute)
+        self.assertEqual(len(indexed_hours), 24)
+        self.assertEqual(indexed_hours[0], ("2024-06-30 12:00:00", "2024-06-30 13:00:00"))
+
+    def test_does_not_index_concurrently(self, mock_sync_execute: MagicMock) -> None:
+        cache.add("property_values_indexing", True)
+
+        with freeze_time("2024-07-01T12:05:00Z"):
+            index_property_values()
+
+        mock_sync_execute.assert_not_called()
@@ -7,7 +7,7 @@ import pytest
 import structlog
 from dateutil.relativedelta import relativedelta
 from dateutil.tz import tzutc
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.utils.timezone import now
 from freezegun import freeze_time
 
@@ -35,6 +35,7 @@ from posthog.tasks.usage_report import (
     OrgReport,
     _add_team_report_to_org_reports,
     _get_all_org_reports,
+    _get_all_usage_data,
     _get_all_usage_data_as_team_rows,
     _get_full_org_usage_report,
     _get_full_org_usage_report_as_dict,
@@ -758,6 +759,56 @@ class HogQLUsageReport(APIBaseTest, ClickhouseTestMixin, ClickhouseDestroyTables
         assert report.event_explorer_api_rows_read == 0
 
 
+@freeze_time("2022-01-10T00:01:00Z")
+class TestUsageReportQueries(APIBaseTest, ClickhouseTestMixin, ClickhouseDestroyTablesMixin):
+    def setUp(self) -> None:
+        super().setUp()
+        for event, properties in [
+            ("$pageview", {"$lib": "web"}),
+            ("$pageview", {"$lib": "web", "$group_0": "org:1"}),
+            ("$autocapture", {"$lib": "ios"}),
+            ("survey sent", {"$lib": "web"}),
+            ("$feature_flag_called", {"$lib": "web"}),
+        ]:
+            _create_event(
+                distinct_id="user",
+                event=event,
+                properties=properties,
+                timestamp=now() - relativedelta(hours=12),
+                team=self.team,
+            )
+        flush_persons_and_events()
+
+    def test_event_counts_are_split_from_a_single_query(self) -> None:
+        period_start, period_end = get_previous_day()
+
+        all_data = _get_all_usage_data_as_team_rows(period_start, period_end)
+
+        assert all_data["teams_with_event_count_in_period"] == {self.team.pk: 3}
+        assert all_data["teams_with_anonymous_personful_event_count_in_period"] == {self.team.pk: 2}
+        assert all_data["teams_with_event_count_with_groups_in_period"] == {self.team.pk: 1}
+        assert all_data["teams_with_survey_responses_count_in_period"] == {self.team.pk: 1}
+
+    def test_concurrent_queries_return_the_same_data(self) -> None:
+        period_start, period_end = get_previous_day()
+
+        serial_data = _get_all_usage_data(period_start, period_end)
+        with override_settings(USAGE_REPORT_QUERY_CONCURRENCY=4):
+            concurrent_data = _get_all_usage_data(period_start, period_end)
+
+        assert serial_data == concurrent_data
+
+    def test_checkpointed_queries_are_not_run_again(self) -> None:
+        period_start, period_end = get_previous_day()
+
+        all_data = _get_all_usage_data(period_start, period_end, checkpoint_key="task-id")
+        with patch("posthog.tasks.usage_report.sync_execute") as mock_sync_execute:
+            retried_data = _get_all_usage_data(period_start, period_end, checkpoint_key="task-id")
+
+        mock_sync_execute.assert_not_called()
+        assert retried_data == all_data
+
+
 @freeze_time("2022-01-10T00:01:00Z")
 class TestFeatureFlagsUsageReport(ClickhouseDestroyTablesMixin, TestCase, ClickhouseTestMixin):
     def setUp(self) -> None:
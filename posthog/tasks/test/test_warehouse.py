@@ -1,3 +1,7 @@
+from typing import Any
+
+from posthog.hogql.database.s3_table import S3Table
+from posthog.models.hogql_schema import get_hogql_schema_version, get_saved_query_materializations_version
 from posthog.test.base import APIBaseTest
 from unittest.mock import patch, MagicMock
 from posthog.tasks.warehouse import (
@@ -5,8 +9,10 @@ from posthog.tasks.warehouse import (
     capture_workspace_rows_synced_by_team,
     validate_data_warehouse_table_columns,
     capture_external_data_rows_synced,
+    materialize_due_saved_queries,
+    materialize_saved_query_task,
 )
-from posthog.warehouse.models import ExternalDataSource, ExternalDataJob
+from posthog.warehouse.models import DataWarehouseSavedQuery, ExternalDataSource, ExternalDataJob
 from freezegun import freeze_time
 import datetime
 
@@ -196,3 +202,116 @@ class TestWarehouse(APIBaseTest):
         capture_external_data_rows_synced()
 
         assert mock_capture_workspace_rows_synced_by_team.call_count == 1
+
+    def _create_materialized_saved_query(self, **kwargs: Any) -> DataWarehouseSavedQuery:
+        return DataWarehouseSavedQuery.objects.create(
+            team=self.team,
+            name="event_view",
+            query={"kind": "HogQLQuery", "query": "select event, timestamp from events"},
+            columns={
+                "event": {"hogql": "StringDatabaseField", "clickhouse": "String", "valid": True},
+                "timestamp": {"hogql": "DateTimeDatabaseField", "clickhouse": "DateTime64(6, 'UTC')", "valid": True},
+            },
+            materialization_interval=datetime.timedelta(hours=1),
+            **kwargs,
+        )
+
+    @patch("posthog.tasks.warehouse.materialize_saved_query_task.delay")
+    def test_materialize_due_saved_queries(self, mock_materialize_saved_query_task: MagicMock) -> None:
+        due_view = self._create_materialized_saved_query()
+        DataWarehouseSavedQuery.objects.create(
+            team=self.team, name="other_view", query={"kind": "HogQLQuery", "query": "select 1"}
+        )
+
+        materialize_due_saved_queries()
+
+        mock_materialize_saved_query_task.assert_called_once_with(str(due_view.pk))
+
+    @patch("posthog.warehouse.data_load.materialize_saved_query.delete_data_import_folder")
+    @patch("posthog.warehouse.data_load.materialize_saved_query.sync_execute", return_value=[[10]])
+    def test_materialize_saved_query(self, mock_sync_execute: MagicMock, mock_delete_folder: MagicMock) -> None:
+        view = self._create_materialized_saved_query()
+        assert view.hogql_definition().materialized_table is None
+
+        materialize_saved_query_task(str(view.pk))
+
+        view.refresh_from_db()
+        assert view.materialized_at is not None
+        assert view.materialization_state["row_count"] == 10
+        insert_query = mock_sync_execute.call_args_list[0][0][0]
+        assert insert_query.startswith("INSERT INTO FUNCTION s3(")
+        assert "FROM events" in insert_query
+
+        materialized_table = view.hogql_definition().materialized_table
+        assert isinstance(materialized_table, S3Table)
+        assert materialized_table.url == view.materialization_state["url_pattern"]
+
+        # the query changed, so the materialization is neither used nor refreshed incrementally
+        view.query = {"kind": "HogQLQuery", "query": "select event, timestamp from events where event = 'a'"}
+        view.save()
+        assert view.hogql_definition().materialized_table is None
+
+        folder_path = view.materialization_state["folder_path"]
+        materialize_saved_query_task(str(view.pk))
+        materialize_saved_query_task(str(view.pk))
+
+        view.refresh_from_db()
+        assert view.materialization_state["folder_path"] != folder_path
+        mock_delete_folder.assert_called_once_with(folder_path)
+
+    @patch("posthog.warehouse.data_load.materialize_saved_query.sync_execute", return_value=[[10]])
+    def test_refreshing_materialization_keeps_hogql_schema_version(self, mock_sync_execute: MagicMock) -> None:
+        view = self._create_materialized_saved_query()
+        schema_version = get_hogql_schema_version(self.team.pk)
+        assert get_saved_query_materializations_version(self.team.pk) is None
+
+        with freeze_time("2024-07-01T12:00:00Z"):
+            materialize_saved_query_task(str(view.pk))
+            materializations_version = get_saved_query_materializations_version(self.team.pk)
+        with freeze_time("2024-07-01T13:00:00Z"):
+            materialize_saved_query_task(str(view.pk))
+            assert get_saved_query_materializations_version(self.team.pk) not in (None, materializations_version)
+
+        assert get_hogql_schema_version(self.team.pk) == schema_version
+        # Queries run the view's query once the materialization went stale
+        with freeze_time("2024-07-01T15:00:01Z"):
+            assert get_saved_query_materializations_version(self.team.pk) is None
+
+    @patch("posthog.warehouse.data_load.materialize_saved_query.delete_data_import_folder")
+    @patch("posthog.tasks.warehouse.materialize_saved_query_task.delay")
+    def test_materialize_due_saved_queries_deletes_turned_off_materializations(
+        self, mock_materialize_saved_query_task: MagicMock, mock_delete_folder: MagicMock
+    ) -> None:
+        view = self._create_materialized_saved_query(
+            materialized_at=datetime.datetime(2024, 7, 1, tzinfo=datetime.UTC),
+            materialization_state={"folder_path": "current", "previous_folder_path": "previous"},
+        )
+        view.materialization_interval = None
+        view.save()
+
+        materialize_due_saved_queries()
+
+        mock_materialize_saved_query_task.assert_not_called()
+        assert [call.args[0] for call in mock_delete_folder.call_args_list] == ["current", "previous"]
+        view.refresh_from_db()
+        assert view.materialization_state == {}
+        assert view.materialized_at is None
+
+    @patch("posthog.warehouse.data_load.materialize_saved_query.sync_execute", return_value=[[10]])
+    def test_materialize_saved_query_incrementally(self, mock_sync_execute: MagicMock) -> None:
+        view = self._create_materialized_saved_query(materialization_time_column="timestamp")
+
+        with freeze_time("2024-07-01T12:00:00Z"):
+            materialize_saved_query_task(str(view.pk))
+        with freeze_time("2024-07-01T13:00:00Z"):
+            materialize_saved_query_task(str(view.pk))
+
+        view.refresh_from_db()
+        assert view.materialization_state["file_count"] == 2
+        assert view.materialization_state["materialized_until"] == "2024-07-01T12:50:00+00:00"
+        full_query, full_values = mock_sync_execute.call_args_list[0][0]
+        incremental_query, incremental_values = mock_sync_execute.call_args_list[2][0]
+        assert any(str(value).endswith("/00001.parquet") for value in full_values.values())
+        assert any(str(value).endswith("/00002.parquet") for value in incremental_values.values())
+        assert "greater(" not in full_query
+        assert "greater(timestamp, toDateTime64('2024-07-01 11:50:00.000000', 6, 'UTC'))" in incremental_query
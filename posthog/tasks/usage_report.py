@@ -1,15 +1,17 @@
 import dataclasses
 import os
 from collections import Counter
-from collections.abc import Sequence
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Any, Literal, Optional, TypedDict, Union, cast
 
 import requests
 import structlog
-from celery import shared_task
+from celery import current_task, shared_task
 from dateutil import parser
 from django.conf import settings
+from django.core.cache import cache
 from django.db import connection
 from django.db.models import Count, Q, Sum
 from posthoganalytics.client import Client
@@ -21,7 +23,6 @@ from posthog import version_requirement
 from posthog.clickhouse.client.connection import Workload
 from posthog.client import sync_execute
 from posthog.cloud_utils import get_cached_instance_license, is_cloud
-from posthog.constants import FlagRequestType
 from posthog.logging.timing import timed_log
 from posthog.models import GroupTypeMapping, OrganizationMembership, User
 from posthog.models.dashboard import Dashboard
@@ -38,6 +39,7 @@ from posthog.utils import (
     get_instance_region,
     get_machine_id,
     get_previous_day,
+    get_safe_cache,
 )
 
 from posthog.warehouse.models import ExternalDataJob
@@ -63,6 +65,25 @@ QUERY_RETRIES = 3
 QUERY_RETRY_DELAY = 1
 QUERY_RETRY_BACKOFF = 2
 
+# The checkpoints only need to survive until the task has been retried
+USAGE_REPORT_CHECKPOINT_TTL = 60 * 60 * 24
+
+# report key -> (query types, access method, query log metric)
+HOGQL_USAGE_METRICS: dict[str, tuple[list[str], str, Literal["read_bytes", "read_rows", "query_duration_ms"]]] = {
+    "teams_with_hogql_app_bytes_read": (["hogql_query", "HogQLQuery"], "", "read_bytes"),
+    "teams_with_hogql_app_rows_read": (["hogql_query", "HogQLQuery"], "", "read_rows"),
+    "teams_with_hogql_app_duration_ms": (["hogql_query", "HogQLQuery"], "", "query_duration_ms"),
+    "teams_with_hogql_api_bytes_read": (["hogql_query", "HogQLQuery"], "personal_api_key", "read_bytes"),
+    "teams_with_hogql_api_rows_read": (["hogql_query", "HogQLQuery"], "personal_api_key", "read_rows"),
+    "teams_with_hogql_api_duration_ms": (["hogql_query", "HogQLQuery"], "personal_api_key", "query_duration_ms"),
+    "teams_with_event_explorer_app_bytes_read": (["EventsQuery"], "", "read_bytes"),
+    "teams_with_event_explorer_app_rows_read": (["EventsQuery"], "", "read_rows"),
+    "teams_with_event_explorer_app_duration_ms": (["EventsQuery"], "", "query_duration_ms"),
+    "teams_with_event_explorer_api_bytes_read": (["EventsQuery"], "personal_api_key", "read_bytes"),
+    "teams_with_event_explorer_api_rows_read": (["EventsQuery"], "personal_api_key", "read_rows"),
+    "teams_with_event_explorer_api_duration_ms": (["EventsQuery"], "personal_api_key", "query_duration_ms"),
+}
+
 USAGE_REPORT_TASK_KWARGS = {
     "queue": CeleryQueue.USAGE_REPORTS.value,
     "ignore_result": True,
@@ -456,20 +477,31 @@ def get_teams_with_anonymous_personful_event_count_in_period(
 
 @timed_log()
 @retry(tries=QUERY_RETRIES, delay=QUERY_RETRY_DELAY, backoff=QUERY_RETRY_BACKOFF)
-def get_teams_with_event_count_with_groups_in_period(begin: datetime, end: datetime) -> list[tuple[int, int]]:
-    result = sync_execute(
+def get_teams_with_event_counts_in_period(begin: datetime, end: datetime) -> dict[str, list[tuple[int, int]]]:
+    """
+    Counts the per-team event metrics of the usage report that don't de-duplicate events in a single scan over the
+    events of the period, instead of scanning the period once per metric. The unique event counts are left to their own
+    queries, as the exact distinct states of several of them at once would take up too much memory.
+    """
+    results = sync_execute(
         """
-        SELECT team_id, count(1) as count
+        SELECT
+            team_id,
+            countIf($group_0 != '' OR $group_1 != '' OR $group_2 != '' OR $group_3 != '' OR $group_4 != '') as event_count_with_groups,
+            countIf(event = 'survey sent') as survey_responses_count
         FROM events
         WHERE timestamp between %(begin)s AND %(end)s
-        AND ($group_0 != '' OR $group_1 != '' OR $group_2 != '' OR $group_3 != '' OR $group_4 != '')
         GROUP BY team_id
     """,
         {"begin": begin, "end": end},
         workload=Workload.OFFLINE,
         settings=CH_BILLING_SETTINGS,
     )
-    return result
+
+    return _split_team_metric_rows(
+        results,
+        ["teams_with_event_count_with_groups_in_period", "teams_with_survey_responses_count_in_period"],
+    )
 
 
 @timed_log()
@@ -512,58 +544,61 @@ def get_teams_with_recording_count_in_period(
 
 @timed_log()
 @retry(tries=QUERY_RETRIES, delay=QUERY_RETRY_DELAY, backoff=QUERY_RETRY_BACKOFF)
-def get_teams_with_hogql_metric(
-    begin: datetime,
-    end: datetime,
-    query_types: list[str],
-    access_method: str = "",
-    metric: Literal["read_bytes", "read_rows", "query_duration_ms"] = "read_bytes",
-) -> list[tuple[int, int]]:
-    if metric not in ["read_bytes", "read_rows", "query_duration_ms"]:
-        # :TRICKY: Inlined into the query below.
-        raise ValueError(f"Invalid metric {metric}")
-    result = sync_execute(
+def get_teams_with_hogql_metrics(begin: datetime, end: datetime) -> dict[str, list[tuple[int, int]]]:
+    """Sums all the HogQL query metrics of the usage report in a single scan of the query log."""
+    metric_exprs = []
+    params: dict[str, Any] = {"begin": begin, "end": end, "query_types": []}
+    for index, (query_types, access_method, metric) in enumerate(HOGQL_USAGE_METRICS.values()):
+        # :TRICKY: The metric is inlined into the query below, the metrics are constants above.
+        metric_exprs.append(
+            f"sumIf({metric}, query_type IN (%(query_types_{index})s) AND access_method = %(access_method_{index})s)"
+        )
+        params[f"query_types_{index}"] = query_types
+        params[f"access_method_{index}"] = access_method
+        params["query_types"] = list(dict.fromkeys([*params["query_types"], *query_types]))
+
+    metrics_sql = ", ".join(metric_exprs)
+
+    results = sync_execute(
         f"""
         WITH JSONExtractInt(log_comment, 'team_id') as team_id,
              JSONExtractString(log_comment, 'query_type') as query_type,
              JSONExtractString(log_comment, 'access_method') as access_method
-        SELECT team_id, sum({metric}) as count
+        SELECT team_id, {metrics_sql}
         FROM clusterAllReplicas({CLICKHOUSE_CLUSTER}, system.query_log)
         WHERE (type = 'QueryFinish' OR type = 'ExceptionWhileProcessing')
           AND is_initial_query = 1
           AND query_type IN (%(query_types)s)
           AND query_start_time between %(begin)s AND %(end)s
-          AND access_method = %(access_method)s
         GROUP BY team_id
     """,
-        {
-            "begin": begin,
-            "end": end,
-            "query_types": query_types,
-            "access_method": access_method,
-        },
+        params,
         workload=Workload.OFFLINE,
         settings=CH_BILLING_SETTINGS,
     )
-    return result
+
+    return _split_team_metric_rows(results, list(HOGQL_USAGE_METRICS.keys()))
 
 
 @timed_log()
 @retry(tries=QUERY_RETRIES, delay=QUERY_RETRY_DELAY, backoff=QUERY_RETRY_BACKOFF)
-def get_teams_with_feature_flag_requests_count_in_period(
-    begin: datetime, end: datetime, request_type: FlagRequestType
-) -> list[tuple[int, int]]:
+def get_teams_with_feature_flag_requests_counts_in_period(
+    begin: datetime, end: datetime
+) -> dict[str, list[tuple[int, int]]]:
     # depending on the region, events are stored in different teams
     team_to_query = 1 if get_instance_region() == "EU" else 2
     validity_token = settings.DECIDE_BILLING_ANALYTICS_TOKEN
 
-    target_event = "decide usage" if request_type == FlagRequestType.DECIDE else "local evaluation usage"
-
-    result = sync_execute(
+    results = sync_execute(
         """
-        SELECT distinct_id as team, sum(JSONExtractInt(properties, 'count')) as sum
+        SELECT
+            distinct_id as team,
+            sumIf(JSONExtractInt(properties, 'count'), event = 'decide usage') as decide_requests,
+            sumIf(JSONExtractInt(properties, 'count'), event = 'local evaluation usage') as local_evaluation_requests
         FROM events
-        WHERE team_id = %(team_to_query)s AND event=%(target_event)s AND timestamp between %(begin)s AND %(end)s
+        WHERE team_id = %(team_to_query)s
+        AND event IN ('decide usage', 'local evaluation usage')
+        AND timestamp between %(begin)s AND %(end)s
         AND has([%(validity_token)s], replaceRegexpAll(JSONExtractRaw(properties, 'token'), '^"|"$', ''))
         GROUP BY team
     """,
@@ -572,34 +607,25 @@ def get_teams_with_feature_flag_requests_count_in_period(
             "end": end,
             "team_to_query": team_to_query,
             "validity_token": validity_token,
-            "target_event": target_event,
         },
         workload=Workload.OFFLINE,
         settings=CH_BILLING_SETTINGS,
     )
 
-    return result
-
-
-@timed_log()
-@retry(tries=QUERY_RETRIES, delay=QUERY_RETRY_DELAY, backoff=QUERY_RETRY_BACKOFF)
-def get_teams_with_survey_responses_count_in_period(
-    begin: datetime,
-    end: datetime,
-) -> list[tuple[int, int]]:
-    results = sync_execute(
-        """
-        SELECT team_id, COUNT() as count
-        FROM events
-        WHERE event = 'survey sent' AND timestamp between %(begin)s AND %(end)s
-        GROUP BY team_id
-    """,
-        {"begin": begin, "end": end},
-        workload=Workload.OFFLINE,
-        settings=CH_BILLING_SETTINGS,
+    return _split_team_metric_rows(
+        results,
+        ["teams_with_decide_requests_count_in_period", "teams_with_local_evaluation_requests_count_in_period"],
     )
 
-    return results
+
+def _split_team_metric_rows(rows: list[tuple], metrics: list[str]) -> dict[str, list[tuple[int, int]]]:
+    """
+    Splits `(team, metric_1, metric_2, ...)` rows of a fused query into `(team, metric)` rows per metric. Like the
+    queries for a single metric, teams without any usage are left out.
+    """
+    return {
+        metric: [(row[0], row[index + 1]) for row in rows if row[index + 1]] for index, metric in enumerate(metrics)
+    }
 
 
 @timed_log()
@@ -657,36 +683,52 @@ def convert_team_usage_rows_to_dict(rows: list[Union[dict, tuple[int, int]]]) ->
     return team_id_map
 
 
-def _get_all_usage_data(period_start: datetime, period_end: datetime) -> dict[str, Any]:
+def _get_all_usage_data(
+    period_start: datetime, period_end: datetime, checkpoint_key: Optional[str] = None
+) -> dict[str, Any]:
     """
     Gets all usage data for the specified period. Clickhouse is good at counting things so
     we count across all teams rather than doing it one by one
+
+    The ClickHouse queries run concurrently. With a `checkpoint_key`, their results are checkpointed, so that calling
+    this again with the same key (e.g. when the task is retried) only runs the queries that didn't complete.
     """
-    return {
-        "teams_with_event_count_in_period": get_teams_with_billable_event_count_in_period(
-            period_start, period_end, count_distinct=True
-        ),
-        "teams_with_enhanced_persons_event_count_in_period": get_teams_with_billable_enhanced_persons_event_count_in_period(
-            period_start, period_end, count_distinct=True
-        ),
-        "teams_with_anonymous_personful_event_count_in_period": get_teams_with_anonymous_personful_event_count_in_period(
-            period_start, period_end, count_distinct=True
-        ),
-        "teams_with_event_count_with_groups_in_period": get_teams_with_event_count_with_groups_in_period(
+    clickhouse_queries: dict[str, Callable[[], dict[str, Any]]] = {
+        "event_count": lambda: {
+            "teams_with_event_count_in_period": get_teams_with_billable_event_count_in_period(
+                period_start, period_end, count_distinct=True
+            )
+        },
+        "enhanced_persons_event_count": lambda: {
+            "teams_with_enhanced_persons_event_count_in_period": get_teams_with_billable_enhanced_persons_event_count_in_period(
+                period_start, period_end, count_distinct=True
+            )
+        },
+        "anonymous_personful_event_count": lambda: {
+            "teams_with_anonymous_personful_event_count_in_period": get_teams_with_anonymous_personful_event_count_in_period(
+                period_start, period_end, count_distinct=True
+            )
+        },
+        "event_counts": lambda: get_teams_with_event_counts_in_period(period_start, period_end),
+        "recording_count": lambda: {
+            "teams_with_recording_count_in_period": get_teams_with_recording_count_in_period(
+                period_start, period_end, snapshot_source="web"
+            )
+        },
+        "mobile_recording_count": lambda: {
+            "teams_with_mobile_recording_count_in_period": get_teams_with_recording_count_in_period(
+                period_start, period_end, snapshot_source="mobile"
+            )
+        },
+        "feature_flag_requests_counts": lambda: get_teams_with_feature_flag_requests_counts_in_period(
             period_start, period_end
         ),
-        "teams_with_recording_count_in_period": get_teams_with_recording_count_in_period(
-            period_start, period_end, snapshot_source="web"
-        ),
-        "teams_with_mobile_recording_count_in_period": get_teams_with_recording_count_in_period(
-            period_start, period_end, snapshot_source="mobile"
-        ),
-        "teams_with_decide_requests_count_in_period": get_teams_with_feature_flag_requests_count_in_period(
-            period_start, period_end, FlagRequestType.DECIDE
-        ),
-        "teams_with_local_evaluation_requests_count_in_period": get_teams_with_feature_flag_requests_count_in_period(
-            period_start, period_end, FlagRequestType.LOCAL_EVALUATION
-        ),
+        "hogql_metrics": lambda: get_teams_with_hogql_metrics(period_start, period_end),
+    }
+    all_data = _run_usage_queries(clickhouse_queries, checkpoint_key)
+
+    return {
+        **all_data,
         "teams_with_group_types_total": list(
             GroupTypeMapping.objects.values("team_id").annotate(total=Count("id")).order_by("team_id")
         ),
@@ -717,103 +759,53 @@ def _get_all_usage_data(period_start: datetime, period_end: datetime) -> dict[st
         "teams_with_ff_active_count": list(
             FeatureFlag.objects.filter(active=True).values("team_id").annotate(total=Count("id")).order_by("team_id")
         ),
-        "teams_with_hogql_app_bytes_read": get_teams_with_hogql_metric(
-            period_start,
-            period_end,
-            metric="read_bytes",
-            query_types=["hogql_query", "HogQLQuery"],
-            access_method="",
-        ),
-        "teams_with_hogql_app_rows_read": get_teams_with_hogql_metric(
-            period_start,
-            period_end,
-            metric="read_rows",
-            query_types=["hogql_query", "HogQLQuery"],
-            access_method="",
-        ),
-        "teams_with_hogql_app_duration_ms": get_teams_with_hogql_metric(
-            period_start,
-            period_end,
-            metric="query_duration_ms",
-            query_types=["hogql_query", "HogQLQuery"],
-            access_method="",
-        ),
-        "teams_with_hogql_api_bytes_read": get_teams_with_hogql_metric(
-            period_start,
-            period_end,
-            metric="read_bytes",
-            query_types=["hogql_query", "HogQLQuery"],
-            access_method="personal_api_key",
-        ),
-        "teams_with_hogql_api_rows_read": get_teams_with_hogql_metric(
-            period_start,
-            period_end,
-            metric="read_rows",
-            query_types=["hogql_query", "HogQLQuery"],
-            access_method="personal_api_key",
-        ),
-        "teams_with_hogql_api_duration_ms": get_teams_with_hogql_metric(
-            period_start,
-            period_end,
-            metric="query_duration_ms",
-            query_types=["hogql_query", "HogQLQuery"],
-            access_method="personal_api_key",
-        ),
-        "teams_with_event_explorer_app_bytes_read": get_teams_with_hogql_metric(
-            period_start,
-            period_end,
-            metric="read_bytes",
-            query_types=["EventsQuery"],
-            access_method="",
-        ),
-        "teams_with_event_explorer_app_rows_read": get_teams_with_hogql_metric(
-            period_start,
-            period_end,
-            metric="read_rows",
-            query_types=["EventsQuery"],
-            access_method="",
-        ),
-        "teams_with_event_explorer_app_duration_ms": get_teams_with_hogql_metric(
-            period_start,
-            period_end,
-            metric="query_duration_ms",
-            query_types=["EventsQuery"],
-            access_method="",
-        ),
-        "teams_with_event_explorer_api_bytes_read": get_teams_with_hogql_metric(
-            period_start,
-            period_end,
-            metric="read_bytes",
-            query_types=["EventsQuery"],
-            access_method="personal_api_key",
-        ),
-        "teams_with_event_explorer_api_rows_read": get_teams_with_hogql_metric(
-            period_start,
-            period_end,
-            metric="read_rows",
-            query_types=["EventsQuery"],
-            access_method="personal_api_key",
-        ),
-        "teams_with_event_explorer_api_duration_ms": get_teams_with_hogql_metric(
-            period_start,
-            period_end,
-            metric="query_duration_ms",
-            query_types=["EventsQuery"],
-            access_method="personal_api_key",
-        ),
-        "teams_with_survey_responses_count_in_period": get_teams_with_survey_responses_count_in_period(
-            period_start, period_end
-        ),
         "teams_with_rows_synced_in_period": get_teams_with_rows_synced_in_period(period_start, period_end),
     }
 
 
-def _get_all_usage_data_as_team_rows(period_start: datetime, period_end: datetime) -> dict[str, Any]:
+def _run_usage_queries(
+    queries: dict[str, Callable[[], dict[str, Any]]], checkpoint_key: Optional[str]
+) -> dict[str, Any]:
+    """
+    Runs the queries on a bounded thread pool. Only ClickHouse queries should be passed in here, Django database
+    connections can't be shared between threads.
+    """
+
+    def run_query(name: str) -> dict[str, Any]:
+        cache_key = f"usage_report_checkpoint_{checkpoint_key}_{name}" if checkpoint_key else None
+        if cache_key:
+            checkpoint = get_safe_cache(cache_key)
+            if checkpoint is not None:
+                logger.info("Using checkpointed usage report query results", query=name)
+                return checkpoint
+
+        result = queries[name]()
+
+        if cache_key:
+            cache.set(cache_key, result, USAGE_REPORT_CHECKPOINT_TTL)
+        return result
+
+    all_data: dict[str, Any] = {}
+    max_workers = settings.USAGE_REPORT_QUERY_CONCURRENCY
+    if max_workers <= 1:
+        for name in queries:
+            all_data.update(run_query(name))
+        return all_data
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="usage-report") as executor:
+        for result in executor.map(run_query, queries):
+            all_data.update(result)
+    return all_data
+
+
+def _get_all_usage_data_as_team_rows(
+    period_start: datetime, period_end: datetime, checkpoint_key: Optional[str] = None
+) -> dict[str, Any]:
     """
     Gets all usage data for the specified period as a map of team_id -> value. This makes it faster
     to access the data than looping over all_data to find what we want.
     """
-    all_data = _get_all_usage_data(period_start, period_end)
+    all_data = _get_all_usage_data(period_start, period_end, checkpoint_key)
     # convert it to a map of team_id -> value
     for key, rows in all_data.items():
         all_data[key] = convert_team_usage_rows_to_dict(rows)
@@ -906,10 +898,12 @@ def _add_team_report_to_org_reports(
                 )
 
 
-def _get_all_org_reports(period_start: datetime, period_end: datetime) -> dict[str, OrgReport]:
+def _get_all_org_reports(
+    period_start: datetime, period_end: datetime, checkpoint_key: Optional[str] = None
+) -> dict[str, OrgReport]:
     logger.info("Getting all usage data...")  # noqa T201
     time_now = datetime.now()
-    all_data = _get_all_usage_data_as_team_rows(period_start, period_end)
+    all_data = _get_all_usage_data_as_team_rows(period_start, period_end, checkpoint_key)
     logger.debug(f"Getting all usage data took {(datetime.now() - time_now).total_seconds()} seconds.")  # noqa T201
 
     logger.info("Getting teams for usage reports...")  # noqa T201
@@ -957,8 +951,11 @@ def send_all_org_usage_reports(
 
     instance_metadata = get_instance_metadata(period)
 
+    # Retries of the task keep its id, so they pick up the query results of the previous attempts
+    checkpoint_key = current_task.request.id if current_task else None
+
     try:
-        org_reports = _get_all_org_reports(period_start, period_end)
+        org_reports = _get_all_org_reports(period_start, period_end, checkpoint_key)
 
         logger.info("Sending usage reports to PostHog and Billing...")  # noqa T201
         time_now = datetime.now()
@@ -2,13 +2,14 @@ import datetime
 
 import structlog
 from celery import shared_task
+from sentry_sdk import capture_exception
 
 from posthog.warehouse.data_load.service import (
     cancel_external_data_workflow,
     pause_external_data_schedule,
     unpause_external_data_schedule,
 )
-from posthog.warehouse.models import ExternalDataJob, ExternalDataSource
+from posthog.warehouse.models import DataWarehouseSavedQuery, ExternalDataJob, ExternalDataSource
 from posthog.ph_client import get_ph_client
 from posthog.models import Team
 from django.db.models import Q
@@ -141,3 +142,36 @@ def validate_data_warehouse_table_columns(team_id: int, table_id: str) -> None:
         ph_client.capture(team_id, "validate_data_warehouse_table_columns errored")
     finally:
         ph_client.shutdown()
+
+
+def materialize_due_saved_queries() -> None:
+    from posthog.warehouse.data_load.materialize_saved_query import delete_materialization, is_materialization_due
+
+    saved_queries = DataWarehouseSavedQuery.objects.filter(materialization_interval__isnull=False).exclude(deleted=True)
+    for saved_query in saved_queries:
+        if is_materialization_due(saved_query):
+            materialize_saved_query_task.delay(str(saved_query.pk))
+
+    # Views whose materialization was turned off since the last run
+    turned_off_saved_queries = DataWarehouseSavedQuery.objects.filter(
+        Q(materialization_interval__isnull=True) | Q(deleted=True)
+    ).exclude(materialization_state={})
+    for saved_query in turned_off_saved_queries:
+        try:
+            delete_materialization(saved_query)
+        except Exception as err:
+            logger.exception("Failed to delete materialization of saved query", saved_query_id=saved_query.pk)
+            capture_exception(err)
+
+
+@shared_task(ignore_result=True)
+def materialize_saved_query_task(saved_query_id: str) -> None:
+    from posthog.warehouse.data_load.materialize_saved_query import materialize_saved_query
+
+    saved_query = DataWarehouseSavedQuery.objects.select_related("team").get(pk=saved_query_id)
+    try:
+        materialize_saved_query(saved_query)
+    except Exception as err:
+        # queries of the view keep reading the previous materialization until it's stale, then run the query
+        logger.exception("Failed to materialize saved query", saved_query_id=saved_query_id)
+        capture_exception(err)
@@ -0,0 +1,129 @@
+from datetime import UTC, date, datetime
+from typing import Any, Optional
+from urllib.parse import unquote
+
+import dlt
+import pyarrow as pa
+from deltalake import DeltaTable
+from django.conf import settings
+from dlt.common.libs.deltalake import _deltalake_storage_options, try_get_deltatable
+from dlt.common.schema.utils import get_columns_names_with_prop
+from structlog.typing import FilteringBoundLogger
+from temporalio import activity
+
+# Tables with more files than this aren't pruned when querying them
+MAX_FILE_STATS_FILES = 1000
+
+
+def maintain_delta_tables(
+    pipeline: dlt.Pipeline, table_names: list[str], logger: FilteringBoundLogger
+) -> dict[str, Optional[dict[str, Any]]]:
+    """
+    Compacts and vacuums the Delta tables the pipeline loaded into. Every sync adds at least one file per table, so
+    without this incremental syncs leave behind ever more small files, which every query of the table has to read.
+    Returns the file stats of the tables once maintained, see `get_file_stats`.
+    """
+    file_stats: dict[str, Optional[dict[str, Any]]] = {}
+    with pipeline.destination_client() as client:
+        for table_name in table_names:
+            table_uri = client.make_remote_uri(client.get_table_dir(table_name))  # type: ignore
+            delta_table = try_get_deltatable(table_uri, storage_options=_deltalake_storage_options(client.config))  # type: ignore
+            if delta_table is None:
+                continue
+
+            table_schema = pipeline.default_schema.tables.get(table_name)
+            z_order_columns = get_columns_names_with_prop(table_schema, "primary_key") if table_schema else []
+            maintain_delta_table(table_name, delta_table, z_order_columns, logger)
+            file_stats[table_name] = get_file_stats(delta_table)
+    return file_stats
+
+
+def maintain_delta_table(
+    table_name: str, delta_table: DeltaTable, z_order_columns: list[str], logger: FilteringBoundLogger
+) -> None:
+    """
+    Bin-packs the files of the table into files of `DATA_IMPORTS_DELTA_TARGET_FILE_SIZE` bytes, once it has
+    `DATA_IMPORTS_DELTA_COMPACTION_MIN_FILES` files. Tables with a primary key are Z-ordered by it, so that the merges
+    of incremental syncs and lookups by key only need to read a few of the files. Files no longer part of the table are
+    deleted after `DATA_IMPORTS_DELTA_VACUUM_RETENTION_HOURS`, leaving queries that already listed them time to finish.
+    """
+    file_count = len(delta_table.files())
+    record_delta_table_files(file_count)
+
+    if file_count >= settings.DATA_IMPORTS_DELTA_COMPACTION_MIN_FILES:
+        metrics: dict[str, Any]
+        if z_order_columns:
+            metrics = delta_table.optimize.z_order(
+                z_order_columns, target_size=settings.DATA_IMPORTS_DELTA_TARGET_FILE_SIZE
+            )
+        else:
+            metrics = delta_table.optimize.compact(target_size=settings.DATA_IMPORTS_DELTA_TARGET_FILE_SIZE)
+        logger.info(
+            f"Compacted Delta table {table_name}",
+            files_removed=metrics.get("numFilesRemoved"),
+            files_added=metrics.get("numFilesAdded"),
+            z_order_columns=z_order_columns,
+        )
+
+    deleted_files = delta_table.vacuum(
+        retention_hours=settings.DATA_IMPORTS_DELTA_VACUUM_RETENTION_HOURS,
+        dry_run=False,
+        enforce_retention_duration=False,
+    )
+    if deleted_files:
+        logger.info(f"Vacuumed {len(deleted_files)} files of Delta table {table_name}")
+
+
+def get_file_stats(delta_table: DeltaTable) -> Optional[dict[str, Any]]:
+    """
+    The min and max values of the numeric, date and datetime columns per file of the current version of the table, as
+    recorded in the Delta log. HogQL uses them to only read the files that might match the where clause of a query.
+    """
+    add_actions = delta_table.get_add_actions(flatten=True)
+    if add_actions.num_rows > MAX_FILE_STATS_FILES:
+        return None
+
+    columns = {field.name: kind for field in delta_table.schema().to_pyarrow() if (kind := _get_stats_kind(field.type))}
+    files = []
+    for add_action in add_actions.to_pylist():
+        path = unquote(add_action["path"])
+        if any(char in path for char in "{},*?"):
+            # these would be read as globs
+            return None
+        file: dict[str, Any] = {"path": path, "min": {}, "max": {}}
+        for column in columns:
+            for bound in ("min", "max"):
+                value = _to_json_value(add_action.get(f"{bound}.{column}"))
+                if value is not None:
+                    file[bound][column] = value
+        files.append(file)
+
+    return {"version": delta_table.version(), "columns": columns, "files": files}
+
+
+def _get_stats_kind(arrow_type: pa.DataType) -> Optional[str]:
+    # decimals and strings are left out, as their stats can be rounded or truncated
+    if pa.types.is_integer(arrow_type) or pa.types.is_floating(arrow_type):
+        return "number"
+    if pa.types.is_date(arrow_type):
+        return "date"
+    if pa.types.is_timestamp(arrow_type):
+        return "datetime"
+    return None
+
+
+def _to_json_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return (value if value.tzinfo is not None else value.replace(tzinfo=UTC)).isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+def record_delta_table_files(file_count: int) -> None:
+    if activity.in_activity():
+        activity.metric_meter().create_histogram(
+            "data_imports_delta_table_files", "Number of files of a Delta table after a sync, before compacting it."
+        ).record(file_count)
@@ -14,7 +14,9 @@ from dlt.sources import DltSource
 from deltalake.exceptions import DeltaError
 from collections import Counter
 
+from posthog.temporal.data_imports.pipelines.delta_maintenance import maintain_delta_tables
 from posthog.warehouse.data_load.validate_schema import validate_schema_and_update_table
+from posthog.warehouse.models.external_data_schema import ExternalDataSchema
 from posthog.warehouse.models.external_data_source import ExternalDataSource
 
 
@@ -41,7 +43,10 @@ class DataImportPipeline:
     ):
         self.inputs = inputs
         self.logger = logger
-        if incremental:
+        # Incremental syncs of Postgres and MySQL tables are bounded by ranges of the incremental field instead, which
+        # unlike a limit never end between rows with the same value of the field
+        is_sql_database = inputs.job_type in (ExternalDataSource.Type.POSTGRES, ExternalDataSource.Type.MYSQL)
+        if incremental and not is_sql_database:
             # Incremental syncs: Assuming each page is 100 items for now so bound each run at 50_000 items
             self.source = source.add_limit(500)
         else:
@@ -49,11 +54,7 @@ class DataImportPipeline:
 
         self._incremental = incremental
         self.refresh_dlt = reset_pipeline
-        self.should_chunk_pipeline = (
-            incremental
-            and inputs.job_type != ExternalDataSource.Type.POSTGRES
-            and inputs.job_type != ExternalDataSource.Type.SNOWFLAKE
-        )
+        self.should_chunk_pipeline = incremental and inputs.job_type != ExternalDataSource.Type.SNOWFLAKE
 
     def _get_pipeline_name(self):
         return f"{self.inputs.job_type}_pipeline_{self.inputs.team_id}_run_{self.inputs.schema_id}"
@@ -99,14 +100,14 @@ class DataImportPipeline:
 
         total_counts: Counter[str] = Counter({})
 
-        # Do chunking for incremental syncing on API based endpoints (e.g. not sql databases)
+        # Do chunking for incremental syncing, each chunk is committed on its own and the next one resumes from it
         if self.should_chunk_pipeline:
             # will get overwritten
             counts: Counter[str] = Counter({"start": 1})
             pipeline_runs = 0
 
             while counts:
-                self.logger.info(f"Running incremental (non-sql) pipeline, run ${pipeline_runs}")
+                self.logger.info(f"Running incremental pipeline, run ${pipeline_runs}")
 
                 try:
                     pipeline.run(
@@ -175,8 +176,28 @@ class DataImportPipeline:
                     row_count=total_counts.total(),
                 )
 
+        if total_counts.total() > 0:
+            self._maintain_delta_tables(pipeline, list(total_counts.keys()))
+
         return dict(total_counts)
 
+    def _maintain_delta_tables(self, pipeline: dlt.Pipeline, table_names: list[str]) -> None:
+        try:
+            file_stats = maintain_delta_tables(pipeline, table_names, self.logger)
+        except Exception as e:
+            # The data is loaded at this point, the next sync tries again
+            self.logger.exception(f"Maintaining Delta tables failed with exception {e}", exc_info=e)
+            file_stats = {}
+
+        # Outdated stats would have queries read outdated files, so they're cleared if there are no new ones
+        schema = ExternalDataSchema.objects.select_related("table").get(
+            id=self.inputs.schema_id, team_id=self.inputs.team_id
+        )
+        if schema.table is not None:
+            table_dir = schema.table.url_pattern.rstrip("/").rsplit("/", 1)[-1]
+            schema.table.file_stats = file_stats.get(table_dir)
+            schema.table.save(update_fields=["file_stats"])
+
     async def run(self) -> dict[str, int]:
         try:
             return await asyncio.to_thread(self._run)
@@ -12,8 +12,11 @@ from dlt.sources import DltResource, DltSource
 from dlt.common.schema.typing import TColumnSchema
 
 
+from dlt.common.libs.pyarrow import remove_columns
 from dlt.sources.credentials import ConnectionStringCredentials
+from django.conf import settings
 from urllib.parse import quote
+import pyarrow as pa
 
 from posthog.warehouse.types import IncrementalFieldType
 from posthog.warehouse.models.external_data_source import ExternalDataSource
@@ -25,6 +28,7 @@ from .helpers import (
     get_primary_key,
     SqlDatabaseTableConfiguration,
 )
+from .settings import INCREMENTAL_RANGE_SIZE
 
 
 def incremental_type_to_initial_value(field_type: IncrementalFieldType) -> Any:
@@ -73,7 +77,14 @@ def sql_source_for_type(
         raise Exception("Unsupported source_type")
 
     db_source = sql_database(
-        credentials, schema=schema, table_names=table_names, incremental=incremental, team_id=team_id
+        credentials,
+        schema=schema,
+        table_names=table_names,
+        incremental=incremental,
+        team_id=team_id,
+        use_arrow=str(team_id) in settings.DATA_IMPORTS_ARROW_LOADER_TEAM_IDS,
+        partitions=settings.DATA_IMPORTS_SQL_PARTITION_COUNT,
+        incremental_range_size=INCREMENTAL_RANGE_SIZE,
     )
 
     return db_source
@@ -114,9 +125,12 @@ def snowflake_source(
 
 
 # Temp while DLT doesn't support `interval` columns
-def remove_interval(doc: dict, team_id: Optional[int]) -> dict:
+def remove_interval(doc: dict | pa.Table, team_id: Optional[int]) -> dict | pa.Table:
     if team_id == 1 or team_id == 2:
-        if "sync_frequency_interval" in doc:
+        if isinstance(doc, pa.Table):
+            if "sync_frequency_interval" in doc.column_names:
+                return remove_columns(doc, ["sync_frequency_interval"])
+        elif "sync_frequency_interval" in doc:
             del doc["sync_frequency_interval"]
     return doc
 
@@ -129,6 +143,9 @@ def sql_database(
     table_names: Optional[List[str]] = dlt.config.value,  # noqa: UP006
     incremental: Optional[dlt.sources.incremental] = None,
     team_id: Optional[int] = None,
+    use_arrow: bool = False,
+    partitions: int = 1,
+    incremental_range_size: Optional[int] = None,
 ) -> Iterable[DltResource]:
     """
     A DLT source which loads data from an SQL database using SQLAlchemy.
@@ -139,6 +156,9 @@ def sql_database(
         schema (Optional[str]): Name of the database schema to load (if different from default).
         metadata (Optional[MetaData]): Optional `sqlalchemy.MetaData` instance. `schema` argument is ignored when this is used.
         table_names (Optional[List[str]]): A list of table names to load. By default, all tables in the schema are loaded.
+        use_arrow (bool): Load the tables in chunks of Arrow tables instead of lists of dicts.
+        partitions (int): Read full refreshes of tables with an integer primary key in up to this many concurrent ranges.
+        incremental_range_size (Optional[int]): Load incremental tables in ranges of at least this many rows, one range per run of the source.
 
     Returns:
         Iterable[DltResource]: A list of DLT resources for each table to be loaded.
@@ -177,6 +197,9 @@ def sql_database(
             engine=engine,
             table=table,
             incremental=incremental,
+            use_arrow=use_arrow,
+            partitions=partitions,
+            incremental_range_size=incremental_range_size,
         )
 
 
@@ -3,21 +3,47 @@
 from typing import (
     Any,
     Optional,
+    TypeVar,
     Union,
 )
-from collections.abc import Iterator
+from collections.abc import Callable, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+import json
 import operator
+import queue
+import threading
+from time import monotonic
+from uuid import UUID
 
 import dlt
+import pyarrow as pa
+import structlog
 from dlt.sources.credentials import ConnectionStringCredentials
 from dlt.common.configuration.specs import BaseConfiguration, configspec
 from dlt.common.typing import TDataItem
-from .settings import DEFAULT_CHUNK_SIZE
+from temporalio import activity
+from .settings import (
+    ARROW_CHUNK_TARGET_BYTES,
+    ARROW_INITIAL_CHUNK_SIZE,
+    ARROW_MAX_CHUNK_SIZE,
+    ARROW_MIN_CHUNK_SIZE,
+    DEFAULT_CHUNK_SIZE,
+    MIN_PARTITION_SIZE,
+)
 
-from sqlalchemy import Table, create_engine, Column
+from sqlalchemy import Table, create_engine, Column, func, select
 from sqlalchemy.engine import Engine
 from sqlalchemy.sql import Select
 
+logger = structlog.get_logger(__name__)
+
+T = TypeVar("T")
+
+# Put on the queue of `TableLoader._load_partitions` by a reader once its range is read
+_PARTITION_DONE = object()
+
 
 class TableLoader:
     def __init__(
@@ -26,11 +52,15 @@ class TableLoader:
         table: Table,
         chunk_size: int = 1000,
         incremental: Optional[dlt.sources.incremental[Any]] = None,
+        partitions: int = 1,
+        incremental_range_size: Optional[int] = None,
     ) -> None:
         self.engine = engine
         self.table = table
         self.chunk_size = chunk_size
         self.incremental = incremental
+        self.partitions = partitions
+        self.incremental_range_size = incremental_range_size
         if incremental:
             try:
                 self.cursor_column: Optional[Column[Any]] = table.c[incremental.cursor_path]
@@ -52,29 +82,257 @@ class TableLoader:
         if last_value_func is max:  # Query ordered and filtered according to last_value function
             order_by = self.cursor_column.asc()  # type: ignore
             filter_op = operator.gt
+            range_op = operator.le
         elif last_value_func is min:
             order_by = self.cursor_column.desc()  # type: ignore
             filter_op = operator.lt
+            range_op = operator.ge
         else:  # Custom last_value, load everything and let incremental handle filtering
             return query
         query = query.order_by(order_by)
-        if self.last_value is None:
-            return query
-        return query.where(filter_op(self.cursor_column, self.last_value))  # type: ignore
+        if self.last_value is not None:
+            query = query.where(filter_op(self.cursor_column, self.last_value))  # type: ignore
+        if self.incremental_range_size is not None and (range_end := self.get_range_end(query)) is not None:
+            query = query.where(range_op(self.cursor_column, range_end))  # type: ignore
+        return query
 
-    def load_rows(self) -> Iterator[list[TDataItem]]:
+    def get_range_end(self, query: Select[Any]) -> Optional[Any]:
+        """
+        The last value of the cursor column in the range of the ordered incremental `query` that is loaded next. Ranges
+        span at least `incremental_range_size` rows, and all rows with their last value, so that a sync resuming from
+        the last value of the range doesn't skip any rows. None if the remaining rows fit in a single range.
+        """
+        assert self.incremental_range_size is not None
+        with self.engine.connect() as conn:
+            return conn.execute(
+                query.with_only_columns(self.cursor_column).offset(self.incremental_range_size - 1).limit(1)  # type: ignore
+            ).scalar()
+
+    def get_partition_ranges(self) -> list[tuple[Optional[int], Optional[int]]]:
+        """
+        Splits the integer primary key of the table into up to `partitions` ranges of at least `MIN_PARTITION_SIZE`
+        values, each given as `[start, end)`. The first and last ranges are open, so that rows written while the table
+        is loaded aren't missed. Returns no ranges if the table can't be split, e.g. for incremental loads, which need
+        their rows in order of the cursor column.
+        """
+        primary_key = list(self.table.primary_key.columns)
+        if self.partitions < 2 or self.incremental or len(primary_key) != 1:
+            return []
+        try:
+            if primary_key[0].type.python_type is not int:
+                return []
+        except NotImplementedError:
+            return []
+
+        with self.engine.connect() as conn:
+            low, high = conn.execute(select(func.min(primary_key[0]), func.max(primary_key[0]))).one()
+        if low is None:
+            return []
+
+        partitions = min(self.partitions, (high - low + 1) // MIN_PARTITION_SIZE)
+        if partitions < 2:
+            return []
+        step = -(-(high - low + 1) // partitions)
+        boundaries = [low + step * i for i in range(1, partitions)]
+        return list(zip([None, *boundaries], [*boundaries, None]))
+
+    def make_partition_query(self, start: Optional[int], end: Optional[int]) -> Select[Any]:
+        column = next(iter(self.table.primary_key.columns))
         query = self.make_query()
+        if start is not None:
+            query = query.where(column >= start)
+        if end is not None:
+            query = query.where(column < end)
+        return query
+
+    def load_rows(self) -> Iterator[list[TDataItem]]:
+        if ranges := self.get_partition_ranges():
+            yield from self._load_partitions(self._load_rows, ranges)
+        else:
+            yield from self._load_rows(self.make_query())
+
+    def _load_rows(self, query: Select[Any]) -> Iterator[list[TDataItem]]:
         with self.engine.connect() as conn:
             result = conn.execution_options(yield_per=self.chunk_size).execute(query)
             for partition in result.partitions(size=self.chunk_size):
                 yield [dict(row._mapping) for row in partition]
 
+    def load_arrow_tables(self) -> Iterator[pa.Table]:
+        """
+        Like `load_rows`, but yields Arrow tables, which dlt writes to parquet as they are, without normalizing every
+        row. Rows are streamed with a server side cursor, in chunks sized to the width of the rows.
+        """
+        rows_loaded, bytes_loaded, start_time = 0, 0, monotonic()
+        if ranges := self.get_partition_ranges():
+            arrow_tables = self._load_partitions(self._load_arrow_tables, ranges)
+        else:
+            arrow_tables = self._load_arrow_tables(self.make_query())
+
+        for arrow_table in arrow_tables:
+            rows_loaded += arrow_table.num_rows
+            bytes_loaded += arrow_table.nbytes
+            yield arrow_table
+
+        record_table_throughput(self.table.name, rows_loaded, bytes_loaded, monotonic() - start_time)
+
+    def _load_arrow_tables(self, query: Select[Any]) -> Iterator[pa.Table]:
+        columns = list(self.table.columns)
+        arrow_types = [get_arrow_type(column) for column in columns]
+        chunk_size = self.chunk_size
+
+        with self.engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, max_row_buffer=ARROW_MAX_CHUNK_SIZE).execute(query)
+            while rows := result.fetchmany(chunk_size):
+                arrow_table = rows_to_arrow_table(rows, [column.name for column in columns], arrow_types)
+                yield arrow_table
+                chunk_size = get_arrow_chunk_size(arrow_table)
+
+    def _load_partitions(
+        self, load: Callable[[Select[Any]], Iterator[T]], ranges: list[tuple[Optional[int], Optional[int]]]
+    ) -> Iterator[T]:
+        """
+        Reads the ranges concurrently, one thread and connection per range, and yields their chunks as they come in.
+        At most two chunks per range are buffered, so slow consumers hold back the readers rather than fill up memory.
+        """
+        chunks: queue.Queue[Any] = queue.Queue(maxsize=len(ranges) * 2)
+        stopped = threading.Event()
+
+        def put(item: Any) -> bool:
+            while not stopped.is_set():
+                try:
+                    chunks.put(item, timeout=1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def read(start: Optional[int], end: Optional[int]) -> None:
+            try:
+                for chunk in load(self.make_partition_query(start, end)):
+                    if not put(chunk):
+                        return
+            except Exception as e:
+                put(e)
+            finally:
+                put(_PARTITION_DONE)
+
+        logger.info("sql_database_table_partitioned", table=self.table.name, partitions=len(ranges))
+        with ThreadPoolExecutor(max_workers=len(ranges), thread_name_prefix="sql-table-partition") as executor:
+            for start, end in ranges:
+                executor.submit(read, start, end)
+
+            remaining = len(ranges)
+            try:
+                while remaining:
+                    item = chunks.get()
+                    if item is _PARTITION_DONE:
+                        remaining -= 1
+                    elif isinstance(item, Exception):
+                        raise item
+                    else:
+                        yield item
+            finally:
+                # lets the readers stop early if the consumer went away or another reader failed
+                stopped.set()
+
+
+def get_arrow_type(column: Column[Any]) -> Optional[pa.DataType]:
+    """The Arrow type for values of the column, matching what dlt infers for them. None if Arrow should infer it."""
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return None
+
+    if python_type is bool:
+        return pa.bool_()
+    if python_type is int:
+        return pa.int64()
+    if python_type is float:
+        return pa.float64()
+    if python_type is Decimal:
+        # same defaults as the column hints of `get_column_hints`
+        precision = getattr(column.type, "precision", None) or 76
+        scale = getattr(column.type, "scale", None) or 32
+        if scale > precision:
+            precision = 76
+        return pa.decimal128(precision, scale) if precision <= 38 else pa.decimal256(precision, scale)
+    if python_type is datetime:
+        return pa.timestamp("us", tz="UTC")
+    if python_type is date:
+        return pa.date32()
+    if python_type is time:
+        return pa.time64("us")
+    if python_type is bytes:
+        return pa.binary()
+    if python_type in (str, UUID, dict, list, timedelta):
+        return pa.string()
+    return None
+
+
+def _to_text(value: Any) -> Any:
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, dict | list):
+        return json.dumps(value, default=str)
+    return str(value)
+
+
+def _column_to_arrow(values: list[Any], arrow_type: Optional[pa.DataType]) -> pa.Array:
+    if arrow_type == pa.string():
+        values = [_to_text(value) for value in values]
+    try:
+        return pa.array(values, type=arrow_type)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError, OverflowError):
+        # e.g. decimals out of the range of the column type, or types Arrow doesn't know about
+        return pa.array([_to_text(value) for value in values], type=pa.string())
+
+
+def rows_to_arrow_table(
+    rows: Sequence[Sequence[Any]], column_names: list[str], arrow_types: list[Optional[pa.DataType]]
+) -> pa.Table:
+    columns = list(zip(*rows)) if rows else [() for _ in column_names]
+    return pa.Table.from_arrays(
+        [_column_to_arrow(list(values), arrow_type) for values, arrow_type in zip(columns, arrow_types)],
+        names=column_names,
+    )
+
+
+def get_arrow_chunk_size(arrow_table: pa.Table) -> int:
+    """The number of rows to fetch next, for chunks of `ARROW_CHUNK_TARGET_BYTES`, given the last chunk."""
+    if arrow_table.num_rows == 0:
+        return ARROW_INITIAL_CHUNK_SIZE
+    bytes_per_row = max(arrow_table.nbytes // arrow_table.num_rows, 1)
+    return min(max(ARROW_CHUNK_TARGET_BYTES // bytes_per_row, ARROW_MIN_CHUNK_SIZE), ARROW_MAX_CHUNK_SIZE)
+
+
+def record_table_throughput(table_name: str, rows: int, bytes_loaded: int, duration: float) -> None:
+    logger.info(
+        "sql_database_table_loaded",
+        table=table_name,
+        rows=rows,
+        bytes=bytes_loaded,
+        duration_seconds=round(duration, 3),
+        rows_per_second=round(rows / duration) if duration > 0 else None,
+    )
+    if activity.in_activity():
+        meter = activity.metric_meter()
+        meter.create_counter("data_imports_sql_rows_loaded", "Number of rows loaded from SQL databases.").add(rows)
+        meter.create_counter("data_imports_sql_bytes_loaded", "Number of bytes loaded from SQL databases.").add(
+            bytes_loaded
+        )
+        meter.create_histogram(
+            "data_imports_sql_table_load_duration", "Time to load a table from a SQL database.", unit="ms"
+        ).record(int(duration * 1000))
+
 
 def table_rows(
     engine: Engine,
     table: Table,
     chunk_size: int = DEFAULT_CHUNK_SIZE,
     incremental: Optional[dlt.sources.incremental[Any]] = None,
+    use_arrow: bool = False,
+    partitions: int = 1,
+    incremental_range_size: Optional[int] = None,
 ) -> Iterator[TDataItem]:
     """
     A DLT source which loads data from an SQL database using SQLAlchemy.
@@ -91,8 +349,26 @@ def table_rows(
     """
     yield dlt.mark.materialize_table_schema()  # type: ignore
 
-    loader = TableLoader(engine, table, incremental=incremental, chunk_size=chunk_size)
-    yield from loader.load_rows()
+    if use_arrow:
+        loader = TableLoader(
+            engine,
+            table,
+            incremental=incremental,
+            chunk_size=ARROW_INITIAL_CHUNK_SIZE,
+            partitions=partitions,
+            incremental_range_size=incremental_range_size,
+        )
+        yield from loader.load_arrow_tables()
+    else:
+        loader = TableLoader(
+            engine,
+            table,
+            incremental=incremental,
+            chunk_size=chunk_size,
+            partitions=partitions,
+            incremental_range_size=incremental_range_size,
+        )
+        yield from loader.load_rows()
 
     engine.dispose()
 
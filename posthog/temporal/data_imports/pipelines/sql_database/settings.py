@@ -1,3 +1,17 @@
 """Sql Database source settings and constants"""
 
 DEFAULT_CHUNK_SIZE = 1000
+
+# When loading into Arrow tables, the number of rows per chunk adapts to the width of the rows, aiming for chunks of
+# roughly this many bytes
+ARROW_CHUNK_TARGET_BYTES = 32 * 1024 * 1024
+ARROW_INITIAL_CHUNK_SIZE = 10_000
+ARROW_MIN_CHUNK_SIZE = 1_000
+ARROW_MAX_CHUNK_SIZE = 500_000
+
+# When a table is read in concurrent ranges of its primary key, each range spans at least this many key values
+MIN_PARTITION_SIZE = 250_000
+
+# Incremental syncs load tables in ranges of the incremental field of at least this many rows. Each range is committed to
+# the Delta table by a load of its own, so that interrupted syncs resume from the last committed range.
+INCREMENTAL_RANGE_SIZE = 500_000
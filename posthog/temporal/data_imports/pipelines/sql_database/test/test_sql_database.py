@@ -1,6 +1,14 @@
-from unittest.mock import MagicMock
+from datetime import UTC, datetime
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+import pyarrow as pa
+import pytest
+from sqlalchemy import JSON, Column, DateTime, Integer, MetaData, Numeric, String, Table, create_engine
+from sqlalchemy.engine import Engine
 
 from posthog.temporal.data_imports.pipelines.sql_database import get_column_hints
+from posthog.temporal.data_imports.pipelines.sql_database.helpers import TableLoader, rows_to_arrow_table
 
 
 def _setup(return_value):
@@ -43,3 +51,140 @@ def test_get_column_hints_numeric_with_no_numeric():
     mock_engine = _setup([("column", "bigint", None, None)])
 
     assert get_column_hints(mock_engine, "some_schema", "some_table") == {}
+
+
+def _sqlite_table(rows: list[dict], url: str = "sqlite://") -> tuple[Engine, Table]:
+    engine = create_engine(url)
+    metadata = MetaData()
+    table = Table(
+        "some_table",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("name", String),
+        Column("amount", Numeric(10, 2)),
+        Column("created_at", DateTime),
+        Column("payload", JSON),
+    )
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(table.insert(), rows)
+    return engine, table
+
+
+def test_table_loader_load_arrow_tables():
+    engine, table = _sqlite_table(
+        [
+            {
+                "id": 1,
+                "name": "a",
+                "amount": Decimal("1.50"),
+                "created_at": datetime(2024, 1, 1, 12),
+                "payload": {"key": "value"},
+            },
+            {"id": 2, "name": None, "amount": None, "created_at": None, "payload": None},
+        ]
+    )
+
+    tables = list(TableLoader(engine, table).load_arrow_tables())
+
+    assert len(tables) == 1
+    assert tables[0].schema == pa.schema(
+        [
+            ("id", pa.int64()),
+            ("name", pa.string()),
+            ("amount", pa.decimal128(10, 2)),
+            ("created_at", pa.timestamp("us", tz="UTC")),
+            ("payload", pa.string()),
+        ]
+    )
+    assert tables[0].to_pylist() == [
+        {
+            "id": 1,
+            "name": "a",
+            "amount": Decimal("1.50"),
+            "created_at": datetime(2024, 1, 1, 12, tzinfo=UTC),
+            "payload": '{"key": "value"}',
+        },
+        {"id": 2, "name": None, "amount": None, "created_at": None, "payload": None},
+    ]
+
+
+def test_table_loader_load_arrow_tables_adapts_chunk_size_to_row_width():
+    engine, table = _sqlite_table(
+        [{"id": i, "name": "x" * 1000, "amount": None, "created_at": None, "payload": None} for i in range(5000)]
+    )
+
+    with patch("posthog.temporal.data_imports.pipelines.sql_database.helpers.ARROW_CHUNK_TARGET_BYTES", 1_000_000):
+        tables = list(TableLoader(engine, table, chunk_size=100).load_arrow_tables())
+
+    # the first chunk has the given size, the following ones ~1MB worth of ~1KB rows
+    assert [t.num_rows for t in tables] == [100, 1000, 1000, 1000, 1000, 900]
+
+
+def test_rows_to_arrow_table_falls_back_to_text():
+    arrow_table = rows_to_arrow_table([(Decimal("123456.789"),), (None,)], ["amount"], [pa.decimal128(5, 2)])
+
+    assert arrow_table.to_pylist() == [{"amount": "123456.789"}, {"amount": None}]
+
+
+def test_table_loader_get_partition_ranges():
+    engine, table = _sqlite_table(
+        [{"id": i, "name": None, "amount": None, "created_at": None, "payload": None} for i in (10, 50, 109)]
+    )
+
+    with patch("posthog.temporal.data_imports.pipelines.sql_database.helpers.MIN_PARTITION_SIZE", 30):
+        assert TableLoader(engine, table, partitions=4).get_partition_ranges() == [(None, 44), (44, 78), (78, None)]
+        assert TableLoader(engine, table, partitions=2).get_partition_ranges() == [(None, 60), (60, None)]
+        assert TableLoader(engine, table, partitions=1).get_partition_ranges() == []
+        assert (
+            TableLoader(engine, table, partitions=4, incremental=MagicMock(cursor_path="id")).get_partition_ranges()
+            == []
+        )
+
+    assert TableLoader(engine, table, partitions=4).get_partition_ranges() == []
+
+
+def test_table_loader_loads_partitions_concurrently(tmp_path):
+    # every connection of an in-memory SQLite engine has a database of its own
+    engine, table = _sqlite_table(
+        [{"id": i, "name": str(i), "amount": None, "created_at": None, "payload": None} for i in range(1000)],
+        url=f"sqlite:///{tmp_path / 'db.sqlite'}",
+    )
+
+    with patch("posthog.temporal.data_imports.pipelines.sql_database.helpers.MIN_PARTITION_SIZE", 100):
+        rows = [row for chunk in TableLoader(engine, table, chunk_size=50, partitions=4).load_rows() for row in chunk]
+        arrow_tables = list(TableLoader(engine, table, chunk_size=50, partitions=4).load_arrow_tables())
+
+    assert sorted(row["id"] for row in rows) == list(range(1000))
+    assert sorted(pa.concat_tables(arrow_tables).column("id").to_pylist()) == list(range(1000))
+
+
+def test_table_loader_load_partitions_raises_errors_of_readers():
+    engine, table = _sqlite_table([])
+    loader = TableLoader(engine, table)
+
+    def load(query):
+        yield 1
+        raise ValueError("connection lost")
+
+    with pytest.raises(ValueError, match="connection lost"):
+        list(loader._load_partitions(load, [(None, 10), (10, None)]))
+
+
+def test_table_loader_loads_incremental_ranges():
+    engine, table = _sqlite_table(
+        [
+            {"id": i, "name": None, "amount": None, "created_at": datetime(2024, 1, day), "payload": None}
+            for i, day in enumerate([1, 2, 2, 2, 3, 4])
+        ]
+    )
+
+    def load_range(last_value):
+        incremental = MagicMock(cursor_path="created_at", last_value_func=max, last_value=last_value)
+        loader = TableLoader(engine, table, incremental=incremental, incremental_range_size=2)
+        return [row["id"] for chunk in loader.load_rows() for row in chunk]
+
+    # the first range doesn't end between the rows of the 2nd
+    assert load_range(None) == [0, 1, 2, 3]
+    assert load_range(datetime(2024, 1, 2)) == [4, 5]
+    assert load_range(datetime(2024, 1, 4)) == []
@@ -0,0 +1,76 @@
+from datetime import datetime
+
+import pyarrow as pa
+import structlog
+from deltalake import DeltaTable, write_deltalake
+from django.test import override_settings
+
+from posthog.temporal.data_imports.pipelines.delta_maintenance import get_file_stats, maintain_delta_table
+
+
+def _delta_table_with_syncs(path: str, syncs: int) -> DeltaTable:
+    for i in range(syncs):
+        write_deltalake(path, pa.table({"id": [i], "name": [str(i)]}), mode="append")
+    return DeltaTable(path)
+
+
+@override_settings(DATA_IMPORTS_DELTA_COMPACTION_MIN_FILES=5, DATA_IMPORTS_DELTA_VACUUM_RETENTION_HOURS=0)
+def test_maintain_delta_table_compacts_and_vacuums(tmp_path):
+    delta_table = _delta_table_with_syncs(str(tmp_path), 6)
+
+    maintain_delta_table("customers", delta_table, ["id"], structlog.get_logger())
+
+    delta_table = DeltaTable(str(tmp_path))
+    assert len(delta_table.files()) == 1
+    assert sorted(delta_table.to_pyarrow_table().column("id").to_pylist()) == list(range(6))
+    assert len(list(tmp_path.glob("*.parquet"))) == 1
+
+
+@override_settings(DATA_IMPORTS_DELTA_COMPACTION_MIN_FILES=5, DATA_IMPORTS_DELTA_VACUUM_RETENTION_HOURS=0)
+def test_maintain_delta_table_leaves_few_files_alone(tmp_path):
+    delta_table = _delta_table_with_syncs(str(tmp_path), 4)
+
+    maintain_delta_table("customers", delta_table, [], structlog.get_logger())
+
+    assert len(DeltaTable(str(tmp_path)).files()) == 4
+
+
+def test_get_file_stats(tmp_path):
+    write_deltalake(
+        str(tmp_path),
+        pa.table(
+            {
+                "id": [1, 5],
+                "name": ["a", "b"],
+                "created_at": pa.array([datetime(2024, 1, 1), datetime(2024, 1, 3)], pa.timestamp("us", tz="UTC")),
+            }
+        ),
+    )
+    write_deltalake(
+        str(tmp_path),
+        pa.table(
+            {
+                "id": [7],
+                "name": ["c"],
+                "created_at": pa.array([datetime(2024, 2, 1)], pa.timestamp("us", tz="UTC")),
+            }
+        ),
+        mode="append",
+    )
+
+    file_stats = get_file_stats(DeltaTable(str(tmp_path)))
+
+    assert file_stats is not None
+    assert file_stats["version"] == 1
+    assert file_stats["columns"] == {"id": "number", "created_at": "datetime"}
+    assert sorted(((file["min"], file["max"]) for file in file_stats["files"]), key=lambda stats: stats[0]["id"]) == [
+        (
+            {"id": 1, "created_at": "2024-01-01T00:00:00+00:00"},
+            {"id": 5, "created_at": "2024-01-03T00:00:00+00:00"},
+        ),
+        (
+            {"id": 7, "created_at": "2024-02-01T00:00:00+00:00"},
+            {"id": 7, "created_at": "2024-02-01T00:00:00+00:00"},
+        ),
+    ]
+    assert all(file["path"].endswith(".parquet") for file in file_stats["files"])
@@ -5,6 +5,8 @@ from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.test import override_settings
 import pytest
+from posthog.clickhouse.client import sync_execute
+from posthog.clickhouse.query_tagging import reset_query_tags, tag_queries
 from posthog.hogql.query import execute_hogql_query
 from posthog.models.team.team import Team
 from posthog.temporal.data_imports import ACTIVITIES
@@ -15,6 +17,7 @@ from posthog.warehouse.models import (
     ExternalDataJob,
     ExternalDataSource,
     ExternalDataSchema,
+    DataWarehouseTable,
 )
 from temporalio.testing import WorkflowEnvironment
 from temporalio.common import RetryPolicy
@@ -422,3 +425,73 @@ async def test_make_sure_deletions_occur(team, stripe_balance_transaction):
 
         for call in s3_client_mock.exists.call_args_list:
             assert latest_job not in call[0][0]
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.asyncio
+async def test_delta_table_file_pruning_reads_fewer_bytes(team, stripe_balance_transaction):
+    source = await sync_to_async(ExternalDataSource.objects.create)(
+        source_id=uuid.uuid4(),
+        connection_id=uuid.uuid4(),
+        destination_id=uuid.uuid4(),
+        team=team,
+        status="running",
+        source_type="Stripe",
+        job_inputs={"stripe_secret_key": "test-key", "stripe_account_id": "acct_id"},
+    )
+    schema = await sync_to_async(ExternalDataSchema.objects.create)(
+        name="BalanceTransaction",
+        team_id=team.pk,
+        source_id=source.pk,
+        sync_type=ExternalDataSchema.SyncType.INCREMENTAL,
+        sync_type_config={"incremental_field": "created", "incremental_field_type": "integer"},
+    )
+    inputs = ExternalDataWorkflowInputs(
+        team_id=team.id,
+        external_data_source_id=source.pk,
+        external_data_schema_id=schema.id,
+    )
+
+    # every incremental sync adds a file to the Delta table, with amounts that don't overlap
+    transaction = stripe_balance_transaction["data"][0]
+    await _execute_run(str(uuid.uuid4()), inputs, [transaction])
+    await _execute_run(
+        str(uuid.uuid4()),
+        inputs,
+        [{**transaction, "id": "txn_large", "amount": 100000, "created": transaction["created"] + 1}],
+    )
+
+    @sync_to_async
+    def query_read_bytes(file_stats: Optional[dict[str, Any]]) -> int:
+        table = DataWarehouseTable.objects.get(team_id=team.pk, external_data_source_id=source.pk)
+        table.file_stats = file_stats
+        table.save(update_fields=["file_stats"])
+
+        query_id = str(uuid.uuid4())
+        tag_queries(kind="test", id=query_id)
+        try:
+            res = execute_hogql_query("SELECT id FROM stripe_balancetransaction WHERE amount >= 1000", team)
+        finally:
+            reset_query_tags()
+        assert res.results == [("txn_large",)]
+
+        sync_execute("SYSTEM FLUSH LOGS")
+        rows = sync_execute(
+            """
+            SELECT read_bytes
+            FROM system.query_log
+            WHERE query NOT LIKE '%%query_log%%' AND query LIKE %(matcher)s AND type = 'QueryFinish'
+            """,
+            {"matcher": f"%test:{query_id}%"},
+        )
+        assert len(rows) == 1
+        return rows[0][0]
+
+    table = await sync_to_async(DataWarehouseTable.objects.get)(team_id=team.pk, external_data_source_id=source.pk)
+    assert table.file_stats is not None
+    assert len(table.file_stats["files"]) == 2
+
+    pruned_read_bytes = await query_read_bytes(table.file_stats)
+    unpruned_read_bytes = await query_read_bytes(None)
+
+    assert 0 < pruned_read_bytes < unpruned_read_bytes
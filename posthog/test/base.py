@@ -80,6 +80,19 @@ from posthog.models.raw_sessions.sql import (
     RAW_SESSIONS_VIEW_SQL,
     RAW_SESSIONS_TABLE_SQL,
 )
+from posthog.models.web_stats_hourly.sql import (
+    DISTRIBUTED_WEB_STATS_HOURLY_TABLE_SQL,
+    DROP_WEB_STATS_HOURLY_MATERIALIZED_VIEW_SQL,
+    DROP_WEB_STATS_HOURLY_TABLE_SQL,
+    WEB_STATS_HOURLY_MV_SQL,
+    WEB_STATS_HOURLY_TABLE_SQL,
+)
+from posthog.models.property_values.sql import (
+    DISTRIBUTED_PROPERTY_VALUES_TABLE_SQL,
+    DROP_PROPERTY_VALUES_TABLE_SQL,
+    PROPERTY_VALUES_TABLE_SQL,
+    WRITABLE_PROPERTY_VALUES_TABLE_SQL,
+)
 from posthog.session_recordings.sql.session_recording_event_sql import (
     DISTRIBUTED_SESSION_RECORDING_EVENTS_TABLE_SQL,
     DROP_SESSION_RECORDING_EVENTS_TABLE_SQL,
@@ -984,6 +997,9 @@ class ClickhouseDestroyTablesMixin(BaseTest):
                 DROP_RAW_SESSION_MATERIALIZED_VIEW_SQL(),
                 DROP_SESSION_VIEW_SQL(),
                 DROP_RAW_SESSION_VIEW_SQL(),
+                DROP_WEB_STATS_HOURLY_TABLE_SQL(),
+                DROP_WEB_STATS_HOURLY_MATERIALIZED_VIEW_SQL(),
+                DROP_PROPERTY_VALUES_TABLE_SQL(),
             ]
         )
         run_clickhouse_statement_in_parallel(
@@ -996,6 +1012,8 @@ class ClickhouseDestroyTablesMixin(BaseTest):
                 CHANNEL_DEFINITION_DICTIONARY_SQL,
                 SESSIONS_TABLE_SQL(),
                 RAW_SESSIONS_TABLE_SQL(),
+                WEB_STATS_HOURLY_TABLE_SQL(),
+                PROPERTY_VALUES_TABLE_SQL(),
             ]
         )
         run_clickhouse_statement_in_parallel(
@@ -1010,6 +1028,10 @@ class ClickhouseDestroyTablesMixin(BaseTest):
                 RAW_SESSIONS_VIEW_SQL(),
                 DISTRIBUTED_SESSIONS_TABLE_SQL(),
                 DISTRIBUTED_RAW_SESSIONS_TABLE_SQL(),
+                WEB_STATS_HOURLY_MV_SQL(),
+                DISTRIBUTED_WEB_STATS_HOURLY_TABLE_SQL(),
+                DISTRIBUTED_PROPERTY_VALUES_TABLE_SQL(),
+                WRITABLE_PROPERTY_VALUES_TABLE_SQL(),
             ]
         )
 
@@ -1033,6 +1055,9 @@ class ClickhouseDestroyTablesMixin(BaseTest):
                 DROP_RAW_SESSION_MATERIALIZED_VIEW_SQL(),
                 DROP_SESSION_VIEW_SQL(),
                 DROP_RAW_SESSION_VIEW_SQL(),
+                DROP_WEB_STATS_HOURLY_TABLE_SQL(),
+                DROP_WEB_STATS_HOURLY_MATERIALIZED_VIEW_SQL(),
+                DROP_PROPERTY_VALUES_TABLE_SQL(),
             ]
         )
 
@@ -1046,6 +1071,8 @@ class ClickhouseDestroyTablesMixin(BaseTest):
                 CHANNEL_DEFINITION_DICTIONARY_SQL,
                 SESSIONS_TABLE_SQL(),
                 RAW_SESSIONS_TABLE_SQL(),
+                WEB_STATS_HOURLY_TABLE_SQL(),
+                PROPERTY_VALUES_TABLE_SQL(),
             ]
         )
         run_clickhouse_statement_in_parallel(
@@ -1058,6 +1085,10 @@ class ClickhouseDestroyTablesMixin(BaseTest):
                 SESSIONS_VIEW_SQL(),
                 RAW_SESSIONS_VIEW_SQL(),
                 CHANNEL_DEFINITION_DATA_SQL(),
+                WEB_STATS_HOURLY_MV_SQL(),
+                DISTRIBUTED_WEB_STATS_HOURLY_TABLE_SQL(),
+                DISTRIBUTED_PROPERTY_VALUES_TABLE_SQL(),
+                WRITABLE_PROPERTY_VALUES_TABLE_SQL(),
             ]
         )
 
@@ -5,13 +5,14 @@ from unittest.mock import ANY, call, patch
 from urllib.parse import quote
 
 from django.core.cache import cache
+from django.test import SimpleTestCase
 from django.utils.timezone import now
 from freezegun.api import freeze_time
 from rest_framework import status
 from django.test.client import Client
 
 
-from posthog import models, rate_limit
+from posthog import models, rate_limit, redis
 from posthog.api.test.test_team import create_team
 from posthog.api.test.test_user import create_user
 from posthog.models.instance_setting import override_instance_config
@@ -26,6 +27,7 @@ class TestUserAPI(APIBaseTest):
 
         # ensure the rate limit is reset for each test
         cache.clear()
+        rate_limit._token_bucket_limiters.clear()
 
         self.personal_api_key = generate_random_token_personal()
         PersonalAPIKey.objects.create(
@@ -415,3 +417,52 @@ class TestUserAPI(APIBaseTest):
                     )
                     self.assertEqual(response.status_code, status.HTTP_200_OK)
                 assert call("rate_limit_exceeded", tags=ANY) not in incr_mock.mock_calls
+
+
+class TestTokenBucketLimiter(SimpleTestCase):
+    def setUp(self):
+        redis.get_client().flushdb()
+
+    def test_limits_to_capacity_and_replenishes(self):
+        limiter = rate_limit.TokenBucketLimiter(scope="test", capacity=3, replenish_rate=0.5)
+
+        with freeze_time("2024-01-01T00:00:00Z") as frozen_time:
+            self.assertEqual([limiter.consume("key") for _ in range(4)], [True, True, True, False])
+            self.assertTrue(limiter.consume("other key"))
+
+            frozen_time.tick(delta=timedelta(seconds=2))
+            self.assertEqual([limiter.consume("key") for _ in range(2)], [True, False])
+
+            frozen_time.tick(delta=timedelta(minutes=10))
+            self.assertEqual([limiter.consume("key") for _ in range(4)], [True, True, True, False])
+
+    def test_limits_are_shared_between_processes(self):
+        limiters = [rate_limit.TokenBucketLimiter(scope="test", capacity=4, replenish_rate=0.01) for _ in range(2)]
+
+        with freeze_time("2024-01-01T00:00:00Z"):
+            admitted = [limiter.consume("key") for _ in range(3) for limiter in limiters]
+
+        self.assertEqual(admitted.count(True), 4)
+
+    def test_leases_tokens_in_chunks(self):
+        limiter = rate_limit.TokenBucketLimiter(scope="test", capacity=100, replenish_rate=0.01)
+        self.assertEqual(limiter.lease_size, 5)
+
+        with freeze_time("2024-01-01T00:00:00Z") as frozen_time:
+            with patch.object(limiter, "_lease_from_bucket", wraps=limiter._lease_from_bucket) as lease_from_bucket:
+                for _ in range(10):
+                    self.assertTrue(limiter.consume("key"))
+                self.assertEqual(lease_from_bucket.call_count, 2)
+
+                # Unused tokens of an expired lease are lost
+                limiter.consume("key")
+                frozen_time.tick(delta=timedelta(seconds=2))
+                limiter.consume("key")
+                self.assertEqual(lease_from_bucket.call_count, 4)
+
+        other_limiter = rate_limit.TokenBucketLimiter(scope="test", capacity=100, replenish_rate=0.01)
+        with freeze_time("2024-01-01T00:00:02Z"):
+            self.assertEqual(other_limiter._lease_from_bucket("key"), 5)
+            self.assertAlmostEqual(
+                float(redis.get_client().hget("rate_limit:token_bucket:test:key", "tokens") or 0), 75.02, places=3
+            )
@@ -1,8 +1,13 @@
 import json
+from datetime import datetime, UTC
+from unittest.mock import patch
 
 from django.test import TestCase
+from rest_framework.test import APIRequestFactory
+from rest_framework.request import Request
 
-from posthog.renderers import SafeJSONRenderer
+from posthog.renderers import SafeJSONRenderer, stream_json, wants_streaming_response
+from posthog.schema import HogQLQueryResponse
 
 
 class TestCleanDataForJSON(TestCase):
@@ -93,3 +98,44 @@ class TestCleanDataForJSON(TestCase):
                 ],
             },
         )
+
+
+class TestStreamJSON(TestCase):
+    def test_streams_rows_after_everything_else(self):
+        response = {
+            "results": [[1, "a", datetime(2024, 1, 1, tzinfo=UTC)], [float("nan"), None, None]],
+            "columns": ["n", "s", "t"],
+        }
+
+        body = b"".join(stream_json(response, rows_key="results"))
+
+        self.assertEqual(body, b'{"columns":["n","s","t"],"results":[[1,"a","2024-01-01T00:00:00Z"],[null,null,null]]}')
+        self.assertEqual(json.loads(body), json.loads(SafeJSONRenderer().render(response)))
+
+    def test_streams_pydantic_models(self):
+        response = HogQLQueryResponse(results=[[1], [2]], columns=["n"], types=[["n", "UInt8"]], hasMore=False)
+
+        body = b"".join(stream_json(response, rows_key="results"))
+
+        self.assertEqual(json.loads(body), json.loads(SafeJSONRenderer().render(response.model_dump(by_alias=True))))
+
+    def test_streams_empty_and_missing_rows(self):
+        self.assertEqual(b"".join(stream_json({"results": []}, rows_key="results")), b'{"results":[]}')
+        self.assertEqual(b"".join(stream_json({"next": None}, rows_key="result")), b'{"next":null,"result":null}')
+
+    @patch("posthog.renderers.STREAMING_CHUNK_BYTES", 10)
+    def test_sends_rows_in_chunks(self):
+        chunks = list(stream_json({"columns": ["s"], "results": [["abcdefgh"]] * 3}, rows_key="results"))
+
+        self.assertEqual(len(chunks), 4)
+        self.assertEqual(json.loads(b"".join(chunks))["results"], [["abcdefgh"]] * 3)
+
+    def test_wants_streaming_response(self):
+        factory = APIRequestFactory()
+
+        self.assertTrue(wants_streaming_response(Request(factory.get("/?stream=true"))))
+        self.assertTrue(
+            wants_streaming_response(Request(factory.get("/", HTTP_ACCEPT="text/html, application/json; stream=true")))
+        )
+        self.assertFalse(wants_streaming_response(Request(factory.get("/", HTTP_ACCEPT="application/json"))))
+        self.assertFalse(wants_streaming_response(Request(factory.get("/?stream=false"))))
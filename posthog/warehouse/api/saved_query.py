@@ -1,3 +1,4 @@
+from datetime import timedelta
 from typing import Any
 
 from django.conf import settings
@@ -11,8 +12,12 @@ from posthog.hogql.errors import ExposedHogQLError
 from posthog.hogql.metadata import is_valid_view
 from posthog.hogql.parser import parse_select
 from posthog.hogql.printer import print_ast
+from posthog.warehouse.data_load.materialize_saved_query import delete_materialization_folders
 from posthog.warehouse.models import DataWarehouseSavedQuery, DataWarehouseJoin
 
+# Materializations are refreshed by a periodic task running every 5 minutes
+MIN_MATERIALIZATION_INTERVAL = timedelta(minutes=5)
+
 
 class DataWarehouseSavedQuerySerializer(serializers.ModelSerializer):
     created_by = UserBasicSerializer(read_only=True)
@@ -28,8 +33,11 @@ class DataWarehouseSavedQuerySerializer(serializers.ModelSerializer):
             "created_by",
             "created_at",
             "columns",
+            "materialization_interval",
+            "materialization_time_column",
+            "materialized_at",
         ]
-        read_only_fields = ["id", "created_by", "created_at", "columns"]
+        read_only_fields = ["id", "created_by", "created_at", "columns", "materialized_at"]
 
     def get_columns(self, view: DataWarehouseSavedQuery) -> list[SerializedField]:
         team_id = self.context["team_id"]
@@ -60,6 +68,7 @@ class DataWarehouseSavedQuerySerializer(serializers.ModelSerializer):
             view.external_tables = view.s3_tables
         except Exception as err:
             raise serializers.ValidationError(str(err))
+        self._validate_materialization_time_column(view)
 
         view.save()
         return view
@@ -72,9 +81,25 @@ class DataWarehouseSavedQuerySerializer(serializers.ModelSerializer):
             view.external_tables = view.s3_tables
         except Exception as err:
             raise serializers.ValidationError(str(err))
+        self._validate_materialization_time_column(view)
         view.save()
         return view
 
+    def validate_materialization_interval(self, materialization_interval):
+        if materialization_interval is not None and materialization_interval < MIN_MATERIALIZATION_INTERVAL:
+            raise exceptions.ValidationError(
+                detail=f"Materialization interval must be at least {int(MIN_MATERIALIZATION_INTERVAL.total_seconds() // 60)} minutes"
+            )
+        return materialization_interval
+
+    def _validate_materialization_time_column(self, view: DataWarehouseSavedQuery) -> None:
+        if view.materialization_time_column and view.materialization_time_column not in (view.columns or {}):
+            raise serializers.ValidationError(
+                {
+                    "materialization_time_column": f"Column {view.materialization_time_column} is not returned by the query"
+                }
+            )
+
     def validate_query(self, query):
         team_id = self.context["team_id"]
 
@@ -123,6 +148,10 @@ class DataWarehouseSavedQueryViewSet(TeamAndOrgViewSetMixin, viewsets.ModelViewS
         instance: DataWarehouseSavedQuery = self.get_object()
         DataWarehouseJoin.objects.filter(source_table_name=instance.name).delete()
         DataWarehouseJoin.objects.filter(joining_table_name=instance.name).delete()
+        materialization_state = instance.materialization_state
         self.perform_destroy(instance)
+        if materialization_state:
+            # Nothing can query the view anymore
+            delete_materialization_folders(materialization_state)
 
         return response.Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,185 @@
+from datetime import datetime, timedelta
+from typing import Any, Optional
+from uuid import uuid4
+
+import structlog
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from posthog.clickhouse.client.connection import Workload
+from posthog.client import sync_execute
+from posthog.hogql import ast
+from posthog.hogql.context import HogQLContext
+from posthog.hogql.database.s3_table import build_function_call
+from posthog.hogql.parser import parse_select
+from posthog.hogql.printer import print_ast
+from posthog.hogql.query import create_default_modifiers_for_team
+from posthog.settings.base_variables import TEST
+from posthog.warehouse.data_load.service import delete_data_import_folder
+from posthog.warehouse.models import DataWarehouseSavedQuery
+
+logger = structlog.get_logger(__name__)
+
+# Rows newer than this aren't materialized yet, as rows for the last minutes can still be arriving
+MATERIALIZATION_LAG = timedelta(minutes=10)
+
+# Incremental refreshes add a file each, after this many files the next refresh rewrites them into one
+MAX_INCREMENTAL_FILES = 100
+
+LOCK_TIMEOUT = 60 * 60
+
+
+def materialization_folder_path(saved_query: DataWarehouseSavedQuery, run_id: str) -> str:
+    return f"materialized_views/team_{saved_query.team_id}_{str(saved_query.pk)}/{run_id}".lower().replace("-", "_")
+
+
+def materialization_folder_url(folder_path: str) -> str:
+    if TEST:
+        return f"http://{settings.AIRBYTE_BUCKET_DOMAIN}/{settings.BUCKET}/{folder_path}/"
+
+    return f"https://{settings.AIRBYTE_BUCKET_DOMAIN}/dlt/{folder_path}/"
+
+
+def is_materialization_due(saved_query: DataWarehouseSavedQuery) -> bool:
+    if not saved_query.materialization_interval:
+        return False
+    if (
+        not saved_query.materialized_at
+        or saved_query.materialization_state.get("hash") != saved_query.materialization_hash
+    ):
+        return True
+    return timezone.now() - saved_query.materialized_at >= saved_query.materialization_interval
+
+
+def materialize_saved_query(saved_query: DataWarehouseSavedQuery) -> None:
+    """
+    Writes the rows of the saved query into parquet files, which queries of the view then read instead of running the
+    query, see `DataWarehouseSavedQuery.hogql_definition`.
+
+    Views with a `materialization_time_column` only ever append rows, so refreshing them only writes the rows with a
+    time after the previous refresh into a new file. All other refreshes write all rows into a new folder, and queries
+    switch to it once the state of the view is saved. The folder replaced by the refresh before is deleted then, as no
+    query can still be reading it.
+    """
+    lock_key = f"materialize_saved_query_{saved_query.pk}"
+    if not cache.add(lock_key, True, timeout=LOCK_TIMEOUT):
+        logger.info("Saved query is already being materialized", saved_query_id=saved_query.pk)
+        return
+
+    try:
+        state = saved_query.materialization_state or {}
+        materialized_at = timezone.now()
+        materialized_until = materialized_at - MATERIALIZATION_LAG
+        incremental = (
+            bool(saved_query.materialization_time_column)
+            and state.get("hash") == saved_query.materialization_hash
+            and state.get("materialized_until") is not None
+            and state.get("file_count", 0) < MAX_INCREMENTAL_FILES
+        )
+
+        if incremental:
+            new_state = {**state, "file_count": state["file_count"] + 1}
+            start: Optional[datetime] = datetime.fromisoformat(state["materialized_until"])
+        else:
+            folder_path = materialization_folder_path(saved_query, uuid4().hex)
+            new_state = {
+                "hash": saved_query.materialization_hash,
+                "folder_path": folder_path,
+                "url_pattern": f"{materialization_folder_url(folder_path)}*.parquet",
+                "file_count": 1,
+                "previous_folder_path": state.get("folder_path"),
+            }
+            start = None
+
+        file_url = new_state["url_pattern"].replace("*.parquet", f"{new_state['file_count']:05d}.parquet")
+        _insert_rows(saved_query, file_url, start, materialized_until)
+        new_state["row_count"] = _count_rows(new_state["url_pattern"])
+        if saved_query.materialization_time_column:
+            new_state["materialized_until"] = materialized_until.isoformat()
+
+        saved_query.materialization_state = new_state
+        saved_query.materialized_at = materialized_at
+        saved_query.save(update_fields=["materialization_state", "materialized_at"])
+
+        if not incremental and state.get("previous_folder_path"):
+            delete_data_import_folder(state["previous_folder_path"])
+
+        logger.info(
+            "Materialized saved query",
+            saved_query_id=saved_query.pk,
+            incremental=incremental,
+            row_count=new_state["row_count"],
+        )
+    finally:
+        cache.delete(lock_key)
+
+
+def delete_materialization(saved_query: DataWarehouseSavedQuery) -> None:
+    """
+    Deletes the parquet files of a view that is no longer materialized. This runs on the next periodic run after the
+    materialization was turned off, rather than right away, so that queries still reading the files can finish, as for
+    folders replaced by a refresh.
+    """
+    delete_materialization_folders(saved_query.materialization_state or {})
+    saved_query.materialization_state = {}
+    saved_query.materialized_at = None
+    saved_query.save(update_fields=["materialization_state", "materialized_at"])
+    logger.info("Deleted materialization of saved query", saved_query_id=saved_query.pk)
+
+
+def delete_materialization_folders(state: dict[str, Any]) -> None:
+    for folder_path in (state.get("folder_path"), state.get("previous_folder_path")):
+        if folder_path:
+            delete_data_import_folder(folder_path)
+
+
+def _insert_rows(saved_query: DataWarehouseSavedQuery, file_url: str, start: Optional[datetime], end: datetime) -> None:
+    context = HogQLContext(
+        team_id=saved_query.team_id,
+        enable_select_queries=True,
+        limit_top_select=False,
+        modifiers=create_default_modifiers_for_team(saved_query.team),
+    )
+
+    query: ast.SelectQuery | ast.SelectUnionQuery = parse_select(saved_query.query["query"])
+    if saved_query.materialization_time_column:
+        time_column = ast.Field(chain=[saved_query.materialization_time_column])
+        where: list[ast.Expr] = [
+            ast.CompareOperation(op=ast.CompareOperationOp.LtEq, left=time_column, right=ast.Constant(value=end))
+        ]
+        if start is not None:
+            where.append(
+                ast.CompareOperation(op=ast.CompareOperationOp.Gt, left=time_column, right=ast.Constant(value=start))
+            )
+        query = ast.SelectQuery(
+            select=[ast.Field(chain=["*"])],
+            select_from=ast.JoinExpr(table=query),
+            where=ast.And(exprs=where),
+        )
+
+    sql = print_ast(query, context=context, dialect="clickhouse")
+    s3_table_func = build_function_call(
+        url=file_url,
+        format="Parquet",
+        access_key=settings.AIRBYTE_BUCKET_KEY,
+        access_secret=settings.AIRBYTE_BUCKET_SECRET,
+        context=context,
+    )
+    sync_execute(
+        f"INSERT INTO FUNCTION {s3_table_func} {sql}",
+        context.values,
+        workload=Workload.OFFLINE,
+        team_id=saved_query.team_id,
+    )
+
+
+def _count_rows(url_pattern: str) -> int:
+    s3_table_func = build_function_call(
+        url=url_pattern,
+        format="Parquet",
+        access_key=settings.AIRBYTE_BUCKET_KEY,
+        access_secret=settings.AIRBYTE_BUCKET_SECRET,
+    )
+    result: Any = sync_execute(f"SELECT count() FROM {s3_table_func}", workload=Workload.OFFLINE)
+    return result[0][0]
@@ -1,10 +1,16 @@
+import hashlib
+import json
 import re
+from datetime import datetime
+from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.utils import timezone
 from typing import Optional, Any
 
 from posthog.hogql.database.database import Database
 from posthog.hogql.database.models import SavedQuery, FieldOrTable
+from posthog.hogql.database.s3_table import S3Table
 from posthog.hogql import ast
 from posthog.models.team import Team
 from posthog.models.utils import CreatedMetaFields, DeletedMetaFields, UUIDModel
@@ -49,6 +55,23 @@ class DataWarehouseSavedQuery(CreatedMetaFields, UUIDModel, DeletedMetaFields):
         default=list, null=True, blank=True, help_text="List of all external tables"
     )
     query: models.JSONField = models.JSONField(default=dict, null=True, blank=True, help_text="HogQL query")
+    materialization_interval: models.DurationField = models.DurationField(
+        null=True,
+        blank=True,
+        help_text="How often to materialize the query into parquet files. Not materialized if unset.",
+    )
+    materialization_time_column: models.CharField = models.CharField(
+        max_length=400,
+        null=True,
+        blank=True,
+        help_text="Column the query only ever appends rows by, for refreshing the materialization incrementally",
+    )
+    materialized_at: models.DateTimeField = models.DateTimeField(null=True, blank=True)
+    materialization_state: models.JSONField = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Location and extent of the materialized parquet files, see `materialize_saved_query`",
+    )
 
     class Meta:
         constraints = [
@@ -58,6 +81,28 @@ class DataWarehouseSavedQuery(CreatedMetaFields, UUIDModel, DeletedMetaFields):
             )
         ]
 
+    @property
+    def materialization_hash(self) -> str:
+        """Changes whenever the materialized files have to be recreated from scratch."""
+        config = json.dumps([self.query, self.materialization_time_column], sort_keys=True, default=str)
+        return hashlib.sha256(config.encode("utf-8")).hexdigest()
+
+    @property
+    def materialization_fresh_until(self) -> Optional[datetime]:
+        """
+        Until when queries read the materialized files instead of running the query. Materializations are used up to
+        two intervals after they were refreshed, so that a refresh running late doesn't fall back to the query.
+        """
+        if not self.materialization_interval or not self.materialized_at:
+            return None
+        if self.materialization_state.get("hash") != self.materialization_hash:
+            return None
+        return self.materialized_at + 2 * self.materialization_interval
+
+    def is_materialization_fresh(self) -> bool:
+        fresh_until = self.materialization_fresh_until
+        return fresh_until is not None and timezone.now() <= fresh_until
+
     def get_columns(self) -> dict[str, dict[str, Any]]:
         from posthog.api.services.query import process_query_dict
         from posthog.hogql_queries.query_runner import ExecutionMode
@@ -127,8 +172,11 @@ class DataWarehouseSavedQuery(CreatedMetaFields, UUIDModel, DeletedMetaFields):
             else:
                 clickhouse_type = type["clickhouse"]
 
+            is_nullable = False
+
             if clickhouse_type.startswith("Nullable("):
                 clickhouse_type = clickhouse_type.replace("Nullable(", "")[:-1]
+                is_nullable = True
 
             # TODO: remove when addressed https://github.com/ClickHouse/ClickHouse/issues/37594
             if clickhouse_type.startswith("Array("):
@@ -140,7 +188,10 @@ class DataWarehouseSavedQuery(CreatedMetaFields, UUIDModel, DeletedMetaFields):
                 column_invalid = False
 
             if not column_invalid or (modifiers is not None and modifiers.s3TableUseInvalidColumns):
-                structure.append(f"`{column}` {clickhouse_type}")
+                if is_nullable:
+                    structure.append(f"`{column}` Nullable({clickhouse_type})")
+                else:
+                    structure.append(f"`{column}` {clickhouse_type}")
 
             # Support for 'old' style columns
             if isinstance(type, str):
@@ -151,8 +202,21 @@ class DataWarehouseSavedQuery(CreatedMetaFields, UUIDModel, DeletedMetaFields):
 
             fields[column] = hogql_type(name=column)
 
+        materialized_table: Optional[S3Table] = None
+        if self.is_materialization_fresh():
+            materialized_table = S3Table(
+                name=self.name,
+                url=self.materialization_state["url_pattern"],
+                format="Parquet",
+                access_key=settings.AIRBYTE_BUCKET_KEY,
+                access_secret=settings.AIRBYTE_BUCKET_SECRET,
+                fields=fields,
+                structure=", ".join(structure),
+            )
+
         return SavedQuery(
             name=self.name,
             query=self.query["query"],
             fields=fields,
+            materialized_table=materialized_table,
         )
@@ -102,6 +102,11 @@ class DataWarehouseTable(CreatedMetaFields, UpdatedMetaFields, UUIDModel, Delete
     row_count: models.IntegerField = models.IntegerField(
         null=True, help_text="How many rows are currently synced in this table"
     )
+    file_stats: models.JSONField = models.JSONField(
+        null=True,
+        blank=True,
+        help_text="Min and max values of the numeric and temporal columns per file of the current version of a Delta table",
+    )
 
     __repr__ = sane_repr("name")
 
@@ -243,6 +248,7 @@ class DataWarehouseTable(CreatedMetaFields, UpdatedMetaFields, UUIDModel, Delete
             access_secret=self.credential.access_secret,
             fields=fields,
             structure=", ".join(structure),
+            file_stats=self.file_stats if self.format == DataWarehouseTable.TableFormat.Delta else None,
         )
 
     def get_clickhouse_column_type(self, column_name: str) -> Optional[str]: